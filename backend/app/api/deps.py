@@ -6,7 +6,6 @@
 @Docs: FastAPI 依赖注入模块 (Database Session & Auth Dependency).
 """
 
-import json
 import uuid
 from collections.abc import AsyncGenerator
 from typing import Annotated, Any, Protocol, TypeAlias
@@ -28,6 +27,7 @@ from app.core.config import settings
 from app.core.db import AsyncSessionLocal
 from app.core.exceptions import ForbiddenException, NotFoundException, UnauthorizedException
 from app.core.logger import logger
+from app.core.principal_cache import Principal, PrincipalRevokedError, cache_principal, get_cached_principal
 from app.core.token_store import get_user_revoked_after
 from app.crud.crud_alert import CRUDAlert
 from app.crud.crud_alert import alert_crud as alert_instance
@@ -134,9 +134,12 @@ SessionDep = Annotated[AsyncSession, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-async def get_current_user(request: Request, session: SessionDep, token: TokenDep) -> User:
+async def get_current_principal(request: Request, session: SessionDep, token: TokenDep) -> Principal:
     """
-    解析 Token 并获取当前登录用户。
+    解析 Token 并获取当前认证主体（状态、部门、数据范围与权限集合）。
+
+    优先读取认证主体缓存（进程内 LRU -> Redis），命中时不访问数据库；
+    未命中时加载 User+roles+menus 并回填缓存。
 
     Args:
         request: 当前请求对象。
@@ -144,7 +147,7 @@ async def get_current_user(request: Request, session: SessionDep, token: TokenDe
         token: 访问令牌字符串。
 
     Returns:
-        User: 当前登录用户。
+        Principal: 当前认证主体。
 
     Raises:
         UnauthorizedException: 凭据无效或已失效。
@@ -171,13 +174,50 @@ async def get_current_user(request: Request, session: SessionDep, token: TokenDe
         logger.error("Token 缺少 sub 字段")
         raise UnauthorizedException(message="无法验证凭据 (Token 缺失 sub)")
 
-    # 直接查询数据库获取用户
     try:
         user_uuid = uuid.UUID(token_data.sub)
     except ValueError as e:
         logger.error(f"Token 解析失败: {str(e)}", error=str(e))
         raise UnauthorizedException(message="Token 无效 (用户ID格式错误)") from e
 
+    try:
+        token_iat = int(token_data.iat) if token_data.iat is not None else None
+    except Exception:
+        token_iat = None
+
+    try:
+        principal = await get_cached_principal(user_uuid, token_iat)
+    except PrincipalRevokedError as e:
+        raise UnauthorizedException(message="登录状态已失效，请重新登录") from e
+
+    if principal is None:
+        principal = await _load_principal(session, user_uuid, token_iat)
+        await cache_principal(principal, token_iat)
+
+    # 将用户信息绑定到 request state，供中间件使用(存储简单值避免 Session 关闭后的 DetachedInstanceError)
+    request.state.user_id = str(principal.id)
+    request.state.username = principal.username
+    request.state.permissions = {"*"} if principal.is_superuser else set(principal.permissions)
+    return principal
+
+
+async def _load_principal(session: AsyncSession, user_uuid: uuid.UUID, token_iat: int | None) -> Principal:
+    """
+    从数据库加载用户并构建认证主体（缓存未命中时调用）。
+
+    Args:
+        session: 数据库会话。
+        user_uuid: 用户 ID。
+        token_iat: Access Token 签发时间。
+
+    Returns:
+        Principal: 认证主体。
+
+    Raises:
+        UnauthorizedException: Token 已被即时失效。
+        NotFoundException: 用户不存在。
+        ForbiddenException: 用户被禁用。
+    """
     # 预加载 roles->menus，便于计算权限集合且避免后续惰性加载
     result = await session.execute(
         select(User)
@@ -188,7 +228,7 @@ async def get_current_user(request: Request, session: SessionDep, token: TokenDe
     user = result.scalars().first()
 
     if not user:
-        logger.error(f"未找到用户 {token_data.sub}")
+        logger.error(f"未找到用户 {user_uuid}")
         raise NotFoundException(message="用户不存在")
     if not user.is_active:
         raise ForbiddenException(message="用户已被禁用")
@@ -196,79 +236,62 @@ async def get_current_user(request: Request, session: SessionDep, token: TokenDe
     # 即时会话失效：若用户被强制下线或注销，设置了 revoked_after，则 iat 早于该时间的 access 立即失效
     try:
         revoked_after = await get_user_revoked_after(user_id=str(user.id))
-        if revoked_after is not None and token_data.iat is not None:
-            try:
-                token_iat = int(token_data.iat)
-            except Exception:
-                token_iat = None
-            if token_iat is not None and token_iat <= int(revoked_after):
-                raise UnauthorizedException(message="登录状态已失效，请重新登录")
+        if revoked_after is not None and token_iat is not None and token_iat <= int(revoked_after):
+            raise UnauthorizedException(message="登录状态已失效，请重新登录")
     except UnauthorizedException:
         raise
     except Exception as e:
         # 存储不可用时不阻断请求，但记录告警
         logger.warning(f"revoked_after 校验失败: {e}")
 
-    # 将用户信息绑定到 request state，供中间件使用(存储简单值避免 Session 关闭后的 DetachedInstanceError)
-    request.state.user_id = str(user.id)
-    request.state.username = user.username
+    return Principal.from_user(user)
 
-    # 计算并缓存权限集合：v1:user:permissions:{user_id}
-    if user.is_superuser:
-        request.state.permissions = {"*"}
-        return user
 
-    permissions_cache_key = f"v1:user:permissions:{user.id}"
-    permissions: set[str] = set()
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
 
-    if cache_module.redis_client is not None:
-        try:
-            cached = await cache_module.redis_client.get(permissions_cache_key)
-            if cached:
-                permissions = set(json.loads(cached))
-        except Exception as e:
-            logger.warning(f"权限缓存读取失败: {e}")
-
-    if not permissions:
-        for role in user.roles:
-            for menu in role.menus:
-                if menu.permission:
-                    permissions.add(menu.permission)
-
-        if cache_module.redis_client is not None:
-            try:
-                await cache_module.redis_client.setex(
-                    permissions_cache_key, 300, json.dumps(sorted(permissions), ensure_ascii=False)
-                )
-            except Exception as e:
-                logger.warning(f"权限缓存写入失败: {e}")
-
-    request.state.permissions = permissions
+
+async def get_current_user(session: SessionDep, principal: CurrentPrincipal) -> User:
+    """
+    获取当前登录用户对象（需要完整用户信息的接口使用）。
+
+    鉴权由 get_current_principal 完成；缓存未命中时用户已在同一会话中加载，此处直接复用。
+
+    Args:
+        session: 数据库会话依赖。
+        principal: 当前认证主体。
+
+    Returns:
+        User: 当前登录用户。
+
+    Raises:
+        NotFoundException: 用户不存在。
+    """
+    user = await session.get(User, principal.id)
+    if not user:
+        raise NotFoundException(message="用户不存在")
     return user
 
 
 def require_permissions(required_permissions: list[str]):
     """构建权限校验依赖。
 
+    仅依赖认证主体，缓存命中时权限校验不访问数据库。
+
     Args:
         required_permissions: 需要包含的权限列表。
 
     Returns:
-        Callable[[Request, User], User]: 权限校验依赖函数。
+        Callable[[Principal], Principal]: 权限校验依赖函数。
     """
 
-    async def _checker(request: Request, current_user: CurrentUser) -> User:
+    async def _checker(principal: CurrentPrincipal) -> Principal:
         """校验当前用户权限是否满足要求。"""
-        if current_user.is_superuser:
-            return current_user
-
-        perms = getattr(request.state, "permissions", set())
-        if not isinstance(perms, set):
-            perms = set(perms)
+        if principal.is_superuser:
+            return principal
 
-        if not set(required_permissions).issubset(perms):
+        if not set(required_permissions).issubset(principal.permissions):
             raise ForbiddenException(message="权限不足")
-        return current_user
+        return principal
 
     return _checker
 
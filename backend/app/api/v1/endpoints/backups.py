@@ -145,6 +145,7 @@ async def get_backups(
             device=DeviceResponse.model_validate(backup.device) if backup.device else None,
             content=backup.content,
             content_path=backup.content_path,
+            content_hash=backup.content_hash,
         )
         backup_responses.append(resp)
 
@@ -236,6 +237,7 @@ async def get_recycle_backups(
                 device=DeviceResponse.model_validate(backup.device) if backup.device else None,
                 content=backup.content,
                 content_path=backup.content_path,
+                content_hash=backup.content_hash,
             )
         )
 
@@ -319,6 +321,7 @@ async def get_backup(
             device=DeviceResponse.model_validate(backup.device) if backup.device else None,
             content=backup.content,
             content_path=backup.content_path,
+            content_hash=backup.content_hash,
         )
     )
 
@@ -412,6 +415,7 @@ async def backup_device(
             device=DeviceResponse.model_validate(backup.device) if backup.device else None,
             content=backup.content,
             content_path=backup.content_path,
+            content_hash=backup.content_hash,
         ),
         message="备份任务已完成",
     )
@@ -528,6 +532,7 @@ async def get_device_latest_backup(
             device=DeviceResponse.model_validate(backup.device) if backup.device else None,
             content=backup.content,
             content_path=backup.content_path,
+            content_hash=backup.content_hash,
         )
     )
 
@@ -580,6 +585,7 @@ async def get_device_backup_history(
             device=DeviceResponse.model_validate(backup.device) if backup.device else None,
             content=backup.content,
             content_path=backup.content_path,
+            content_hash=backup.content_hash,
         )
         for backup in items
     ]
@@ -6,6 +6,7 @@
 @Docs: ARP/MAC 采集 API 接口 (Collection API Endpoints).
 """
 
+from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
@@ -23,6 +24,7 @@ from app.schemas.collect import (
     CollectTaskStatus,
     DeviceCollectResult,
     LocateResponse,
+    MACHistoryResponse,
     MACTableResponse,
 )
 from app.schemas.common import ResponseBase
@@ -335,3 +337,37 @@ async def locate_by_mac(
         message = "未找到匹配记录，请确保已采集 ARP/MAC 数据"
 
     return ResponseBase(data=result, message=message)
+
+
+@router.get(
+    "/history/mac/{mac_address:path}",
+    response_model=ResponseBase[MACHistoryResponse],
+    dependencies=[Depends(require_permissions([PermissionCode.COLLECT_VIEW.value]))],
+    summary="MAC 历史轨迹",
+    description="查询 MAC 地址的迁移历史及指定时间点所在设备和端口。",
+)
+async def get_mac_history(
+    mac_address: str,
+    service: CollectServiceDep,
+    at: datetime | None = None,
+) -> ResponseBase[MACHistoryResponse]:
+    """查询 MAC 地址的历史轨迹。
+
+    每次采集只记录条目出现、消失与迁移事件，按时间回放得到任意时间点的位置。
+
+    Args:
+        mac_address (str): 要查询的 MAC 地址（支持多种常见格式）。
+        service (CollectService): 采集服务依赖。
+        at (datetime | None, optional): 查询时间点，默认当前时间。
+
+    Returns:
+        ResponseBase[MACHistoryResponse]: 包含该时间点位置与历史事件的响应。
+    """
+    result = await service.get_mac_history(mac_address, at=at)
+
+    if result.events:
+        message = f"找到 {len(result.events)} 条历史事件"
+    else:
+        message = "未找到历史记录，请确保已采集 ARP/MAC 数据"
+
+    return ResponseBase(data=result, message=message)
@@ -13,7 +13,7 @@ from fastapi import APIRouter, Depends
 from app.api import deps
 from app.core.permissions import PermissionCode
 from app.schemas.common import ResponseBase
-from app.schemas.diff import DiffResponse
+from app.schemas.diff import DiffResponse, DiffSection
 
 router = APIRouter(tags=["配置差异"])
 
@@ -57,7 +57,9 @@ async def get_device_latest_diff(
             )
         )
 
-    if not old_bak.content or not new_bak.content:
+    old_content = await diff_service.get_backup_content(old_bak)
+    new_content = await diff_service.get_backup_content(new_bak)
+    if not old_content or not new_content:
         return ResponseBase(
             data=DiffResponse(
                 device_id=device_id,
@@ -69,11 +71,11 @@ async def get_device_latest_diff(
                 old_md5=old_bak.md5_hash,
                 new_md5=new_bak.md5_hash,
                 has_changes=False,
-                message="备份内容未直存数据库（可能为大配置/MinIO 未集成），暂不支持差异计算",
+                message="备份内容不可用（对象存储读取失败或内容已清理），暂不支持差异计算",
             )
         )
 
-    diff_text = diff_service.compute_unified_diff(old_bak.content, new_bak.content, context_lines=3)
+    diff_text, sections = await diff_service.compute_diff_async(old_content, new_content, context_lines=3)
     has_changes = bool(diff_text.strip())
     return ResponseBase(
         data=DiffResponse(
@@ -84,6 +86,7 @@ async def get_device_latest_diff(
             old_hash=old_bak.md5_hash,
             new_hash=new_bak.md5_hash,
             diff_content=diff_text,
+            sections=[DiffSection.model_validate(section, from_attributes=True) for section in sections],
             has_changes=has_changes,
             old_md5=old_bak.md5_hash,
             new_md5=new_bak.md5_hash,
@@ -11,7 +11,7 @@
     FastAPI 按定义顺序匹配路由，静态路由必须在动态路由之前定义，否则动态路由可能会错误匹配静态路径。
     当前文件路由顺序:
     1. 根路由: /
-    2. 静态路由: /links, /export, /refresh, /cache/rebuild, /reset
+    2. 静态路由: /subgraph, /links, /export, /refresh, /cache/rebuild, /reset
     3. 带有 /device/ 前缀的动态路由
     4. 带有 /task/ 前缀的动态路由
 """
@@ -19,8 +19,9 @@
 from typing import Any, cast
 from uuid import UUID
 
+import orjson
 from celery.result import AsyncResult
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from fastapi.responses import JSONResponse
 
 from app.api.deps import (
@@ -43,6 +44,7 @@ from app.schemas.topology import (
     TopologyLinkItem,
     TopologyLinksResponse,
     TopologyResponse,
+    TopologySubgraphResponse,
     TopologyTaskResponse,
     TopologyTaskStatus,
 )
@@ -50,6 +52,22 @@ from app.schemas.topology import (
 router = APIRouter(tags=["网络拓扑"])
 
 
+def _topology_json_response(data: dict[str, Any]) -> Response:
+    """将服务层拼装好的拓扑字典直接序列化为统一响应。
+
+    拓扑可能包含数万条边，返回 Response 可跳过 response_model 对每个节点/边的模型校验，
+    response_model 仅用于生成接口文档。
+
+    Args:
+        data (dict[str, Any]): TopologyResponse 结构的拓扑数据。
+
+    Returns:
+        Response: JSON 响应。
+    """
+    body = ResponseBase(data=None).model_dump() | {"data": data}
+    return Response(content=orjson.dumps(body), media_type="application/json")
+
+
 # =============================================================================
 # 1. 根路由
 # =============================================================================
@@ -64,7 +82,7 @@ router = APIRouter(tags=["网络拓扑"])
 async def get_topology(
     db: SessionDep,
     topology_service: TopologyServiceDep,
-) -> ResponseBase[TopologyResponse]:
+) -> Response:
     """获取完整的网络拓扑数据，用于前端 vis.js 或相关拓扑引擎渲染。
 
     Args:
@@ -72,17 +90,52 @@ async def get_topology(
         topology_service (TopologyService): 拓扑服务依赖。
 
     Returns:
-        ResponseBase[TopologyResponse]: 包含节点 (nodes)、边 (edges) 和统计数据的对象。
+        Response: ResponseBase[TopologyResponse] 结构，包含节点 (nodes)、边 (edges) 和统计数据。
     """
     data = await topology_service.build_topology(db)
-    return ResponseBase(data=data)
+    return _topology_json_response(data)
 
 
 # =============================================================================
-# 2. 静态路由: /links, /export, /refresh, /cache/rebuild, /reset
+# 2. 静态路由: /subgraph, /links, /export, /refresh, /cache/rebuild, /reset
 # =============================================================================
 
 
+@router.get(
+    "/subgraph",
+    summary="获取拓扑子图",
+    response_model=ResponseBase[TopologySubgraphResponse],
+    dependencies=[Depends(require_permissions([PermissionCode.TOPOLOGY_VIEW.value]))],
+)
+async def get_topology_subgraph(
+    db: SessionDep,
+    topology_service: TopologyServiceDep,
+    dept_id: UUID | None = Query(None, description="部门筛选"),
+    device_id: UUID | None = Query(None, description="中心设备ID"),
+    hops: int = Query(1, ge=1, le=5, description="距中心设备的跳数"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(2000, ge=1, le=10000),
+) -> Response:
+    """按部门或以设备为中心的 N 跳范围获取拓扑子图，边按页返回。
+
+    Args:
+        db (Session): 数据库会话。
+        topology_service (TopologyService): 拓扑服务依赖。
+        dept_id (UUID | None): 部门 ID，保留至少一端属于该部门设备的链路。
+        device_id (UUID | None): 中心设备 ID。
+        hops (int): 距中心设备的跳数（需指定 device_id）。
+        page (int): 页码。
+        page_size (int): 每页边数。
+
+    Returns:
+        Response: ResponseBase[TopologySubgraphResponse] 结构，当前页的节点与边，统计信息为整个子图。
+    """
+    data = await topology_service.build_subgraph(
+        db, dept_id=dept_id, device_id=device_id, hops=hops, page=page, page_size=page_size
+    )
+    return _topology_json_response(data)
+
+
 @router.get(
     "/links",
     summary="获取链路列表",
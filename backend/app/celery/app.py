@@ -139,6 +139,7 @@ def create_celery_app() -> Celery:
             "app.celery.tasks.inventory_audit.*": {"queue": "discovery"},
             "app.celery.tasks.discovery.*": {"queue": "discovery"},
             "app.celery.tasks.alerts.*": {"queue": "discovery"},
+            "app.celery.tasks.stats.*": {"queue": "discovery"},
             "app.celery.tasks.topology.*": {"queue": "topology"},
         },
         # 定时任务调度 (Celery Beat)
@@ -161,6 +162,12 @@ def create_celery_app() -> Celery:
                 ),
                 "options": {"queue": "backup"},
             },
+            # 每日备份保留策略全量清理（兜底：覆盖未触发保存路径的设备与按天数过期）
+            "daily-backup-retention": {
+                "task": "app.celery.tasks.backup.enforce_backup_retention",
+                "schedule": crontab(hour=str(settings.CELERY_BEAT_RETENTION_HOUR), minute="0"),
+                "options": {"queue": "backup"},
+            },
             # 定时 ARP/MAC 表采集
             "hourly-collect-all": {
                 "task": "app.celery.tasks.collect.scheduled_collect_all",
@@ -194,6 +201,18 @@ def create_celery_app() -> Celery:
                 "schedule": crontab(hour="1", minute="0"),
                 "options": {"queue": "discovery"},
             },
+            # 告警通知发件箱投递（Webhook 批量、邮件摘要、失败重试）
+            "alert-notification-dispatch": {
+                "task": "app.celery.tasks.alerts.dispatch_alert_notifications",
+                "schedule": float(settings.ALERT_NOTIFY_DISPATCH_INTERVAL),
+                "options": {"queue": "discovery"},
+            },
+            # 每日统计汇总重算（修正增量遗漏，备份数量只由重算维护）
+            "stats-rollup-compact": {
+                "task": "app.celery.tasks.stats.compact_daily_stats",
+                "schedule": float(settings.STATS_ROLLUP_INTERVAL_MINUTES * 60),
+                "options": {"queue": "discovery"},
+            },
         },
         # Beat 调度器配置
         beat_scheduler="celery.beat:PersistentScheduler",
@@ -14,6 +14,7 @@ from app.celery.tasks import (
     deploy,
     discovery,
     inventory_audit,
+    stats,
     topology,
 )
 
@@ -24,5 +25,6 @@ __all__ = [
     "deploy",
     "discovery",
     "inventory_audit",
+    "stats",
     "topology",
 ]
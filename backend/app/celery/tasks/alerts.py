@@ -5,7 +5,7 @@
 @DateTime: 2026-01-10 04:20:00
 @Docs: 告警 Celery 任务 (Alert Tasks).
 
-包含离线设备与影子资产的定时告警扫描。
+包含离线设备与影子资产的定时告警扫描，以及告警通知发件箱投递。
 """
 
 from datetime import UTC, datetime
@@ -66,41 +66,37 @@ async def _process_offline_devices(
         if not items:
             break
 
-        for d in items:
-            try:
-                title = f"设备离线: {d.ip_address}"
-                alert = await service.create_alert(
-                    AlertCreate(
-                        alert_type=AlertType.DEVICE_OFFLINE,
-                        severity=AlertSeverity.HIGH,
-                        title=title,
-                        message=f"设备已离线 {d.offline_days} 天",
-                        details={
-                            "ip_address": d.ip_address,
-                            "mac_address": d.mac_address,
-                            "offline_days": d.offline_days,
-                            "last_seen_at": d.last_seen_at.isoformat() if d.last_seen_at else None,
-                            "matched_device_id": str(d.matched_device_id) if d.matched_device_id else None,
-                        },
-                        source="discovery",
-                        related_device_id=d.matched_device_id,
-                        related_discovery_id=d.id,
-                    ),
-                    dedup_minutes=24 * 60,
-                )
-                await notifier.send_webhook(alert)
-                created += 1
-            except Exception as e:
-                celery_details_logger.warning(
-                    "创建离线告警失败",
-                    discovery_id=str(d.id),
-                    ip_address=d.ip_address,
-                    error=str(e),
-                )
-
-        # 每批提交一次事务
-        await db.commit()
+        alerts_in = [
+            AlertCreate(
+                alert_type=AlertType.DEVICE_OFFLINE,
+                severity=AlertSeverity.HIGH,
+                title=f"设备离线: {d.ip_address}",
+                message=f"设备已离线 {d.offline_days} 天",
+                details={
+                    "ip_address": d.ip_address,
+                    "mac_address": d.mac_address,
+                    "offline_days": d.offline_days,
+                    "last_seen_at": d.last_seen_at.isoformat() if d.last_seen_at else None,
+                    "matched_device_id": str(d.matched_device_id) if d.matched_device_id else None,
+                },
+                source="discovery",
+                related_device_id=d.matched_device_id,
+                related_discovery_id=d.id,
+            )
+            for d in items
+        ]
         last_id = items[-1].id
+        # 每批一次去重查询 + 一次多行写入，并提交事务
+        try:
+            result = await service.create_alerts_bulk(alerts_in, dedup_minutes=24 * 60, notifier=notifier)
+            created += len(result.created_ids)
+        except Exception as e:
+            celery_details_logger.warning(
+                "创建离线告警失败",
+                last_discovery_id=str(last_id),
+                batch_size=len(alerts_in),
+                error=str(e),
+            )
 
     return created
 
@@ -139,41 +135,37 @@ async def _process_shadow_assets(
         if not items:
             break
 
-        for d in items:
-            try:
-                title = f"影子资产: {d.ip_address}"
-                alert = await service.create_alert(
-                    AlertCreate(
-                        alert_type=AlertType.SHADOW_ASSET,
-                        severity=AlertSeverity.MEDIUM,
-                        title=title,
-                        message="发现未纳管设备（影子资产）",
-                        details={
-                            "ip_address": d.ip_address,
-                            "mac_address": d.mac_address,
-                            "vendor": d.vendor,
-                            "hostname": d.hostname,
-                            "open_ports": d.open_ports,
-                            "first_seen_at": d.first_seen_at.isoformat() if d.first_seen_at else None,
-                            "last_seen_at": d.last_seen_at.isoformat() if d.last_seen_at else None,
-                        },
-                        source="discovery",
-                        related_discovery_id=d.id,
-                    ),
-                    dedup_minutes=24 * 60,
-                )
-                await notifier.send_webhook(alert)
-                created += 1
-            except Exception as e:
-                celery_details_logger.warning(
-                    "创建影子资产告警失败",
-                    discovery_id=str(d.id),
-                    ip_address=d.ip_address,
-                    error=str(e),
-                )
-
-        await db.commit()
+        alerts_in = [
+            AlertCreate(
+                alert_type=AlertType.SHADOW_ASSET,
+                severity=AlertSeverity.MEDIUM,
+                title=f"影子资产: {d.ip_address}",
+                message="发现未纳管设备（影子资产）",
+                details={
+                    "ip_address": d.ip_address,
+                    "mac_address": d.mac_address,
+                    "vendor": d.vendor,
+                    "hostname": d.hostname,
+                    "open_ports": d.open_ports,
+                    "first_seen_at": d.first_seen_at.isoformat() if d.first_seen_at else None,
+                    "last_seen_at": d.last_seen_at.isoformat() if d.last_seen_at else None,
+                },
+                source="discovery",
+                related_discovery_id=d.id,
+            )
+            for d in items
+        ]
         last_id = items[-1].id
+        try:
+            result = await service.create_alerts_bulk(alerts_in, dedup_minutes=24 * 60, notifier=notifier)
+            created += len(result.created_ids)
+        except Exception as e:
+            celery_details_logger.warning(
+                "创建影子资产告警失败",
+                last_discovery_id=str(last_id),
+                batch_size=len(alerts_in),
+                error=str(e),
+            )
 
     return created
 
@@ -304,10 +296,13 @@ def scheduled_offline_alerts(self) -> dict[str, Any]:
             closed_offline = await _auto_close_recovered_offline_alerts(db, service)
             closed_shadow = await _auto_close_matched_shadow_alerts(db, service)
 
-            # 2. 创建新告警
+            # 2. 创建新告警（通知随告警写入发件箱）
             created_offline = await _process_offline_devices(db, service, notifier)
             created_shadow = await _process_shadow_assets(db, service, notifier)
 
+            # 3. 清理过期的通知记录
+            await notifier.purge(db)
+
         return {
             "task_id": task_id,
             "created_offline": created_offline,
@@ -318,6 +313,8 @@ def scheduled_offline_alerts(self) -> dict[str, Any]:
 
     try:
         result = run_async(_scan())
+        if result["created_offline"] or result["created_shadow"]:
+            trigger_notification_dispatch()
         ended_at = datetime.now(UTC)
         celery_task_logger.info(
             "告警扫描完成",
@@ -332,3 +329,52 @@ def scheduled_offline_alerts(self) -> dict[str, Any]:
     except Exception as e:
         celery_details_logger.error("告警扫描失败", task_id=task_id, error=str(e), exc_info=True)
         raise
+
+
+@celery_app.task(
+    base=BaseTask,
+    bind=True,
+    name="app.celery.tasks.alerts.dispatch_alert_notifications",
+    queue="discovery",
+)
+def dispatch_alert_notifications(self) -> dict[str, Any]:
+    """
+    投递告警通知发件箱中到期的记录。
+
+    由 Celery Beat 按 ALERT_NOTIFY_DISPATCH_INTERVAL 周期触发，告警扫描产生新告警后也会立即触发；
+    并发执行时通过 SKIP LOCKED 领取不同记录，不会重复发送。
+
+    Args:
+        self: Celery 任务实例。
+
+    Returns:
+        dict[str, Any]: 投递结果字典。
+    """
+    task_id = self.request.id
+
+    async def _dispatch() -> dict[str, int]:
+        async with AsyncSessionLocal() as db:
+            return await NotificationService().dispatch_pending(db)
+
+    try:
+        stats = run_async(_dispatch())
+        if any(stats.values()):
+            celery_task_logger.info("告警通知投递完成", task_id=task_id, **stats)
+        return {"task_id": task_id, **stats}
+    except Exception as e:
+        celery_details_logger.error("告警通知投递失败", task_id=task_id, error=str(e), exc_info=True)
+        raise
+
+
+def trigger_notification_dispatch() -> None:
+    """立即投递一次通知发件箱（新告警提交后调用；投递失败只记录日志，由定时投递兜底）。
+
+    Returns:
+        None: 无返回值。
+    """
+    if not NotificationService.enabled_channels():
+        return
+    try:
+        dispatch_alert_notifications.delay()  # type: ignore[attr-defined]
+    except Exception as e:
+        celery_details_logger.warning("告警通知投递任务触发失败", error=str(e))
@@ -11,8 +11,7 @@
 """
 
 import asyncio
-import difflib
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from typing import Any
 from uuid import UUID
 
@@ -20,181 +19,69 @@ from sqlalchemy import select
 
 from app.celery.app import celery_app
 from app.celery.base import BaseTask, run_async, safe_update_state, safe_update_state_async
+from app.celery.tasks.alerts import trigger_notification_dispatch
+from app.celery.tasks.backup_writer import BackupStreamWriter, record_from_result
 from app.core.config import settings
 from app.core.db import AsyncSessionLocal
 from app.core.enums import AlertSeverity, AlertType, AuthType, BackupStatus, BackupType, DeviceStatus
 from app.core.exceptions import OTPRequiredException
 from app.core.logger import celery_details_logger, celery_task_logger
-from app.core.minio_client import delete_object, put_text
+from app.core.minio_client import put_text
 from app.core.otp import otp_coordinator
 from app.core.otp_service import otp_service
 from app.crud.crud_alert import alert_crud
 from app.crud.crud_backup import backup as backup_crud
 from app.crud.crud_credential import credential as credential_crud
+from app.crud.crud_snmp_credential import dept_snmp_credential as dept_snmp_credential_crud
 from app.models.backup import Backup
 from app.models.device import Device
 from app.schemas.alert import AlertCreate
 from app.schemas.backup import BackupCreate
 from app.services.alert_service import AlertService
+from app.services.backup_blob_service import BackupBlobService, load_backup_contents
+from app.services.config_change_probe_service import ConfigChangeProbeService
 from app.services.notification_service import NotificationService
+from app.utils.config_diff import SectionChange, diff_config
 from app.utils.validators import (
     compute_text_md5,
     compute_text_md5_async,
     should_skip_backup_save_due_to_unchanged_md5,
 )
 
-def _get_keep_count(bt: BackupType) -> int:
-    """根据备份类型获取保留数量（使用 match-case 进行模式匹配）。
+def dispatch_backup_retention(device_ids: list[str]) -> None:
+    """投递保留策略清理任务（不阻塞备份保存路径，投递失败只记录日志）。
 
     Args:
-        bt (BackupType): 备份类型枚举。
-
-    Returns:
-        int: 该类型备份的保留数量。
-    """
-    match bt:
-        case BackupType.SCHEDULED:
-            return getattr(settings, "BACKUP_RETENTION_SCHEDULED_KEEP", 0)
-        case BackupType.MANUAL:
-            return getattr(settings, "BACKUP_RETENTION_MANUAL_KEEP", 0)
-        case BackupType.PRE_CHANGE:
-            return getattr(settings, "BACKUP_RETENTION_PRE_CHANGE_KEEP", 0)
-        case BackupType.POST_CHANGE:
-            return getattr(settings, "BACKUP_RETENTION_POST_CHANGE_KEEP", 0)
-        case BackupType.INCREMENTAL:
-            return getattr(settings, "BACKUP_RETENTION_INCREMENTAL_KEEP", 0)
-
-
-async def _enforce_retention_for_device(db: Any, device_id: str) -> None:
-    """按条数+按天数清理备份，保证每台设备至少保留 1 条（优先保留最新成功备份）。
-
-    Args:
-        db (Any): 数据库会话。
-        device_id (str): 设备 ID 字符串。
+        device_ids (list[str]): 需要清理的设备 ID 字符串列表。
 
     Returns:
         None: 无返回值。
     """
-    did = UUID(device_id)
-    keep_ids: set[UUID] = set()
-
-    latest_any_q = (
-        select(Backup.id)
-        .where(Backup.device_id == did)
-        .where(Backup.is_deleted.is_(False))
-        .order_by(Backup.created_at.desc())
-        .limit(1)
-    )
-    latest_any = await db.execute(latest_any_q)
-    latest_any_id = latest_any.scalar()
-    if latest_any_id:
-        keep_ids.add(latest_any_id)
-
-    latest_success_q = (
-        select(Backup.id)
-        .where(Backup.device_id == did)
-        .where(Backup.is_deleted.is_(False))
-        .where(Backup.status == BackupStatus.SUCCESS.value)
-        .order_by(Backup.created_at.desc())
-        .limit(1)
-    )
-    latest_success = await db.execute(latest_success_q)
-    latest_success_id = latest_success.scalar()
-    if latest_success_id:
-        keep_ids.add(latest_success_id)
-
-    to_delete: dict[UUID, Backup] = {}
-
-    # 1) 按条数（按类型、仅成功备份；失败备份交给按天数清理）
-    for bt in BackupType:
-        keep = _get_keep_count(bt)
-        if keep <= 0:
-            continue
-
-        q = (
-            select(Backup)
-            .where(Backup.device_id == did)
-            .where(Backup.is_deleted.is_(False))
-            .where(Backup.status == BackupStatus.SUCCESS.value)
-            .where(Backup.backup_type == bt.value)
-            .order_by(Backup.created_at.desc())
-            .offset(keep)
-        )
-        r = await db.execute(q)
-        for b in r.scalars().all():
-            if b.id in keep_ids:
-                continue
-            to_delete[b.id] = b
-
-    # 2) 按天数（所有备份类型）
-    keep_days = settings.BACKUP_RETENTION_KEEP_DAYS
-    if keep_days > 0:
-        cutoff = datetime.now(UTC) - timedelta(days=keep_days)
-        q = (
-            select(Backup)
-            .where(Backup.device_id == did)
-            .where(Backup.is_deleted.is_(False))
-            .where(Backup.created_at < cutoff)
-        )
-        r = await db.execute(q)
-        for b in r.scalars().all():
-            if b.id in keep_ids:
-                continue
-            to_delete[b.id] = b
-
-    if not to_delete:
+    unique_ids = sorted(set(device_ids))
+    if not unique_ids:
         return
-
-    for b in to_delete.values():
-        if b.content_path:
-            try:
-                await delete_object(b.content_path)
-            except Exception as e:
-                celery_details_logger.warning("MinIO 删除对象失败", path=b.content_path, error=str(e))
-        b.is_deleted = True
-        db.add(b)
-
-
-def _normalize_lines(text: str) -> list[str]:
-    """差异预处理：去行尾空白、去空行。
-
-    Args:
-        text (str): 原始文本内容。
-
-    Returns:
-        list[str]: 处理后的行列表（去除行尾空白和空行）。
-    """
-    lines: list[str] = []
-    for line in text.splitlines():
-        s = line.rstrip()
-        if not s:
-            continue
-        lines.append(s)
-    return lines
+    try:
+        enforce_backup_retention.delay(device_ids=unique_ids)  # type: ignore[attr-defined]
+    except Exception as e:
+        celery_details_logger.warning("备份保留策略任务投递失败", devices=len(unique_ids), error=str(e))
 
 
-def _compute_unified_diff(old_text: str, new_text: str, context_lines: int = 3) -> str:
-    """计算 unified diff（用于告警详情）。
+def _change_alert_message(name: str, sections: list[SectionChange]) -> str:
+    """配置变更告警正文（列出前几个变更的配置段）。
 
     Args:
-        old_text (str): 旧文本内容。
-        new_text (str): 新文本内容。
-        context_lines (int): 上下文行数，默认为 3。
+        name (str): 设备名称。
+        sections (list[SectionChange]): 有变更的配置段。
 
     Returns:
-        str: unified diff 格式的差异字符串。
+        str: 告警正文。
     """
-    old_lines = _normalize_lines(old_text)
-    new_lines = _normalize_lines(new_text)
-    diff_iter = difflib.unified_diff(
-        old_lines,
-        new_lines,
-        fromfile="old",
-        tofile="new",
-        lineterm="",
-        n=context_lines,
-    )
-    return "\n".join(diff_iter)
+    message = f"检测到设备配置变更: {name}"
+    if sections:
+        message += "，涉及配置段: " + "、".join(section.section for section in sections[:3])
+        if len(sections) > 3:
+            message += f" 等 {len(sections)} 个"
+    return message
 
 
 def _convert_async_results_to_summary(
@@ -407,6 +294,7 @@ async def _save_backup_results(
             # 计算存储信息
             content = None
             content_path = None
+            content_hash = None
             content_size = 0
             md5_hash = None
 
@@ -439,7 +327,10 @@ async def _save_backup_results(
                             error=str(e),
                         )
 
-                if content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+                if settings.BACKUP_DEDUP_ENABLED:
+                    # 去重存储：相同内容只存一份
+                    content_hash = await BackupBlobService(db, backup_crud).store(config_content, UUID(device_id))
+                elif content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
                     content = config_content
                 else:
                     # 存储到 MinIO
@@ -458,6 +349,7 @@ async def _save_backup_results(
                     backup_type=bt,
                     content=content,
                     content_path=content_path,
+                    content_hash=content_hash,
                     content_size=content_size,
                     md5_hash=md5_hash,
                     status=BackupStatus.SUCCESS if status == "success" else BackupStatus.FAILED,
@@ -472,15 +364,62 @@ async def _save_backup_results(
 
         await db.commit()
 
-        # 保留策略清理：按条数（各类型可配）+ 按天数（默认 7 天），每台设备至少保留 1 条（优先最新成功）
-        unique_device_ids: list[str] = sorted({str(h["device_id"]) for h in hosts_data if h.get("device_id")})
-        for did in unique_device_ids:
-            try:
-                await _enforce_retention_for_device(db, did)
-            except Exception as e:
-                celery_details_logger.warning("备份保留策略清理失败", device_id=did, error=str(e))
+    # 保留策略清理：按条数（各类型可配）+ 按天数（默认 7 天），每台设备至少保留 1 条（优先最新成功）
+    dispatch_backup_retention([str(h["device_id"]) for h in hosts_data if h.get("device_id")])
 
-        await db.commit()
+
+async def _stream_backup_hosts(
+    hosts_data: list[dict[str, Any]],
+    *,
+    backup_type: str = BackupType.MANUAL.value,
+    operator_id: str | None = None,
+    num_workers: int | None = None,
+) -> dict[str, Any]:
+    """采集配置并流式写入备份（采集与落库并行，按批次提交）。
+
+    每台设备的采集结果经 AsyncRunner 进度回调直接投递给 BackupStreamWriter，
+    写入后即释放配置文本，worker 峰值内存与设备总数无关。
+
+    Args:
+        hosts_data (list[dict[str, Any]]): 主机数据列表。
+        backup_type (str): 备份类型，默认为手动备份。
+        operator_id (str | None): 操作员 ID。
+        num_workers (int | None): 最大并发连接数。
+
+    Returns:
+        dict[str, Any]: 备份统计 {"success", "failed", "total", "saved", "skipped"}。
+    """
+    from app.network.async_runner import run_async_tasks
+    from app.network.async_tasks import async_collect_config
+    from app.network.nornir_config import init_nornir_async
+
+    host_meta: dict[str, tuple[str, str | None]] = {}
+    for host in hosts_data:
+        host_name = host.get("name")
+        device_id = host.get("device_id") or (host.get("data") or {}).get("device_id")
+        if host_name and device_id:
+            host_meta[str(host_name)] = (str(device_id), operator_id or host.get("operator_id"))
+
+    inventory = init_nornir_async(hosts_data)
+
+    async with BackupStreamWriter(backup_type=backup_type) as writer:
+
+        async def _on_result(host_name: str, result: Any) -> None:
+            meta = host_meta.get(host_name)
+            if not meta:
+                return
+            device_id, effective_operator_id = meta
+            await writer.submit(record_from_result(device_id, result, operator_id=effective_operator_id))
+
+        await run_async_tasks(
+            inventory.hosts,
+            async_collect_config,
+            num_workers=num_workers,
+            progress_callback=_on_result,
+        )
+
+    dispatch_backup_retention([device_id for device_id, _ in host_meta.values()])
+    return writer.summary()
 
 
 @celery_app.task(
@@ -654,30 +593,40 @@ def scheduled_backup_all(self) -> dict[str, Any]:
             },
         )
 
-        from app.network.async_runner import run_async_tasks
-        from app.network.async_tasks import async_collect_config
-        from app.network.nornir_config import init_nornir_async
-
-        inventory = init_nornir_async(hosts_data)
-        results = run_async(
-            run_async_tasks(
-                inventory.hosts,
-                async_collect_config,
-                num_workers=min(50, len(hosts_data)),
+        if settings.BACKUP_STREAM_ENABLED:
+            # 流式模式：逐台落库，配置文本不在 worker 内累积
+            summary = run_async(
+                _stream_backup_hosts(
+                    hosts_data,
+                    backup_type=BackupType.SCHEDULED.value,
+                    num_workers=min(50, len(hosts_data)),
+                )
+            )
+        else:
+            from app.network.async_runner import run_async_tasks
+            from app.network.async_tasks import async_collect_config
+            from app.network.nornir_config import init_nornir_async
+
+            inventory = init_nornir_async(hosts_data)
+            results = run_async(
+                run_async_tasks(
+                    inventory.hosts,
+                    async_collect_config,
+                    num_workers=min(50, len(hosts_data)),
+                )
             )
-        )
 
-        # 转换异步结果格式以兼容 _save_backup_results
-        summary = _convert_async_results_to_summary(results)
+            # 转换异步结果格式以兼容 _save_backup_results
+            summary = _convert_async_results_to_summary(results)
 
-        run_async(
-            _save_backup_results(
-                hosts_data,
-                summary,
-                backup_type=BackupType.SCHEDULED.value,
-                operator_id=None,
+            run_async(
+                _save_backup_results(
+                    hosts_data,
+                    summary,
+                    backup_type=BackupType.SCHEDULED.value,
+                    operator_id=None,
+                )
             )
-        )
 
         end_time = datetime.now(UTC)
         result = {
@@ -755,6 +704,8 @@ async def _get_devices_for_scheduled_backup() -> tuple[list[dict], list[str]]:
                     password = credential.password
                     extra_data = {
                         "auth_type": "static",
+                        "dept_id": str(device.dept_id) if device.dept_id else None,
+                        "device_group": device.device_group,
                         "device_id": str(device.id),
                         "device_name": device.name,
                         "vendor": device.vendor,
@@ -896,6 +847,9 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
     changed_count = 0
     backup_triggered = 0
     changed_devices = []
+    probe_service: ConfigChangeProbeService | None = None
+    probe_markers: dict[str, str] = {}
+    confirmed_markers: dict[str, str] = {}
 
     async with AsyncSessionLocal() as db:
         # 获取可自动备份的设备
@@ -909,12 +863,28 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                 "message": "没有可检查的设备",
             }
 
-        # 获取设备的最新备份信息（MD5 + 内容，用于差异与告警）
+        # 获取设备的最新备份信息（仅 backup_id + MD5；旧配置内容只对变更设备懒加载）
         device_ids = [UUID(h["device_id"]) for h in hosts_data if h.get("device_id")]
         old_info_map = await backup_crud.get_devices_latest_backup_info(db, device_ids)
 
         total_checked = len(hosts_data)
 
+        # 先探测配置变更标记，标记未变化的设备不再全量采集
+        if settings.BACKUP_CHANGE_PROBE_ENABLED:
+            safe_update_state(
+                task,
+                celery_task_id,
+                state="PROGRESS",
+                meta={"stage": "probing", "message": f"正在探测配置变更标记 ({total_checked} 台)..."},
+            )
+            try:
+                probe_service = ConfigChangeProbeService(db, dept_snmp_credential_crud)
+                hosts_data, probe_markers = await probe_service.filter_changed(
+                    hosts_data, known_device_ids={str(d) for d in old_info_map}
+                )
+            except Exception as e:
+                celery_details_logger.warning("配置变更探测失败，全量检查", error=str(e))
+
     # 分批检查配置变更（避免大量并发连接）
     batch_size = 10
     for i in range(0, len(hosts_data), batch_size):
@@ -926,7 +896,7 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
             state="PROGRESS",
             meta={
                 "stage": "checking",
-                "message": f"正在检查配置变更 ({i + len(batch)}/{total_checked})...",
+                "message": f"正在检查配置变更 ({i + len(batch)}/{len(hosts_data)})...",
             },
         )
 
@@ -964,7 +934,9 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
             old_info = old_info_map.get(UUID(device_id), {})
             old_md5 = old_info.get("md5_hash")
             old_backup_id = old_info.get("backup_id")
-            old_content = old_info.get("content") or ""
+
+            if old_md5 == new_md5 and device_id in probe_markers:
+                confirmed_markers[device_id] = probe_markers[device_id]
 
             if old_md5 != new_md5:
                 changed_count += 1
@@ -975,7 +947,6 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                         "old_md5": old_md5,
                         "new_md5": new_md5,
                         "config": config,
-                        "old_content": old_content,
                         "old_backup_id": old_backup_id,
                     }
                 )
@@ -984,12 +955,21 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
     BATCH_COMMIT_SIZE = settings.BACKUP_BATCH_SIZE
     if changed_devices:
         async with AsyncSessionLocal() as db:
+            old_contents: dict[UUID, str] = {}
             for idx, device_info in enumerate(changed_devices, start=1):
+                if (idx - 1) % BATCH_COMMIT_SIZE == 0:
+                    # 只为本批变更设备批量读取上一版本配置（DB / MinIO / 内容块），用于差异告警
+                    chunk = changed_devices[idx - 1 : idx - 1 + BATCH_COMMIT_SIZE]
+                    old_backups = await backup_crud.get_by_ids(
+                        db, [d["old_backup_id"] for d in chunk if d["old_backup_id"]], is_deleted=None
+                    )
+                    old_contents = await load_backup_contents(db, old_backups)
+
                 device_id = device_info["device_id"]
                 name = device_info["device_name"]
                 config = device_info["config"]
-                old_content = device_info["old_content"]
                 old_backup_id = device_info["old_backup_id"]
+                old_content = old_contents.get(old_backup_id, "") if old_backup_id else ""
                 new_md5 = device_info["new_md5"]
                 old_md5 = device_info["old_md5"]
 
@@ -998,7 +978,10 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                 # 处理大配置：存储到 MinIO（使用熔断器保护）
                 content = None
                 content_path = None
-                if content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+                content_hash = None
+                if settings.BACKUP_DEDUP_ENABLED:
+                    content_hash = await BackupBlobService(db, backup_crud).store(config, UUID(device_id))
+                elif content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
                     content = config
                 else:
                     try:
@@ -1021,6 +1004,7 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                     backup_type=BackupType.INCREMENTAL,
                     content=content,
                     content_path=content_path,
+                    content_hash=content_hash,
                     content_size=content_size,
                     md5_hash=new_md5,
                     status=BackupStatus.SUCCESS,
@@ -1031,20 +1015,21 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                 await db.refresh(backup)
                 backup_triggered += 1
 
-                # 触发配置变更告警（写入 DB + 可选 Webhook）
+                # 触发配置变更告警（告警与通知发件箱同事务写入，由投递任务发送）
                 try:
                     diff_text = ""
+                    sections: list[SectionChange] = []
                     if old_content:
-                        diff_text = _compute_unified_diff(old_content, config, context_lines=3)
+                        diff_text, sections = diff_config(old_content, config, context_lines=3)
 
                     alert_service = AlertService(db, alert_crud)
                     notification_service = NotificationService()
-                    alert = await alert_service.create_alert(
+                    await alert_service.raise_alert(
                         AlertCreate(
                             alert_type=AlertType.CONFIG_CHANGE,
                             severity=AlertSeverity.MEDIUM,
                             title=f"设备配置变更: {name}",
-                            message=f"检测到设备配置变更: {name}",
+                            message=_change_alert_message(name, sections),
                             details={
                                 "device_id": str(device_id),
                                 "device_name": name,
@@ -1053,12 +1038,21 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
                                 "old_md5": old_md5,
                                 "new_md5": new_md5,
                                 "diff": diff_text[:8000] if diff_text else "",
+                                "sections": [
+                                    {
+                                        "section": section.section,
+                                        "change": section.change,
+                                        "added": len(section.added),
+                                        "removed": len(section.removed),
+                                    }
+                                    for section in sections[: settings.CONFIG_DIFF_ALERT_MAX_SECTIONS]
+                                ],
                             },
                             source="diff",
                             related_device_id=UUID(device_id),
-                        )
+                        ),
+                        notifier=notification_service,
                     )
-                    await notification_service.send_webhook(alert)
                 except Exception as e:
                     celery_task_logger.warning("配置变更告警触发失败", error=str(e))
 
@@ -1070,14 +1064,79 @@ async def _perform_incremental_check(task, celery_task_id: str | None) -> dict[s
             # 提交剩余的事务
             await db.commit()
 
+        dispatch_backup_retention([d["device_id"] for d in changed_devices])
+        if backup_triggered:
+            trigger_notification_dispatch()
+        confirmed_markers.update(
+            {d["device_id"]: probe_markers[d["device_id"]] for d in changed_devices if d["device_id"] in probe_markers}
+        )
+
+    # 标记只在配置确认入库/确认未变化后写回，采集或保存失败的设备下次仍会全量采集
+    if probe_service is not None:
+        await probe_service.save_markers(confirmed_markers)
+
     return {
         "total_checked": total_checked,
+        "probe_skipped": total_checked - len(hosts_data),
         "changed_count": changed_count,
         "backup_triggered": backup_triggered,
         "changed_devices": changed_devices[:10],  # 只返回前 10 个变更设备
     }
 
 
+@celery_app.task(
+    base=BaseTask,
+    bind=True,
+    name="app.celery.tasks.backup.enforce_backup_retention",
+    queue="backup",
+)
+def enforce_backup_retention(self, device_ids: list[str] | None = None) -> dict[str, Any]:
+    """
+    备份保留策略清理任务（集合式执行）。
+
+    由备份保存路径异步投递（限定设备），或由 Celery Beat 定时全量执行（device_ids 为空）。
+
+    Args:
+        self: Celery 任务实例。
+        device_ids (list[str] | None): 设备 ID 列表，None 表示全部设备。
+
+    Returns:
+        dict[str, Any]: 清理结果摘要字典。
+    """
+    task_id = self.request.id
+    start_time = datetime.now(UTC)
+
+    async def _run() -> dict[str, int]:
+        from app.services.backup_retention_service import BackupRetentionService
+
+        async with AsyncSessionLocal() as db:
+            retention = BackupRetentionService(db, backup_crud)
+            return await retention.enforce([UUID(d) for d in device_ids] if device_ids is not None else None)
+
+    try:
+        stats = run_async(_run())
+    except Exception as e:
+        celery_details_logger.error(
+            "备份保留策略清理失败",
+            task_id=task_id,
+            devices=len(device_ids) if device_ids is not None else "all",
+            error=str(e),
+            exc_info=True,
+        )
+        raise
+
+    end_time = datetime.now(UTC)
+    result = {
+        "task_id": task_id,
+        "task_type": "enforce_backup_retention",
+        "devices": len(device_ids) if device_ids is not None else "all",
+        "duration_seconds": (end_time - start_time).total_seconds(),
+        **stats,
+    }
+    celery_task_logger.info("备份保留策略清理完成", **result)
+    return result
+
+
 # ===== 异步版本备份任务 (Phase 3 - AsyncRunner) =====
 
 
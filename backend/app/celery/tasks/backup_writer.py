@@ -0,0 +1,350 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: backup_writer.py
+@DateTime: 2026-02-03 10:00:00
+@Docs: 流式备份写入器 (Streaming Backup Writer).
+
+采集结果逐台进入有界队列，由单个后台协程按固定批次写入 MinIO 与 ncm_backup；
+配置文本落库后立即释放，峰值内存只与队列容量和批次大小相关，与设备总数无关。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+from nornir.core.task import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.enums import BackupStatus, BackupType
+from app.core.exceptions import OTPRequiredException
+from app.core.logger import celery_details_logger, celery_task_logger
+from app.core.minio_client import delete_objects_safe, put_text_safe
+from app.crud.crud_backup import backup as backup_crud
+from app.models.backup import Backup
+from app.schemas.backup import BackupCreate
+from app.services.backup_blob_service import BackupBlobService
+from app.utils.validators import compute_text_md5_async, should_skip_backup_save_due_to_unchanged_md5
+
+
+@dataclass(slots=True)
+class BackupRecord:
+    """单台设备的待写入备份结果。
+
+    Attributes:
+        device_id (str): 设备 ID。
+        status (BackupStatus): 备份状态。
+        config (str | None): 配置文本（仅成功时存在，写入后释放）。
+        error_message (str | None): 错误信息。
+        operator_id (str | None): 操作人 ID。
+    """
+
+    device_id: str
+    status: BackupStatus
+    config: str | None = None
+    error_message: str | None = None
+    operator_id: str | None = None
+
+
+def record_from_result(device_id: str, result: Result, *, operator_id: str | None = None) -> BackupRecord | None:
+    """将 AsyncRunner 单主机结果转换为待写入记录。
+
+    转换时会从 Result 中取出配置文本，AggregatedResult 只保留轻量状态，
+    配置文本的生命周期完全交给写入器管理。
+
+    Args:
+        device_id (str): 设备 ID。
+        result (Result): AsyncRunner 单主机结果。
+        operator_id (str | None): 操作人 ID。
+
+    Returns:
+        BackupRecord | None: 待写入记录；OTP 失效导致的失败返回 None（与批量保存逻辑一致，不落库）。
+    """
+    data: dict[str, Any] | None = result.result if isinstance(result.result, dict) else None
+    config = data.pop("config", None) if data is not None else None
+
+    if isinstance(result.exception, OTPRequiredException) or (data and data.get("otp_required")):
+        return None
+
+    if result.failed or not data or not data.get("success", True):
+        if result.exception:
+            error_message = str(result.exception)
+        else:
+            error_message = (data or {}).get("error") or "Unknown error"
+        return BackupRecord(
+            device_id=device_id,
+            status=BackupStatus.FAILED,
+            error_message=error_message,
+            operator_id=operator_id,
+        )
+
+    return BackupRecord(
+        device_id=device_id,
+        status=BackupStatus.SUCCESS,
+        config=config,
+        operator_id=operator_id,
+    )
+
+
+class BackupStreamWriter:
+    """
+    流式备份写入器。
+
+    生产者（AsyncRunner 进度回调）通过 submit() 投递结果，队列满时 await 反压；
+    单个消费者协程攒满 batch_size 条后写 MinIO + 批量插入 Backup 并提交事务。
+    任务中途崩溃时，已提交批次的备份不会丢失。
+
+    Attributes:
+        backup_type: 备份类型
+        batch_size: 每批提交的记录数
+        success_count: 成功采集的设备数
+        failed_count: 采集失败的设备数
+        saved_count: 已写入数据库的记录数
+        skipped_count: 因 md5 未变化而跳过的记录数
+    """
+
+    def __init__(
+        self,
+        *,
+        backup_type: str | BackupType = BackupType.MANUAL,
+        batch_size: int | None = None,
+        queue_size: int | None = None,
+    ):
+        """
+        初始化流式写入器。
+
+        Args:
+            backup_type: 备份类型
+            batch_size: 每批提交的记录数，默认读取 BACKUP_STREAM_BATCH_SIZE
+            queue_size: 队列容量，默认读取 BACKUP_STREAM_QUEUE_SIZE
+        """
+        try:
+            self.backup_type = BackupType(backup_type)
+        except ValueError:
+            self.backup_type = BackupType.MANUAL
+        self.batch_size = max(1, batch_size or settings.BACKUP_STREAM_BATCH_SIZE)
+        self._queue: asyncio.Queue[BackupRecord | None] = asyncio.Queue(
+            maxsize=max(1, queue_size or settings.BACKUP_STREAM_QUEUE_SIZE)
+        )
+        self._consumer: asyncio.Task[None] | None = None
+
+        self.success_count = 0
+        self.failed_count = 0
+        self.saved_count = 0
+        self.skipped_count = 0
+
+    async def __aenter__(self) -> "BackupStreamWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """启动后台消费者协程。"""
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume(), name="backup-stream-writer")
+
+    async def submit(self, record: BackupRecord | None) -> None:
+        """
+        投递一条备份记录（队列满时等待）。
+
+        Args:
+            record: 待写入记录，None 会被忽略
+        """
+        if record is None:
+            return
+        if self._consumer is None:
+            raise RuntimeError("BackupStreamWriter 未启动")
+        if self._consumer.done():
+            # 消费者异常退出时直接抛出，避免生产者永久阻塞在满队列上
+            self._consumer.result()
+            raise RuntimeError("BackupStreamWriter 已关闭")
+
+        if record.status == BackupStatus.SUCCESS:
+            self.success_count += 1
+        else:
+            self.failed_count += 1
+        await self._queue.put(record)
+
+    async def close(self) -> None:
+        """投递结束标记，等待剩余记录全部写入。"""
+        if self._consumer is None:
+            return
+        if not self._consumer.done():
+            await self._queue.put(None)
+        await self._consumer
+
+    def summary(self) -> dict[str, int]:
+        """
+        获取写入统计。
+
+        Returns:
+            dict[str, int]: 与 _convert_async_results_to_summary 计数字段兼容的统计
+        """
+        return {
+            "success": self.success_count,
+            "failed": self.failed_count,
+            "total": self.success_count + self.failed_count,
+            "saved": self.saved_count,
+            "skipped": self.skipped_count,
+        }
+
+    async def _consume(self) -> None:
+        batch: list[BackupRecord] = []
+        while True:
+            record = await self._queue.get()
+            if record is None:
+                break
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[BackupRecord]) -> None:
+        """写入一个批次（单独会话，提交后释放配置文本）。"""
+        async with AsyncSessionLocal() as db:
+            latest_md5: dict[UUID, str] = {}
+            if self.backup_type in {BackupType.PRE_CHANGE, BackupType.POST_CHANGE}:
+                try:
+                    latest_md5 = await backup_crud.get_devices_latest_md5(
+                        db, [UUID(r.device_id) for r in batch if r.config]
+                    )
+                except Exception as e:
+                    celery_details_logger.warning("md5 去重检查失败，继续保存", error=str(e))
+
+            prepared = await asyncio.gather(*(self._prepare(r, latest_md5) for r in batch))
+            rows = [row for row in prepared if row is not None]
+            # 配置文本已转入 rows（小配置/待去重内容）或 MinIO（大配置），记录本身不再持有
+            for r in batch:
+                r.config = None
+
+            if rows:
+                await self._insert_rows(db, rows)
+
+        celery_task_logger.debug(
+            "流式备份批次提交",
+            batch=len(batch),
+            saved=self.saved_count,
+            skipped=self.skipped_count,
+        )
+
+    async def _insert_rows(self, db: AsyncSession, rows: list[tuple[BackupCreate, str | None]]) -> None:
+        """批量插入；整批失败时逐条重试，避免单条坏数据拖垮整批。
+
+        内容块引用与备份记录在同一事务内写入，回滚时引用计数一并回滚，
+        本次写入的内容块对象随之删除；大配置对象在逐条重试仍失败后删除。
+        """
+        placed: list[str] = []
+        try:
+            await self._attach_blobs(db, rows, placed)
+            db.add_all([Backup(**row.model_dump()) for row, _ in rows])
+            await db.commit()
+            self.saved_count += len(rows)
+            return
+        except Exception as e:
+            await db.rollback()
+            await self._discard_objects(placed)
+            celery_details_logger.warning("备份批量写入失败，改为逐条写入", rows=len(rows), error=str(e))
+
+        for item in rows:
+            row = item[0]
+            placed = []
+            try:
+                await self._attach_blobs(db, [item], placed)
+                db.add(Backup(**row.model_dump()))
+                await db.commit()
+                self.saved_count += 1
+            except Exception as e:
+                await db.rollback()
+                await self._discard_objects([*placed, row.content_path] if row.content_path else placed)
+                celery_details_logger.error("保存备份记录失败", device_id=str(row.device_id), error=str(e))
+
+    @staticmethod
+    async def _attach_blobs(db: AsyncSession, rows: list[tuple[BackupCreate, str | None]], placed: list[str]) -> None:
+        """整批写入去重内容块（一次引用累加 + 一次批量插入），回填 content_hash。
+
+        新写入的 MinIO 对象名追加到 placed（写入中途失败时同样记录），供事务回滚后删除。
+        """
+        pending = [(row, config) for row, config in rows if config]
+        if not pending:
+            return
+        service = BackupBlobService(db, backup_crud)
+        try:
+            hashes = await service.store_many([config for _, config in pending], [row.device_id for row, _ in pending])
+        finally:
+            placed.extend(service.placed_objects)
+        for (row, _), content_hash in zip(pending, hashes, strict=True):
+            row.content_hash = content_hash
+
+    @staticmethod
+    async def _discard_objects(object_names: list[str]) -> None:
+        """删除回滚批次写入的 MinIO 对象（尽力而为，删除失败只记录日志）。"""
+        if not object_names:
+            return
+        failed = await delete_objects_safe(object_names)
+        if failed:
+            celery_details_logger.warning("回滚批次的对象删除失败", objects=len(failed))
+
+    async def _prepare(
+        self, record: BackupRecord, latest_md5: dict[UUID, str]
+    ) -> tuple[BackupCreate, str | None] | None:
+        """计算 md5、按大小分流 DB/MinIO，生成插入数据；md5 未变化的变更备份返回 None。
+
+        启用去重时不在此落盘，返回 (插入数据, 待写入内容块的配置文本)。
+        """
+        content = None
+        content_path = None
+        content_size = 0
+        md5_hash = None
+        blob_content = None
+        config = record.config
+
+        if config:
+            content_size = len(config.encode("utf-8"))
+            md5_hash = await compute_text_md5_async(config)
+
+            if should_skip_backup_save_due_to_unchanged_md5(
+                backup_type=self.backup_type.value,
+                status=record.status.value,
+                old_md5=latest_md5.get(UUID(record.device_id)),
+                new_md5=md5_hash,
+            ):
+                self.skipped_count += 1
+                return None
+
+            if settings.BACKUP_DEDUP_ENABLED:
+                blob_content = config
+            elif content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+                content = config
+            else:
+                object_name = f"backups/{record.device_id}/{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}.txt"
+                if await put_text_safe(object_name, config):
+                    content_path = object_name
+                else:
+                    # 熔断器打开或写入失败，降级存 DB
+                    content = config
+                    celery_details_logger.warning("大配置存 MinIO 失败，降级存 DB", device_id=record.device_id)
+
+        try:
+            row = BackupCreate(
+                device_id=UUID(record.device_id),
+                backup_type=self.backup_type,
+                content=content,
+                content_path=content_path,
+                content_size=content_size,
+                md5_hash=md5_hash,
+                status=record.status,
+                error_message=record.error_message if record.status != BackupStatus.SUCCESS else None,
+                operator_id=UUID(str(record.operator_id)) if record.operator_id else None,
+            )
+            return row, blob_content
+        except Exception as e:
+            celery_details_logger.error("保存备份记录失败", device_id=record.device_id, error=str(e))
+            return None
@@ -139,7 +139,6 @@ def scheduled_collect_all(self) -> dict[str, Any]:
             result = await service.collect_all_active_devices(
                 collect_arp=True,
                 collect_mac=True,
-                concurrency=10,
             )
             # 使用 mode="json" 确保 datetime 等类型被序列化为 JSON 兼容格式
             return result.model_dump(mode="json")
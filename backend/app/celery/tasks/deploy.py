@@ -40,6 +40,7 @@ from app.models.device import Device
 from app.models.task import Task
 from app.models.template import Template
 from app.network.platform_config import get_platform_for_vendor
+from app.services.backup_blob_service import load_backup_content_safe
 from app.services.render_service import RenderService
 
 # 支持回滚的厂商列表（扩展支持 Huawei/Cisco）
@@ -377,7 +378,8 @@ async def _rollback_task_async(self, task_id: str) -> dict[str, Any]:
                 continue
 
             backup = await db.get(Backup, UUID(backup_id))
-            if not backup or not backup.content:
+            backup_content = await load_backup_content_safe(db, backup) if backup else None
+            if not backup or not backup_content:
                 cannot_rollback_devices.append({
                     "device_id": device_id_str,
                     "device_name": d.name,
@@ -403,8 +405,8 @@ async def _rollback_task_async(self, task_id: str) -> dict[str, Any]:
                 })
                 continue
 
-            expected_md5 = backup.md5_hash or hashlib.md5(backup.content.encode("utf-8")).hexdigest()
-            cmds = normalize_rendered_config(backup.content)
+            expected_md5 = backup.md5_hash or hashlib.md5(backup_content.encode("utf-8")).hexdigest()
+            cmds = normalize_rendered_config(backup_content)
 
             backup_info[device_id_str] = {
                 "backup": backup,
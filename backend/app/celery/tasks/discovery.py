@@ -55,7 +55,7 @@ async def _execute_scan(
     Args:
         scan_service: 扫描服务实例
         subnet: 网段 (CIDR 格式)
-        scan_type: 扫描类型 (nmap/masscan/auto)
+        scan_type: 扫描类型 (nmap/masscan/sweep/auto)
         ports: 扫描端口
 
     Returns:
@@ -69,6 +69,8 @@ async def _execute_scan(
         return await scan_service.masscan_scan(subnet, ports=ports)
     if resolved == "nmap":
         return await scan_service.nmap_scan(subnet, ports=ports)
+    if resolved == "sweep":
+        return await scan_service.sweep_scan(subnet, ports=ports)
 
     # 未检测到可用扫描器
     return ScanResultSchema(
@@ -102,7 +104,7 @@ def scan_subnet(
     Args:
         self: Celery 任务实例。
         subnet (str): 网段 (CIDR 格式)。
-        scan_type (str): 扫描类型 (nmap/masscan/auto)，默认为 auto。
+        scan_type (str): 扫描类型 (nmap/masscan/sweep/auto)，默认为 auto。
         ports (str | None): 扫描端口，默认为 None。
         snmp_cred_id (str | None): SNMP 凭据 ID，默认为 None。
 
@@ -128,6 +130,30 @@ def scan_subnet(
                 meta={"progress": 5, "stage": "scanning", "subnet": subnet},
             )
 
+            if scan_service.resolve_scan_type(scan_type) == "sweep":
+                # 原生异步扫描：边扫描边补全入库
+                result, processed = await scan_service.process_scan_stream(
+                    db,
+                    scan_service.iter_sweep(subnet, ports),
+                    subnet=subnet,
+                    scan_type="sweep",
+                    scan_task_id=celery_task_id,
+                    snmp_cred_id=snmp_cred_uuid,
+                )
+                celery_task_logger.info(
+                    "扫描结果流式处理完成",
+                    subnet=subnet,
+                    hosts_found=result.hosts_found,
+                    processed=processed,
+                )
+                safe_update_state(
+                    self,
+                    celery_task_id,
+                    state="PROGRESS",
+                    meta={"progress": 100, "stage": "done", "subnet": subnet},
+                )
+                return result.model_dump(mode="json")
+
             # 执行扫描（使用共用函数）
             result = await _execute_scan(scan_service, subnet, scan_type, ports)
 
@@ -194,7 +220,7 @@ def scan_subnets_batch(
     Args:
         self: Celery 任务实例。
         subnets (list[str]): 网段列表。
-        scan_type (str): 扫描类型 (nmap/masscan/auto)，默认为 auto。
+        scan_type (str): 扫描类型 (nmap/masscan/sweep/auto)，默认为 auto。
         ports (str | None): 扫描端口，默认为 None。
         snmp_cred_id (str | None): SNMP 凭据 ID，默认为 None。
 
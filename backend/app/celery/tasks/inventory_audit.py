@@ -24,7 +24,10 @@ from app.crud.crud_discovery import discovery_crud
 from app.models.device import Device
 from app.models.discovery import Discovery
 from app.models.inventory_audit import InventoryAudit
+from app.schemas.discovery import ScanResult
+from app.services.nmap_scan_service import NMAP_TIMEOUT_ERROR
 from app.services.scan_service import ScanService
+from app.services.scan_target_planner import ScanBatch, plan_scan_batches, split_hosts_by_target
 
 
 @celery_app.task(
@@ -97,37 +100,74 @@ async def _run_inventory_audit_async(self, audit_id: str) -> dict[str, Any]:
         processed_hosts = 0
         scan_errors: list[str] = []
 
-        # 1) 并发执行 Nmap 扫描（使用 Semaphore 控制最大并发数）
+        # 1) 规划扫描批次：剔除被包含的目标，零散目标打包为多目标扫描调用
+        batches, invalid_targets = plan_scan_batches(
+            subnets,
+            max_targets=settings.SCAN_TARGETS_PER_INVOCATION,
+            max_addresses=settings.SCAN_ADDRESSES_PER_INVOCATION,
+        )
+        scan_errors.extend(f"{t}: 非法扫描目标" for t in invalid_targets)
+        # nmap 未安装时使用进程内异步扫描
+        scanner = "nmap" if service.is_nmap_available() else "sweep"
+        celery_task_logger.info(
+            "扫描目标规划完成",
+            audit_id=audit_id,
+            targets=len(subnets),
+            invocations=len(batches),
+            scanner=scanner,
+        )
+
+        # 并发执行扫描调用（使用 Semaphore 控制最大并发数）
         semaphore = asyncio.Semaphore(settings.SCAN_MAX_CONCURRENT_SUBNETS)
-        scan_results_map: dict[str, Any] = {}  # subnet -> ScanResult
+        scan_results_map: dict[str, ScanResult] = {}  # 原始目标 -> ScanResult
 
-        async def scan_subnet(subnet: str) -> tuple[str, Any, str | None]:
-            """扫描单个子网，返回 (subnet, ScanResult, 错误信息)"""
+        async def scan_batch(batch: ScanBatch) -> list[tuple[ScanBatch, ScanResult | None, str | None]]:
+            """执行一次多目标扫描，返回 [(批次, ScanResult, 错误信息)]；多网段批次超时后逐网段重试"""
             async with semaphore:
                 try:
-                    celery_task_logger.info("开始扫描子网", subnet=subnet, audit_id=audit_id)
-                    scan_result = await service.nmap_scan(subnet=subnet, ports=ports)
                     celery_task_logger.info(
-                        "子网扫描完成",
-                        subnet=subnet,
+                        "开始扫描", targets=len(batch.targets), networks=len(batch.networks), audit_id=audit_id
+                    )
+                    if scanner == "nmap":
+                        scan_result = await service.nmap_scan(subnet=batch.expression, ports=ports)
+                    else:
+                        scan_result = await service.sweep_scan(batch.expression, ports=ports)
+                    celery_task_logger.info(
+                        "扫描完成",
+                        targets=len(batch.targets),
                         hosts_found=scan_result.hosts_found,
                     )
-                    return subnet, scan_result, None
                 except Exception as e:
-                    celery_details_logger.error("子网扫描失败", subnet=subnet, error=str(e))
-                    return subnet, None, f"{subnet}: {e}"
+                    celery_details_logger.error("扫描失败", targets=len(batch.targets), error=str(e))
+                    return [(batch, None, str(e))]
+
+            # 释放并发槽位后再拆分，单网段批次各自排队
+            if len(batch.networks) > 1 and (scan_result.error or "").startswith(NMAP_TIMEOUT_ERROR):
+                celery_task_logger.warning(
+                    "多目标扫描超时，改为逐网段扫描", networks=len(batch.networks), audit_id=audit_id
+                )
+                parts = await asyncio.gather(*[scan_batch(b) for b in batch.split()])
+                return [item for part in parts for item in part]
+            return [(batch, scan_result, scan_result.error)]
 
-        # 并发执行所有子网扫描
-        if subnets:
-            results = await asyncio.gather(*[scan_subnet(s) for s in subnets])
-            for subnet, scan_result, error in results:
+        if batches:
+            results = [item for part in await asyncio.gather(*[scan_batch(b) for b in batches]) for item in part]
+            for batch, scan_result, error in results:
                 if error:
-                    scan_errors.append(error)
-                elif scan_result:
-                    scan_results_map[subnet] = scan_result
+                    scan_errors.extend(f"{t}: {error}" for t in batch.targets)
+                    continue
+                if scan_result is None:
+                    continue
+                # 按原始目标拆分结果
+                for target, hosts in split_hosts_by_target(scan_result.hosts, batch.targets).items():
+                    scan_results_map[target] = scan_result.model_copy(
+                        update={"subnet": target, "hosts": hosts, "hosts_found": len(hosts)}
+                    )
 
         # 2) 串行写入数据库（避免并发写入冲突）
         for subnet, scan_result in scan_results_map.items():
+            if not scan_result.hosts:
+                continue
             try:
                 count = await service.process_scan_result(
                     db=db, scan_result=scan_result, scan_task_id=str(audit.id)
@@ -158,6 +198,7 @@ async def _run_inventory_audit_async(self, audit_id: str) -> dict[str, Any]:
 
         result = {
             "subnets": subnets,
+            "scan_invocations": len(batches),
             "processed_hosts": processed_hosts,
             "discoveries_total": int(total),
             "discoveries_by_status": by_status,
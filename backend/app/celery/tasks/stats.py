@@ -0,0 +1,53 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: stats.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总 Celery 任务 (Stats Rollup Tasks).
+"""
+
+from typing import Any
+
+from app.celery.app import celery_app
+from app.celery.base import BaseTask, run_async
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.logger import celery_details_logger, celery_task_logger
+from app.crud.crud_stat import stat_daily_crud
+from app.services.stats_service import StatsService
+
+
+@celery_app.task(
+    base=BaseTask,
+    bind=True,
+    name="app.celery.tasks.stats.compact_daily_stats",
+    queue="discovery",
+)
+def compact_daily_stats(self, days: int | None = None) -> dict[str, Any]:
+    """
+    按源表重算最近几天的每日统计汇总。
+
+    由 Celery Beat 按 STATS_ROLLUP_INTERVAL_MINUTES 周期触发，修正增量累加的遗漏；
+    历史汇总由 migrate_stats_rollup.py 回填（也可手动调用 compact_daily_stats.delay(days=N)）。
+
+    Args:
+        self: Celery 任务实例。
+        days: 重算天数（含今天），默认 STATS_ROLLUP_RECOMPUTE_DAYS。
+
+    Returns:
+        dict[str, Any]: 各指标重算后的汇总行数。
+    """
+    task_id = self.request.id
+    days = days or settings.STATS_ROLLUP_RECOMPUTE_DAYS
+
+    async def _compact() -> dict[str, int]:
+        async with AsyncSessionLocal() as db:
+            return await StatsService(db, stat_daily_crud).compact(days)
+
+    try:
+        rows = run_async(_compact())
+        celery_task_logger.info("每日统计汇总重算完成", task_id=task_id, days=days, **rows)
+        return {"task_id": task_id, "days": days, "rows": rows}
+    except Exception as e:
+        celery_details_logger.error("每日统计汇总重算失败", task_id=task_id, error=str(e), exc_info=True)
+        raise
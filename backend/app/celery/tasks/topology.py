@@ -263,7 +263,7 @@ def build_topology_cache(self) -> dict[str, Any]:
     """
     构建拓扑缓存 - Celery 任务。
 
-    从数据库构建 vis.js 格式的拓扑数据并缓存到 Redis。
+    从数据库重建全部源设备的邻接片段并缓存到 Redis。
 
     Args:
         self: Celery 任务实例。
@@ -276,20 +276,21 @@ def build_topology_cache(self) -> dict[str, Any]:
         async with AsyncSessionLocal() as db:
             topology_service = _create_topology_service()
 
-            topology = await topology_service.build_topology(db)
+            topology = await topology_service.build_topology(db, refresh=True)
+            stats = topology["stats"]
 
             celery_task_logger.info(
                 "拓扑缓存构建完成",
-                nodes=topology.stats.total_nodes,
-                edges=topology.stats.total_edges,
+                nodes=stats["total_nodes"],
+                edges=stats["total_edges"],
             )
 
             return {
                 "task_id": self.request.id,
-                "nodes_count": topology.stats.total_nodes,
-                "edges_count": topology.stats.total_edges,
-                "cmdb_devices": topology.stats.cmdb_devices,
-                "unknown_devices": topology.stats.unknown_devices,
+                "nodes_count": stats["total_nodes"],
+                "edges_count": stats["total_edges"],
+                "cmdb_devices": stats["cmdb_devices"],
+                "unknown_devices": stats["unknown_devices"],
             }
 
     return run_async(_build_cache())
@@ -191,7 +191,7 @@ def user_permissions_cache_key(user_id: UUID) -> str:
 
 
 async def invalidate_user_permissions_cache(user_ids: Iterable[UUID]) -> int:
-    """精确失效指定用户的权限缓存。
+    """精确失效指定用户的权限缓存（同时失效认证主体缓存）。
 
     使用 Redis Pipeline 批量删除，提高性能。
 
@@ -201,13 +201,18 @@ async def invalidate_user_permissions_cache(user_ids: Iterable[UUID]) -> int:
     Returns:
         int: 删除的缓存 Key 数量。
     """
-    if redis_client is None:
-        return 0
-
     ids = list(user_ids)
     if not ids:
         return 0
 
+    # 延迟导入：principal_cache 依赖本模块的 redis_client
+    from app.core.principal_cache import invalidate_principals
+
+    await invalidate_principals(ids)
+
+    if redis_client is None:
+        return 0
+
     deleted = 0
     try:
         keys = [user_permissions_cache_key(user_id) for user_id in ids]
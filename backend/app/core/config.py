@@ -37,6 +37,9 @@ class Settings(BaseSettings):
     JWT_ISSUER: str = "admin-rbac-backend"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # 30 分钟
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # 7 天
+    PRINCIPAL_CACHE_TTL: int = 300  # 认证主体 Redis 缓存过期时间（秒）
+    PRINCIPAL_LOCAL_CACHE_TTL: int = 5  # 认证主体进程内缓存时间（秒），即撤销/权限变更最大延迟，0 禁用
+    PRINCIPAL_LOCAL_CACHE_SIZE: int = 4096  # 认证主体进程内缓存最大条目数
     PASSWORD_COMPLEXITY_ENABLED: bool = True  # 开启后需要大小写+数字+特殊字符且>=8位
 
     # Auth Cookie/CSRF
@@ -68,6 +71,11 @@ class Settings(BaseSettings):
     DB_POOL_RECYCLE: int = 3600  # 连接回收时间（秒），防止数据库端断开空闲连接
     DB_POOL_TIMEOUT: int = 30  # 获取连接超时时间（秒）
 
+    # 操作日志批量写入（请求路径只入队，后台写入器批量落库）
+    OPERATION_LOG_QUEUE_MAX: int = 10000  # 待写入队列上限，队列满时丢弃新日志并计数
+    OPERATION_LOG_BATCH_SIZE: int = 200  # 单次批量写入的最大日志数
+    OPERATION_LOG_FLUSH_INTERVAL_MS: int = 500  # 最长攒批时间（毫秒）
+
     # 初始化超级管理员 (Initial Superuser)
     FIRST_SUPERUSER: str = "admin"
     FIRST_SUPERUSER_PASSWORD: str = "password"
@@ -122,17 +130,28 @@ class Settings(BaseSettings):
     CELERY_BEAT_BACKUP_HOUR: int = 2  # 每日全量备份时间（小时，0-23）
     CELERY_BEAT_BACKUP_MINUTE: int = 0  # 每日全量备份时间（分钟，0-59）
     CELERY_BEAT_INCREMENTAL_HOURS: str = "*/4"  # 增量检查间隔（cron 格式）
+    CELERY_BEAT_RETENTION_HOUR: int = 5  # 每日全量备份保留策略清理时间（小时，0-23）
 
     # ARP/MAC 采集配置
-    COLLECT_CACHE_TTL: int = 3600  # ARP/MAC 缓存过期时间（秒），默认 1 小时
+    COLLECT_CACHE_TTL: int = 3600  # ARP/MAC 表与定位结果的有效期（秒），默认 1 小时
     CELERY_BEAT_COLLECT_MINUTE: int = 30  # 定时采集分钟（每小时的第几分钟执行）
+    COLLECT_NUM_WORKERS: int = 50  # ARP/MAC 批量采集最大并发设备数
+    COLLECT_HISTORY_RETENTION_DAYS: int = 7  # ARP/MAC 快照（过期后作比对基线）与 MAC 历史轨迹保留天数
+    COLLECT_HISTORY_MAX_EVENTS: int = 500  # 单个 MAC 最多保留的历史事件数
 
     # 网络扫描配置
     SCAN_DEFAULT_PORTS: str = "22,23,80,443,161"  # Nmap 默认扫描端口
     SCAN_TIMEOUT: int = 300  # 扫描超时时间（秒）
     SCAN_RATE: int = 1000  # Masscan 扫描速率（packets/sec）
     SCAN_MAX_CONCURRENT_SUBNETS: int = 4  # 资产盘点最大并发扫描子网数
+    SCAN_TARGETS_PER_INVOCATION: int = 256  # 资产盘点单次扫描调用合并的最大网段数
+    SCAN_ADDRESSES_PER_INVOCATION: int = 256  # 资产盘点单次扫描调用覆盖的最大地址数（需在 SCAN_TIMEOUT 内完成）
     SCAN_MAX_CONCURRENT: int = 5  # 批量网段扫描最大并发数
+    SCAN_SWEEP_RATE: int = 2000  # 原生异步扫描每秒最大连接数（<=0 不限速）
+    SCAN_SWEEP_CONCURRENCY: int = 256  # 原生异步扫描同时探测的最大主机数
+    SCAN_SWEEP_CONNECT_TIMEOUT: float = 1.5  # 原生异步扫描单次连接超时（秒）
+    SCAN_SWEEP_GRAB_BANNER: bool = True  # 原生异步扫描是否抓取 SSH Banner
+    SCAN_SWEEP_BATCH_SIZE: int = 64  # 原生异步扫描流式入库批大小
     SCAN_SCHEDULED_SUBNETS: str = ""  # 定时扫描网段列表（逗号分隔，如 "192.168.1.0/24,10.0.0.0/24"）
     CELERY_BEAT_SCAN_HOUR: int = 3  # 定时扫描小时（0-23）
     CELERY_BEAT_SCAN_MINUTE: int = 0  # 定时扫描分钟
@@ -142,6 +161,7 @@ class Settings(BaseSettings):
     SNMP_TIMEOUT_MS: int | None = None  # 兼容毫秒超时配置（优先级高于 SNMP_TIMEOUT_SECONDS）
     SNMP_RETRIES: int = 2  # SNMP 重试次数
     SNMP_MAX_CONCURRENCY: int = 50  # SNMP 并发数（资产补全）
+    SNMP_BULK_MAX_REPETITIONS: int = 25  # GETBULK 每个 PDU 返回的最大行数
 
     @model_validator(mode="after")
     def _normalize_snmp_timeout(self):
@@ -157,9 +177,20 @@ class Settings(BaseSettings):
     ASYNC_SSH_SEMAPHORE: int = 100  # 最大并发 SSH 连接数
     ASYNC_SSH_TIMEOUT: int = 30  # 单设备 SSH 命令超时（秒）
     ASYNC_SSH_CONNECT_TIMEOUT: int = 10  # SSH 连接超时（秒）
+    ASYNC_GROUP_CONCURRENCY: int = 0  # 单个设备分组最大并发数（0 表示不限制）
+    ASYNC_DEPT_CONCURRENCY: int = 0  # 单个部门最大并发数（0 表示不限制）
+    ASYNC_JUMP_HOST_CONCURRENCY: int = 10  # 单个跳板机最大并发数（host.data.jump_host，0 表示不限制）
+    ASYNC_ADAPTIVE_ENABLED: bool = True  # 是否启用 AIMD 自适应并发（上限为 ASYNC_SSH_SEMAPHORE/num_workers）
+    ASYNC_ADAPTIVE_INITIAL_CONCURRENCY: int = 20  # 自适应初始并发数
+    ASYNC_ADAPTIVE_MIN_CONCURRENCY: int = 5  # 自适应最小并发数
+    ASYNC_ADAPTIVE_DECREASE_FACTOR: float = 0.5  # 认证失败/超时/耗时突增时的并发乘性减小系数
+    ASYNC_ADAPTIVE_LATENCY_FACTOR: float = 3.0  # 单设备耗时超过基线该倍数视为耗时突增
+    ASYNC_ADAPTIVE_COOLDOWN_SECONDS: float = 5.0  # 两次减小之间的最短间隔（秒）
 
     # Scrapli 连接池配置
     SCRAPLI_POOL_MAX_CONNECTIONS: int = 100  # 连接池最大连接数
+    SCRAPLI_POOL_MAX_SESSIONS_PER_DEVICE: int = 2  # 单设备（host:port:username）最大会话数
+    SCRAPLI_POOL_ACQUIRE_TIMEOUT: float = 60.0  # 等待可用会话超时（秒）
     SCRAPLI_POOL_MAX_IDLE_TIME: int = 300  # 连接最大空闲时间（秒）
     SCRAPLI_POOL_MAX_AGE: int = 3600  # 连接最大存活时间（秒）
     SCRAPLI_POOL_HEALTH_CHECK: bool = True  # 是否启用连接健康检查
@@ -184,6 +215,22 @@ class Settings(BaseSettings):
     ALERT_EMAIL_FROM: str = ""
     ALERT_EMAIL_TO: str = ""
 
+    # 通知发件箱投递（告警与发件箱记录同事务写入，由 Worker 批量投递）
+    ALERT_WEBHOOK_BATCH_SIZE: int = 50  # 单次 Webhook 请求携带的告警数（1 为单告警兼容格式）
+    ALERT_WEBHOOK_TIMEOUT: float = 10.0  # Webhook 请求超时（秒）
+    ALERT_EMAIL_DIGEST_SECONDS: int = 300  # 邮件摘要窗口（秒），窗口内告警合并为一封邮件
+    ALERT_NOTIFY_DISPATCH_INTERVAL: int = 30  # 发件箱投递间隔（秒）
+    ALERT_NOTIFY_DISPATCH_BATCH: int = 500  # 每轮领取的待发送通知数
+    ALERT_NOTIFY_MAX_ATTEMPTS: int = 5  # 最大发送次数（含首次）
+    ALERT_NOTIFY_RETRY_BASE_SECONDS: int = 30  # 重试退避基数（秒），按 2^n 递增
+    ALERT_NOTIFY_RETRY_MAX_SECONDS: int = 3600  # 重试退避上限（秒）
+    ALERT_NOTIFY_RETENTION_DAYS: int = 7  # 已发送/失败通知记录保留天数
+
+    # 每日统计汇总（仪表盘/趋势接口只读汇总行）
+    DASHBOARD_CACHE_TTL: int = 60  # 仪表盘全局计数/告警统计缓存过期时间（秒）
+    STATS_ROLLUP_INTERVAL_MINUTES: int = 10  # 汇总重算间隔（分钟）
+    STATS_ROLLUP_RECOMPUTE_DAYS: int = 2  # 每次重算的天数（含今天）
+
     # MinIO（大配置文件存储）
     MINIO_ENDPOINT: str = "localhost:9000"
     MINIO_ACCESS_KEY: str = "minioadmin"
@@ -200,6 +247,16 @@ class Settings(BaseSettings):
     BACKUP_BATCH_SIZE: int = 10  # 备份任务批次大小（每批处理的设备数）
     BACKUP_NUM_WORKERS: int = 50  # 备份任务最大并发数
 
+    # 流式备份写入（定时全量备份逐台落库，避免全部配置驻留内存）
+    BACKUP_STREAM_ENABLED: bool = True  # 是否启用流式写入
+    BACKUP_STREAM_BATCH_SIZE: int = 50  # 每批提交的备份记录数
+    BACKUP_STREAM_QUEUE_SIZE: int = 200  # 写入队列容量（队列满时反压采集结果回调）
+
+    # 增量检查变更探测（先取配置变更标记，标记未变化的设备跳过全量采集）
+    BACKUP_CHANGE_PROBE_ENABLED: bool = True  # 是否启用变更探测
+    BACKUP_CHANGE_PROBE_CLI_ENABLED: bool = True  # SNMP 不可用时是否使用 CLI 轻量命令探测
+    BACKUP_CHANGE_MARKER_TTL_SECONDS: int = 86400  # 标记缓存有效期，过期后强制全量采集一次
+
     # 备份保留策略（按设备+类型保留最近 N 条，0 表示不限制）
     BACKUP_RETENTION_SCHEDULED_KEEP: int = 500  # 定时备份保留条数
     BACKUP_RETENTION_MANUAL_KEEP: int = 200  # 手动备份保留条数
@@ -210,10 +267,23 @@ class Settings(BaseSettings):
     # 备份内容存储分流阈值：小于阈值存 DB，达到或超过阈值存 MinIO
     BACKUP_CONTENT_SIZE_THRESHOLD_BYTES: int = 64 * 1024
 
+    # 备份内容去重：按 SHA-256 内容寻址存储，相同配置只存一份（引用计数归零时删除）
+    # 已有库开启前需先执行 python migrate_backup_storage.py --schema（补列并放宽内容约束）
+    BACKUP_DEDUP_ENABLED: bool = True
+
+    # 内容块存储编码（仅去重开启时生效）：plain 明文 / compressed 完整快照压缩 / delta 相对上一版本的差量
+    BACKUP_STORAGE_MODE: Literal["plain", "compressed", "delta"] = "plain"
+    BACKUP_COMPRESSION: Literal["gzip", "zstd"] = "gzip"  # zstd 不可用时自动回退 gzip
+    BACKUP_DELTA_SNAPSHOT_INTERVAL: int = 20  # 差量链最大长度，达到后写入完整快照
+
     # 备份保留策略（按天数）：默认保留最近 30 天的所有备份类型，0 表示不限制
     # 注意：即便超过天数，也至少保留每台设备 1 条备份（优先保留最新成功备份）
     BACKUP_RETENTION_KEEP_DAYS: int = 30
 
+    # 配置差异（变更告警与差异查看）
+    CONFIG_DIFF_ENGINE: Literal["patience", "difflib"] = "patience"  # patience 大配置近线性；difflib 为旧实现
+    CONFIG_DIFF_ALERT_MAX_SECTIONS: int = 50  # 变更告警详情中最多列出的配置段数
+
     # 导入导出（Import/Export）
     IMPORT_EXPORT_TMP_DIR: str = ""  # 空表示使用系统临时目录下的 ncm 子目录
     IMPORT_EXPORT_TTL_HOURS: int = 24  # 导入临时数据默认保留时长（小时）
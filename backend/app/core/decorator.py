@@ -134,9 +134,11 @@ def transactional() -> Callable:
 
                 return result
             except Exception as e:
-                # 发生异常，回滚事务
+                # 发生异常，回滚事务；已登记的提交后任务随之作废
                 logger.error(f"{func.__name__} 中的事务回滚: {e}")
                 await db_session.rollback()
+                if args and isinstance(getattr(args[0], "_post_commit_tasks", None), list):
+                    args[0]._post_commit_tasks = []
                 raise
 
         return wrapper
@@ -245,6 +245,30 @@ class AlertStatus(str, Enum):
         return {cls.OPEN.value, cls.ACK.value}
 
 
+class NotificationChannel(str, Enum):
+    """告警通知渠道。"""
+
+    WEBHOOK = "webhook"  # Webhook
+    EMAIL = "email"  # 邮件
+
+
+class StatMetric(str, Enum):
+    """每日统计汇总指标。"""
+
+    LOGIN = "login"  # 登录次数
+    OPERATION = "operation"  # 操作次数
+    ALERT = "alert"  # 新增告警数
+    BACKUP = "backup"  # 配置备份数
+
+
+class NotificationStatus(str, Enum):
+    """告警通知发件箱状态。"""
+
+    PENDING = "pending"  # 待发送（含等待重试）
+    SENT = "sent"  # 已发送
+    FAILED = "failed"  # 重试耗尽或渠道未启用
+
+
 # ===== 模板参数类型枚举 =====
 
 
@@ -10,7 +10,7 @@ import asyncio
 from collections import defaultdict
 from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Protocol
 
 from app.core.logger import logger
 
@@ -45,17 +45,31 @@ class OperationLogEvent(Event):
 EventHandler = Callable[[Event], Coroutine[Any, Any, None]]
 
 
+class EventSink(Protocol):
+    """
+    同步入队的事件接收器（如带缓冲的批量写入器）。
+
+    submit 在发布方调用栈内同步执行，必须非阻塞；flush 在 drain 时调用，写出缓冲中的事件。
+    """
+
+    def submit(self, event: Event) -> None: ...
+
+    async def flush(self, timeout: float) -> None: ...
+
+
 class EventBus:
     """
     简单的内存事件总线。
 
     支持:
     - subscribe(event_type, handler): 订阅事件。
+    - subscribe_sink(event_type, sink): 订阅事件（同步入队，不创建任务）。
     - publish(event): 发布事件，异步执行所有订阅者。
     """
 
     def __init__(self) -> None:
         self._handlers: dict[type[Event], list[EventHandler]] = defaultdict(list)
+        self._sinks: dict[type[Event], list[EventSink]] = defaultdict(list)
         self._pending_tasks: set[asyncio.Task] = set()
 
     def subscribe(self, event_type: type[Event], handler: EventHandler) -> None:
@@ -71,6 +85,20 @@ class EventBus:
         self._handlers[event_type].append(handler)
         logger.info(f"已订阅事件: {event_type.__name__} -> {handler.__name__}")
 
+    def subscribe_sink(self, event_type: type[Event], sink: EventSink) -> None:
+        """以接收器订阅指定类型的事件。发布时同步调用 sink.submit，drain 时调用 sink.flush。
+
+        Args:
+            event_type (type[Event]): 事件类型。
+            sink (EventSink): 事件接收器。
+
+        Returns:
+            None: 无返回值。
+        """
+        if sink not in self._sinks[event_type]:
+            self._sinks[event_type].append(sink)
+        logger.info(f"已订阅事件: {event_type.__name__} -> {type(sink).__name__}")
+
     async def publish(self, event: Event) -> None:
         """发布事件。所有订阅者将异步执行。
 
@@ -83,8 +111,18 @@ class EventBus:
         event_type = type(event)
         handlers = self._handlers.get(event_type, [])
 
+        sinks = self._sinks.get(event_type, [])
+
+        # 接收器同步入队（不创建任务）
+        for sink in sinks:
+            try:
+                sink.submit(event)
+            except Exception as e:
+                logger.error(f"事件入队错误 ({type(sink).__name__}): {e}")
+
         if not handlers:
-            logger.debug(f"未找到事件订阅者: {event_type.__name__}")
+            if not sinks:
+                logger.debug(f"未找到事件订阅者: {event_type.__name__}")
             return
 
         # 创建所有 handler 的任务（不阻塞主流程，但会跟踪任务，便于 shutdown 时 drain）
@@ -99,16 +137,23 @@ class EventBus:
         """尽量等待已发布但未完成的事件处理任务完成。
 
         说明：这是“尽力而为”的可靠性增强，不保证强一致。
+        先等待订阅者任务，再在剩余时间内写出各接收器缓冲中的事件。
         """
-
-        if not self._pending_tasks:
-            return
-
-        tasks = list(self._pending_tasks)
-        try:
-            await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=timeout)
-        except TimeoutError:
-            logger.warning(f"事件总线 drain 超时，剩余任务数: {len(self._pending_tasks)}")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        if self._pending_tasks:
+            tasks = list(self._pending_tasks)
+            try:
+                await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=timeout)
+            except TimeoutError:
+                logger.warning(f"事件总线 drain 超时，剩余任务数: {len(self._pending_tasks)}")
+
+        for sink in {id(sink): sink for sinks in self._sinks.values() for sink in sinks}.values():
+            try:
+                await sink.flush(max(deadline - loop.time(), 0.0))
+            except Exception as e:
+                logger.warning(f"事件接收器 flush 失败 ({type(sink).__name__}): {e}")
 
     async def _safe_call(self, handler: EventHandler, event: Event) -> None:
         """安全调用 handler，捕获异常防止影响其他 handler。
@@ -6,7 +6,7 @@
 @Docs: Prometheus 指标收集模块 (Prometheus Metrics).
 """
 
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 from starlette.requests import Request
 from starlette.responses import Response
 
@@ -35,6 +35,17 @@ ACTIVE_USERS = Counter(
     "活跃用户总数",
 )
 
+OPERATION_LOG_EVENTS = Counter(
+    "operation_log_events_total",
+    "操作日志事件总数",
+    ["result"],  # written / dropped / failed
+)
+
+OPERATION_LOG_QUEUE_DEPTH = Gauge(
+    "operation_log_queue_depth",
+    "操作日志待写入队列长度",
+)
+
 
 def record_request_metrics(method: str, endpoint: str, status_code: int, duration: float) -> None:
     """记录请求指标。
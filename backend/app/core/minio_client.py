@@ -8,11 +8,11 @@
 支持熔断器保护，当 MinIO 不可用时快速降级。
 """
 
-
 import asyncio
 from io import BytesIO
 
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 
 from app.core.circuit_breaker import CircuitBreakerOpenError, minio_circuit_breaker
@@ -180,6 +180,101 @@ async def get_text_safe(object_name: str) -> str | None:
         return None
 
 
+async def put_bytes(object_name: str, data: bytes, *, content_type: str = "application/octet-stream") -> None:
+    """写入二进制内容到 MinIO（无熔断保护）。
+
+    Args:
+        object_name (str): 对象名称。
+        data (bytes): 二进制内容。
+        content_type (str): 内容类型，默认为 "application/octet-stream"。
+
+    Returns:
+        None: 无返回值。
+
+    Raises:
+        S3Error: MinIO 操作失败时。
+    """
+    client = _get_minio()
+    await ensure_bucket()
+    bio = BytesIO(data)
+
+    def _put() -> None:
+        client.put_object(
+            settings.MINIO_BUCKET,
+            object_name,
+            bio,
+            length=len(data),
+            content_type=content_type,
+        )
+
+    await asyncio.to_thread(_put)
+
+
+async def put_bytes_safe(
+    object_name: str,
+    data: bytes,
+    *,
+    content_type: str = "application/octet-stream",
+) -> bool:
+    """
+    写入二进制内容到 MinIO（带熔断保护）。
+
+    当 MinIO 不可用时，返回 False 而不是抛出异常。
+
+    Args:
+        object_name: 对象名称
+        data: 二进制内容
+        content_type: 内容类型
+
+    Returns:
+        bool: 是否成功
+    """
+    try:
+        await minio_circuit_breaker.call(
+            put_bytes,
+            object_name,
+            data,
+            content_type=content_type,
+        )
+        return True
+    except CircuitBreakerOpenError as e:
+        logger.warning(
+            "MinIO 熔断器打开，跳过写入",
+            object_name=object_name,
+            remaining=e.remaining_time,
+        )
+        return False
+    except Exception as e:
+        logger.error("MinIO 写入失败", object_name=object_name, error=str(e))
+        return False
+
+
+async def get_bytes(object_name: str) -> bytes:
+    """从 MinIO 读取二进制内容（无熔断保护）。
+
+    Args:
+        object_name (str): 对象名称。
+
+    Returns:
+        bytes: 二进制内容。
+
+    Raises:
+        S3Error: MinIO 操作失败时。
+    """
+    client = _get_minio()
+    await ensure_bucket()
+
+    def _get() -> bytes:
+        resp = client.get_object(settings.MINIO_BUCKET, object_name)
+        try:
+            return resp.read()
+        finally:
+            resp.close()
+            resp.release_conn()
+
+    return await asyncio.to_thread(_get)
+
+
 async def delete_object(object_name: str) -> None:
     """从 MinIO 删除对象（无熔断保护）。
 
@@ -231,6 +326,66 @@ async def delete_object_safe(object_name: str) -> bool:
         return False
 
 
+async def delete_objects(object_names: list[str], *, chunk_size: int = 1000) -> list[str]:
+    """从 MinIO 批量删除对象（无熔断保护，每次请求最多 chunk_size 个）。
+
+    Args:
+        object_names (list[str]): 对象名称列表。
+        chunk_size (int): 单次 DeleteObjects 请求的对象数，默认 1000（S3 上限）。
+
+    Returns:
+        list[str]: 删除失败的对象名称。
+
+    Raises:
+        S3Error: MinIO 操作失败时。
+    """
+    if not object_names:
+        return []
+
+    client = _get_minio()
+    await ensure_bucket()
+
+    def _del() -> list[str]:
+        failed: list[str] = []
+        for i in range(0, len(object_names), chunk_size):
+            chunk = object_names[i : i + chunk_size]
+            # remove_objects 为惰性迭代器，必须消费才会真正发送请求
+            for err in client.remove_objects(settings.MINIO_BUCKET, [DeleteObject(name) for name in chunk]):
+                logger.warning("MinIO 批量删除对象失败", object_name=err.name, error=err.message)
+                failed.append(err.name)
+        return failed
+
+    return await asyncio.to_thread(_del)
+
+
+async def delete_objects_safe(object_names: list[str]) -> list[str]:
+    """
+    从 MinIO 批量删除对象（带熔断保护）。
+
+    当 MinIO 不可用时，返回全部对象名称而不是抛出异常。
+
+    Args:
+        object_names: 对象名称列表
+
+    Returns:
+        list[str]: 删除失败的对象名称
+    """
+    if not object_names:
+        return []
+    try:
+        return await minio_circuit_breaker.call(delete_objects, object_names)
+    except CircuitBreakerOpenError as e:
+        logger.warning(
+            "MinIO 熔断器打开，跳过批量删除",
+            count=len(object_names),
+            remaining=e.remaining_time,
+        )
+        return list(object_names)
+    except Exception as e:
+        logger.error("MinIO 批量删除失败", count=len(object_names), error=str(e))
+        return list(object_names)
+
+
 def get_circuit_breaker_stats() -> dict:
     """获取 MinIO 熔断器统计信息。"""
     return minio_circuit_breaker.stats()
@@ -0,0 +1,292 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: principal_cache.py
+@DateTime: 2026-02-10 18:00:00
+@Docs: 认证主体缓存 (Principal Cache).
+
+缓存已认证用户的状态、超管标记、部门、数据范围与权限集合，使鉴权无需每次查询 User/Role/Menu。
+
+两级缓存：
+- 进程内 LRU（短 TTL）：命中时鉴权零 IO；多进程部署下撤销/权限变更最多延迟 PRINCIPAL_LOCAL_CACHE_TTL 秒生效
+- Redis Hash `v1:user:principal:{user_id}`：字段为 Token iat，另有 revoked_after 字段记录即时失效时间戳
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+import orjson
+
+from app.core import cache as cache_module
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from app.models.user import User
+
+_REVOKED_AFTER_FIELD = "revoked_after"
+
+
+def principal_cache_key(user_id: UUID | str) -> str:
+    """生成认证主体缓存 Key。
+
+    Args:
+        user_id (UUID | str): 用户 ID。
+
+    Returns:
+        str: 认证主体缓存 Key。
+    """
+    return f"v1:user:principal:{user_id}"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """已认证用户的鉴权信息快照。
+
+    Attributes:
+        id (UUID): 用户 ID。
+        username (str): 用户名。
+        is_active (bool): 是否启用。
+        is_superuser (bool): 是否超级管理员。
+        dept_id (UUID | None): 所属部门 ID。
+        data_scope (str): 有效数据权限范围。
+        permissions (frozenset[str]): 权限码集合。
+    """
+
+    id: UUID
+    username: str
+    is_active: bool
+    is_superuser: bool
+    dept_id: UUID | None
+    data_scope: str
+    permissions: frozenset[str]
+
+    @classmethod
+    def from_user(cls, user: "User") -> "Principal":
+        """从用户对象（需预加载 roles->menus）构建。
+
+        Args:
+            user (User): 用户对象。
+
+        Returns:
+            Principal: 认证主体。
+        """
+        from app.core.data_scope import get_user_effective_data_scope
+
+        permissions: set[str] = set()
+        if not user.is_superuser:
+            for role in user.roles:
+                for menu in role.menus:
+                    if menu.permission:
+                        permissions.add(menu.permission)
+
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            dept_id=user.dept_id,
+            data_scope=get_user_effective_data_scope(user).value,
+            permissions=frozenset(permissions),
+        )
+
+    def dumps(self) -> str:
+        """序列化为 JSON 字符串。
+
+        Returns:
+            str: JSON 字符串。
+        """
+        return orjson.dumps(
+            {
+                "id": str(self.id),
+                "username": self.username,
+                "is_active": self.is_active,
+                "is_superuser": self.is_superuser,
+                "dept_id": str(self.dept_id) if self.dept_id else None,
+                "data_scope": self.data_scope,
+                "permissions": sorted(self.permissions),
+            }
+        ).decode("utf-8")
+
+    @classmethod
+    def loads(cls, raw: str) -> "Principal":
+        """从 JSON 字符串反序列化。
+
+        Args:
+            raw (str): JSON 字符串。
+
+        Returns:
+            Principal: 认证主体。
+        """
+        data = orjson.loads(raw)
+        return cls(
+            id=UUID(data["id"]),
+            username=data["username"],
+            is_active=data["is_active"],
+            is_superuser=data["is_superuser"],
+            dept_id=UUID(data["dept_id"]) if data.get("dept_id") else None,
+            data_scope=data["data_scope"],
+            permissions=frozenset(data["permissions"]),
+        )
+
+
+class PrincipalRevokedError(Exception):
+    """缓存记录显示该 Token 已被即时失效。"""
+
+
+class _LocalPrincipalCache:
+    """进程内 LRU 缓存（带 TTL）。"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # (user_id, iat) -> (expire_at, principal)
+        self._data: OrderedDict[tuple[str, int], tuple[float, Principal]] = OrderedDict()
+
+    def get(self, key: tuple[str, int]) -> Principal | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, principal = item
+        if expire_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return principal
+
+    def put(self, key: tuple[str, int], principal: Principal) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, principal)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard_users(self, user_ids: set[str]) -> None:
+        for key in [key for key in self._data if key[0] in user_ids]:
+            self._data.pop(key, None)
+
+
+_local_cache = _LocalPrincipalCache(settings.PRINCIPAL_LOCAL_CACHE_SIZE, settings.PRINCIPAL_LOCAL_CACHE_TTL)
+
+
+async def get_cached_principal(user_id: UUID, iat: int | None) -> Principal | None:
+    """获取缓存的认证主体（进程内优先，其次 Redis）。
+
+    Args:
+        user_id (UUID): 用户 ID。
+        iat (int | None): Access Token 签发时间。
+
+    Returns:
+        Principal | None: 认证主体；未命中返回 None。
+
+    Raises:
+        PrincipalRevokedError: Redis 中记录的失效时间晚于该 Token 签发时间。
+    """
+    local_key = (str(user_id), iat or 0)
+    principal = _local_cache.get(local_key)
+    if principal is not None:
+        return principal
+
+    if cache_module.redis_client is None:
+        return None
+
+    try:
+        raw, revoked_after = await cache_module.redis_client.hmget(
+            principal_cache_key(user_id), [str(iat or 0), _REVOKED_AFTER_FIELD]
+        )  # type: ignore[misc]
+    except Exception as e:
+        logger.warning(f"认证主体缓存读取失败: {e}")
+        return None
+
+    if not raw:
+        return None
+    if revoked_after is not None and iat is not None and iat <= int(float(revoked_after)):
+        raise PrincipalRevokedError
+
+    principal = Principal.loads(raw)
+    _local_cache.put(local_key, principal)
+    return principal
+
+
+async def cache_principal(principal: Principal, iat: int | None) -> None:
+    """写入认证主体缓存。
+
+    Args:
+        principal (Principal): 认证主体。
+        iat (int | None): Access Token 签发时间。
+
+    Returns:
+        None: 无返回值。
+    """
+    _local_cache.put((str(principal.id), iat or 0), principal)
+
+    if cache_module.redis_client is None:
+        return
+
+    key = principal_cache_key(principal.id)
+    try:
+        async with cache_module.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, str(iat or 0), principal.dumps())
+            pipe.expire(key, settings.PRINCIPAL_CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"认证主体缓存写入失败: {e}")
+
+
+async def invalidate_principals(user_ids: Iterable[UUID | str]) -> None:
+    """失效指定用户的认证主体缓存（权限、状态变更后调用）。
+
+    Args:
+        user_ids (Iterable[UUID | str]): 用户 ID 列表。
+
+    Returns:
+        None: 无返回值。
+    """
+    ids = {str(user_id) for user_id in user_ids}
+    if not ids:
+        return
+    _local_cache.discard_users(ids)
+
+    if cache_module.redis_client is None:
+        return
+
+    try:
+        await cache_module.redis_client.delete(*[principal_cache_key(user_id) for user_id in ids])
+    except Exception as e:
+        logger.warning(f"认证主体缓存失效错误: {e}")
+
+
+async def mark_principals_revoked(user_ids: Iterable[UUID | str], ts_seconds: float) -> None:
+    """记录即时失效时间戳，使签发时间不晚于该时间的 Token 在缓存命中时也被拒绝。
+
+    与直接删除不同，写入 revoked_after 字段可避免并发请求在失效后回填旧 Token 的缓存。
+
+    Args:
+        user_ids (Iterable[UUID | str]): 用户 ID 列表。
+        ts_seconds (float): 失效时间戳（秒）。
+
+    Returns:
+        None: 无返回值。
+    """
+    ids = {str(user_id) for user_id in user_ids}
+    if not ids:
+        return
+    _local_cache.discard_users(ids)
+
+    if cache_module.redis_client is None:
+        return
+
+    try:
+        async with cache_module.redis_client.pipeline(transaction=False) as pipe:
+            for user_id in ids:
+                key = principal_cache_key(user_id)
+                pipe.hset(key, _REVOKED_AFTER_FIELD, str(int(ts_seconds)))
+                pipe.expire(key, settings.PRINCIPAL_CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"认证主体失效标记写入失败: {e}")
@@ -17,6 +17,7 @@ from collections.abc import Iterable
 from app.core import cache as cache_module
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.principal_cache import mark_principals_revoked
 
 _REVOKED_JTI = "__revoked__"
 _REVOKED_AFTER_TTL_SECONDS = 30 * 24 * 3600  # 访问失效阈值的保存时长（30天），用于即时失效对比
@@ -397,6 +398,7 @@ async def revoke_users_refresh(*, user_ids: Iterable[str]) -> None:
 
 async def set_user_revoked_after(*, user_id: str, ts_seconds: float) -> None:
     await get_access_gate().set_revoked_after(user_id, ts_seconds)
+    await mark_principals_revoked([user_id], ts_seconds)
 
 
 async def get_user_revoked_after(*, user_id: str) -> float | None:
@@ -405,7 +407,10 @@ async def get_user_revoked_after(*, user_id: str) -> float | None:
 
 async def revoke_user_access_now(*, user_id: str) -> None:
     await get_access_gate().revoke_now(user_id)
+    await mark_principals_revoked([user_id], time.time())
 
 
 async def revoke_users_access_now(*, user_ids: Iterable[str]) -> None:
-    await get_access_gate().revoke_many_now(user_ids)
+    ids = list(user_ids)
+    await get_access_gate().revoke_many_now(ids)
+    await mark_principals_revoked(ids, time.time())
@@ -9,9 +9,10 @@
 from collections.abc import Sequence
 from datetime import datetime, timedelta
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import and_, func, select
+import uuid6
+from sqlalchemy import Row, and_, func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -24,6 +25,9 @@ from app.schemas.alert import AlertCreate, AlertUpdate
 class CRUDAlert(CRUDBase[Alert, AlertCreate, AlertUpdate]):
     """告警 CRUD 操作类。"""
 
+    # 单条 INSERT 语句的最大行数（避免绑定参数超过 PostgreSQL 上限）
+    INSERT_BATCH_SIZE = 1000
+
     # 告警关联加载选项
     _ALERT_OPTIONS = [selectinload(Alert.related_device), selectinload(Alert.related_discovery)]
 
@@ -93,5 +97,93 @@ class CRUDAlert(CRUDBase[Alert, AlertCreate, AlertUpdate]):
         result = await db.execute(query)
         return result.scalars().first()
 
+    async def get_recent_open_alert_keys(
+        self,
+        db: AsyncSession,
+        *,
+        alerts_in: Sequence[AlertCreate],
+        within_minutes: int = 24 * 60,
+    ) -> Sequence[Row[Any]]:
+        """
+        批量去重：一次查询与待创建告警可能重复的近期未关闭告警。
+
+        Args:
+            db: 数据库会话
+            alerts_in: 待创建告警列表
+            within_minutes: 去重时间窗口（分钟）
+
+        Returns:
+            Sequence[Row]: (id, alert_type, related_device_id, related_discovery_id) 行，按创建时间升序
+        """
+        if not alerts_in:
+            return []
+        since = datetime.now() - timedelta(minutes=within_minutes)
+        conditions = [
+            self.model.is_deleted.is_(False),
+            self.model.alert_type.in_({a.alert_type.value for a in alerts_in}),
+            self.model.created_at >= since,
+            self.model.status.in_(AlertStatus.open_statuses()),
+        ]
+        # 只有全部告警都带关联对象时才能按关联 ID 收窄范围
+        if all(a.related_device_id or a.related_discovery_id for a in alerts_in):
+            device_ids = {a.related_device_id for a in alerts_in if a.related_device_id}
+            discovery_ids = {a.related_discovery_id for a in alerts_in if a.related_discovery_id}
+            conditions.append(
+                or_(
+                    self.model.related_device_id.in_(device_ids),
+                    self.model.related_discovery_id.in_(discovery_ids),
+                )
+            )
+
+        query = (
+            select(
+                self.model.id,
+                self.model.alert_type,
+                self.model.related_device_id,
+                self.model.related_discovery_id,
+            )
+            .where(and_(*conditions))
+            .order_by(self.model.created_at)
+        )
+        result = await db.execute(query)
+        return result.all()
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[AlertCreate],
+        ids: Sequence[UUID] | None = None,
+    ) -> list[UUID]:
+        """
+        多行 INSERT 批量创建告警。
+
+        Args:
+            db: 数据库会话
+            objs_in: 告警创建数据列表
+            ids: 预先生成的告警 ID（与 objs_in 一一对应），默认自动生成 UUIDv7
+
+        Returns:
+            list[UUID]: 新告警 ID 列表（与 objs_in 顺序一致）
+        """
+        if not objs_in:
+            return []
+        alert_ids = list(ids) if ids is not None else [uuid6.uuid7() for _ in objs_in]
+        rows = [
+            {
+                **obj_in.model_dump(),
+                "id": alert_id,
+                "alert_type": obj_in.alert_type.value,
+                "severity": obj_in.severity.value,
+                "status": AlertStatus.OPEN.value,
+                "is_deleted": False,
+                "version_id": uuid4().hex,
+            }
+            for alert_id, obj_in in zip(alert_ids, objs_in, strict=True)
+        ]
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            await db.execute(insert(self.model).values(rows[start : start + self.INSERT_BATCH_SIZE]))
+        return alert_ids
+
 
 alert_crud = CRUDAlert(Alert)
@@ -6,18 +6,21 @@
 @Docs: 配置备份 CRUD 操作。
 """
 
-from collections.abc import Sequence
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, case, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 from sqlalchemy.sql.elements import ColumnElement
 
 from app.crud.base import CRUDBase
 from app.models.backup import Backup
+from app.models.backup_blob import BackupBlob
 from app.schemas.backup import BackupCreate
 
 
@@ -343,12 +346,52 @@ class CRUDBackup(CRUDBase[Backup, BackupCreate, BackupUpdate]):
         result = await db.execute(query)
         return {row.device_id: row.md5_hash for row in result.fetchall()}
 
+    async def get_devices_latest_content_hash(self, db: AsyncSession, device_ids: list[UUID]) -> dict[UUID, str]:
+        """
+        批量获取多个设备最新成功备份引用的内容块哈希（差量编码的基准）。
+
+        Args:
+            db: 数据库会话
+            device_ids: 设备ID列表
+
+        Returns:
+            dict[UUID, str]: 设备ID -> 内容哈希 的映射
+        """
+        if not device_ids:
+            return {}
+
+        subquery = (
+            select(
+                self.model.device_id,
+                self.model.content_hash,
+                func.row_number()
+                .over(partition_by=self.model.device_id, order_by=self.model.created_at.desc())
+                .label("rn"),
+            )
+            .where(self.model.device_id.in_(device_ids))
+            .where(self.model.is_deleted.is_(False))
+            .where(self.model.status == "success")
+            .where(self.model.content_hash.isnot(None))
+            .subquery()
+        )
+        query = select(subquery.c.device_id, subquery.c.content_hash).where(subquery.c.rn == 1)
+
+        result = await db.execute(query)
+        return {row.device_id: row.content_hash for row in result.fetchall()}
+
     async def get_devices_latest_backup_info(self, db: AsyncSession, device_ids: list[UUID]) -> dict[UUID, dict]:
         """
         批量获取多个设备的最新成功备份信息（用于差异/告警）。
 
+        只返回轻量的 backup_id 与 md5；配置内容仅对 md5 变化的设备按 backup_id 懒加载
+        （见 backup_blob_service.load_backup_contents），避免全量设备配置驻留内存。
+
+        Args:
+            db: 数据库会话
+            device_ids: 设备ID列表
+
         Returns:
-            dict[UUID, dict]: 设备ID -> {backup_id, md5_hash, content}
+            dict[UUID, dict]: 设备ID -> {backup_id, md5_hash}
         """
         if not device_ids:
             return {}
@@ -360,7 +403,6 @@ class CRUDBackup(CRUDBase[Backup, BackupCreate, BackupUpdate]):
                 self.model.device_id,
                 self.model.id.label("backup_id"),
                 self.model.md5_hash,
-                self.model.content,
                 sql_func.row_number()
                 .over(partition_by=self.model.device_id, order_by=self.model.created_at.desc())
                 .label("rn"),
@@ -371,16 +413,280 @@ class CRUDBackup(CRUDBase[Backup, BackupCreate, BackupUpdate]):
             .subquery()
         )
 
-        query = select(subquery.c.device_id, subquery.c.backup_id, subquery.c.md5_hash, subquery.c.content).where(
-            subquery.c.rn == 1
-        )
+        query = select(subquery.c.device_id, subquery.c.backup_id, subquery.c.md5_hash).where(subquery.c.rn == 1)
 
         result = await db.execute(query)
-        rows = result.fetchall()
-        return {
-            row.device_id: {"backup_id": row.backup_id, "md5_hash": row.md5_hash, "content": row.content}
-            for row in rows
-        }
+        return {row.device_id: {"backup_id": row.backup_id, "md5_hash": row.md5_hash} for row in result.fetchall()}
+
+    async def expire_by_retention(
+        self,
+        db: AsyncSession,
+        *,
+        keep_counts: dict[str, int],
+        cutoff: datetime | None,
+        device_ids: Sequence[UUID] | None = None,
+    ) -> list[tuple[UUID, str | None, str | None]]:
+        """
+        按保留策略批量软删除过期备份（单条 UPDATE + 窗口函数，集合式执行）。
+
+        规则：
+        - 每台设备最新一条备份、最新一条成功备份始终保留
+        - 成功备份按 (设备, 类型) 倒序排名，超出 keep_counts 的部分过期
+        - 早于 cutoff 的备份（所有类型/状态）过期
+
+        Args:
+            db: 数据库会话
+            keep_counts: 备份类型 -> 保留条数（<=0 表示不限制）
+            cutoff: 按天数保留的截止时间（None 表示不限制）
+            device_ids: 限定设备范围（None 表示全部设备）
+
+        Returns:
+            list[tuple[UUID, str | None, str | None]]: 被标记删除的 (备份ID, MinIO 路径, 内容块哈希)
+        """
+        limits = {bt: keep for bt, keep in keep_counts.items() if keep > 0}
+        if not limits and cutoff is None:
+            return []
+
+        model = self.model
+        ranked_q = select(
+            model.id,
+            model.backup_type,
+            model.status,
+            model.created_at,
+            func.row_number().over(partition_by=model.device_id, order_by=model.created_at.desc()).label("rn_any"),
+            func.row_number()
+            .over(partition_by=(model.device_id, model.status), order_by=model.created_at.desc())
+            .label("rn_status"),
+            func.row_number()
+            .over(partition_by=(model.device_id, model.backup_type, model.status), order_by=model.created_at.desc())
+            .label("rn_type"),
+        ).where(model.is_deleted.is_(False))
+        if device_ids is not None:
+            ranked_q = ranked_q.where(model.device_id.in_(list(device_ids)))
+        ranked = ranked_q.subquery()
+
+        expire_reasons: list[ColumnElement[bool]] = []
+        if limits:
+            # 未配置的类型 keep 为 NULL，比较结果为 NULL（不过期）
+            keep_expr = case(limits, value=ranked.c.backup_type, else_=None)
+            expire_reasons.append(and_(ranked.c.status == "success", ranked.c.rn_type > keep_expr))
+        if cutoff is not None:
+            expire_reasons.append(ranked.c.created_at < cutoff)
+
+        expired_ids = select(ranked.c.id).where(
+            ranked.c.rn_any > 1,
+            or_(ranked.c.status != "success", ranked.c.rn_status > 1),
+            or_(*expire_reasons),
+        )
+
+        stmt = (
+            update(model)
+            .where(model.id.in_(expired_ids))
+            .values(is_deleted=True)
+            .returning(model.id, model.content_path, model.content_hash)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return [(row.id, row.content_path, row.content_hash) for row in result.fetchall()]
+
+    # ===== 内容块（内容寻址去重存储） =====
+
+    @staticmethod
+    def _group_by_delta(counts: Mapping[str, int]) -> dict[int, list[str]]:
+        """按增量分组哈希，同一增量合并为一条 UPDATE（绝大多数增量为 1）。"""
+        groups: dict[int, list[str]] = defaultdict(list)
+        for content_hash, delta in counts.items():
+            if delta > 0:
+                groups[delta].append(content_hash)
+        return groups
+
+    async def get_blobs(self, db: AsyncSession, hashes: Sequence[str]) -> dict[str, BackupBlob]:
+        """
+        批量获取内容块。
+
+        Args:
+            db: 数据库会话
+            hashes: 内容哈希列表
+
+        Returns:
+            dict[str, BackupBlob]: 内容哈希 -> 内容块
+        """
+        if not hashes:
+            return {}
+        result = await db.execute(select(BackupBlob).where(BackupBlob.content_hash.in_(list(set(hashes)))))
+        return {blob.content_hash: blob for blob in result.scalars().all()}
+
+    async def get_blob_chains(
+        self, db: AsyncSession, hashes: Sequence[str], *, max_depth: int = 1000
+    ) -> dict[str, BackupBlob]:
+        """
+        一次递归查询获取内容块及其全部差量基准（沿 base_hash 向上直到完整快照）。
+
+        Args:
+            db: 数据库会话
+            hashes: 起始内容哈希列表
+            max_depth: 最大递归层数（防止异常数据形成环）
+
+        Returns:
+            dict[str, BackupBlob]: 内容哈希 -> 内容块（包含链上所有基准）
+        """
+        if not hashes:
+            return {}
+        chain = (
+            select(BackupBlob.content_hash, BackupBlob.base_hash, literal(0).label("level"))
+            .where(BackupBlob.content_hash.in_(list(set(hashes))))
+            .cte("blob_chain", recursive=True)
+        )
+        parent = aliased(BackupBlob)
+        chain = chain.union(
+            select(parent.content_hash, parent.base_hash, (chain.c.level + 1).label("level"))
+            .join(chain, parent.content_hash == chain.c.base_hash)
+            .where(chain.c.level < max_depth)
+        )
+        result = await db.execute(select(BackupBlob).where(BackupBlob.content_hash.in_(select(chain.c.content_hash))))
+        return {blob.content_hash: blob for blob in result.scalars().all()}
+
+    async def has_blob_children(self, db: AsyncSession, content_hash: str) -> bool:
+        """
+        判断内容块是否被其他差量内容块作为基准引用。
+
+        Args:
+            db: 数据库会话
+            content_hash: 内容哈希
+
+        Returns:
+            bool: 是否存在差量子块
+        """
+        result = await db.execute(select(BackupBlob.content_hash).where(BackupBlob.base_hash == content_hash).limit(1))
+        return result.scalar_one_or_none() is not None
+
+    async def increment_blob_refs(self, db: AsyncSession, counts: Mapping[str, int]) -> set[str]:
+        """
+        为已存在的内容块增加引用计数。
+
+        Args:
+            db: 数据库会话
+            counts: 内容哈希 -> 新增引用数
+
+        Returns:
+            set[str]: 实际存在并已增加引用的内容哈希（不存在的需调用方插入）
+        """
+        updated: set[str] = set()
+        for delta, hashes in self._group_by_delta(counts).items():
+            stmt = (
+                update(BackupBlob)
+                .where(BackupBlob.content_hash.in_(hashes))
+                .values(ref_count=BackupBlob.ref_count + delta, updated_at=func.now())
+                .returning(BackupBlob.content_hash)
+                .execution_options(synchronize_session=False)
+            )
+            result = await db.execute(stmt)
+            updated.update(result.scalars().all())
+        return updated
+
+    async def upsert_blobs(self, db: AsyncSession, rows: list[dict[str, Any]]) -> dict[str, str | None]:
+        """
+        批量插入内容块；并发写入同一内容时冲突行只累加引用计数。
+
+        Args:
+            db: 数据库会话
+            rows: 内容块字段列表（content_hash/content/content_data/content_path/content_size/
+                content_encoding/base_hash/chain_depth/ref_count）
+
+        Returns:
+            dict[str, str | None]: 内容哈希 -> 最终生效的 MinIO 路径（冲突时为已有内容块的路径）
+        """
+        if not rows:
+            return {}
+        stmt = insert(BackupBlob).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BackupBlob.content_hash],
+            set_={
+                "ref_count": BackupBlob.ref_count + stmt.excluded.ref_count,
+                "updated_at": func.now(),
+            },
+        ).returning(BackupBlob.content_hash, BackupBlob.content_path)
+        result = await db.execute(stmt.execution_options(synchronize_session=False))
+        return {row.content_hash: row.content_path for row in result.fetchall()}
+
+    async def release_blobs(self, db: AsyncSession, counts: Mapping[str, int]) -> list[str]:
+        """
+        减少内容块引用计数，并删除引用归零的内容块。
+
+        差量内容块持有其基准的一次引用，删除差量块时级联释放基准引用。
+
+        Args:
+            db: 数据库会话
+            counts: 内容哈希 -> 释放的引用数
+
+        Returns:
+            list[str]: 被删除内容块的 MinIO 路径（调用方在事务提交后删除对象）
+        """
+        paths: list[str] = []
+        groups = self._group_by_delta(counts)
+        while groups:
+            for delta, hashes in groups.items():
+                await db.execute(
+                    update(BackupBlob)
+                    .where(BackupBlob.content_hash.in_(hashes))
+                    .values(ref_count=BackupBlob.ref_count - delta, updated_at=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+            touched = [h for hashes in groups.values() for h in hashes]
+            stmt = (
+                delete(BackupBlob)
+                .where(BackupBlob.content_hash.in_(touched))
+                .where(BackupBlob.ref_count <= 0)
+                .returning(BackupBlob.content_path, BackupBlob.base_hash)
+                .execution_options(synchronize_session=False)
+            )
+            result = await db.execute(stmt)
+            bases: dict[str, int] = defaultdict(int)
+            for row in result.fetchall():
+                if row.content_path:
+                    paths.append(row.content_path)
+                if row.base_hash:
+                    bases[row.base_hash] += 1
+            groups = self._group_by_delta(bases)
+        return paths
+
+    async def recount_blob_refs(self, db: AsyncSession, *, orphan_before: datetime) -> tuple[int, list[str]]:
+        """
+        按未删除备份与差量子块重新统计全部内容块引用计数，并删除早于 orphan_before 即已无引用的内容块。
+
+        用于修正设备级联删除等绕过引用计数的路径；宽限期避免与并发写入竞争。
+
+        Args:
+            db: 数据库会话
+            orphan_before: 孤儿内容块的最晚更新时间
+
+        Returns:
+            tuple[int, list[str]]: (修正的内容块数, 被删除内容块的 MinIO 路径)
+        """
+        live_refs = (
+            select(func.count())
+            .where(self.model.content_hash == BackupBlob.content_hash)
+            .where(self.model.is_deleted.is_(False))
+            .scalar_subquery()
+        )
+        child = aliased(BackupBlob)
+        child_refs = select(func.count()).where(child.base_hash == BackupBlob.content_hash).scalar_subquery()
+        expected = live_refs + child_refs
+        fixed = await db.execute(
+            update(BackupBlob)
+            .where(BackupBlob.ref_count != expected)
+            .values(ref_count=expected, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(
+            delete(BackupBlob)
+            .where(BackupBlob.ref_count <= 0)
+            .where(BackupBlob.updated_at < orphan_before)
+            .returning(BackupBlob.content_path)
+            .execution_options(synchronize_session=False)
+        )
+        paths = [path for path in result.scalars().all() if path]
+        return int(getattr(fixed, "rowcount", 0) or 0), paths
 
 
 # 单例实例
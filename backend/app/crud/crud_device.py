@@ -129,6 +129,26 @@ class CRUDDevice(CRUDBase[Device, DeviceCreate, DeviceUpdate]):
 
         return None
 
+    async def get_match_keys(self, db: AsyncSession) -> list[tuple[UUID, str, str | None]]:
+        """
+        获取全部未删除设备的匹配键（ID、名称、IP），用于批量邻居匹配。
+
+        只查询三列，按创建时间排序保证同名/同 IP 时匹配结果稳定。
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            list[tuple[UUID, str, str | None]]: (设备ID, 设备名称, IP 地址) 列表
+        """
+        query = (
+            select(self.model.id, self.model.name, self.model.ip_address)
+            .where(self.model.is_deleted.is_(False))
+            .order_by(self.model.created_at, self.model.id)
+        )
+        result = await db.execute(query)
+        return [(row.id, row.name, row.ip_address) for row in result]
+
     async def exists_ip(self, db: AsyncSession, ip_address: str, exclude_id: UUID | None = None) -> bool:
         """
         检查 IP 地址是否已存在。
@@ -6,19 +6,46 @@
 @Docs: 设备发现 (Discovery) CRUD 操作。
 """
 
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import and_, select, update
+from sqlalchemy import and_, exists, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.elements import ColumnElement
 
 from app.core.enums import DiscoveryStatus
 from app.crud.base import CRUDBase
+from app.models.device import Device
 from app.models.discovery import Discovery
 from app.schemas.discovery import DiscoveryCreate, DiscoveryUpdate
 
 
+@dataclass
+class CMDBReconcileResult:
+    """
+    CMDB 对账结果。
+
+    Attributes:
+        total_discovered: 发现记录总数
+        total_cmdb: CMDB 设备总数
+        matched: 与 CMDB 匹配的发现记录数
+        shadow: 影子资产数
+        offline: CMDB 中有但未被发现的设备数
+        matched_ids: 本次转为已匹配（或匹配设备变化）的发现记录 ID
+        shadow_ids: 本次转为影子资产的发现记录 ID
+    """
+
+    total_discovered: int = 0
+    total_cmdb: int = 0
+    matched: int = 0
+    shadow: int = 0
+    offline: int = 0
+    matched_ids: list[UUID] = field(default_factory=list)
+    shadow_ids: list[UUID] = field(default_factory=list)
+
+
 class CRUDDiscovery(CRUDBase[Discovery, DiscoveryCreate, DiscoveryUpdate]):
     """设备发现 CRUD 类。"""
 
@@ -275,6 +302,135 @@ class CRUDDiscovery(CRUDBase[Discovery, DiscoveryCreate, DiscoveryUpdate]):
             await db.refresh(obj)
         return obj
 
+    async def reconcile_with_cmdb(self, db: AsyncSession) -> CMDBReconcileResult:
+        """
+        按 IP 与 CMDB 设备对账（集合式执行，无数量上限）。
+
+        - UPDATE ... FROM 关联设备表：有同 IP 设备的记录置为 MATCHED 并写入匹配设备
+        - NOT EXISTS：无同 IP 设备的记录置为 SHADOW
+        - 已处于目标状态的记录不会被重复更新
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            CMDBReconcileResult: 统计数量与本次状态变化的记录 ID
+        """
+        model = self.model
+        device_alive = Device.is_deleted.is_(False)
+        has_device = exists().where(Device.ip_address == model.ip_address, device_alive)
+
+        matched_stmt = (
+            update(model)
+            .where(
+                model.is_deleted.is_(False),
+                Device.ip_address == model.ip_address,
+                device_alive,
+                or_(
+                    model.status != DiscoveryStatus.MATCHED.value,
+                    model.matched_device_id.is_(None),
+                    model.matched_device_id != Device.id,
+                ),
+            )
+            .values(status=DiscoveryStatus.MATCHED.value, matched_device_id=Device.id)
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        matched_ids = list((await db.execute(matched_stmt)).scalars().all())
+
+        shadow_stmt = (
+            update(model)
+            .where(
+                model.is_deleted.is_(False),
+                model.status != DiscoveryStatus.SHADOW.value,
+                ~has_device,
+            )
+            .values(status=DiscoveryStatus.SHADOW.value)
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        shadow_ids = list((await db.execute(shadow_stmt)).scalars().all())
+
+        discovery_alive = model.is_deleted.is_(False)
+        has_discovery = exists().where(model.ip_address == Device.ip_address, discovery_alive)
+        counts_stmt = select(
+            select(func.count()).select_from(model).where(discovery_alive).scalar_subquery(),
+            select(func.count()).select_from(model).where(discovery_alive, has_device).scalar_subquery(),
+            select(func.count()).select_from(Device).where(device_alive).scalar_subquery(),
+            select(func.count()).select_from(Device).where(device_alive, ~has_discovery).scalar_subquery(),
+        )
+        total_discovered, matched, total_cmdb, offline = (await db.execute(counts_stmt)).one()
+        await db.flush()
+
+        return CMDBReconcileResult(
+            total_discovered=int(total_discovered or 0),
+            total_cmdb=int(total_cmdb or 0),
+            matched=int(matched or 0),
+            shadow=int(total_discovered or 0) - int(matched or 0),
+            offline=int(offline or 0),
+            matched_ids=matched_ids,
+            shadow_ids=shadow_ids,
+        )
+
+    async def get_offline_devices(
+        self, db: AsyncSession, *, device_status: str, days_threshold: int
+    ) -> list[dict[str, Any]]:
+        """
+        查询离线设备（单条 LEFT JOIN，替代逐设备 get_by_ip）。
+
+        同一 IP 存在多条发现记录时取最近一次发现的记录。
+
+        Args:
+            db: 数据库会话
+            device_status: 参与检测的设备状态
+            days_threshold: 离线天数阈值
+
+        Returns:
+            list[dict[str, Any]]: 设备 ID/名称/IP 与离线天数（从未发现为 -1）、最后发现时间
+        """
+        model = self.model
+        ranked = (
+            select(
+                model.ip_address,
+                model.offline_days,
+                model.last_seen_at,
+                func.row_number().over(partition_by=model.ip_address, order_by=model.last_seen_at.desc()).label("rn"),
+            )
+            .where(model.is_deleted.is_(False))
+            .subquery()
+        )
+        latest = (
+            select(ranked.c.ip_address, ranked.c.offline_days, ranked.c.last_seen_at).where(ranked.c.rn == 1).subquery()
+        )
+        query = (
+            select(
+                Device.id,
+                Device.name,
+                Device.ip_address,
+                latest.c.offline_days,
+                latest.c.last_seen_at,
+            )
+            .outerjoin(latest, latest.c.ip_address == Device.ip_address)
+            .where(
+                Device.is_deleted.is_(False),
+                Device.status == device_status,
+                or_(latest.c.ip_address.is_(None), latest.c.offline_days >= days_threshold),
+            )
+            .order_by(Device.name)
+        )
+        rows = (await db.execute(query)).all()
+        return [
+            {
+                "device_id": row.id,
+                "device_name": row.name,
+                "ip_address": row.ip_address,
+                # -1 表示从未发现
+                "offline_days": row.offline_days if row.offline_days is not None else -1,
+                "last_seen_at": row.last_seen_at,
+            }
+            for row in rows
+        ]
+
     async def increment_offline_days(self, db: AsyncSession) -> int:
         """
         将所有未更新的发现记录离线天数加1。
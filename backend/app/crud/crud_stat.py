@@ -0,0 +1,121 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: crud_stat.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总 (StatDaily) CRUD 操作。
+"""
+
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import date
+from typing import Any
+
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stat_daily import StatDaily
+
+# (指标, 维度, 日期) -> 计数
+StatCounts = Mapping[tuple[str, str, date], int]
+
+
+class CRUDStatDaily:
+    """每日统计汇总 CRUD 类（复合主键，纯数据访问）。"""
+
+    # 单条 INSERT 语句的最大行数
+    INSERT_BATCH_SIZE = 1000
+
+    @staticmethod
+    def _rows(counts: StatCounts) -> list[dict[str, Any]]:
+        return [
+            {"metric": metric, "dimension": dimension, "day": day, "value": value}
+            for (metric, dimension, day), value in counts.items()
+        ]
+
+    async def increment(self, db: AsyncSession, *, counts: StatCounts) -> None:
+        """
+        累加计数（不存在的汇总行自动创建）。
+
+        Args:
+            db: 数据库会话
+            counts: (指标, 维度, 日期) -> 增量
+        """
+        if not counts:
+            return
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(StatDaily).values(self._rows(counts))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StatDaily.metric, StatDaily.dimension, StatDaily.day],
+            set_={"value": StatDaily.value + stmt.excluded.value, "updated_at": func.now()},
+        )
+        await db.execute(stmt)
+
+    async def replace(
+        self,
+        db: AsyncSession,
+        *,
+        metrics: Iterable[str],
+        start_day: date,
+        end_day: date,
+        counts: StatCounts,
+    ) -> int:
+        """
+        用重算结果覆盖指定指标在日期区间内的全部汇总行。
+
+        Args:
+            db: 数据库会话
+            metrics: 指标列表
+            start_day: 开始日期（含）
+            end_day: 结束日期（含）
+            counts: (指标, 维度, 日期) -> 计数
+
+        Returns:
+            int: 写入的汇总行数
+        """
+        await db.execute(
+            delete(StatDaily)
+            .where(StatDaily.metric.in_(list(metrics)))
+            .where(StatDaily.day >= start_day)
+            .where(StatDaily.day <= end_day)
+        )
+        rows = self._rows(counts)
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            await db.execute(insert(StatDaily).values(rows[start : start + self.INSERT_BATCH_SIZE]))
+        return len(rows)
+
+    async def get_values(
+        self,
+        db: AsyncSession,
+        *,
+        metrics: Iterable[str],
+        dimensions: Iterable[str],
+        start_day: date,
+        end_day: date,
+    ) -> Sequence[Row[Any]]:
+        """
+        读取汇总行。
+
+        Args:
+            db: 数据库会话
+            metrics: 指标列表
+            dimensions: 维度列表
+            start_day: 开始日期（含）
+            end_day: 结束日期（含）
+
+        Returns:
+            Sequence[Row]: (metric, dimension, day, value) 行，按日期升序
+        """
+        query = (
+            select(StatDaily.metric, StatDaily.dimension, StatDaily.day, StatDaily.value)
+            .where(StatDaily.metric.in_(list(metrics)))
+            .where(StatDaily.dimension.in_(list(dimensions)))
+            .where(StatDaily.day >= start_day)
+            .where(StatDaily.day <= end_day)
+            .order_by(StatDaily.day)
+        )
+        result = await db.execute(query)
+        return result.all()
+
+
+stat_daily_crud = CRUDStatDaily()
@@ -20,6 +20,9 @@ from app.schemas.topology import TopologyLinkCreate, TopologyLinkResponse
 class CRUDTopology(CRUDBase[TopologyLink, TopologyLinkCreate, TopologyLinkResponse]):
     """网络拓扑 CRUD 类（纯数据访问）。"""
 
+    # 单条 upsert 语句的最大行数
+    UPSERT_BATCH_SIZE = 1000
+
     @staticmethod
     def _upsert_set_clause(stmt):
         """构建 upsert 更新字段。"""
@@ -54,16 +57,20 @@ class CRUDTopology(CRUDBase[TopologyLink, TopologyLinkCreate, TopologyLinkRespon
         if not links_data:
             return 0
 
-        values = [d.model_dump(exclude_unset=True) for d in links_data]
-        stmt = insert(TopologyLink).values(values)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["source_device_id", "source_interface"],
-            index_where=text("is_deleted = false"),
-            set_=self._upsert_set_clause(stmt),
-        )
-        result = await db.execute(stmt)
+        # 分批写入，避免单条语句绑定参数超过 PostgreSQL 上限（32767）
+        affected = 0
+        for start in range(0, len(links_data), self.UPSERT_BATCH_SIZE):
+            values = [d.model_dump(exclude_unset=True) for d in links_data[start : start + self.UPSERT_BATCH_SIZE]]
+            stmt = insert(TopologyLink).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["source_device_id", "source_interface"],
+                index_where=text("is_deleted = false"),
+                set_=self._upsert_set_clause(stmt),
+            )
+            result = await db.execute(stmt)
+            affected += int(getattr(result, "rowcount", 0) or 0)
         await db.flush()
-        return int(getattr(result, "rowcount", 0) or 0)
+        return affected
 
     async def delete_by_device(self, db: AsyncSession, *, device_id: UUID, hard_delete: bool = False) -> int:
         """
@@ -95,6 +102,35 @@ class CRUDTopology(CRUDBase[TopologyLink, TopologyLinkCreate, TopologyLinkRespon
             await db.flush()
             return int(getattr(result, "rowcount", 0) or 0)
 
+    async def delete_by_devices(self, db: AsyncSession, *, device_ids: list[UUID], hard_delete: bool = False) -> int:
+        """
+        删除多台设备的所有链路（单条语句）。
+
+        Args:
+            db: 数据库会话
+            device_ids: 设备ID列表
+            hard_delete: 是否硬删除
+
+        Returns:
+            删除的链路数量
+        """
+        if not device_ids:
+            return 0
+        if hard_delete:
+            result = await db.execute(delete(self.model).where(self.model.source_device_id.in_(device_ids)))
+        else:
+            result = await db.execute(
+                update(self.model)
+                .where(self.model.source_device_id.in_(device_ids), self.model.is_deleted.is_(False))
+                .values(
+                    is_deleted=True,
+                    updated_at=func.now(),
+                    version_id=text("md5(random()::text)"),
+                )
+            )
+        await db.flush()
+        return int(getattr(result, "rowcount", 0) or 0)
+
     async def delete_all(self, db: AsyncSession, *, hard_delete: bool = False) -> int:
         """
         删除所有链路。
@@ -17,6 +17,7 @@ from app.core.enums import (
 
 from .alert import Alert
 from .backup import Backup
+from .backup_blob import BackupBlob
 from .base import AuditableModel, Base
 from .credential import DeviceGroupCredential
 from .dept import Department
@@ -24,8 +25,10 @@ from .device import Device
 from .discovery import Discovery
 from .inventory_audit import InventoryAudit
 from .log import LoginLog, OperationLog
+from .notification_outbox import NotificationOutbox
 from .rbac import Menu, Role, RoleMenu, UserRole
 from .snmp_credential import DeptSnmpCredential
+from .stat_daily import StatDaily
 from .task import Task
 from .task_approval import TaskApprovalStep
 from .template import Template
@@ -48,6 +51,7 @@ __all__ = [
     # 日志
     "LoginLog",
     "OperationLog",
+    "StatDaily",
     # 网络设备管理 (NCM)
     "Device",
     "DeviceVendor",
@@ -59,6 +63,7 @@ __all__ = [
     "DeptSnmpCredential",
     # 配置备份
     "Backup",
+    "BackupBlob",
     "BackupType",
     "BackupStatus",
     # 任务管理
@@ -82,6 +87,7 @@ __all__ = [
     "InventoryAudit",
     # 告警
     "Alert",
+    "NotificationOutbox",
     # 网络拓扑
     "TopologyLink",
 ]
@@ -12,7 +12,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -51,6 +51,7 @@ class Alert(AuditableModel):
     """
 
     __tablename__ = "ncm_alert"
+    __table_args__ = (Index("ix_ncm_alert_created_at", "created_at"),)
 
     alert_type: Mapped[str] = mapped_column(
         String(30),
@@ -24,13 +24,15 @@ class Backup(AuditableModel):
     """配置备份模型。
 
     网络设备配置备份表，存储设备配置内容和备份元信息。
-    支持小配置直接存储，大配置存储到 MinIO。
+    支持小配置直接存储，大配置存储到 MinIO；启用去重后内容存储在内容块表，
+    本表仅保存 content_hash 引用。
 
     Attributes:
         device_id (UUID): 设备 ID。
         content (str | None): 配置内容（小配置直接存储）。
         content_path (str | None): MinIO 存储路径（大配置）。
         content_size (int): 配置大小（字节）。
+        content_hash (str | None): 内容块 SHA-256（关联 ncm_backup_blob）。
         backup_type (str): 备份类型（MANUAL/SCHEDULED/INCREMENTAL）。
         status (str): 备份状态（SUCCESS/FAILED/PENDING）。
         md5_hash (str | None): MD5 哈希值，用于配置变更检测。
@@ -43,8 +45,9 @@ class Backup(AuditableModel):
     __tablename__ = "ncm_backup"
     __table_args__ = (
         Index("ix_ncm_backup_device_time", "device_id", "created_at"),
+        Index("ix_ncm_backup_created_at", "created_at"),
         CheckConstraint(
-            "content IS NOT NULL OR content_path IS NOT NULL",
+            "content IS NOT NULL OR content_path IS NOT NULL OR content_hash IS NOT NULL",
             name="ck_ncm_backup_content",
         ),
         {"comment": "配置备份表"},
@@ -62,6 +65,9 @@ class Backup(AuditableModel):
     content: Mapped[str | None] = mapped_column(Text, nullable=True, comment="配置内容(小配置直接存储)")
     content_path: Mapped[str | None] = mapped_column(String(500), nullable=True, comment="MinIO 存储路径(大配置)")
     content_size: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False, comment="配置大小(字节)")
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True, comment="内容块 SHA-256(去重存储)"
+    )
 
     # 备份元信息
     backup_type: Mapped[str] = mapped_column(
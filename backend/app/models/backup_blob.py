@@ -0,0 +1,60 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: backup_blob.py
+@DateTime: 2026-02-05 10:00:00
+@Docs: 配置备份内容块模型 (BackupBlob) 定义。
+
+按内容 SHA-256 寻址，相同配置（未变化设备的定时备份、模板化接入交换机）只存一份，
+由 Backup.content_hash 引用并维护引用计数。内容可按 content_encoding 压缩或存为
+相对 base_hash 的行级前向差量（差量块同样持有 base 的一次引用）。
+"""
+
+from sqlalchemy import BigInteger, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class BackupBlob(Base, TimestampMixin):
+    """配置备份内容块模型。
+
+    明文小配置存储在 content 字段，编码后的数据存储在 content_data 字段，
+    超过阈值的存储到 MinIO（content_path）。
+    ref_count 为引用该内容块的未删除备份数与差量子块数之和，降为 0 时内容块及其 MinIO 对象一并删除。
+
+    Attributes:
+        content_hash (str): 配置内容 SHA-256（主键，始终为原文哈希）。
+        content (str | None): 明文配置内容（identity 编码的小配置）。
+        content_data (bytes | None): 编码后的内容（压缩快照或压缩差量）。
+        content_path (str | None): MinIO 存储路径（大配置/大编码数据）。
+        content_size (int): 原文大小（字节）。
+        content_encoding (str): 内容编码（identity/gzip/zstd/delta+gzip/delta+zstd）。
+        base_hash (str | None): 差量基准内容块哈希。
+        chain_depth (int): 距最近完整快照的差量层数（快照为 0）。
+        ref_count (int): 引用计数。
+    """
+
+    __tablename__ = "ncm_backup_blob"
+    __table_args__ = (
+        Index("ix_ncm_backup_blob_base_hash", "base_hash"),
+        {"comment": "配置备份内容块表(内容寻址去重)"},
+    )
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True, comment="配置内容 SHA-256")
+    content: Mapped[str | None] = mapped_column(Text, nullable=True, comment="配置内容(小配置直接存储)")
+    content_data: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, comment="编码后的内容(压缩/差量)")
+    content_path: Mapped[str | None] = mapped_column(String(500), nullable=True, comment="MinIO 存储路径(大配置)")
+    content_size: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False, comment="配置大小(字节)")
+    content_encoding: Mapped[str] = mapped_column(
+        String(20), default="identity", server_default="identity", nullable=False, comment="内容编码"
+    )
+    base_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, comment="差量基准内容块哈希")
+    chain_depth: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="差量链深度")
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="引用计数")
+
+    def __repr__(self) -> str:
+        return (
+            f"<BackupBlob(hash={self.content_hash[:12]}, encoding={self.content_encoding}, "
+            f"size={self.content_size}, refs={self.ref_count})>"
+        )
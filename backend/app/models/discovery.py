@@ -44,7 +44,7 @@ class Discovery(AuditableModel):
         offline_days (int): 离线天数。
         status (str): 发现状态（PENDING/MATCHED/SHADOW/IGNORED）。
         matched_device_id (UUID | None): 匹配的设备 ID。
-        scan_source (str | None): 扫描来源（nmap/masscan）。
+        scan_source (str | None): 扫描来源（nmap/masscan/sweep）。
         scan_task_id (str | None): 扫描任务 ID。
         dept_id (UUID | None): 部门 ID（用于匹配 SNMP 凭据）。
         snmp_sysname (str | None): SNMP sysName。
@@ -92,7 +92,7 @@ class Discovery(AuditableModel):
     )
 
     # 扫描来源
-    scan_source: Mapped[str | None] = mapped_column(String(50), nullable=True, comment="扫描来源(nmap/masscan)")
+    scan_source: Mapped[str | None] = mapped_column(String(50), nullable=True, comment="扫描来源(nmap/masscan/sweep)")
     scan_task_id: Mapped[str | None] = mapped_column(String(100), nullable=True, comment="扫描任务ID")
 
     dept_id: Mapped[uuid.UUID | None] = mapped_column(
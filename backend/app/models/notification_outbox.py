@@ -0,0 +1,62 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: notification_outbox.py
+@DateTime: 2026-02-11 09:00:00
+@Docs: 告警通知发件箱模型 (NotificationOutbox) 定义。
+
+新告警与发件箱记录在同一事务内写入，由投递任务按渠道批量发送（Webhook 批量、邮件摘要），
+失败按指数退避重试。每条告警每个渠道只有一条记录，去重命中的告警不会重复通知。
+"""
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.enums import NotificationStatus
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+if TYPE_CHECKING:
+    from app.models.alert import Alert
+
+
+class NotificationOutbox(Base, UUIDMixin, TimestampMixin):
+    """告警通知发件箱模型。
+
+    Attributes:
+        alert_id (UUID): 告警 ID。
+        channel (str): 通知渠道（webhook/email）。
+        status (str): 状态（pending/sent/failed）。
+        attempts (int): 已尝试发送次数。
+        next_attempt_at (datetime): 下次可发送时间（邮件对齐到摘要窗口末尾，失败后按退避推迟）。
+        last_error (str | None): 最近一次发送错误。
+        sent_at (datetime | None): 发送成功时间。
+        alert (Alert): 关联的告警对象。
+    """
+
+    __tablename__ = "ncm_notification_outbox"
+    __table_args__ = (
+        UniqueConstraint("alert_id", "channel", name="uq_ncm_notification_outbox_alert_channel"),
+        Index("ix_ncm_notification_outbox_status_next", "status", "next_attempt_at"),
+        {"comment": "告警通知发件箱表"},
+    )
+
+    alert_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("ncm_alert.id", ondelete="CASCADE"), nullable=False, comment="告警ID"
+    )
+    channel: Mapped[str] = mapped_column(String(20), nullable=False, comment="通知渠道(webhook/email)")
+    status: Mapped[str] = mapped_column(
+        String(20), default=NotificationStatus.PENDING.value, nullable=False, comment="状态(pending/sent/failed)"
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="已尝试发送次数")
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, comment="下次可发送时间")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="最近一次发送错误")
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, comment="发送成功时间")
+
+    alert: Mapped["Alert"] = relationship("Alert", lazy="raise")
+
+    def __repr__(self) -> str:
+        return f"<NotificationOutbox(alert={self.alert_id}, channel={self.channel}, status={self.status})>"
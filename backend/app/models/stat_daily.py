@@ -0,0 +1,39 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: stat_daily.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总模型 (StatDaily) 定义。
+
+按 (指标, 维度, 日期) 预聚合登录/操作/告警/备份数量，仪表盘与趋势接口直接读取汇总行，
+查询代价与日志表数据量无关。登录、操作、告警在写入路径增量累加，定时任务按源表重算近几天兜底。
+"""
+
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class StatDaily(Base, TimestampMixin):
+    """每日统计汇总模型。
+
+    Attributes:
+        metric (str): 指标（login/operation/alert/backup）。
+        dimension (str): 维度（all、user:<id>、type:<告警类型>、severity:<级别>、status:<备份状态>）。
+        day (date): 日期（UTC）。
+        value (int): 计数。
+    """
+
+    __tablename__ = "sys_stat_daily"
+    __table_args__ = ({"comment": "每日统计汇总表"},)
+
+    metric: Mapped[str] = mapped_column(String(30), primary_key=True, comment="指标")
+    dimension: Mapped[str] = mapped_column(String(100), primary_key=True, comment="维度")
+    day: Mapped[date] = mapped_column(Date, primary_key=True, comment="日期(UTC)")
+    value: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False, comment="计数")
+
+    def __repr__(self) -> str:
+        return f"<StatDaily(metric={self.metric}, dimension={self.dimension}, day={self.day}, value={self.value})>"
@@ -11,9 +11,10 @@
 """
 
 # 异步接口（推荐）
-from app.network.async_runner import run_async_tasks
+from app.network.async_runner import run_async_tasks, run_async_tasks_iter
 from app.network.async_tasks import (
     async_collect_config,
+    async_collect_tables,
     async_deploy_from_host_data,
     async_get_lldp_neighbors,
     async_send_command,
@@ -30,8 +31,10 @@ __all__ = [
     "init_nornir_async",
     "init_nornir_async_from_db",
     "run_async_tasks",
+    "run_async_tasks_iter",
     "async_send_command",
     "async_collect_config",
+    "async_collect_tables",
     "async_deploy_from_host_data",
     "async_get_lldp_neighbors",
     # 同步接口（向后兼容）
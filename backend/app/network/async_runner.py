@@ -5,14 +5,27 @@
 @DateTime: 2026-01-14 00:26:00
 @Docs: Nornir 异步运行器，替代 ThreadedRunner 实现真正的 asyncio 并发。
 
-使用 asyncio.Semaphore 控制最大并发数，配合 Scrapli Async 驱动实现高效网络自动化。
+使用 ConcurrencyScheduler 控制并发：全局上限（可选 AIMD 自适应）之外，
+再按设备分组、部门、跳板机分别限流，配合 Scrapli Async 驱动实现高效网络自动化。
+执行采用常驻 worker 工作池，run_async_tasks_iter 可流式获取结果（内存占用与并发数相关而非设备数）。
 """
 
 import asyncio
-from collections.abc import Awaitable, Callable, Coroutine
-from typing import TYPE_CHECKING, Any
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Iterable, Sized
+from contextlib import AsyncExitStack, aclosing, asynccontextmanager
+from itertools import zip_longest
+from typing import TYPE_CHECKING, Any, Self
 
 from nornir.core.task import AggregatedResult, MultiResult, Result
+from scrapli.exceptions import (
+    ScrapliAuthenticationFailed,
+    ScrapliConnectionError,
+    ScrapliConnectionNotOpened,
+    ScrapliTimeout,
+)
 
 from app.core.config import settings
 from app.core.exceptions import OTPRequiredException
@@ -30,6 +43,282 @@ type ProgressCallback = Callable[[str, Result], Awaitable[None] | None]
 type HostsDict = dict[str, "Host"]
 """主机字典类型。"""
 
+# 视为“设备/认证端过载”的异常：触发自适应并发的乘性减小
+_CONGESTION_ERRORS: tuple[type[BaseException], ...] = (
+    ScrapliAuthenticationFailed,
+    ScrapliTimeout,
+    ScrapliConnectionError,
+    ScrapliConnectionNotOpened,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 自适应并发窗口。
+
+    成功且耗时正常时加性增大窗口（首次拥塞前每次成功 +step，之后每次成功 +step/窗口，
+    即每轮约 +step）；认证失败、连接超时或耗时超过基线 latency_factor 倍时乘性减小，
+    冷却期内多次拥塞只减小一次，避免同一批失败把窗口压到最小值。
+
+    Attributes:
+        limit: 当前窗口（浮点，实际并发为其整数部分）
+        max_limit: 窗口上限
+        min_limit: 窗口下限
+        decreases: 累计减小次数
+    """
+
+    # 基线耗时的 EWMA 平滑系数与判定耗时突增前所需的样本数
+    EWMA_ALPHA = 0.2
+    WARMUP_SAMPLES = 5
+
+    def __init__(
+        self,
+        max_limit: int,
+        *,
+        min_limit: int = 1,
+        initial: int | None = None,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 3.0,
+        cooldown: float = 5.0,
+    ):
+        """
+        初始化自适应并发窗口。
+
+        Args:
+            max_limit: 窗口上限
+            min_limit: 窗口下限
+            initial: 初始窗口（默认等于上限）
+            increase_step: 加性增大步长
+            decrease_factor: 乘性减小系数（0~1）
+            latency_factor: 耗时超过基线该倍数视为突增
+            cooldown: 两次减小之间的最短间隔（秒）
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        start = self.max_limit if initial is None else initial
+        self.limit = float(min(max(start, self.min_limit), self.max_limit))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.decreases = 0
+        self._in_flight = 0
+        self._slow_start = True
+        self._baseline: float | None = None
+        self._samples = 0
+        self._last_decrease = -math.inf
+        self._cond = asyncio.Condition()
+
+    @property
+    def current(self) -> int:
+        """当前允许的并发数。"""
+        return int(self.limit)
+
+    @property
+    def in_flight(self) -> int:
+        """当前占用的并发数。"""
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """等待窗口内的空闲名额。"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def release(self, latency: float | None = None, *, congested: bool = False) -> None:
+        """
+        归还名额并根据本次结果调整窗口。
+
+        Args:
+            latency: 成功执行的耗时（秒），None 表示结果不参与调整
+            congested: 是否为拥塞类失败（认证失败/超时/连接失败）
+        """
+        async with self._cond:
+            self._in_flight -= 1
+            if congested:
+                self._decrease("error")
+            elif latency is not None:
+                self._on_success(latency)
+            free = int(self.limit) - self._in_flight
+            if free > 0:
+                self._cond.notify(free)
+
+    def _on_success(self, latency: float) -> None:
+        baseline = self._baseline
+        self._baseline = latency if baseline is None else baseline + self.EWMA_ALPHA * (latency - baseline)
+        self._samples += 1
+        if baseline is not None and self._samples > self.WARMUP_SAMPLES and latency > baseline * self.latency_factor:
+            self._decrease("latency")
+            return
+        step = self.increase_step if self._slow_start else self.increase_step / self.limit
+        self.limit = min(self.limit + step, float(self.max_limit))
+
+    def _decrease(self, reason: str) -> None:
+        self._slow_start = False
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(self.limit * self.decrease_factor, float(self.min_limit))
+        if int(self.limit) < int(previous):
+            self.decreases += 1
+            celery_details_logger.info(
+                "自适应并发窗口减小",
+                reason=reason,
+                previous=int(previous),
+                current=int(self.limit),
+                baseline_latency=round(self._baseline or 0.0, 3),
+            )
+
+
+class ConcurrencyScheduler:
+    """
+    分层并发调度器。
+
+    每台设备执行前占用跳板机、部门、设备分组三级键控名额（上限为 0 或键缺失时跳过该级），
+    最后占用全局名额（固定 Semaphore 或 AdaptiveConcurrency 窗口）。键控名额先于全局名额获取，
+    被分组/部门限流阻塞的设备不会占住全局名额；工作池通过 try_reserve 非阻塞预占键控名额，
+    键已满的设备延后调度，不会占住 worker。
+
+    键取自 host.data：jump_host、dept_id、device_group。
+
+    Attributes:
+        global_limit: 全局最大并发数
+        adaptive: 自适应窗口（未启用时为 None）
+    """
+
+    def __init__(
+        self,
+        global_limit: int,
+        *,
+        group_limit: int = 0,
+        dept_limit: int = 0,
+        jump_host_limit: int = 0,
+        adaptive: AdaptiveConcurrency | None = None,
+    ):
+        """
+        初始化调度器。
+
+        Args:
+            global_limit: 全局最大并发数
+            group_limit: 单个设备分组最大并发数（0 表示不限制）
+            dept_limit: 单个部门最大并发数（0 表示不限制）
+            jump_host_limit: 单个跳板机最大并发数（0 表示不限制）
+            adaptive: 自适应窗口，传入时替代固定全局信号量
+        """
+        self.global_limit = max(1, global_limit)
+        self.adaptive = adaptive
+        self._global = asyncio.Semaphore(self.global_limit)
+        self._key_limits = {"jump_host": jump_host_limit, "dept_id": dept_limit, "device_group": group_limit}
+        self._keyed: dict[tuple[str, str], int] = {}
+        self._key_released = asyncio.Event()
+
+    @classmethod
+    def from_settings(cls, global_limit: int) -> Self:
+        """
+        按配置创建调度器。
+
+        Args:
+            global_limit: 全局最大并发数
+
+        Returns:
+            ConcurrencyScheduler: 调度器实例
+        """
+        adaptive = None
+        if settings.ASYNC_ADAPTIVE_ENABLED:
+            adaptive = AdaptiveConcurrency(
+                global_limit,
+                min_limit=settings.ASYNC_ADAPTIVE_MIN_CONCURRENCY,
+                initial=min(settings.ASYNC_ADAPTIVE_INITIAL_CONCURRENCY, global_limit),
+                decrease_factor=settings.ASYNC_ADAPTIVE_DECREASE_FACTOR,
+                latency_factor=settings.ASYNC_ADAPTIVE_LATENCY_FACTOR,
+                cooldown=settings.ASYNC_ADAPTIVE_COOLDOWN_SECONDS,
+            )
+        return cls(
+            global_limit,
+            group_limit=settings.ASYNC_GROUP_CONCURRENCY,
+            dept_limit=settings.ASYNC_DEPT_CONCURRENCY,
+            jump_host_limit=settings.ASYNC_JUMP_HOST_CONCURRENCY,
+            adaptive=adaptive,
+        )
+
+    def _host_keys(self, host: "Host") -> list[tuple[tuple[str, str], int]]:
+        data = host.data or {}
+        return [
+            ((field, str(data.get(field))), limit)
+            for field, limit in self._key_limits.items()
+            if limit > 0 and data.get(field)
+        ]
+
+    def try_reserve(self, host: "Host") -> bool:
+        """
+        非阻塞占用设备的全部键控名额（任一级已满则一个都不占用）。
+
+        Args:
+            host: Nornir Host
+
+        Returns:
+            bool: 是否占用成功（成功后须调用 release_keys 释放）
+        """
+        keys = self._host_keys(host)
+        if any(self._keyed.get(key, 0) >= limit for key, limit in keys):
+            return False
+        for key, _ in keys:
+            self._keyed[key] = self._keyed.get(key, 0) + 1
+        return True
+
+    def release_keys(self, host: "Host") -> None:
+        """
+        释放设备占用的键控名额，并唤醒等待名额的 worker。
+
+        Args:
+            host: Nornir Host
+        """
+        for key, _ in self._host_keys(host):
+            remaining = self._keyed.get(key, 0) - 1
+            if remaining > 0:
+                self._keyed[key] = remaining
+            else:
+                self._keyed.pop(key, None)
+        self._key_released.set()
+
+    async def wait_released(self) -> None:
+        """等待任一设备释放键控名额。"""
+        self._key_released.clear()
+        await self._key_released.wait()
+
+    @asynccontextmanager
+    async def slot(self, host: "Host", *, keys_reserved: bool = False) -> AsyncIterator[None]:
+        """
+        占用单台设备的执行名额，退出时按执行结果反馈给自适应窗口。
+
+        Args:
+            host: Nornir Host
+            keys_reserved: 键控名额是否已由调用方通过 try_reserve 占用（此时只占用全局名额）
+        """
+        async with AsyncExitStack() as stack:
+            if not keys_reserved:
+                while not self.try_reserve(host):
+                    await self.wait_released()
+                stack.callback(self.release_keys, host)
+            if self.adaptive is None:
+                async with self._global:
+                    yield
+                return
+
+            await self.adaptive.acquire()
+            started = time.monotonic()
+            try:
+                yield
+            except BaseException as e:
+                await self.adaptive.release(congested=isinstance(e, _CONGESTION_ERRORS))
+                raise
+            await self.adaptive.release(time.monotonic() - started)
+
 
 class AsyncRunner:
     """
@@ -39,11 +328,15 @@ class AsyncRunner:
     适用于大批量设备操作场景，显著降低线程开销。
 
     Attributes:
-        semaphore_limit: 最大并发连接数（通过 asyncio.Semaphore 控制）
+        semaphore_limit: 全局最大并发连接数
         max_retries: 失败重试次数（0 表示不重试）
         retry_delay: 重试间隔（秒）
+        scheduler: 自定义并发调度器（默认每次执行按配置新建）
     """
 
+    # 每个 worker 最多延后的设备数（键控名额已满时暂存，超过后等待名额释放）
+    DEFERRED_PER_WORKER = 8
+
     def __init__(
         self,
         num_workers: int | None = None,
@@ -51,6 +344,7 @@ class AsyncRunner:
         retry_delay: float = 1.0,
         max_retry_delay: float = 30.0,
         exponential_backoff: bool = True,
+        scheduler: ConcurrencyScheduler | None = None,
     ):
         """
         初始化异步运行器。
@@ -61,8 +355,10 @@ class AsyncRunner:
             retry_delay: 初始重试间隔秒数（默认 1.0）
             max_retry_delay: 最大重试间隔秒数（默认 30.0）
             exponential_backoff: 是否启用指数退避（默认 True）
+            scheduler: 自定义并发调度器（默认按配置创建，含分组/部门/跳板机限流与自适应并发）
         """
         self.semaphore_limit = num_workers or settings.ASYNC_SSH_SEMAPHORE
+        self.scheduler = scheduler
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.max_retry_delay = max_retry_delay
@@ -95,6 +391,188 @@ class AsyncRunner:
             raise RuntimeError("当前存在运行中的事件循环，请使用 await run_async_tasks(...) 调用异步执行入口。")
         return asyncio.run(self._run_async(task, hosts, **kwargs))
 
+    async def _execute_host(
+        self,
+        scheduler: ConcurrencyScheduler,
+        task: AsyncTaskFn,
+        host: "Host",
+        kwargs: dict[str, Any],
+        *,
+        keys_reserved: bool = False,
+    ) -> tuple[str, Result]:
+        """单设备执行（带分层并发控制、OTP 等待和可选重试；keys_reserved 表示键控名额已预占）。"""
+        task_name = getattr(task, "__name__", "async_task")
+        last_exception: Exception | None = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with scheduler.slot(host, keys_reserved=keys_reserved):
+                    logger.debug("开始执行异步任务", host=host.name, task=task_name, attempt=attempt + 1)
+                    result_data = await task(host, **kwargs)
+                    return host.name, Result(host=host, result=result_data)
+            except OTPRequiredException as e:
+                dept_id_raw = host.data.get("dept_id")
+                device_group = host.data.get("device_group")
+                device_id = host.data.get("device_id")
+                wait_status = None
+                if isinstance(e.details, dict):
+                    wait_status = e.details.get("otp_wait_status")
+                otp_meta = {
+                    "otp_dept_id": str(dept_id_raw) if dept_id_raw else None,
+                    "otp_device_group": str(device_group) if device_group else None,
+                    "otp_wait_status": wait_status,
+                    "pending_device_ids": [str(device_id)] if device_id else None,
+                }
+                return host.name, Result(
+                    host=host,
+                    result={
+                        "success": False,
+                        "otp_required": True,
+                        "error": str(e),
+                        "skipped": True,
+                        **otp_meta,
+                    },
+                    failed=True,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_exception = e
+                if attempt < self.max_retries:
+                    # 计算重试延迟（支持指数退避）
+                    if self.exponential_backoff:
+                        delay = min(self.retry_delay * (2**attempt), self.max_retry_delay)
+                    else:
+                        delay = self.retry_delay
+
+                    celery_task_logger.warning(
+                        "任务失败，准备重试",
+                        host=host.name,
+                        task=task_name,
+                        attempt=attempt + 1,
+                        max_retries=self.max_retries,
+                        retry_delay=delay,
+                        error=str(e),
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    # 记录详细失败日志到 celery_details
+                    celery_details_logger.error(
+                        "任务执行失败",
+                        host=host.name,
+                        task=task_name,
+                        error=str(e),
+                        error_type=type(e).__name__,
+                        exc_info=True,
+                    )
+
+        return host.name, Result(host=host, exception=last_exception, failed=True)
+
+    async def _iter_results(
+        self,
+        scheduler: ConcurrencyScheduler,
+        task: AsyncTaskFn,
+        hosts: Iterable["Host"],
+        kwargs: dict[str, Any],
+    ) -> AsyncIterator[tuple[str, Result]]:
+        """
+        工作池执行主体。
+
+        固定数量的常驻 worker 从共享主机迭代器中取设备执行，结果经有界队列交给调用方，
+        调用方消费变慢时 worker 在入队处等待（背压），在途任务与结果均为 O(并发数)。
+
+        worker 取设备时先非阻塞预占键控名额，键已满的设备放入延后队列（有界），
+        worker 转而执行其它分组/部门的设备，避免被同一限流键阻塞的 worker 拖慢整个池。
+        """
+        source = iter(hosts)
+        num_workers = scheduler.global_limit
+        if isinstance(hosts, Sized):
+            num_workers = min(num_workers, len(hosts))
+        if num_workers <= 0:
+            return
+
+        queue: asyncio.Queue[tuple[str, Result] | None] = asyncio.Queue(maxsize=scheduler.global_limit)
+        deferred: deque[Host] = deque()
+        max_deferred = num_workers * self.DEFERRED_PER_WORKER
+        exhausted = False
+
+        def _take() -> "Host | None":
+            nonlocal exhausted
+            # 先按原顺序重试延后的设备
+            for _ in range(len(deferred)):
+                host = deferred.popleft()
+                if scheduler.try_reserve(host):
+                    return host
+                deferred.append(host)
+            while not exhausted and len(deferred) < max_deferred:
+                host = next(source, None)
+                if host is None:
+                    exhausted = True
+                elif scheduler.try_reserve(host):
+                    return host
+                else:
+                    deferred.append(host)
+            return None
+
+        async def _worker() -> None:
+            try:
+                while True:
+                    host = _take()
+                    if host is None:
+                        if exhausted and not deferred:
+                            break
+                        await scheduler.wait_released()
+                        continue
+                    try:
+                        item = await self._execute_host(scheduler, task, host, kwargs, keys_reserved=True)
+                    finally:
+                        scheduler.release_keys(host)
+                    await queue.put(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                celery_details_logger.error("异步任务 worker 异常退出", error=str(e), exc_info=True)
+            await queue.put(None)
+
+        workers = [asyncio.create_task(_worker()) for _ in range(num_workers)]
+        try:
+            remaining = num_workers
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def iter_async(
+        self,
+        task: AsyncTaskFn,
+        hosts: Iterable["Host"],
+        **kwargs: Any,
+    ) -> AsyncIterator[tuple[str, Result]]:
+        """
+        流式执行：按完成顺序逐台产出 (host_name, Result)。
+
+        不保留已产出的结果，主机可以是惰性生成器，适合超大规模清单边执行边入库。
+        提前退出时请用 contextlib.aclosing 包裹或显式 aclose()，以立即取消尚未完成的设备任务。
+
+        Args:
+            task: 异步任务函数
+            hosts: 主机可迭代对象（按迭代顺序调度）
+            **kwargs: 传递给任务函数的额外参数
+
+        Yields:
+            tuple[str, Result]: 主机名与单设备执行结果
+        """
+        scheduler = self.scheduler or ConcurrencyScheduler.from_settings(self.semaphore_limit)
+        async with aclosing(self._iter_results(scheduler, task, hosts, kwargs)) as results:
+            async for item in results:
+                yield item
+
     async def _run_async(
         self,
         task: AsyncTaskFn,
@@ -106,7 +584,8 @@ class AsyncRunner:
         """
         异步执行主体。
 
-        使用 Semaphore 控制并发，支持可配置的重试机制和 OTP 断点续传。
+        使用工作池 + ConcurrencyScheduler 控制并发，支持可配置的重试机制和 OTP 断点续传。
+        主机按设备分组轮转排列，避免单个分组的限流阻塞全部 worker。
 
         Args:
             task: 异步任务函数
@@ -120,135 +599,22 @@ class AsyncRunner:
         """
         task_name = getattr(task, "__name__", "async_task")
         results = AggregatedResult(task_name)
-        semaphore = asyncio.Semaphore(self.semaphore_limit)
-
-        async def _execute_host(host: "Host") -> tuple[str, Result]:
-            """单设备执行（带信号量控制、OTP 等待和可选重试）。"""
-            last_exception: Exception | None = None
-
-            for attempt in range(self.max_retries + 1):
-                try:
-                    async with semaphore:
-                        logger.debug("开始执行异步任务", host=host.name, task=task_name, attempt=attempt + 1)
-                        result_data = await task(host, **kwargs)
-                        return host.name, Result(host=host, result=result_data)
-                except OTPRequiredException as e:
-                    dept_id_raw = host.data.get("dept_id")
-                    device_group = host.data.get("device_group")
-                    device_id = host.data.get("device_id")
-                    wait_status = None
-                    if isinstance(e.details, dict):
-                        wait_status = e.details.get("otp_wait_status")
-                    otp_meta = {
-                        "otp_dept_id": str(dept_id_raw) if dept_id_raw else None,
-                        "otp_device_group": str(device_group) if device_group else None,
-                        "otp_wait_status": wait_status,
-                        "pending_device_ids": [str(device_id)] if device_id else None,
-                    }
-                    return host.name, Result(
-                        host=host,
-                        result={
-                            "success": False,
-                            "otp_required": True,
-                            "error": str(e),
-                            "skipped": True,
-                            **otp_meta,
-                        },
-                        failed=True,
-                    )
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    last_exception = e
-                    if attempt < self.max_retries:
-                        # 计算重试延迟（支持指数退避）
-                        if self.exponential_backoff:
-                            delay = min(self.retry_delay * (2**attempt), self.max_retry_delay)
-                        else:
-                            delay = self.retry_delay
-
-                        celery_task_logger.warning(
-                            "任务失败，准备重试",
-                            host=host.name,
-                            task=task_name,
-                            attempt=attempt + 1,
-                            max_retries=self.max_retries,
-                            retry_delay=delay,
-                            error=str(e),
-                        )
-                        await asyncio.sleep(delay)
-                    else:
-                        # 记录详细失败日志到 celery_details
-                        celery_details_logger.error(
-                            "任务执行失败",
-                            host=host.name,
-                            task=task_name,
-                            error=str(e),
-                            error_type=type(e).__name__,
-                            exc_info=True,
-                        )
-
-            return host.name, Result(host=host, exception=last_exception, failed=True)
-
-        # 并行执行所有主机任务（按设备分组创建，避免内存问题）
-        GROUP_BATCH_SIZE = 100  # 每组内分批大小
-        hosts_list = list(hosts.values())
-        total_hosts = len(hosts_list)
-
-        # 按设备分组（device_group）进行分组
-        groups: dict[str, list] = {}
-        for host in hosts_list:
-            group_name = host.data.get("device_group", "default") if host.data else "default"
-            if group_name not in groups:
-                groups[group_name] = []
-            groups[group_name].append(host)
-
-        tasks: list[asyncio.Task] = []
-
-        if len(groups) == 1 and total_hosts <= GROUP_BATCH_SIZE:
-            # 单分组且设备数量少：一次性创建所有任务
-            tasks = [asyncio.create_task(_execute_host(host)) for host in hosts_list]
-        else:
-            # 按分组创建任务，大分组内部再按 100 台分批
+        scheduler = self.scheduler or ConcurrencyScheduler.from_settings(self.semaphore_limit)
+
+        # 按设备分组（device_group）轮转排列
+        groups: dict[str, list[Host]] = {}
+        for host in hosts.values():
+            group_name = (host.data.get("device_group") if host.data else None) or "default"
+            groups.setdefault(group_name, []).append(host)
+        if len(groups) > 1:
             celery_details_logger.info(
-                "按设备分组创建任务",
-                total_hosts=total_hosts,
-                groups=list(groups.keys()),
+                "按设备分组轮转调度",
+                total_hosts=len(hosts),
                 group_counts={k: len(v) for k, v in groups.items()},
             )
+        ordered = [host for batch in zip_longest(*groups.values()) for host in batch if host is not None]
 
-            for group_name, group_hosts in groups.items():
-                group_size = len(group_hosts)
-
-                if group_size <= GROUP_BATCH_SIZE:
-                    # 分组内设备数量少：一次性创建该分组的任务
-                    group_tasks = [asyncio.create_task(_execute_host(host)) for host in group_hosts]
-                    tasks.extend(group_tasks)
-                    celery_details_logger.debug(
-                        "创建分组任务",
-                        group=group_name,
-                        count=group_size,
-                    )
-                else:
-                    # 分组内设备数量多：按 100 台分批创建
-                    celery_details_logger.info(
-                        "大分组分批创建任务",
-                        group=group_name,
-                        total=group_size,
-                        batch_size=GROUP_BATCH_SIZE,
-                    )
-                    for i in range(0, group_size, GROUP_BATCH_SIZE):
-                        batch = group_hosts[i : i + GROUP_BATCH_SIZE]
-                        batch_tasks = [asyncio.create_task(_execute_host(host)) for host in batch]
-                        tasks.extend(batch_tasks)
-                        # 让出事件循环，避免阻塞
-                        await asyncio.sleep(0)
-
-                # 每个分组创建完后让出事件循环
-                await asyncio.sleep(0)
-
-        for done in asyncio.as_completed(tasks):
-            host_name, result = await done
+        async for host_name, result in self._iter_results(scheduler, task, ordered, kwargs):
             multi = MultiResult(host_name)
             multi.append(result)
             results[host_name] = multi
@@ -271,6 +637,7 @@ class AsyncRunner:
             total=len(results),
             success=success_count,
             failed=failed_count,
+            concurrency=scheduler.adaptive.current if scheduler.adaptive else scheduler.global_limit,
         )
 
         return results
@@ -331,6 +698,47 @@ async def run_async_tasks(
     )
 
 
+async def run_async_tasks_iter(
+    hosts: "HostsDict | Inventory | Iterable[Host]",
+    task_fn: AsyncTaskFn,
+    num_workers: int | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[str, Result]]:
+    """
+    流式异步任务执行入口：按完成顺序逐台产出结果。
+
+    与 run_async_tasks 相比不聚合结果，调用方可边执行边持久化；
+    hosts 可传惰性生成器，超大规模清单无需一次性构建全部 Host。
+    提前退出时请用 contextlib.aclosing 包裹，以立即取消剩余设备任务。
+
+    Args:
+        hosts: Nornir Inventory、主机字典或 Host 可迭代对象
+        task_fn: 异步任务函数，签名为 async def task(host: Host, **kwargs) -> Any
+        num_workers: 最大并发数，默认从配置读取
+        **kwargs: 传递给任务函数的额外参数
+
+    Yields:
+        tuple[str, Result]: 主机名与单设备执行结果
+
+    Example:
+        ```python
+        async for host_name, result in run_async_tasks_iter(inventory, async_collect_config):
+            await writer.add(host_name, result)
+        ```
+    """
+    if hasattr(hosts, "hosts"):
+        host_iter: Iterable[Host] = hosts.hosts.values()  # type: ignore[union-attr]
+    elif isinstance(hosts, dict):
+        host_iter = hosts.values()
+    else:
+        host_iter = hosts
+
+    runner = AsyncRunner(num_workers=num_workers)
+    async with aclosing(runner.iter_async(task_fn, host_iter, **kwargs)) as results:
+        async for item in results:
+            yield item
+
+
 def run_async_tasks_sync(
     hosts: "HostsDict | Inventory",
     task_fn: AsyncTaskFn,
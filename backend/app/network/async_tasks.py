@@ -13,6 +13,8 @@
 - 使用连接池（AsyncConnectionPool）复用连接，显著提升批量操作性能
 """
 
+import asyncio
+import re
 import time
 from typing import TYPE_CHECKING, Any
 
@@ -24,7 +26,12 @@ from app.core.config import settings
 from app.core.logger import logger
 from app.network.connection_pool import get_connection_pool
 from app.network.otp_utils import handle_otp_auth_failure, resolve_otp_password
-from app.network.scrapli_utils import build_scrapli_config, disable_paging_async, send_command_with_paging_async
+from app.network.scrapli_utils import (
+    build_scrapli_config,
+    disable_paging_async,
+    is_command_error,
+    send_command_with_paging_async,
+)
 
 if TYPE_CHECKING:
     from nornir.core.inventory import Host
@@ -473,6 +480,8 @@ async def async_send_config(host: "Host", config: str | list[str]) -> dict[str,
 
                 response: MultiResponse = await conn.send_configs(config_lines)
                 failed_lines = [r for r in response if r.failed]
+                # 配置可能修改主机名/终端设置，清空会话预热状态
+                pool_ctx.invalidate_state()
 
                 logger.info(
                     "AsyncScrapli 配置下发完成",
@@ -573,6 +582,7 @@ async def async_get_prompt(host: "Host") -> dict[str, Any]:
                 reused=pool_ctx.reused,
             )
             prompt = await conn.get_prompt()
+            pool_ctx.state.prompt = prompt
             return {"success": True, "prompt": prompt}
     except Exception as e:
         logger.error("获取提示符失败", host=host.name, error=str(e), exc_info=True)
@@ -646,15 +656,8 @@ async def async_collect_config(host: "Host") -> dict[str, Any]:
                     elapsed_ms=int((time.monotonic() - start) * 1000),
                 )
 
-                # 获取提示符
-                prompt = None
-                try:
-                    prompt = await conn.get_prompt()
-                except Exception:
-                    pass
-
-                # 关闭分页
-                await disable_paging_async(conn, platform)
+                # 获取提示符并关闭分页（热会话复用已记录状态）
+                prompt = await pool_ctx.warm_up(platform)
 
                 # 采集配置（处理分页）
                 output = await send_command_with_paging_async(conn, command, timeout_ops=timeout_ops, prompt=prompt)
@@ -712,6 +715,140 @@ async def async_collect_config(host: "Host") -> dict[str, Any]:
         raise
 
 
+async def async_collect_tables(
+    host: "Host",
+    *,
+    collect_arp: bool = True,
+    collect_mac: bool = True,
+) -> dict[str, Any]:
+    """
+    异步采集设备 ARP/MAC 表（使用连接池复用连接）。
+
+    ARP 与 MAC 在同一会话上顺序执行，TextFSM 解析放到线程中，避免大表阻塞事件循环。
+    OTP 认证失败时直接提示重新输入。
+
+    Args:
+        host: Nornir Host 对象
+        collect_arp: 是否采集 ARP
+        collect_mac: 是否采集 MAC
+
+    Returns:
+        dict[str, Any]: 采集结果字典：
+        - success (bool): 是否成功
+        - arp (list[dict] | None): 解析后的 ARP 条目（未采集时为 None）
+        - mac (list[dict] | None): 解析后的 MAC 条目（未采集时为 None）
+        - platform (str): 设备平台
+        - elapsed_ms (int): 耗时（毫秒）
+
+    Raises:
+        ScrapliAuthenticationFailed: 认证失败时抛出
+        RuntimeError: 设备返回命令错误时抛出（不把错误输出当作空表，调用方保留上一份快照）
+    """
+    from app.network.platform_config import get_command, get_platform_for_vendor
+    from app.network.textfsm_parser import parse_arp_table, parse_mac_table
+
+    platform = get_platform_for_vendor(host.platform or "hp_comware")
+    tables = [
+        (key, get_command(command_key, platform), parser)
+        for key, command_key, parser, enabled in (
+            ("arp", "arp_table", parse_arp_table, collect_arp),
+            ("mac", "mac_table", parse_mac_table, collect_mac),
+        )
+        if enabled
+    ]
+
+    kwargs = _get_scrapli_kwargs(host)
+    kwargs = await _apply_otp_manual_password(host, kwargs)
+    device_name = host.data.get("device_name", host.name)
+    start = time.monotonic()
+
+    try:
+        pool = await get_connection_pool()
+        pool_ctx = await pool.acquire(
+            host=kwargs["host"],
+            username=kwargs["auth_username"],
+            password=kwargs["auth_password"],
+            platform=platform,
+            port=kwargs.get("port", 22),
+            timeout_socket=kwargs.get("timeout_socket"),
+            timeout_transport=kwargs.get("timeout_transport"),
+            timeout_ops=kwargs.get("timeout_ops"),
+            auth_strict_key=kwargs.get("auth_strict_key", False),
+            ssh_config_file=kwargs.get("ssh_config_file", ""),
+        )
+        outputs: dict[str, str] = {}
+        async with pool_ctx as conn:
+            prompt = await pool_ctx.warm_up(platform)
+            for key, command, _ in tables:
+                outputs[key] = await send_command_with_paging_async(conn, command, timeout_ops=120, prompt=prompt)
+    except ScrapliAuthenticationFailed as e:
+        await handle_otp_auth_failure(dict(host.data), e)
+        raise
+
+    for key, command, _ in tables:
+        if is_command_error(outputs[key]):
+            raise RuntimeError(f"命令执行失败: {command}: {outputs[key].strip()[:200]}")
+
+    result: dict[str, Any] = {"success": True, "arp": None, "mac": None, "platform": platform}
+    for key, _, parser in tables:
+        result[key] = await asyncio.to_thread(parser, platform, outputs[key])
+    result["elapsed_ms"] = int((time.monotonic() - start) * 1000)
+
+    logger.info(
+        "AsyncScrapli ARP/MAC 采集完成",
+        host=device_name,
+        device=host.hostname,
+        platform=platform,
+        arp_count=len(result["arp"] or []),
+        mac_count=len(result["mac"] or []),
+        reused=pool_ctx.reused,
+        elapsed_ms=result["elapsed_ms"],
+    )
+    return result
+
+
+async def async_probe_config_change(host: "Host") -> dict[str, Any]:
+    """
+    异步探测设备配置变更标记（使用连接池复用连接）。
+
+    只执行输出一行变更时间/提交号的轻量命令，供增量检查判断是否需要全量采集。
+    输出无法匹配标记时返回 marker=None（调用方按"可能已变更"处理）。
+
+    Args:
+        host: Nornir Host 对象
+
+    Returns:
+        dict[str, Any]: 探测结果字典：
+        - success (bool): 是否成功
+        - marker (str | None): 配置变更标记
+        - platform (str): 设备平台
+
+    Raises:
+        ScrapliAuthenticationFailed: 认证失败时抛出
+    """
+    from app.network.platform_config import get_config_change_cli_probe, get_platform_for_vendor
+
+    platform = get_platform_for_vendor(host.platform or "hp_comware")
+    probe = get_config_change_cli_probe(platform)
+    if probe is None:
+        return {"success": False, "marker": None, "platform": platform}
+    command, pattern = probe
+
+    kwargs = _get_scrapli_kwargs(host)
+    kwargs = await _apply_otp_manual_password(host, kwargs)
+    timeout_ops = min(30, int(settings.ASYNC_SSH_TIMEOUT or 30))
+
+    try:
+        response = await _run_send_command(host, kwargs, command, timeout_ops=timeout_ops, use_pool=True)
+    except ScrapliAuthenticationFailed as e:
+        await handle_otp_auth_failure(dict(host.data), e)
+        raise
+
+    match = re.search(pattern, response.result or "", re.MULTILINE)
+    marker = match.group(1).strip() if match and not response.failed else None
+    return {"success": marker is not None, "marker": marker, "platform": platform}
+
+
 async def async_deploy_from_host_data(host: "Host") -> dict[str, Any]:
     """
     异步下发配置（从 host.data['deploy_configs'] 读取）。
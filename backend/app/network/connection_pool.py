@@ -7,14 +7,17 @@
 
 提供连接复用能力，减少频繁连接同一设备的开销。
 特性：
-- 基于 (host, port, username) 的连接缓存
+- 基于 (host, port, username) 的多会话借出/归还，单设备会话数可配置
+- 会话耗尽时通过 asyncio.Condition 等待归还（不轮询）
+- 全池达到上限时按 LRU 淘汰空闲会话，借出中的会话不会被关闭
 - 自动连接健康检查
+- 会话预热状态（提示符/分页/权限级别）随会话缓存，复用时跳过重复的预热命令
 - 可配置的连接超时和最大空闲时间
-- 异步安全（使用 asyncio.Lock）
 """
 
 import asyncio
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -22,9 +25,30 @@ from scrapli import AsyncScrapli
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.network.platform_config import get_paging_disable_commands
+from app.network.scrapli_utils import disable_paging_async
 
 
 @dataclass
+class SessionState:
+    """会话预热状态（随连接重建自然失效）。
+
+    Attributes:
+        prompt: 已探测到的设备提示符
+        paging_checked: 是否已尝试过关闭分页（失败的平台不再重复尝试）
+        paging_disabled: 分页是否已关闭
+        privilege_level: Scrapli 记录的当前权限级别
+        quirks: 平台特性标记（如不支持关闭分页）
+    """
+
+    prompt: str | None = None
+    paging_checked: bool = False
+    paging_disabled: bool = False
+    privilege_level: str | None = None
+    quirks: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(eq=False)
 class PooledConnection:
     """连接池中的连接包装。
 
@@ -34,9 +58,12 @@ class PooledConnection:
         port: SSH 端口
         username: SSH 用户名
         platform: Scrapli 平台标识
+        key: 连接缓存键
         created_at: 连接创建时间（monotonic 时间戳）
         last_used_at: 最后使用时间（monotonic 时间戳）
         use_count: 使用次数
+        in_use: 是否已被借出
+        state: 会话预热状态
     """
 
     conn: AsyncScrapli
@@ -44,9 +71,12 @@ class PooledConnection:
     port: int
     username: str
     platform: str
+    key: str = ""
     created_at: float = field(default_factory=time.monotonic)
     last_used_at: float = field(default_factory=time.monotonic)
     use_count: int = 0
+    in_use: bool = False
+    state: SessionState = field(default_factory=SessionState)
 
     @property
     def age(self) -> float:
@@ -66,14 +96,18 @@ class PooledConnection:
 
 class AsyncConnectionPool:
     """
-    Scrapli 异步连接池。
+    Scrapli 异步连接池（借出/归还模型）。
+
+    同一设备（host:port:username）最多保持 max_sessions_per_key 个会话，每个会话同一时刻只借给一个调用方；
+    会话耗尽时调用方在 Condition 上等待归还，而不是轮询。全池会话数达到 max_connections 时
+    按 LRU 淘汰空闲会话，借出中的会话永不被淘汰。
 
     使用示例：
         ```python
         pool = AsyncConnectionPool()
 
-        # 获取连接（自动复用或创建新连接）
-        async with pool.acquire(host="192.168.1.1", ...) as conn:
+        # 借出会话（优先复用空闲会话，无空闲且未达上限时创建新会话），退出时自动归还
+        async with await pool.acquire(host="192.168.1.1", ...) as conn:
             response = await conn.send_command("show version")
 
         # 关闭连接池
@@ -81,10 +115,12 @@ class AsyncConnectionPool:
         ```
 
     Attributes:
-        max_connections: 最大连接数
+        max_connections: 全池最大会话数
+        max_sessions_per_key: 单设备最大会话数
         max_idle_time: 最大空闲时间（秒），超过后连接将被关闭
         max_age: 连接最大存活时间（秒），超过后强制重建
         health_check: 是否在获取连接时进行健康检查
+        acquire_timeout: 等待可用会话的超时时间（秒）
     """
 
     def __init__(
@@ -94,6 +130,8 @@ class AsyncConnectionPool:
         max_age: float | None = None,
         health_check: bool = True,
         health_check_timeout: float | None = None,
+        max_sessions_per_key: int | None = None,
+        acquire_timeout: float | None = None,
     ):
         """
         初始化连接池。
@@ -104,16 +142,25 @@ class AsyncConnectionPool:
             max_age: 连接最大存活时间秒数（默认从配置读取 SCRAPLI_POOL_MAX_AGE）
             health_check: 是否在复用连接前进行健康检查（默认 True）
             health_check_timeout: 健康检查超时秒数（默认从配置读取 POOL_HEALTH_CHECK_TIMEOUT 或 5.0）
+            max_sessions_per_key: 单设备最大会话数（默认从配置读取 SCRAPLI_POOL_MAX_SESSIONS_PER_DEVICE）
+            acquire_timeout: 等待可用会话超时秒数（默认从配置读取 SCRAPLI_POOL_ACQUIRE_TIMEOUT）
         """
         self.max_connections = max_connections or settings.SCRAPLI_POOL_MAX_CONNECTIONS
         self.max_idle_time = max_idle_time or float(settings.SCRAPLI_POOL_MAX_IDLE_TIME)
         self.max_age = max_age or float(settings.SCRAPLI_POOL_MAX_AGE)
         self.health_check = health_check
         self.health_check_timeout = health_check_timeout or getattr(settings, "POOL_HEALTH_CHECK_TIMEOUT", 5.0)
-
-        self._pool: dict[str, PooledConnection] = {}
+        self.max_sessions_per_key = max_sessions_per_key or settings.SCRAPLI_POOL_MAX_SESSIONS_PER_DEVICE
+        self.acquire_timeout = acquire_timeout or settings.SCRAPLI_POOL_ACQUIRE_TIMEOUT
+
+        self._sessions: dict[str, list[PooledConnection]] = {}  # 键 -> 全部会话（含借出中）
+        self._idle: OrderedDict[PooledConnection, None] = OrderedDict()  # 空闲会话，按归还时间 LRU 排序
+        self._pending: dict[str, int] = {}  # 键 -> 正在创建中的会话数
+        self._total = 0  # 会话数 + 创建中数
+        self._waiters = 0
+        self._saved_round_trips = 0
         self._lock = asyncio.Lock()
-        self._pending: set[str] = set()  # 正在创建中的连接键
+        self._cond = asyncio.Condition(self._lock)
         self._closed = False
 
     def _make_key(self, host: str, port: int, username: str) -> str:
@@ -129,6 +176,16 @@ class AsyncConnectionPool:
         """
         return f"{host}:{port}:{username}"
 
+    def _is_expired(self, pooled: PooledConnection) -> bool:
+        """连接是否超过最大存活/空闲时间。"""
+        if pooled.age > self.max_age:
+            logger.debug("连接超过最大存活时间", host=pooled.host, age=pooled.age, max_age=self.max_age)
+            return True
+        if pooled.idle_time > self.max_idle_time:
+            logger.debug("连接空闲时间过长", host=pooled.host, idle=pooled.idle_time, max_idle=self.max_idle_time)
+            return True
+        return False
+
     async def _is_connection_healthy(self, pooled: PooledConnection) -> bool:
         """检查连接是否健康（带超时控制）。
 
@@ -138,18 +195,13 @@ class AsyncConnectionPool:
         Returns:
             bool: 连接是否健康
         """
-        if pooled.age > self.max_age:
-            logger.debug("连接超过最大存活时间", host=pooled.host, age=pooled.age, max_age=self.max_age)
-            return False
-
-        if pooled.idle_time > self.max_idle_time:
-            logger.debug("连接空闲时间过长", host=pooled.host, idle=pooled.idle_time, max_idle=self.max_idle_time)
+        if self._is_expired(pooled):
             return False
 
         if self.health_check:
             try:
-                # 使用超时控制进行健康检查
-                await asyncio.wait_for(
+                # 使用超时控制进行健康检查，顺带刷新会话记录的提示符
+                pooled.state.prompt = await asyncio.wait_for(
                     pooled.conn.get_prompt(),
                     timeout=self.health_check_timeout,
                 )
@@ -185,6 +237,79 @@ class AsyncConnectionPool:
         except Exception as e:
             logger.debug("关闭连接失败", host=pooled.host, error=str(e))
 
+    def _remove_locked(self, pooled: PooledConnection) -> None:
+        """从池中移除会话（调用方持有锁，关闭在锁外进行）。"""
+        sessions = self._sessions.get(pooled.key)
+        if sessions is None or pooled not in sessions:
+            return
+        sessions.remove(pooled)
+        if not sessions:
+            del self._sessions[pooled.key]
+        self._idle.pop(pooled, None)
+        self._total -= 1
+        self._cond.notify_all()
+
+    def _checkout_idle_locked(self, key: str) -> PooledConnection | None:
+        """借出该键最近归还的空闲会话（LIFO，保持热会话）。"""
+        idle = [p for p in self._sessions.get(key, ()) if not p.in_use]
+        if not idle:
+            return None
+        pooled = max(idle, key=lambda p: p.last_used_at)
+        self._idle.pop(pooled, None)
+        pooled.in_use = True
+        return pooled
+
+    def _evict_lru_locked(self) -> PooledConnection | None:
+        """淘汰最久未使用的空闲会话，返回待关闭的会话（无空闲会话时返回 None）。"""
+        if not self._idle:
+            return None
+        oldest, _ = self._idle.popitem(last=False)
+        self._remove_locked(oldest)
+        logger.debug("连接池淘汰最久未使用连接", host=oldest.host, idle_time=int(oldest.idle_time))
+        return oldest
+
+    async def _checkout(self, key: str) -> tuple[PooledConnection | None, list[PooledConnection]]:
+        """
+        借出空闲会话或预留一个创建名额，必要时等待归还。
+
+        Returns:
+            tuple[PooledConnection | None, list[PooledConnection]]: (借出的会话, 需在锁外关闭的会话)；
+            会话为 None 表示已预留创建名额
+        """
+        to_close: list[PooledConnection] = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+
+                pooled = self._checkout_idle_locked(key)
+                if pooled is not None:
+                    return pooled, to_close
+
+                key_count = len(self._sessions.get(key, ())) + self._pending.get(key, 0)
+                if key_count < self.max_sessions_per_key:
+                    if self._total >= self.max_connections:
+                        evicted = self._evict_lru_locked()
+                        if evicted is not None:
+                            to_close.append(evicted)
+                    if self._total < self.max_connections:
+                        self._pending[key] = self._pending.get(key, 0) + 1
+                        self._total += 1
+                        return None, to_close
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待连接池会话超时: {key}")
+                self._waiters += 1
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=remaining)
+                except TimeoutError:
+                    pass
+                finally:
+                    self._waiters -= 1
+
     async def acquire(
         self,
         host: str,
@@ -195,12 +320,9 @@ class AsyncConnectionPool:
         **kwargs: Any,
     ) -> "PooledConnectionContext":
         """
-        获取连接（优先复用，无可用连接时创建新连接）。
+        借出会话（优先复用空闲会话，无空闲且未达上限时创建新会话，否则等待归还）。
 
-        使用两阶段锁定优化：
-        1. 短锁：检查缓存、预留槽位
-        2. 无锁：创建连接（耗时的网络 I/O）
-        3. 短锁：放入缓存
+        锁只保护借出/预留等内存状态；健康检查与建连（耗时的网络 I/O）都在锁外进行。
 
         Args:
             host: 设备 IP 地址或主机名
@@ -211,194 +333,192 @@ class AsyncConnectionPool:
             **kwargs: 其他 Scrapli 参数
 
         Returns:
-            PooledConnectionContext: 连接上下文管理器
+            PooledConnectionContext: 连接上下文管理器（退出时归还会话）
 
         Raises:
             RuntimeError: 连接池已关闭
+            TimeoutError: 等待可用会话超时
         """
         if self._closed:
             raise RuntimeError("连接池已关闭")
 
         key = self._make_key(host, port, username)
-        pooled_to_check: PooledConnection | None = None
-        need_create = False
+        while True:
+            pooled, to_close = await self._checkout(key)
+            for stale in to_close:
+                await self._close_connection(stale)
+            if pooled is None:
+                break
+
+            # 在锁外检查借出会话的健康状态
+            if await self._is_connection_healthy(pooled):
+                pooled.touch()
+                logger.debug(
+                    "连接池复用连接",
+                    host=host,
+                    port=port,
+                    use_count=pooled.use_count,
+                )
+                return PooledConnectionContext(self, pooled, key, reused=True)
 
-        # 阶段 1：短锁 - 检查缓存并预留槽位
-        async with self._lock:
-            # 尝试复用现有连接
-            if key in self._pool:
-                pooled_to_check = self._pool[key]
-            elif key not in self._pending:
-                # 检查连接数限制
-                total_count = len(self._pool) + len(self._pending)
-                if total_count >= self.max_connections:
-                    # 移除最旧的空闲连接
-                    await self._evict_oldest()
-
-                # 标记为正在创建
-                self._pending.add(key)
-                need_create = True
-
-        # 阶段 2：无锁 - 检查健康状态或创建连接
-        if pooled_to_check is not None:
-            # 在锁外检查连接健康状态
-            if await self._is_connection_healthy(pooled_to_check):
-                async with self._lock:
-                    # 双重检查连接还在池中
-                    if key in self._pool and self._pool[key] is pooled_to_check:
-                        pooled_to_check.touch()
-                        logger.debug(
-                            "连接池复用连接",
-                            host=host,
-                            port=port,
-                            use_count=pooled_to_check.use_count,
-                            idle_time=int(pooled_to_check.idle_time),
-                        )
-                        return PooledConnectionContext(self, pooled_to_check, key, reused=True)
-
-            # 连接不健康或已被其他协程移除，需要创建新连接
+            # 连接不健康：移出池并重新借出/创建
             async with self._lock:
-                if key in self._pool:
-                    old_pooled = self._pool.pop(key)
-                    # 异步关闭旧连接（不阻塞）
-                    asyncio.create_task(self._close_connection(old_pooled))
+                self._remove_locked(pooled)
+            await self._close_connection(pooled)
 
-                if key not in self._pending:
-                    self._pending.add(key)
-                    need_create = True
-
-        if need_create:
-            # 在锁外创建新连接（耗时操作）
-            try:
-                conn_kwargs = {
-                    "host": host,
-                    "auth_username": username,
-                    "auth_password": password,
-                    "port": port,
-                    "platform": platform,
-                    "transport": "asyncssh",  # AsyncScrapli 需要异步 transport
-                    **kwargs,
-                }
-                conn = AsyncScrapli(**conn_kwargs)
-                await conn.open()
+        # 已预留创建名额，在锁外创建新连接（耗时操作）
+        try:
+            conn_kwargs = {
+                "host": host,
+                "auth_username": username,
+                "auth_password": password,
+                "port": port,
+                "platform": platform,
+                "transport": "asyncssh",  # AsyncScrapli 需要异步 transport
+                **kwargs,
+            }
+            conn = AsyncScrapli(**conn_kwargs)
+            await conn.open()
+        except BaseException:
+            # 创建失败，归还预留名额并唤醒等待者
+            async with self._lock:
+                self._release_pending_locked(key)
+            raise
+
+        pooled = PooledConnection(
+            conn=conn,
+            host=host,
+            port=port,
+            username=username,
+            platform=platform,
+            key=key,
+            in_use=True,
+        )
+        pooled.touch()
 
-                pooled = PooledConnection(
-                    conn=conn,
-                    host=host,
-                    port=port,
-                    username=username,
-                    platform=platform,
-                )
-                pooled.touch()
+        async with self._lock:
+            self._release_pending_locked(key)
+            self._total += 1
+            self._sessions.setdefault(key, []).append(pooled)
+            logger.debug(
+                "连接池创建新连接",
+                host=host,
+                port=port,
+                platform=platform,
+                pool_size=self._total,
+                key_sessions=len(self._sessions[key]),
+            )
 
-                # 阶段 3：短锁 - 放入缓存
-                async with self._lock:
-                    self._pending.discard(key)
-                    self._pool[key] = pooled
-
-                    logger.debug(
-                        "连接池创建新连接",
-                        host=host,
-                        port=port,
-                        platform=platform,
-                        pool_size=len(self._pool),
-                    )
-
-                return PooledConnectionContext(self, pooled, key, reused=False)
-            except Exception:
-                # 创建失败，移除待创建标记
-                async with self._lock:
-                    self._pending.discard(key)
-                raise
-
-        # 如果其他协程正在创建此连接，等待并重试
-        await asyncio.sleep(0.1)
-        return await self.acquire(host, username, password, platform, port, **kwargs)
-
-    async def _evict_oldest(self) -> None:
-        """移除最旧的空闲连接。
-
-        当连接池达到最大连接数时，移除最久未使用的连接。
-        """
-        if not self._pool:
-            return
+        return PooledConnectionContext(self, pooled, key, reused=False)
 
-        # 按空闲时间排序，移除最久未使用的
-        oldest_key = max(self._pool.keys(), key=lambda k: self._pool[k].idle_time)
-        oldest = self._pool.pop(oldest_key)
-        await self._close_connection(oldest)
-        logger.debug("连接池淘汰最旧连接", host=oldest.host, idle_time=int(oldest.idle_time))
+    def _release_pending_locked(self, key: str) -> None:
+        count = self._pending.get(key, 0) - 1
+        if count > 0:
+            self._pending[key] = count
+        else:
+            self._pending.pop(key, None)
+        self._total -= 1
+        self._cond.notify_all()
 
     async def release(self, key: str, pooled: PooledConnection, *, discard: bool = False) -> None:
         """
-        释放连接回连接池。
+        归还会话到连接池。
 
         Args:
             key: 连接缓存键
             pooled: 连接包装对象
             discard: 是否丢弃连接（不放回池中）
         """
-        async with self._lock:
-            if discard or self._closed:
-                await self._close_connection(pooled)
-                if key in self._pool:
-                    del self._pool[key]
+        close = discard or self._closed
+        async with self._cond:
+            pooled.in_use = False
+            pooled.last_used_at = time.monotonic()
+            if close or pooled.age > self.max_age:
+                self._remove_locked(pooled)
+                close = True
+            elif pooled in self._sessions.get(key, ()):
+                self._idle[pooled] = None
+                self._cond.notify_all()
             else:
-                pooled.touch()
+                close = True
+        if close:
+            await self._close_connection(pooled)
 
     async def close(self) -> None:
-        """关闭连接池，释放所有连接。"""
-        async with self._lock:
+        """关闭连接池：关闭全部空闲会话，借出中的会话在归还时关闭。"""
+        async with self._cond:
             self._closed = True
-            self._pending.clear()
-            for _, pooled in list(self._pool.items()):
-                await self._close_connection(pooled)
-            self._pool.clear()
-            logger.info("连接池已关闭")
+            idle = list(self._idle)
+            for pooled in idle:
+                self._remove_locked(pooled)
+            self._cond.notify_all()
+        for pooled in idle:
+            await self._close_connection(pooled)
+        logger.info("连接池已关闭")
 
     async def cleanup_idle(self) -> int:
         """
-        清理空闲连接。
+        清理超过空闲/存活时间的空闲会话（借出中的会话不受影响）。
 
         Returns:
             int: 清理的连接数
         """
-        cleaned = 0
-        async with self._lock:
-            for key in list(self._pool.keys()):
-                pooled = self._pool[key]
-                if pooled.idle_time > self.max_idle_time or pooled.age > self.max_age:
-                    await self._close_connection(pooled)
-                    del self._pool[key]
-                    cleaned += 1
+        async with self._cond:
+            expired = [p for p in self._idle if p.idle_time > self.max_idle_time or p.age > self.max_age]
+            for pooled in expired:
+                self._remove_locked(pooled)
+        for pooled in expired:
+            await self._close_connection(pooled)
 
-        if cleaned > 0:
-            logger.info("连接池清理空闲连接", cleaned=cleaned, remaining=len(self._pool))
+        if expired:
+            logger.info("连接池清理空闲连接", cleaned=len(expired), remaining=self.size)
 
-        return cleaned
+        return len(expired)
 
     @property
     def size(self) -> int:
-        """当前连接池大小。"""
-        return len(self._pool)
+        """当前连接池会话数。"""
+        return sum(len(sessions) for sessions in self._sessions.values())
+
+    def record_saved_round_trips(self, count: int) -> None:
+        """
+        累计热会话跳过的预热往返次数。
+
+        Args:
+            count: 本次节省的往返次数
+        """
+        self._saved_round_trips += count
+
+    @property
+    def in_use(self) -> int:
+        """当前借出中的会话数。"""
+        return self.size - len(self._idle)
 
     def stats(self) -> dict[str, Any]:
         """获取连接池统计信息。"""
         return {
-            "size": len(self._pool),
-            "pending": len(self._pending),
+            "size": self.size,
+            "in_use": self.in_use,
+            "idle": len(self._idle),
+            "pending": sum(self._pending.values()),
+            "waiters": self._waiters,
+            "saved_round_trips": self._saved_round_trips,
             "max_connections": self.max_connections,
+            "max_sessions_per_key": self.max_sessions_per_key,
             "closed": self._closed,
             "connections": [
                 {
                     "host": p.host,
                     "port": p.port,
                     "platform": p.platform,
+                    "in_use": p.in_use,
+                    "warm": p.state.prompt is not None and p.state.paging_checked,
                     "use_count": p.use_count,
                     "age": int(p.age),
                     "idle_time": int(p.idle_time),
                 }
-                for p in self._pool.values()
+                for sessions in self._sessions.values()
+                for p in sessions
             ],
         }
 
@@ -436,10 +556,60 @@ class PooledConnectionContext:
         """是否为复用的连接。"""
         return self._reused
 
+    @property
+    def state(self) -> SessionState:
+        """会话预热状态。"""
+        return self._pooled.state
+
     def discard(self) -> None:
         """标记连接为需要丢弃（不放回池中）。"""
         self._discard = True
 
+    def invalidate_state(self) -> None:
+        """清空会话预热状态（如配置下发可能修改主机名/提示符后调用）。"""
+        self._pooled.state = SessionState()
+
+    async def warm_up(self, platform: str) -> str | None:
+        """
+        预热会话：获取提示符并关闭分页，热会话直接复用已记录的状态。
+
+        Args:
+            platform: Scrapli 平台标识
+
+        Returns:
+            str | None: 设备提示符（获取失败时为 None）
+        """
+        conn = self._pooled.conn
+        state = self._pooled.state
+        saved = 0
+
+        if state.prompt is None:
+            try:
+                state.prompt = await conn.get_prompt()
+            except Exception as e:
+                logger.debug("获取提示符失败", host=self._pooled.host, error=str(e))
+        else:
+            saved += 1
+
+        if state.paging_checked:
+            # 已关闭分页省 1 次往返；关闭失败的平台省去全部候选命令的重试
+            saved += 1 if state.paging_disabled else len(get_paging_disable_commands(platform))
+        elif get_paging_disable_commands(platform):
+            state.paging_disabled = await disable_paging_async(conn, platform)
+            state.paging_checked = True
+            if not state.paging_disabled:
+                state.quirks["paging_disable_failed"] = True
+        else:
+            state.paging_checked = True
+            state.quirks["paging_disable_unsupported"] = True
+
+        priv_level = getattr(conn, "_current_priv_level", None)
+        state.privilege_level = getattr(priv_level, "name", None) or state.privilege_level
+
+        if saved:
+            self._pool.record_saved_round_trips(saved)
+        return state.prompt
+
     async def __aenter__(self) -> AsyncScrapli:
         return self._pooled.conn
 
@@ -477,10 +647,13 @@ async def get_connection_pool() -> AsyncConnectionPool:
                 max_age=getattr(settings, "SCRAPLI_POOL_MAX_AGE", 3600.0),
                 health_check=getattr(settings, "SCRAPLI_POOL_HEALTH_CHECK", True),
                 health_check_timeout=getattr(settings, "POOL_HEALTH_CHECK_TIMEOUT", 5.0),
+                max_sessions_per_key=settings.SCRAPLI_POOL_MAX_SESSIONS_PER_DEVICE,
+                acquire_timeout=settings.SCRAPLI_POOL_ACQUIRE_TIMEOUT,
             )
             logger.info(
                 "全局连接池已初始化",
                 max_connections=_global_pool.max_connections,
+                max_sessions_per_key=_global_pool.max_sessions_per_key,
                 max_idle_time=_global_pool.max_idle_time,
                 health_check_timeout=_global_pool.health_check_timeout,
             )
@@ -236,6 +236,8 @@ def _devices_to_hosts_data(devices: list[Any]) -> list[dict[str, Any]]:
             "data": {
                 "device_id": str(device.id),
                 "device_name": device.name,
+                "dept_id": str(device.dept_id) if device.dept_id else None,
+                "device_group": device.device_group,
                 "vendor": device.vendor,
                 "model": device.model,
                 "location": device.location,
@@ -171,6 +171,54 @@ COMMAND_MAP: dict[str, dict[str, str]] = {
 }
 
 
+# ===== 配置变更标记探测（增量检查先探测标记，标记变化才全量采集配置）=====
+# SNMP：设备记录的"运行配置最后修改时间"（sysUpTime 计时），单次 GET 即可，不建立 SSH 会话
+CONFIG_CHANGE_SNMP_OIDS: dict[str, str] = _expand_cisco_commands(
+    {
+        "cisco_iosxe": "1.3.6.1.4.1.9.9.43.1.1.1.0",  # CISCO-CONFIG-MAN-MIB::ccmHistoryRunningLastChanged
+        "hp_comware": "1.3.6.1.4.1.25506.2.4.1.1.1.0",  # HH3C-CONFIG-MAN-MIB::hh3cCfgRunModifiedLast
+        "huawei_vrp": "1.3.6.1.4.1.2011.6.10.1.1.1.0",  # HUAWEI-CONFIG-MAN-MIB::hwCfgRunModifiedLast
+    }
+)
+
+# CLI：只输出一行变更时间/提交号的轻量命令，(命令, 提取标记的正则)；正则不匹配视为无法探测
+CONFIG_CHANGE_CLI_PROBES: dict[str, tuple[str, str]] = {
+    "cisco_iosxe": ("show running-config | include Last configuration change", r"Last configuration change at (.+)"),
+    "cisco_ios": ("show running-config | include Last configuration change", r"Last configuration change at (.+)"),
+    "cisco_nxos": (
+        'show running-config | include "Running configuration last done"',
+        r"Running configuration last done at:?\s*(.+)",
+    ),
+    "huawei_vrp": ("display configuration commit list 1", r"^\s*1\s+(\d+)\s"),
+}
+
+
+def get_config_change_snmp_oid(platform: str) -> str | None:
+    """
+    获取配置变更标记的 SNMP OID。
+
+    Args:
+        platform: Scrapli 平台标识
+
+    Returns:
+        str | None: OID，平台不支持时返回 None
+    """
+    return CONFIG_CHANGE_SNMP_OIDS.get(platform)
+
+
+def get_config_change_cli_probe(platform: str) -> tuple[str, str] | None:
+    """
+    获取配置变更标记的 CLI 探测命令。
+
+    Args:
+        platform: Scrapli 平台标识
+
+    Returns:
+        tuple[str, str] | None: (命令, 标记提取正则)，平台不支持时返回 None
+    """
+    return CONFIG_CHANGE_CLI_PROBES.get(platform)
+
+
 # ===== Scrapli 连接默认参数 =====
 SCRAPLI_DEFAULTS: dict[str, Any] = {
     "auth_strict_key": False,
@@ -28,6 +28,13 @@ class AlertCreate(BaseModel):
     related_discovery_id: UUID | None = Field(default=None, description="关联发现记录ID")
 
 
+class AlertBulkCreateResult(BaseModel):
+    """批量创建告警结果（内部使用）。"""
+
+    created_ids: list[UUID] = Field(default_factory=list, description="新创建的告警ID")
+    existing_ids: list[UUID] = Field(default_factory=list, description="去重命中的已有告警ID")
+
+
 class AlertUpdate(BaseModel):
     """更新告警（内部使用）。"""
 
@@ -38,6 +38,7 @@ class BackupCreate(BackupBase):
         content (str | None): 配置内容（小配置直接存储）。
         content_path (str | None): MinIO 存储路径（大配置）。
         content_size (int): 配置大小（字节），默认 0。
+        content_hash (str | None): 内容块 SHA-256（去重存储）。
         md5_hash (str | None): MD5 哈希值。
         status (BackupStatus): 备份状态，默认 SUCCESS。
         operator_id (UUID | None): 操作人 ID。
@@ -48,6 +49,7 @@ class BackupCreate(BackupBase):
     content: str | None = Field(default=None, description="配置内容")
     content_path: str | None = Field(default=None, description="MinIO 存储路径")
     content_size: int = Field(default=0, description="配置大小(字节)")
+    content_hash: str | None = Field(default=None, description="内容块 SHA-256")
     md5_hash: str | None = Field(default=None, description="MD5 哈希值")
     status: BackupStatus = Field(default=BackupStatus.SUCCESS, description="备份状态")
     operator_id: UUID | None = Field(default=None, description="操作人ID")
@@ -91,6 +93,7 @@ class BackupResponse(BaseModel):
     # 内部字段（用于计算 has_content）
     content: str | None = Field(default=None, exclude=True)
     content_path: str | None = Field(default=None, exclude=True)
+    content_hash: str | None = Field(default=None, exclude=True)
 
     @computed_field
     @property
@@ -100,7 +103,7 @@ class BackupResponse(BaseModel):
         Returns:
             bool: 如果有配置内容则返回 True。
         """
-        return bool(self.content or self.content_path)
+        return bool(self.content or self.content_path or self.content_hash)
 
     model_config = ConfigDict(from_attributes=True, use_enum_values=True)
 
@@ -113,6 +113,9 @@ class DeviceCollectResult(BaseModel):
     mac_count: int = Field(default=0, description="MAC 条目数")
     error_message: str | None = Field(default=None, description="错误信息")
     duration_ms: int | None = Field(default=None, description="耗时（毫秒）")
+    added_count: int = Field(default=0, description="相比上次采集新增条目数")
+    removed_count: int = Field(default=0, description="相比上次采集消失条目数")
+    moved_count: int = Field(default=0, description="相比上次采集迁移条目数（MAC 换端口/IP 换 MAC）")
 
 
 class CollectResult(BaseModel):
@@ -163,3 +166,28 @@ class LocateResponse(BaseModel):
     total: int = Field(default=0, description="匹配总数")
     searched_devices: int = Field(default=0, description="搜索的设备数")
     search_time_ms: int = Field(default=0, description="搜索耗时（毫秒）")
+
+
+# ===== MAC 历史轨迹 =====
+
+
+class MACHistoryEvent(BaseModel):
+    """MAC 历史事件（仅在条目出现/消失/迁移时记录）。"""
+
+    event: str = Field(..., description="事件类型 (seen/gone)")
+    source: str = Field(..., description="数据来源 (arp/mac)")
+    device_id: UUID = Field(..., description="设备ID")
+    device_name: str | None = Field(default=None, description="设备名称")
+    interface: str | None = Field(default=None, description="接口/端口")
+    vlan_id: str | None = Field(default=None, description="VLAN ID")
+    ip_address: str | None = Field(default=None, description="IP 地址（ARP 来源时）")
+    occurred_at: datetime = Field(..., description="发生时间（采集时间）")
+
+
+class MACHistoryResponse(BaseModel):
+    """MAC 历史轨迹响应。"""
+
+    query: str = Field(..., description="查询的 MAC 地址")
+    at: datetime = Field(..., description="查询时间点")
+    locations: list[LocateMatch] = Field(default_factory=list, description="该时间点所在位置")
+    events: list[MACHistoryEvent] = Field(default_factory=list, description="截至该时间点的事件（新在前）")
@@ -12,6 +12,15 @@ from uuid import UUID
 from pydantic import BaseModel, Field
 
 
+class DiffSection(BaseModel):
+    """配置段差异。"""
+
+    section: str = Field(..., description="配置段（顶格段头，顶格单行命令归入 (global)）")
+    change: str = Field(..., description="变更类型(added/removed/modified)")
+    added: list[str] = Field(default_factory=list, description="新增的段内命令")
+    removed: list[str] = Field(default_factory=list, description="删除的段内命令")
+
+
 class DiffResponse(BaseModel):
     """差异响应（unified diff）。"""
 
@@ -25,6 +34,7 @@ class DiffResponse(BaseModel):
     old_hash: str | None = Field(default=None, description="旧版本 Hash/MD5")
     new_hash: str | None = Field(default=None, description="新版本 Hash/MD5")
     diff_content: str | None = Field(default=None, description="unified diff 文本")
+    sections: list[DiffSection] = Field(default_factory=list, description="按配置段划分的差异")
     has_changes: bool = Field(default=False, description="是否存在变更")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="对比生成时间(UTC)")
 
@@ -17,7 +17,7 @@ from app.utils.validators import validate_ip_address, validate_mac_address
 
 # ===== 扫描类型验证 =====
 
-_VALID_SCAN_TYPES = frozenset({"auto", "nmap", "masscan"})
+_VALID_SCAN_TYPES = frozenset({"auto", "nmap", "masscan", "sweep"})
 
 
 def _validate_scan_type(v: str) -> str:
@@ -35,7 +35,7 @@ class ScanRequest(BaseModel):
     """网络扫描请求。"""
 
     subnets: list[str] = Field(..., min_length=1, description="待扫描网段列表 (CIDR 格式)")
-    scan_type: str = Field(default="auto", description="扫描类型 (auto/nmap/masscan)")
+    scan_type: str = Field(default="auto", description="扫描类型 (auto/nmap/masscan/sweep)")
     ports: str | None = Field(default=None, description="扫描端口 (如 22,23,80,443)")
     async_mode: bool = Field(default=True, description="是否异步执行")
     snmp_cred_id: UUID | None = Field(default=None, description="SNMP 凭据ID")
@@ -50,7 +50,7 @@ class ScanSubnetRequest(BaseModel):
     """单网段扫描请求。"""
 
     subnet: str = Field(..., description="网段 (CIDR 格式，如 192.168.1.0/24)")
-    scan_type: str = Field(default="auto", description="扫描类型 (auto/nmap/masscan)")
+    scan_type: str = Field(default="auto", description="扫描类型 (auto/nmap/masscan/sweep)")
     ports: str | None = Field(default=None, description="扫描端口")
 
     @field_validator("scan_type")
@@ -259,6 +259,8 @@ class CMDBCompareResult(BaseModel):
     matched: int = Field(default=0, description="匹配数量")
     shadow_assets: int = Field(default=0, description="影子资产数量")
     offline_devices: int = Field(default=0, description="离线设备数量")
+    newly_matched: int = Field(default=0, description="本次新匹配（或匹配设备变化）的发现记录数")
+    newly_shadow: int = Field(default=0, description="本次新转为影子资产的发现记录数")
     compared_at: datetime = Field(default_factory=datetime.now, description="比对时间")
 
 
@@ -120,6 +120,14 @@ class TopologyResponse(BaseModel):
     stats: TopologyStats = Field(default_factory=TopologyStats, description="统计信息")
 
 
+class TopologySubgraphResponse(TopologyResponse):
+    """拓扑子图响应 (vis.js 格式，按边分页，统计信息为整个子图)。"""
+
+    page: int = Field(default=1, description="当前页")
+    page_size: int = Field(default=2000, description="每页边数")
+    has_more: bool = Field(default=False, description="是否还有下一页")
+
+
 # ===== 采集请求和结果 =====
 
 
@@ -8,27 +8,39 @@
 提供告警创建、分页查询、确认(ack)、关闭(close)等能力。
 """
 
-from datetime import datetime, timedelta
+from collections.abc import Sequence
+from datetime import datetime
 from uuid import UUID
 
+import uuid6
 from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache
+from app.core.config import settings
 from app.core.decorator import transactional
-from app.core.enums import AlertStatus, AlertType
+from app.core.enums import AlertStatus, AlertType, StatMetric
 from app.core.exceptions import NotFoundException
 from app.core.logger import logger
 from app.crud.crud_alert import CRUDAlert
+from app.crud.crud_stat import stat_daily_crud
 from app.models.alert import Alert
-from app.schemas.alert import AlertCreate, AlertListQuery, AlertUpdate
+from app.schemas.alert import AlertBulkCreateResult, AlertCreate, AlertListQuery, AlertUpdate
 from app.schemas.common import BatchOperationResult
+from app.services.base import CacheMixin
+from app.services.notification_service import NotificationService
+from app.services.stats_service import StatsService, alert_dimensions
 
+# 告警统计缓存键模式（key 规范：v1:alert:stats:{函数}:{hash}）
+ALERT_STATS_CACHE_PATTERN = "v1:alert:stats:*"
 
-class AlertService:
+
+class AlertService(CacheMixin):
     """
     告警服务类。
 
     提供告警创建、分页查询、确认(ack)、关闭(close)等能力。
+    继承 CacheMixin，告警写入提交后失效统计缓存。
     """
 
     def __init__(self, db: AsyncSession, alert_crud: CRUDAlert):
@@ -41,6 +53,7 @@ class AlertService:
         """
         self.db = db
         self.alert_crud = alert_crud
+        self._post_commit_tasks: list = []
 
     async def get_alert(self, alert_id: UUID) -> Alert:
         """
@@ -102,6 +115,96 @@ class AlertService:
         Returns:
             Alert: 创建的告警对象（如果存在重复则返回已存在的告警）
         """
+        alert, _ = await self._create_or_get_alert(alert_in, dedup_minutes=dedup_minutes)
+        return alert
+
+    @transactional()
+    async def raise_alert(
+        self,
+        alert_in: AlertCreate,
+        *,
+        notifier: NotificationService,
+        dedup_minutes: int = 24 * 60,
+    ) -> tuple[Alert, bool]:
+        """
+        创建告警并在同一事务内写入通知发件箱。
+
+        去重命中时返回已存在的告警且不再入队通知，避免重复推送。
+
+        Args:
+            alert_in: 告警创建数据
+            notifier: 通知服务
+            dedup_minutes: 去重时间窗口（分钟）
+
+        Returns:
+            tuple[Alert, bool]: (告警对象, 是否为新创建)
+        """
+        alert, created = await self._create_or_get_alert(alert_in, dedup_minutes=dedup_minutes)
+        if created:
+            await notifier.enqueue(self.db, [alert.id])
+        return alert, created
+
+    @transactional()
+    async def create_alerts_bulk(
+        self,
+        alerts_in: Sequence[AlertCreate],
+        *,
+        dedup_minutes: int = 24 * 60,
+        notifier: NotificationService | None = None,
+    ) -> AlertBulkCreateResult:
+        """
+        批量创建告警（集合式去重）。
+
+        一次查询取出窗口内可能重复的未关闭告警，内存中按 (类型, 关联设备, 关联发现记录) 匹配，
+        未命中的告警以多行 INSERT 写入；同一批内的重复告警只创建一条。
+        匹配规则与 create_alert 一致：未指定的关联字段可匹配任意值，命中多条时取最新。
+
+        Args:
+            alerts_in: 告警创建数据列表
+            dedup_minutes: 去重时间窗口（分钟）
+            notifier: 通知服务（传入时为新告警写入通知发件箱）
+
+        Returns:
+            AlertBulkCreateResult: 新创建与去重命中的告警 ID
+        """
+        index: dict[tuple[str, UUID | None, UUID | None], UUID] = {}
+        rows = await self.alert_crud.get_recent_open_alert_keys(
+            self.db, alerts_in=alerts_in, within_minutes=dedup_minutes
+        )
+        for row in rows:
+            for key in self._dedup_keys(row.alert_type, row.related_device_id, row.related_discovery_id):
+                index[key] = row.id
+
+        result = AlertBulkCreateResult()
+        to_create: list[AlertCreate] = []
+        for alert_in in alerts_in:
+            key = (alert_in.alert_type.value, alert_in.related_device_id, alert_in.related_discovery_id)
+            if key in index:
+                result.existing_ids.append(index[key])
+                continue
+            alert_id = uuid6.uuid7()
+            for new_key in self._dedup_keys(*key):
+                index[new_key] = alert_id
+            to_create.append(alert_in)
+            result.created_ids.append(alert_id)
+
+        await self.alert_crud.create_many(self.db, objs_in=to_create, ids=result.created_ids)
+        await self._record_created(to_create)
+        if to_create:
+            self._invalidate_stats_after_commit()
+        if notifier is not None:
+            await notifier.enqueue(self.db, result.created_ids)
+        return result
+
+    @staticmethod
+    def _dedup_keys(
+        alert_type: str, device_id: UUID | None, discovery_id: UUID | None
+    ) -> list[tuple[str, UUID | None, UUID | None]]:
+        """已有告警可命中的去重键（None 表示待创建告警未指定该字段，可匹配任意值）。"""
+        return [(alert_type, d, s) for d in {device_id, None} for s in {discovery_id, None}]
+
+    async def _create_or_get_alert(self, alert_in: AlertCreate, *, dedup_minutes: int) -> tuple[Alert, bool]:
+        """创建告警或返回去重窗口内已存在的告警。"""
         # 去重：避免每天重复产生同类型同对象的告警
         exists = await self.alert_crud.exists_recent_open_alert(
             self.db,
@@ -118,9 +221,28 @@ class AlertService:
                 related_discovery_id=alert_in.related_discovery_id,
             )
             if latest:
-                return latest
+                return latest, False
 
-        return await self.alert_crud.create(self.db, obj_in=alert_in)
+        alert = await self.alert_crud.create(self.db, obj_in=alert_in)
+        await self._record_created([alert_in])
+        self._invalidate_stats_after_commit()
+        return alert, True
+
+    def _invalidate_stats_after_commit(self) -> None:
+        """注册告警统计缓存失效任务，在事务提交后执行。"""
+
+        async def _task() -> None:
+            await self._cache_delete_pattern(ALERT_STATS_CACHE_PATTERN)
+
+        self._post_commit_tasks.append(_task)
+
+    async def _record_created(self, alerts_in: Sequence[AlertCreate]) -> None:
+        """累加当天新增告警汇总（按类型、级别）。"""
+        if alerts_in:
+            await StatsService(self.db, stat_daily_crud).record(
+                StatMetric.ALERT,
+                [alert_dimensions(a.alert_type.value, a.severity.value) for a in alerts_in],
+            )
 
     @transactional()
     async def ack_alert(self, alert_id: UUID, *, user_id: UUID | None = None) -> Alert:
@@ -141,6 +263,7 @@ class AlertService:
             acked_by_id=user_id,
             acked_at=now,
         )
+        self._invalidate_stats_after_commit()
         return await self.alert_crud.update(self.db, db_obj=alert, obj_in=update_data)
 
     @transactional()
@@ -162,6 +285,7 @@ class AlertService:
             closed_by_id=user_id,
             closed_at=now,
         )
+        self._invalidate_stats_after_commit()
         return await self.alert_crud.update(self.db, db_obj=alert, obj_in=update_data)
 
     @transactional()
@@ -194,6 +318,8 @@ class AlertService:
         )
         result = await self.db.execute(stmt)
         success_count: int = result.rowcount or 0  # type: ignore[union-attr]
+        if success_count:
+            self._invalidate_stats_after_commit()
 
         failed_count = len(alert_ids) - success_count
         if failed_count > 0:
@@ -242,6 +368,8 @@ class AlertService:
         )
         result = await self.db.execute(stmt)
         success_count: int = result.rowcount or 0  # type: ignore[union-attr]
+        if success_count:
+            self._invalidate_stats_after_commit()
 
         failed_count = len(alert_ids) - success_count
         if failed_count > 0:
@@ -286,6 +414,8 @@ class AlertService:
         )
         result = await self.db.execute(stmt)
         closed_count: int = result.rowcount or 0  # type: ignore[union-attr]
+        if closed_count:
+            self._invalidate_stats_after_commit()
 
         if closed_count > 0:
             logger.info(
@@ -322,6 +452,8 @@ class AlertService:
         )
         result = await self.db.execute(stmt)
         closed_count: int = result.rowcount or 0  # type: ignore[union-attr]
+        if closed_count:
+            self._invalidate_stats_after_commit()
 
         if closed_count > 0:
             logger.info(
@@ -334,10 +466,13 @@ class AlertService:
 
     # ===== 告警统计 =====
 
+    @cache(prefix="v1:alert:stats", expire=settings.DASHBOARD_CACHE_TTL)
     async def get_stats(self) -> dict:
         """
         获取告警统计数据（按类型/级别/状态分组）。
 
+        单次分组查询（类型, 级别, 状态）后在内存中汇总，结果短时缓存。
+
         Returns:
             dict: {
                 "total": 总数,
@@ -346,32 +481,22 @@ class AlertService:
                 "by_status": {"open": n, "ack": n, "closed": n}
             }
         """
-        base_condition = Alert.is_deleted.is_(False)
-
-        # 总数
-        total_query = select(func.count(Alert.id)).where(base_condition)
-        total = (await self.db.execute(total_query)).scalar() or 0
-
-        # 按类型分组
-        type_query = (
-            select(Alert.alert_type, func.count(Alert.id)).where(base_condition).group_by(Alert.alert_type)
-        )
-        type_result = await self.db.execute(type_query)
-        by_type = {row[0]: row[1] for row in type_result.all()}
-
-        # 按级别分组
-        severity_query = (
-            select(Alert.severity, func.count(Alert.id)).where(base_condition).group_by(Alert.severity)
+        query = (
+            select(Alert.alert_type, Alert.severity, Alert.status, func.count(Alert.id))
+            .where(Alert.is_deleted.is_(False))
+            .group_by(Alert.alert_type, Alert.severity, Alert.status)
         )
-        severity_result = await self.db.execute(severity_query)
-        by_severity = {row[0]: row[1] for row in severity_result.all()}
+        result = await self.db.execute(query)
 
-        # 按状态分组
-        status_query = (
-            select(Alert.status, func.count(Alert.id)).where(base_condition).group_by(Alert.status)
-        )
-        status_result = await self.db.execute(status_query)
-        by_status = {row[0]: row[1] for row in status_result.all()}
+        total = 0
+        by_type: dict[str, int] = {}
+        by_severity: dict[str, int] = {}
+        by_status: dict[str, int] = {}
+        for alert_type, severity, status, count in result.all():
+            total += count
+            by_type[alert_type] = by_type.get(alert_type, 0) + count
+            by_severity[severity] = by_severity.get(severity, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
 
         return {
             "total": total,
@@ -382,28 +507,12 @@ class AlertService:
 
     async def get_trend(self, days: int = 7) -> list[dict]:
         """
-        获取告警趋势数据（近 N 天每日新增）。
+        获取告警趋势数据（近 N 天每日新增，读取每日统计汇总）。
 
         Args:
-            days: 天数，默认 7 天
+            days: 天数（含今天），默认 7 天
 
         Returns:
             list[dict]: [{"date": "2026-01-20", "count": 5}, ...]
         """
-        since = datetime.now() - timedelta(days=days)
-
-        # 按日期分组统计
-        query = (
-            select(
-                func.date(Alert.created_at).label("date"),
-                func.count(Alert.id).label("count"),
-            )
-            .where(Alert.is_deleted.is_(False))
-            .where(Alert.created_at >= since)
-            .group_by(func.date(Alert.created_at))
-            .order_by(func.date(Alert.created_at))
-        )
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        return [{"date": str(row.date), "count": row.count} for row in rows]
+        return await StatsService(self.db, stat_daily_crud).get_trend(StatMetric.ALERT, days)
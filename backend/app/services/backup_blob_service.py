@@ -0,0 +1,506 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: backup_blob_service.py
+@DateTime: 2026-02-05 10:00:00
+@Docs: 备份内容块服务 (Backup Blob Service).
+
+内容寻址去重存储：配置按 SHA-256 存入 ncm_backup_blob（小配置存 DB，大配置存 MinIO），
+备份记录只保存 content_hash 引用；引用计数随备份的写入、删除、恢复增减，归零时删除内容块。
+
+BACKUP_STORAGE_MODE 控制新内容块的编码：plain 明文、compressed 压缩快照、
+delta 相对同设备上一版本的行级差量（每 BACKUP_DELTA_SNAPSHOT_INTERVAL 层写一次完整快照）。
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.minio_client import (
+    delete_objects_safe,
+    get_bytes,
+    get_text,
+    get_text_safe,
+    put_bytes_safe,
+    put_text_safe,
+)
+from app.crud.crud_backup import CRUDBackup
+from app.crud.crud_backup import backup as backup_crud
+from app.models.backup import Backup
+from app.models.backup_blob import BackupBlob
+from app.utils import backup_codec
+from app.utils.validators import compute_text_sha256_async
+
+# 孤儿内容块宽限期：重新统计引用后至少保留这么久才删除，避免与并发写入竞争
+BLOB_ORPHAN_GRACE = timedelta(hours=1)
+
+# 批量读取备份内容时 MinIO 的最大并发读取数
+MINIO_READ_CONCURRENCY = 10
+
+
+async def load_backup_content(db: AsyncSession, backup: Backup) -> str | None:
+    """
+    读取备份配置内容（DB / MinIO / 内容块自动路由）。
+
+    Args:
+        db: 异步数据库会话
+        backup: 备份对象
+
+    Returns:
+        str | None: 配置内容，内容不存在时返回 None
+
+    Raises:
+        Exception: MinIO 读取失败时透传
+    """
+    if backup.content:
+        return backup.content
+    if backup.content_path:
+        return await get_text(backup.content_path)
+    if backup.content_hash:
+        contents = await load_blob_contents(db, backup_crud, [backup.content_hash])
+        return contents.get(backup.content_hash)
+    return None
+
+
+async def _read_payload(blob: BackupBlob) -> str | bytes | None:
+    """读取内容块的原始存储数据（identity 为文本，其余为编码后的字节）。"""
+    if blob.content_encoding == backup_codec.IDENTITY:
+        if blob.content is not None:
+            return blob.content
+        return await get_text(blob.content_path) if blob.content_path else None
+    if blob.content_data is not None:
+        return blob.content_data
+    return await get_bytes(blob.content_path) if blob.content_path else None
+
+
+async def load_blob_contents(db: AsyncSession, crud: CRUDBackup, hashes: Sequence[str]) -> dict[str, str]:
+    """
+    批量还原内容块原文（一次递归查询取齐差量链，逐层应用差量）。
+
+    同一批次内共享的基准只解码一次。
+
+    Args:
+        db: 异步数据库会话
+        crud: 备份 CRUD 实例
+        hashes: 内容哈希列表
+
+    Returns:
+        dict[str, str]: 内容哈希 -> 原文（内容块不存在或链断裂的不在其中）
+
+    Raises:
+        Exception: MinIO 读取失败时透传
+    """
+    blobs = await crud.get_blob_chains(db, hashes)
+    decoded: dict[str, str] = {}
+
+    async def _resolve(content_hash: str) -> str | None:
+        # 沿 base_hash 向上收集到最近的已解码版本或完整快照，再自底向上应用差量
+        pending: list[BackupBlob] = []
+        current: str | None = content_hash
+        while current is not None and current not in decoded:
+            blob = blobs.get(current)
+            if blob is None or len(pending) > len(blobs):
+                return None
+            pending.append(blob)
+            current = blob.base_hash if backup_codec.split_encoding(blob.content_encoding)[0] else None
+
+        text = decoded.get(current) if current is not None else None
+        for blob in reversed(pending):
+            payload = await _read_payload(blob)
+            if payload is None:
+                return None
+            is_delta, algorithm = backup_codec.split_encoding(blob.content_encoding)
+            if isinstance(payload, str):
+                text = payload
+            elif is_delta:
+                if text is None:
+                    return None
+                text = backup_codec.apply_delta(text, backup_codec.decode_delta(payload, algorithm))
+            else:
+                text = backup_codec.decode_snapshot(payload, algorithm)
+            decoded[blob.content_hash] = text
+        return text
+
+    result: dict[str, str] = {}
+    for content_hash in dict.fromkeys(hashes):
+        text = await _resolve(content_hash)
+        if text is not None:
+            result[content_hash] = text
+    return result
+
+
+async def load_backup_contents(db: AsyncSession, backups: Sequence[Backup]) -> dict[UUID, str]:
+    """
+    批量读取备份配置内容（DB 直存 / MinIO / 内容块一次性分流）。
+
+    MinIO 对象并发读取（带熔断保护），内容块一次递归查询还原；读取失败的备份不在结果中。
+
+    Args:
+        db: 异步数据库会话
+        backups: 备份对象列表
+
+    Returns:
+        dict[UUID, str]: 备份 ID -> 配置内容
+    """
+    contents: dict[UUID, str] = {}
+    minio_backups: list[Backup] = []
+    blob_backups: list[Backup] = []
+    for backup in backups:
+        if backup.content:
+            contents[backup.id] = backup.content
+        elif backup.content_path:
+            minio_backups.append(backup)
+        elif backup.content_hash:
+            blob_backups.append(backup)
+
+    if minio_backups:
+        sem = asyncio.Semaphore(MINIO_READ_CONCURRENCY)
+
+        async def _read(backup: Backup) -> tuple[UUID, str | None]:
+            async with sem:
+                return backup.id, await get_text_safe(backup.content_path or "")
+
+        for backup_id, text in await asyncio.gather(*(_read(b) for b in minio_backups)):
+            if text is not None:
+                contents[backup_id] = text
+
+    if blob_backups:
+        try:
+            blob_contents = await load_blob_contents(db, backup_crud, [b.content_hash or "" for b in blob_backups])
+        except Exception as e:
+            logger.warning("批量读取内容块失败", count=len(blob_backups), error=str(e))
+            blob_contents = {}
+        for backup in blob_backups:
+            if backup.content_hash in blob_contents:
+                contents[backup.id] = blob_contents[backup.content_hash]
+    return contents
+
+
+async def load_backup_content_safe(db: AsyncSession, backup: Backup) -> str | None:
+    """
+    读取备份配置内容（失败时返回 None 而不是抛出异常）。
+
+    Args:
+        db: 异步数据库会话
+        backup: 备份对象
+
+    Returns:
+        str | None: 配置内容，内容不存在或读取失败时返回 None
+    """
+    try:
+        return await load_backup_content(db, backup)
+    except Exception as e:
+        logger.warning("读取备份内容失败", backup_id=str(backup.id), error=str(e))
+        return None
+
+
+class BackupBlobService:
+    """
+    备份内容块服务类。
+
+    所有方法只在调用方事务内读写，不提交；release 返回的 MinIO 路径需在提交后删除，
+    placed_objects 记录本实例写入的 MinIO 对象，调用方事务回滚时需删除。
+    """
+
+    def __init__(self, db: AsyncSession, backup_crud: CRUDBackup):
+        """
+        初始化内容块服务。
+
+        Args:
+            db: 异步数据库会话
+            backup_crud: 备份 CRUD 实例
+        """
+        self.db = db
+        self.backup_crud = backup_crud
+        self.placed_objects: list[str] = []
+
+    @staticmethod
+    def object_name(content_hash: str) -> str:
+        """
+        生成内容块的 MinIO 对象名。
+
+        带随机后缀：内容块被删除后同一内容重新写入时使用新对象，
+        不会被旧内容块提交后的对象删除误伤。
+
+        Args:
+            content_hash: 内容哈希
+
+        Returns:
+            str: MinIO 对象名
+        """
+        return f"blobs/{content_hash[:2]}/{content_hash}-{uuid4().hex[:8]}.txt"
+
+    async def store(self, content: str, device_id: UUID | None = None) -> str:
+        """
+        存储单份配置内容并增加一次引用。
+
+        Args:
+            content: 配置内容
+            device_id: 所属设备 ID（差量模式下用于查找上一版本作为基准）
+
+        Returns:
+            str: 内容哈希
+        """
+        hashes = await self.store_many([content], [device_id])
+        return hashes[0]
+
+    async def store_many(self, contents: Sequence[str], device_ids: Sequence[UUID | None] | None = None) -> list[str]:
+        """
+        批量存储配置内容，每份内容增加一次引用。
+
+        已存在的内容块只做一条 UPDATE 累加引用；新内容块按存储模式编码、按大小分流 DB/MinIO 后批量插入。
+
+        Args:
+            contents: 配置内容列表
+            device_ids: 与 contents 一一对应的设备 ID（差量模式需要，缺省时写完整快照）
+
+        Returns:
+            list[str]: 与输入一一对应的内容哈希
+        """
+        if not contents:
+            return []
+
+        hashes = list(await asyncio.gather(*(compute_text_sha256_async(c) for c in contents)))
+        counts = Counter(hashes)
+        first_content: dict[str, str] = {}
+        first_device: dict[str, UUID] = {}
+        for i, (content_hash, content) in enumerate(zip(hashes, contents, strict=True)):
+            first_content.setdefault(content_hash, content)
+            device_id = device_ids[i] if device_ids else None
+            if device_id is not None:
+                first_device.setdefault(content_hash, device_id)
+
+        existing = await self.backup_crud.increment_blob_refs(self.db, counts)
+        missing = [h for h in counts if h not in existing]
+        if not missing:
+            return hashes
+
+        bases = await self._load_bases({h: first_device[h] for h in missing if h in first_device})
+        rows = list(
+            await asyncio.gather(*(self._build_row(h, first_content[h], counts[h], bases.get(h)) for h in missing))
+        )
+        await self._acquire_bases(rows, first_content)
+        effective = await self.backup_crud.upsert_blobs(self.db, rows)
+
+        # 并发写入同一新内容时只有一方的对象被引用，另一方的对象立即清理
+        orphaned = [
+            row["content_path"]
+            for row in rows
+            if row["content_path"] and effective.get(row["content_hash"]) != row["content_path"]
+        ]
+        if orphaned:
+            await delete_objects_safe(orphaned)
+        return hashes
+
+    async def _load_bases(self, devices: dict[str, UUID]) -> dict[str, tuple[str, str, int]]:
+        """
+        差量模式下为新内容块查找基准（同设备最新成功备份的内容块）。
+
+        Args:
+            devices: 新内容哈希 -> 设备 ID
+
+        Returns:
+            dict[str, tuple[str, str, int]]: 新内容哈希 -> (基准哈希, 基准原文, 基准链深度)
+        """
+        if settings.BACKUP_STORAGE_MODE != "delta" or not devices:
+            return {}
+
+        latest = await self.backup_crud.get_devices_latest_content_hash(self.db, list(set(devices.values())))
+        base_hashes = {latest[d] for d in devices.values() if d in latest}
+        if not base_hashes:
+            return {}
+        try:
+            texts = await load_blob_contents(self.db, self.backup_crud, sorted(base_hashes))
+        except Exception as e:
+            logger.warning("读取差量基准失败，改为写入完整快照", error=str(e))
+            return {}
+        depths = {h: blob.chain_depth for h, blob in (await self.backup_crud.get_blobs(self.db, list(texts))).items()}
+
+        bases: dict[str, tuple[str, str, int]] = {}
+        for content_hash, device_id in devices.items():
+            base_hash = latest.get(device_id)
+            if base_hash in texts and base_hash in depths:
+                bases[content_hash] = (base_hash, texts[base_hash], depths[base_hash])
+        return bases
+
+    async def _acquire_bases(self, rows: list[dict[str, Any]], contents: dict[str, str]) -> None:
+        """为差量内容块增加基准引用；基准已被并发回收时改写为完整快照。
+
+        并发插入同一新内容块时冲突方多计的基准引用由 collect_orphans 全量校正。
+        """
+        delta_rows = [row for row in rows if row["base_hash"]]
+        if not delta_rows:
+            return
+        acquired = await self.backup_crud.increment_blob_refs(self.db, Counter(row["base_hash"] for row in delta_rows))
+        for row in delta_rows:
+            if row["base_hash"] not in acquired:
+                if row["content_path"]:
+                    await delete_objects_safe([row["content_path"]])
+                row.update(await self._build_row(row["content_hash"], contents[row["content_hash"]], row["ref_count"]))
+
+    async def _build_row(
+        self,
+        content_hash: str,
+        content: str,
+        ref_count: int,
+        base: tuple[str, str, int] | None = None,
+    ) -> dict[str, Any]:
+        """构造新内容块：按存储模式编码，小数据存 DB，大数据存 MinIO（失败时降级存 DB）。"""
+        content_size = len(content.encode("utf-8"))
+        row: dict[str, Any] = {
+            "content_hash": content_hash,
+            "content": None,
+            "content_data": None,
+            "content_path": None,
+            "content_size": content_size,
+            "content_encoding": backup_codec.IDENTITY,
+            "base_hash": None,
+            "chain_depth": 0,
+            "ref_count": ref_count,
+        }
+        if settings.BACKUP_STORAGE_MODE == "plain":
+            return await self._place_text(row, content)
+
+        algorithm = backup_codec.resolve_compression(settings.BACKUP_COMPRESSION)
+        payload = backup_codec.encode_snapshot(content, algorithm)
+        row["content_encoding"] = algorithm
+        if base is not None and base[2] + 1 <= settings.BACKUP_DELTA_SNAPSHOT_INTERVAL:
+            base_hash, base_text, base_depth = base
+            delta = backup_codec.encode_delta(backup_codec.make_delta(base_text, content), algorithm)
+            if len(delta) < len(payload):
+                payload = delta
+                row["content_encoding"] = f"{backup_codec.DELTA_PREFIX}{algorithm}"
+                row["base_hash"] = base_hash
+                row["chain_depth"] = base_depth + 1
+        return await self._place_bytes(row, payload)
+
+    async def _place_text(self, row: dict[str, Any], content: str) -> dict[str, Any]:
+        """明文内容块：小配置存 DB，大配置存 MinIO。"""
+        if row["content_size"] < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+            row["content"] = content
+            return row
+
+        object_name = self.object_name(row["content_hash"])
+        if await put_text_safe(object_name, content):
+            row["content_path"] = object_name
+            self.placed_objects.append(object_name)
+        else:
+            row["content"] = content
+            logger.warning("内容块存 MinIO 失败，降级存 DB", content_hash=row["content_hash"], size=row["content_size"])
+        return row
+
+    async def _place_bytes(self, row: dict[str, Any], payload: bytes) -> dict[str, Any]:
+        """编码内容块：编码后小于阈值存 DB，否则存 MinIO。"""
+        if len(payload) < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+            row["content_data"] = payload
+            return row
+
+        object_name = self.object_name(row["content_hash"]).removesuffix(".txt") + ".bin"
+        if await put_bytes_safe(object_name, payload):
+            row["content_path"] = object_name
+            self.placed_objects.append(object_name)
+        else:
+            row["content_data"] = payload
+            logger.warning("内容块存 MinIO 失败，降级存 DB", content_hash=row["content_hash"], size=len(payload))
+        return row
+
+    async def reencode(self, content_hash: str, base_hash: str | None = None) -> list[str]:
+        """
+        将已有的非差量内容块按当前存储模式重新编码（存量数据迁移使用）。
+
+        指定 base_hash 且为 delta 模式时尝试改写为相对 base 的差量；已被其他差量引用的内容块
+        只做压缩不改写为差量，base 链中包含自身时忽略 base，避免形成环。
+
+        Args:
+            content_hash: 待重新编码的内容哈希
+            base_hash: 差量基准内容哈希
+
+        Returns:
+            list[str]: 被替换的旧 MinIO 路径（调用方在事务提交后删除）
+        """
+        if settings.BACKUP_STORAGE_MODE == "plain":
+            return []
+        blobs = await self.backup_crud.get_blob_chains(self.db, [h for h in (content_hash, base_hash) if h])
+        blob = blobs.get(content_hash)
+        if blob is None or backup_codec.split_encoding(blob.content_encoding)[0]:
+            return []
+
+        if base_hash is not None:
+            chain = await self.backup_crud.get_blob_chains(self.db, [base_hash])
+            if (
+                settings.BACKUP_STORAGE_MODE != "delta"
+                or base_hash not in chain
+                or content_hash in chain
+                or await self.backup_crud.has_blob_children(self.db, content_hash)
+            ):
+                base_hash = None
+        if base_hash is None and blob.content_encoding == backup_codec.resolve_compression(settings.BACKUP_COMPRESSION):
+            return []
+
+        texts = await load_blob_contents(self.db, self.backup_crud, [h for h in (content_hash, base_hash) if h])
+        if content_hash not in texts:
+            return []
+        base = None
+        if base_hash is not None and base_hash in texts:
+            base = (base_hash, texts[base_hash], blobs[base_hash].chain_depth)
+
+        old_path = blob.content_path
+        row = await self._build_row(content_hash, texts[content_hash], blob.ref_count, base)
+        if row["base_hash"]:
+            acquired = await self.backup_crud.increment_blob_refs(self.db, {row["base_hash"]: 1})
+            if row["base_hash"] not in acquired:
+                return [row["content_path"]] if row["content_path"] else []
+
+        for field in ("content", "content_data", "content_path", "content_encoding", "base_hash", "chain_depth"):
+            setattr(blob, field, row[field])
+        await self.db.flush()
+        return [old_path] if old_path and old_path != row["content_path"] else []
+
+    async def acquire(self, hashes: Iterable[str | None]) -> set[str]:
+        """
+        为已存在的内容块增加引用（恢复已删除备份时使用）。
+
+        Args:
+            hashes: 内容哈希（None 会被忽略，可重复）
+
+        Returns:
+            set[str]: 成功增加引用的内容哈希（内容块已被回收的不在其中）
+        """
+        counts = Counter(h for h in hashes if h)
+        if not counts:
+            return set()
+        return await self.backup_crud.increment_blob_refs(self.db, counts)
+
+    async def release(self, hashes: Iterable[str | None]) -> list[str]:
+        """
+        释放内容块引用（备份被删除时使用）。
+
+        Args:
+            hashes: 内容哈希（None 会被忽略，可重复）
+
+        Returns:
+            list[str]: 引用归零后需删除的 MinIO 路径
+        """
+        counts = Counter(h for h in hashes if h)
+        if not counts:
+            return []
+        return await self.backup_crud.release_blobs(self.db, counts)
+
+    async def collect_orphans(self) -> tuple[int, list[str]]:
+        """
+        全量校正引用计数并回收孤儿内容块（兜底设备级联删除等绕过计数的路径）。
+
+        Returns:
+            tuple[int, list[str]]: (修正的内容块数, 需删除的 MinIO 路径)
+        """
+        return await self.backup_crud.recount_blob_refs(
+            self.db,
+            orphan_before=datetime.now(UTC) - BLOB_ORPHAN_GRACE,
+        )
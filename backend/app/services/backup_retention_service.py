@@ -0,0 +1,152 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: backup_retention_service.py
+@DateTime: 2026-02-04 09:30:00
+@Docs: 备份保留策略服务 (Backup Retention Service).
+
+集合式保留策略引擎：一次窗口函数扫描完成所有设备的按条数 + 按天数清理，
+替代逐设备、逐类型的 SELECT 循环；MinIO 对象在事务提交后批量删除。
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.enums import BackupType
+from app.core.logger import logger
+from app.core.minio_client import delete_objects_safe
+from app.crud.crud_backup import CRUDBackup
+from app.services.backup_blob_service import BackupBlobService
+
+# 单条 UPDATE 涉及的设备数上限（控制 IN 参数数量）
+RETENTION_DEVICE_CHUNK_SIZE = 1000
+
+
+class BackupRetentionService:
+    """
+    备份保留策略服务类。
+
+    规则（与原逐设备实现一致）：
+    - 按条数：每台设备每种类型仅保留最近 N 条成功备份（失败备份交给按天数清理）
+    - 按天数：早于 BACKUP_RETENTION_KEEP_DAYS 的备份（所有类型）过期
+    - 保底：每台设备的最新一条备份与最新一条成功备份始终保留
+    - 去重内容块：过期备份释放引用，引用归零的内容块随之删除
+    """
+
+    def __init__(self, db: AsyncSession, backup_crud: CRUDBackup):
+        """
+        初始化保留策略服务。
+
+        Args:
+            db: 异步数据库会话
+            backup_crud: 备份 CRUD 实例
+        """
+        self.db = db
+        self.backup_crud = backup_crud
+
+    @staticmethod
+    def get_keep_counts() -> dict[str, int]:
+        """
+        获取各备份类型的保留条数配置。
+
+        Returns:
+            dict[str, int]: 备份类型值 -> 保留条数（0 表示不限制）
+        """
+        return {
+            BackupType.SCHEDULED.value: settings.BACKUP_RETENTION_SCHEDULED_KEEP,
+            BackupType.MANUAL.value: settings.BACKUP_RETENTION_MANUAL_KEEP,
+            BackupType.PRE_CHANGE.value: settings.BACKUP_RETENTION_PRE_CHANGE_KEEP,
+            BackupType.POST_CHANGE.value: settings.BACKUP_RETENTION_POST_CHANGE_KEEP,
+            BackupType.INCREMENTAL.value: settings.BACKUP_RETENTION_INCREMENTAL_KEEP,
+        }
+
+    @staticmethod
+    def get_cutoff() -> datetime | None:
+        """
+        获取按天数保留的截止时间。
+
+        Returns:
+            datetime | None: 截止时间，未启用按天数清理时返回 None
+        """
+        keep_days = settings.BACKUP_RETENTION_KEEP_DAYS
+        if keep_days <= 0:
+            return None
+        return datetime.now(UTC) - timedelta(days=keep_days)
+
+    async def mark_expired(self, device_ids: Sequence[UUID] | None = None) -> tuple[int, list[str]]:
+        """
+        标记过期备份为已删除并释放内容块引用（不提交事务）。
+
+        Args:
+            device_ids: 限定设备范围，None 表示全部设备
+
+        Returns:
+            tuple[int, list[str]]: (标记删除数量, 需要删除的 MinIO 对象路径)
+        """
+        keep_counts = self.get_keep_counts()
+        cutoff = self.get_cutoff()
+
+        if device_ids is None:
+            chunks: list[Sequence[UUID] | None] = [None]
+        else:
+            unique_ids = list(dict.fromkeys(device_ids))
+            if not unique_ids:
+                return 0, []
+            chunks = [
+                unique_ids[i : i + RETENTION_DEVICE_CHUNK_SIZE]
+                for i in range(0, len(unique_ids), RETENTION_DEVICE_CHUNK_SIZE)
+            ]
+
+        expired_count = 0
+        content_paths: list[str] = []
+        content_hashes: list[str | None] = []
+        for chunk in chunks:
+            rows = await self.backup_crud.expire_by_retention(
+                self.db,
+                keep_counts=keep_counts,
+                cutoff=cutoff,
+                device_ids=chunk,
+            )
+            expired_count += len(rows)
+            content_paths.extend(path for _, path, _ in rows if path)
+            content_hashes.extend(content_hash for _, _, content_hash in rows)
+
+        content_paths.extend(await BackupBlobService(self.db, self.backup_crud).release(content_hashes))
+        return expired_count, content_paths
+
+    async def enforce(self, device_ids: Sequence[UUID] | None = None) -> dict[str, int]:
+        """
+        执行保留策略：标记过期备份、提交事务后批量删除 MinIO 对象。
+
+        全量执行（device_ids 为 None）时顺带校正内容块引用计数并回收孤儿内容块。
+
+        Args:
+            device_ids: 限定设备范围，None 表示全部设备
+
+        Returns:
+            dict[str, int]: {"expired": 标记删除数, "objects_deleted": 删除对象数, "objects_failed": 删除失败数}
+        """
+        expired_count, content_paths = await self.mark_expired(device_ids)
+        if device_ids is None:
+            _, orphan_paths = await BackupBlobService(self.db, self.backup_crud).collect_orphans()
+            content_paths.extend(orphan_paths)
+        await self.db.commit()
+
+        failed = await delete_objects_safe(content_paths)
+        if expired_count:
+            logger.info(
+                "备份保留策略清理完成",
+                devices=len(device_ids) if device_ids is not None else "all",
+                expired=expired_count,
+                objects=len(content_paths),
+                objects_failed=len(failed),
+            )
+        return {
+            "expired": expired_count,
+            "objects_deleted": len(content_paths) - len(failed),
+            "objects_failed": len(failed),
+        }
@@ -6,7 +6,7 @@
 @Docs: 配置备份服务业务逻辑 (Backup Service Logic).
 """
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from enum import Enum
 from re import S
 from typing import Any
@@ -21,7 +21,7 @@ from app.core.decorator import transactional
 from app.core.enums import AuthType, BackupStatus, BackupType, DeviceStatus
 from app.core.exceptions import BadRequestException, NotFoundException, OTPRequiredException
 from app.core.logger import logger
-from app.core.minio_client import delete_object, get_text, put_text
+from app.core.minio_client import delete_object, delete_objects_safe, put_text
 from app.core.otp import otp_coordinator
 from app.celery.tasks.task_grouping import build_backup_batches
 from app.core.otp_service import otp_service
@@ -42,6 +42,8 @@ from app.schemas.backup import (
     BackupTaskStatus,
 )
 from app.schemas.credential import DeviceCredential
+from app.services.backup_blob_service import BackupBlobService, load_backup_content
+from app.services.backup_retention_service import BackupRetentionService
 from app.services.base import DeviceCredentialMixin
 from app.core.otp_helpers import build_otp_notice_from_info, build_otp_required_info, record_pause_and_build_notice
 from app.utils.validators import compute_text_md5, should_skip_backup_save_due_to_unchanged_md5
@@ -78,6 +80,7 @@ class BackupService(DeviceCredentialMixin):
         self.backup_crud = backup_crud
         self.device_crud = device_crud
         self.credential_crud = credential_crud
+        self._post_commit_tasks: list = []
 
     def _normalize_device_group_value(self, value: str | Enum | None) -> str | None:
         """
@@ -244,9 +247,13 @@ class BackupService(DeviceCredentialMixin):
             except Exception as e:
                 logger.warning(f"MinIO 删除对象失败: path={backup.content_path}, error={e}")
 
+        # 已软删除的备份在软删除时已释放内容块引用
+        released = [] if backup.is_deleted else [backup.content_hash]
+
         success_count, _ = await self.backup_crud.batch_remove(self.db, ids=[backup_id], hard_delete=hard_delete)
         if success_count != 1:
             raise NotFoundException(message="备份不存在")
+        await self._release_blobs(released)
 
         delete_type = "硬删除" if hard_delete else "软删除"
         logger.info(f"备份已{delete_type}: backup_id={backup_id}")
@@ -287,9 +294,13 @@ class BackupService(DeviceCredentialMixin):
                 except Exception as e:
                     logger.warning(f"MinIO 删除对象失败: path={b.content_path}, error={e}")
 
+        # 已软删除的备份在软删除时已释放内容块引用
+        released = [b.content_hash for b in backups if not b.is_deleted]
+
         success_count, failed_ids = await self.backup_crud.batch_remove(
             self.db, ids=unique_ids, hard_delete=hard_delete
         )
+        await self._release_blobs(released)
 
         delete_type = "硬删除" if hard_delete else "软删除"
         logger.info(f"批量{delete_type}备份完成: success={success_count}, failed={len(failed_ids)}")
@@ -299,9 +310,11 @@ class BackupService(DeviceCredentialMixin):
     async def restore_backup(self, backup_id: UUID) -> None:
         """恢复已软删除备份。"""
 
+        hashes = await self._get_deleted_content_hashes([backup_id])
         success_count, _ = await self.backup_crud.batch_restore(self.db, ids=[backup_id])
         if success_count == 0:
             raise NotFoundException(message="备份不存在")
+        await BackupBlobService(self.db, self.backup_crud).acquire(hashes)
         logger.info(f"备份已恢复: backup_id={backup_id}")
 
     @transactional()
@@ -310,10 +323,34 @@ class BackupService(DeviceCredentialMixin):
         if not backup_ids:
             return BackupBatchRestoreResult(success_count=0, failed_ids=[])
 
+        hashes = await self._get_deleted_content_hashes(backup_ids)
         success_count, failed_ids = await self.backup_crud.batch_restore(self.db, ids=backup_ids)
+        await BackupBlobService(self.db, self.backup_crud).acquire(hashes)
         logger.info(f"批量恢复备份完成: success={success_count}, failed={len(failed_ids)}")
         return BackupBatchRestoreResult(success_count=success_count, failed_ids=failed_ids)
 
+    async def _get_deleted_content_hashes(self, backup_ids: list[UUID]) -> list[str]:
+        """获取待恢复（已软删除）备份引用的内容块哈希。"""
+        q = (
+            select(Backup.content_hash)
+            .where(Backup.id.in_(list(dict.fromkeys(backup_ids))))
+            .where(Backup.is_deleted.is_(True))
+            .where(Backup.content_hash.is_not(None))
+        )
+        r = await self.db.execute(q)
+        return [h for h in r.scalars().all() if h]
+
+    async def _release_blobs(self, hashes: list[str | None]) -> None:
+        """释放被删除备份的内容块引用，引用归零的内容块对象在事务提交后删除。"""
+        paths = await BackupBlobService(self.db, self.backup_crud).release(hashes)
+        if not paths:
+            return
+
+        async def _task() -> None:
+            await delete_objects_safe(paths)
+
+        self._post_commit_tasks.append(_task)
+
     # ===== 备份内容获取 =====
 
     async def get_backup_content(self, backup_id: UUID) -> str:
@@ -337,34 +374,16 @@ class BackupService(DeviceCredentialMixin):
         if backup.status != BackupStatus.SUCCESS.value:
             raise BadRequestException(message="备份失败，无法获取内容")
 
-        # 优先从数据库获取
-        if backup.content:
-            return backup.content
-
-        # 从 MinIO 获取
-        if backup.content_path:
-            return await self._get_content_from_minio(backup.content_path)
-
-        raise BadRequestException(message="备份内容不可用")
-
-    async def _get_content_from_minio(self, content_path: str) -> str:
-        """
-        从 MinIO 获取备份内容。
-
-        Args:
-            content_path: MinIO 存储路径
-
-        Returns:
-            str: 配置内容
-
-        Note:
-            MinIO 集成需要后续实现
-        """
+        # DB / MinIO / 去重内容块自动路由
         try:
-            return await get_text(content_path)
+            content = await load_backup_content(self.db, backup)
         except Exception as e:
             raise BadRequestException(message=f"从 MinIO 获取备份内容失败: {e}") from e
 
+        if content is None:
+            raise BadRequestException(message="备份内容不可用")
+        return content
+
     # ===== 单设备备份 =====
 
     @transactional()
@@ -577,6 +596,7 @@ class BackupService(DeviceCredentialMixin):
         存储策略：
         - 配置 < 64KB：直接存储在 content 字段
         - 配置 >= 64KB：存储到 MinIO，路径存储在 content_path
+        - 启用去重时：内容写入内容块表（同样按大小分流），仅保存 content_hash
 
         Args:
             device: 设备对象
@@ -591,6 +611,7 @@ class BackupService(DeviceCredentialMixin):
         """
         content = None
         content_path = None
+        content_hash = None
         content_size = 0
         md5_hash = None
 
@@ -614,7 +635,10 @@ class BackupService(DeviceCredentialMixin):
                         )
                         return latest
 
-            if content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
+            if settings.BACKUP_DEDUP_ENABLED:
+                # 去重存储：相同内容只存一份
+                content_hash = await BackupBlobService(self.db, self.backup_crud).store(config_content, device.id)
+            elif content_size < settings.BACKUP_CONTENT_SIZE_THRESHOLD_BYTES:
                 # 小配置：直接存 DB
                 content = config_content
             else:
@@ -629,6 +653,7 @@ class BackupService(DeviceCredentialMixin):
             device_id=device.id,
             content=content,
             content_path=content_path,
+            content_hash=content_hash,
             content_size=content_size,
             md5_hash=md5_hash,
             status=status,
@@ -649,104 +674,20 @@ class BackupService(DeviceCredentialMixin):
 
         return backup
 
-    def _get_keep_count(self, backup_type: BackupType) -> int:
-        if backup_type == BackupType.SCHEDULED:
-            return settings.BACKUP_RETENTION_SCHEDULED_KEEP
-        if backup_type == BackupType.MANUAL:
-            return settings.BACKUP_RETENTION_MANUAL_KEEP
-        if backup_type == BackupType.PRE_CHANGE:
-            return settings.BACKUP_RETENTION_PRE_CHANGE_KEEP
-        if backup_type == BackupType.POST_CHANGE:
-            return settings.BACKUP_RETENTION_POST_CHANGE_KEEP
-        if backup_type == BackupType.INCREMENTAL:
-            return settings.BACKUP_RETENTION_INCREMENTAL_KEEP
-        return 0
-
     async def _enforce_retention(self, device_id: UUID) -> None:
-        # 保底保留：最新一条 + 最新成功一条（如存在），避免“超过天数后把可用备份删光”
-        keep_ids: set[UUID] = set()
-
-        latest_any_q = (
-            select(Backup.id)
-            .where(Backup.device_id == device_id)
-            .where(Backup.is_deleted.is_(False))
-            .order_by(Backup.created_at.desc())
-            .limit(1)
-        )
-        latest_any = await self.db.execute(latest_any_q)
-        latest_any_id = latest_any.scalar()
-        if latest_any_id:
-            keep_ids.add(latest_any_id)
-
-        latest_success_q = (
-            select(Backup.id)
-            .where(Backup.device_id == device_id)
-            .where(Backup.is_deleted.is_(False))
-            .where(Backup.status == BackupStatus.SUCCESS.value)
-            .order_by(Backup.created_at.desc())
-            .limit(1)
-        )
-        latest_success = await self.db.execute(latest_success_q)
-        latest_success_id = latest_success.scalar()
-        if latest_success_id:
-            keep_ids.add(latest_success_id)
-
-        to_delete: dict[UUID, Backup] = {}
-
-        # 1) 按条数保留（按类型、仅清理成功备份；失败备份交给按天数清理）
-        for bt in BackupType:
-            keep = self._get_keep_count(bt)
-            if keep <= 0:
-                continue
-
-            q = (
-                select(Backup)
-                .where(Backup.device_id == device_id)
-                .where(Backup.is_deleted.is_(False))
-                .where(Backup.status == BackupStatus.SUCCESS.value)
-                .where(Backup.backup_type == bt.value)
-                .order_by(Backup.created_at.desc())
-                .offset(keep)
-            )
-            r = await self.db.execute(q)
-            for b in r.scalars().all():
-                if b.id in keep_ids:
-                    continue
-                to_delete[b.id] = b
-
-        # 2) 按天数保留（所有备份类型；至少保留 keep_ids）
-        keep_days = settings.BACKUP_RETENTION_KEEP_DAYS
-        if keep_days > 0:
-            cutoff = datetime.now(UTC) - timedelta(days=keep_days)
-            q = (
-                select(Backup)
-                .where(Backup.device_id == device_id)
-                .where(Backup.is_deleted.is_(False))
-                .where(Backup.created_at < cutoff)
-            )
-            r = await self.db.execute(q)
-            for b in r.scalars().all():
-                if b.id in keep_ids:
-                    continue
-                to_delete[b.id] = b
-
-        if not to_delete:
+        """对单台设备执行保留策略（集合式单条 UPDATE，随当前事务提交，MinIO 对象在提交后删除）。"""
+        retention = BackupRetentionService(self.db, self.backup_crud)
+        expired, content_paths = await retention.mark_expired([device_id])
+        if not expired:
             return
 
-        deleted = 0
-        for b in to_delete.values():
-            if b.content_path:
-                try:
-                    await delete_object(b.content_path)
-                except Exception as e:
-                    logger.warning(f"MinIO 删除对象失败: path={b.content_path}, error={e}")
+        await self.db.flush()
 
-            b.is_deleted = True
-            self.db.add(b)
-            deleted += 1
+        async def _task() -> None:
+            failed = await delete_objects_safe(content_paths)
+            logger.info(f"备份保留策略清理完成: device_id={device_id}, deleted={expired}, objects_failed={len(failed)}")
 
-        await self.db.flush()
-        logger.info(f"备份保留策略清理完成: device_id={device_id}, deleted={deleted}")
+        self._post_commit_tasks.append(_task)
 
     async def _save_content_to_minio(self, device_id: UUID, config_content: str) -> str:
         """
@@ -918,6 +859,8 @@ class BackupService(DeviceCredentialMixin):
                         password = credential.password
                         extra_data = {
                             "auth_type": "static",
+                            "dept_id": str(device.dept_id) if device.dept_id else None,
+                            "device_group": device.device_group,
                             "device_id": str(device.id),
                             "device_name": device.name,
                             "vendor": device.vendor,
@@ -8,15 +8,13 @@
 负责从网络设备采集 ARP/MAC 表数据，并缓存到 Redis。
 """
 
-import asyncio
 import json
 import time
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from scrapli import Scrapli
-from scrapli.exceptions import ScrapliAuthenticationFailed
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import cache as cache_module
@@ -27,8 +25,11 @@ from app.core.logger import logger
 from app.core.otp_service import otp_service
 from app.crud.crud_credential import CRUDCredential
 from app.crud.crud_device import CRUDDevice
-from app.network.platform_config import get_command, get_platform_for_vendor, get_scrapli_options
-from app.network.textfsm_parser import parse_arp_table, parse_mac_table
+from app.models.device import Device
+from app.network.async_runner import run_async_tasks_iter
+from app.network.async_tasks import async_collect_tables
+from app.network.nornir_config import init_nornir_async
+from app.network.platform_config import get_platform_for_vendor
 from app.schemas.collect import (
     ARPEntry,
     ARPTableResponse,
@@ -38,15 +39,87 @@ from app.schemas.collect import (
     LocateMatch,
     LocateResponse,
     MACEntry,
+    MACHistoryEvent,
+    MACHistoryResponse,
     MACTableResponse,
 )
+from app.schemas.credential import DeviceCredential
 from app.services.base import CacheMixin, DeviceCredentialMixin
+from app.services.collect_table_store import ARP_COLUMNS, MAC_COLUMNS, TableDelta, diff_tables, pack_table, unpack_table
 
 # Redis 键前缀
 ARP_CACHE_PREFIX = "ncm:arp"
 MAC_CACHE_PREFIX = "ncm:mac"
 COLLECT_LAST_PREFIX = "ncm:collect:last"
 
+# 定位倒排索引：MAC/IP -> Hash{字段: 条目数组}，成员集合记录设备写入过的索引字段，便于增量清理
+LOCATE_MAC_INDEX_PREFIX = "ncm:locate:mac"
+LOCATE_IP_INDEX_PREFIX = "ncm:locate:ip"
+LOCATE_MEMBERS_PREFIX = "ncm:locate:members"
+LOCATE_DEVICES_KEY = "ncm:locate:devices"
+
+# 定位索引值的列（设备 ID 取自字段名首段，采集时间为秒级时间戳）
+LOCATE_VALUE_COLUMNS: tuple[str, ...] = (
+    "source",
+    "interface",
+    "vlan_id",
+    "mac_address",
+    "ip_address",
+    "entry_type",
+    "updated_at",
+)
+
+# MAC 历史轨迹：MAC -> ZSet{事件 JSON: 采集时间戳}
+COLLECT_HISTORY_PREFIX = "ncm:collect:history"
+
+# 成员集合中索引键与字段的分隔符（接口名可能包含空格）
+_MEMBER_SEP = "\t"
+
+
+def _snapshot_ttl() -> int:
+    """快照保留时间不短于历史轨迹保留期，过期后仍可作为比对基线，避免把整张表记为新出现。"""
+    return max(settings.COLLECT_CACHE_TTL, settings.COLLECT_HISTORY_RETENTION_DAYS * 86400)
+
+
+def _unpack_fresh_table(raw: str | None) -> tuple[list[dict[str, Any]], datetime | None]:
+    """解析快照，超过 COLLECT_CACHE_TTL 的快照只作比对基线，查询时视为无缓存。"""
+    rows, cached_at = unpack_table(raw)
+    if cached_at and (datetime.now() - cached_at).total_seconds() > settings.COLLECT_CACHE_TTL:
+        return [], None
+    return rows, cached_at
+
+
+def _pack_locate_value(entry: dict[str, Any], source: str, now: datetime) -> str:
+    """将条目压缩为定位索引值（不重复存储设备 ID 与字段名）。"""
+    values = {
+        **entry,
+        "source": source,
+        "entry_type": entry.get("entry_type") or entry.get("state"),
+        "updated_at": int(now.timestamp()),
+    }
+    return orjson.dumps([values.get(column) for column in LOCATE_VALUE_COLUMNS]).decode("utf-8")
+
+
+def _unpack_locate_value(field: str, value: str) -> dict[str, Any]:
+    """还原定位索引值为条目。"""
+    entry = dict(zip(LOCATE_VALUE_COLUMNS, orjson.loads(value), strict=True))
+    entry["device_id"] = field.partition("|")[0]
+    entry["updated_at"] = datetime.fromtimestamp(entry["updated_at"]).isoformat()
+    return entry
+
+
+def normalize_mac(mac: str | None) -> str:
+    """
+    标准化 MAC 地址（小写并去除分隔符），用于跨厂商格式匹配。
+
+    Args:
+        mac: MAC 地址（aa:bb:cc:dd:ee:ff / aabb-ccdd-eeff / aabb.ccdd.eeff 等）
+
+    Returns:
+        str: 标准化后的 MAC 地址
+    """
+    return (mac or "").lower().replace("-", "").replace(":", "").replace(".", "")
+
 
 class CollectService(DeviceCredentialMixin, CacheMixin):
     """
@@ -96,9 +169,8 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         cached_data = await self._cache_get(cache_key)
         if cached_data:
             try:
-                data = json.loads(cached_data)
-                entries = [ARPEntry(**entry) for entry in data.get("entries", [])]
-                cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
+                rows, cached_at = _unpack_fresh_table(cached_data)
+                entries = [ARPEntry(**entry) for entry in rows]
             except Exception as e:
                 logger.warning(f"解析 ARP 缓存失败: {e}")
 
@@ -135,9 +207,8 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         cached_data = await self._cache_get(cache_key)
         if cached_data:
             try:
-                data = json.loads(cached_data)
-                entries = [MACEntry(**entry) for entry in data.get("entries", [])]
-                cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
+                rows, cached_at = _unpack_fresh_table(cached_data)
+                entries = [MACEntry(**entry) for entry in rows]
             except Exception as e:
                 logger.warning(f"解析 MAC 缓存失败: {e}")
 
@@ -212,108 +283,19 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 error_message=f"获取凭据失败: {str(e)}",
             )
 
-        # 连接设备并采集
-        platform = get_platform_for_vendor(device.vendor if device.vendor else "h3c")
-        scrapli_options = get_scrapli_options(platform)
-
-        device_config = {
-            "host": device.ip_address,
-            "auth_username": credential.username,
-            "auth_password": credential.password,
-            "port": device.ssh_port or 22,
-            "platform": platform,
-            **scrapli_options,
-        }
-
-        arp_count = 0
-        mac_count = 0
-
+        # 通过连接池采集（同一会话执行 ARP 与 MAC）
+        inventory = init_nornir_async([self._build_host_data(device, credential)])
         try:
-
-            def _sync_collect() -> tuple[list[dict[str, Any]] | None, list[dict[str, Any]] | None]:
-                with Scrapli(**device_config) as conn:
-                    arp_entries_out = None
-                    mac_entries_out = None
-
-                    if collect_arp:
-                        arp_cmd = get_command("arp_table", platform)
-                        arp_response = conn.send_command(arp_cmd, timeout_ops=120)
-                        if arp_response.failed:
-                            raise RuntimeError(str(arp_response.result))
-                        arp_entries_out = parse_arp_table(platform, arp_response.result)
-
-                    if collect_mac:
-                        mac_cmd = get_command("mac_table", platform)
-                        mac_response = conn.send_command(mac_cmd, timeout_ops=120)
-                        if mac_response.failed:
-                            raise RuntimeError(str(mac_response.result))
-                        mac_entries_out = parse_mac_table(platform, mac_response.result)
-
-                    return arp_entries_out, mac_entries_out
-
-            arp_entries, mac_entries = await asyncio.to_thread(_sync_collect)
-            if arp_entries is not None:
-                await self._save_arp_cache(device_id, arp_entries)
-                arp_count = len(arp_entries)
-                logger.debug(f"ARP 采集成功: device={device.name}, entries={arp_count}")
-            if mac_entries is not None:
-                await self._save_mac_cache(device_id, mac_entries)
-                mac_count = len(mac_entries)
-                logger.debug(f"MAC 采集成功: device={device.name}, entries={mac_count}")
-
-            await self._update_last_collect_time(device_id)
-
-        except ScrapliAuthenticationFailed as e:
-            # 单独处理认证失败，尝试触发 OTP 流程
-            from app.network.otp_utils import handle_otp_auth_failure
-
-            duration_ms = int((time.time() - start_time) * 1000)
-
-            logger.warning(f"捕获 ScrapliAuthenticationFailed: {e}")
-
-            host_data = {
-                "auth_type": device.auth_type,
-                "dept_id": str(device.dept_id) if device.dept_id else None,
-                "device_group": device.device_group,
-                "device_id": str(device.id),
-                "name": device.name,
-            }
-            await handle_otp_auth_failure(host_data, e)
-
-            return DeviceCollectResult(
-                device_id=device_id,
-                device_name=device.name,
-                success=False,
-                error_message=str(e),
-                duration_ms=duration_ms,
+            data = await async_collect_tables(
+                inventory.hosts[str(device.id)],
+                collect_arp=collect_arp,
+                collect_mac=collect_mac,
             )
-
+        except OTPRequiredException:
+            raise
         except Exception as e:
             duration_ms = int((time.time() - start_time) * 1000)
             logger.error(f"采集失败: device={device.name}, error={str(e)}, type={type(e)}")
-
-            # Fallback: 检查字符串是否包含认证失败信息
-            error_str = str(e).lower()
-            if "authentication" in error_str and (
-                "failed" in error_str or "refused" in error_str or "method" in error_str
-            ):
-                try:
-                    from app.network.otp_utils import handle_otp_auth_failure
-
-                    logger.warning(f"通过错误信息检测到认证失败 (Fallback): {e}")
-                    host_data = {
-                        "auth_type": device.auth_type,
-                        "dept_id": str(device.dept_id) if device.dept_id else None,
-                        "device_group": device.device_group,
-                        "device_id": str(device.id),
-                        "name": device.name,
-                    }
-                    await handle_otp_auth_failure(host_data, e)
-                except OTPRequiredException:
-                    raise
-                except Exception as fallback_e:
-                    logger.warning(f"Fallback OTP handling failed: {fallback_e}")
-
             return DeviceCollectResult(
                 device_id=device_id,
                 device_name=device.name,
@@ -322,82 +304,97 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 duration_ms=duration_ms,
             )
 
-        duration_ms = int((time.time() - start_time) * 1000)
-        logger.info(f"采集完成: device={device.name}, arp={arp_count}, mac={mac_count}, duration={duration_ms}ms")
-
-        return DeviceCollectResult(
-            device_id=device_id,
-            device_name=device.name,
-            success=True,
-            arp_count=arp_count,
-            mac_count=mac_count,
-            duration_ms=duration_ms,
-        )
+        result = await self._store_tables(device, data)
+        result.duration_ms = int((time.time() - start_time) * 1000)
+        return result
 
     # ===== 批量采集 =====
 
     async def batch_collect(
         self,
         request: CollectBatchRequest,
-        concurrency: int = 10,
+        concurrency: int | None = None,
     ) -> CollectResult:
         """
         批量采集多台设备的 ARP/MAC 表。
 
+        凭据准备完成后交给 AsyncRunner 通过连接池并发采集，结果按完成顺序写入缓存。
+
         Args:
             request: 批量采集请求
-            concurrency: 并发数
+            concurrency: 并发数（默认 COLLECT_NUM_WORKERS）
         Returns:
             CollectResult: 采集结果
         """
         started_at = datetime.now()
-        semaphore = asyncio.Semaphore(concurrency)
-
-        # 如果提供了 OTP，先缓存
-        if request.otp_code:
-            # 获取设备列表确定需要缓存 OTP 的部分设备
-            devices = await self.device_crud.get_by_ids(self.db, request.device_ids, options=self.device_crud._DEVICE_OPTIONS)
-            for device in devices:
-                auth_type_str = device.auth_type or AuthType.STATIC.value
+        results: dict[UUID, DeviceCollectResult] = {}
+
+        devices = await self.device_crud.get_by_ids(self.db, request.device_ids, options=self.device_crud._DEVICE_OPTIONS)
+        device_map = {device.id: device for device in devices}
+
+        # 构建 Nornir 主机数据，包含凭据获取
+        hosts_data: list[dict[str, Any]] = []
+        for device_id in dict.fromkeys(request.device_ids):
+            device = device_map.get(device_id)
+            if device is None:
+                results[device_id] = DeviceCollectResult(device_id=device_id, success=False, error_message="设备不存在")
+                continue
+            if device.status != DeviceStatus.ACTIVE:
+                results[device_id] = DeviceCollectResult(
+                    device_id=device_id,
+                    device_name=device.name,
+                    success=False,
+                    error_message=f"设备状态异常 {device.status}",
+                )
+                continue
+
+            # 如果提供了 OTP，先缓存
+            if request.otp_code and device.dept_id and device.device_group:
                 try:
-                    auth_type = AuthType(auth_type_str)
+                    auth_type = AuthType(device.auth_type or AuthType.STATIC.value)
                 except ValueError:
                     auth_type = AuthType.STATIC
-                if auth_type == AuthType.OTP_MANUAL and device.dept_id and device.device_group:
+                if auth_type == AuthType.OTP_MANUAL:
                     await otp_service.cache_otp(device.dept_id, device.device_group, request.otp_code)
 
-        async def collect_with_semaphore(device_id: UUID) -> DeviceCollectResult:
-            async with semaphore:
-                return await self.collect_device(
+            try:
+                credential = await self._get_device_credential(device)
+            except Exception as e:
+                results[device_id] = DeviceCollectResult(
                     device_id=device_id,
-                    collect_arp=request.collect_arp,
-                    collect_mac=request.collect_mac,
+                    device_name=device.name,
+                    success=False,
+                    error_message=f"获取凭据失败: {str(e)}",
                 )
-
-        tasks = [collect_with_semaphore(device_id) for device_id in request.device_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 处理结果
-        device_results: list[DeviceCollectResult] = []
-        success_count = 0
-        failed_count = 0
-
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                device_results.append(
-                    DeviceCollectResult(
-                        device_id=request.device_ids[i],
+                continue
+            hosts_data.append(self._build_host_data(device, credential))
+
+        if hosts_data:
+            inventory = init_nornir_async(hosts_data)
+            async for host_name, host_result in run_async_tasks_iter(
+                inventory,
+                async_collect_tables,
+                num_workers=min(concurrency or settings.COLLECT_NUM_WORKERS, len(hosts_data)),
+                collect_arp=request.collect_arp,
+                collect_mac=request.collect_mac,
+            ):
+                device = device_map[UUID(host_name)]
+                data = host_result.result if isinstance(host_result.result, dict) else None
+                if host_result.failed or not data or not data.get("success"):
+                    error = (data or {}).get("error") or str(host_result.exception or "Unknown error")
+                    logger.error(f"采集失败: device={device.name}, error={error}")
+                    results[device.id] = DeviceCollectResult(
+                        device_id=device.id,
+                        device_name=device.name,
                         success=False,
-                        error_message=str(result),
+                        error_message=error,
                     )
-                )
-                failed_count += 1
-            elif isinstance(result, DeviceCollectResult):
-                device_results.append(result)
-                if result.success:
-                    success_count += 1
-                else:
-                    failed_count += 1
+                    continue
+                results[device.id] = await self._store_tables(device, data)
+
+        device_results = [results[device_id] for device_id in dict.fromkeys(request.device_ids)]
+        success_count = sum(1 for r in device_results if r.success)
+        failed_count = len(device_results) - success_count
 
         completed_at = datetime.now()
         logger.info(f"批量采集完成: total={len(request.device_ids)}, success={success_count}, failed={failed_count}")
@@ -415,7 +412,7 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         self,
         collect_arp: bool = True,
         collect_mac: bool = True,
-        concurrency: int = 10,
+        concurrency: int | None = None,
     ) -> CollectResult:
         """
         采集所有活跃设备的 ARP/MAC 表（用于定时任务）。
@@ -423,7 +420,7 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         Args:
             collect_arp: 是否采集 ARP
             collect_mac: 是否采集 MAC
-            concurrency: 并发数
+            concurrency: 并发数（默认 COLLECT_NUM_WORKERS）
 
         Returns:
             CollectResult: 采集结果
@@ -452,13 +449,79 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
 
     # ===== 内部方法 =====
 
-    async def _save_arp_cache(self, device_id: UUID, entries: list[dict[str, Any]]) -> None:
+    def _build_host_data(self, device: Device, credential: DeviceCredential) -> dict[str, Any]:
         """
-        保存 ARP 表到 Redis 缓存（使用 CacheMixin）。
+        构建设备的 Nornir 主机数据。
+
+        Args:
+            device: 设备
+            credential: 设备凭据
+
+        Returns:
+            dict[str, Any]: 主机数据（以设备 ID 作为主机名）
+        """
+        return {
+            "name": str(device.id),
+            "hostname": device.ip_address,
+            "platform": get_platform_for_vendor(device.vendor if device.vendor else "h3c"),
+            "username": credential.username,
+            "password": credential.password,
+            "port": device.ssh_port or 22,
+            "data": {
+                "device_id": str(device.id),
+                "device_name": device.name,
+                "auth_type": device.auth_type,
+                "dept_id": str(device.dept_id) if device.dept_id else None,
+                "device_group": device.device_group,
+            },
+        }
+
+    async def _store_tables(self, device: Device, data: dict[str, Any]) -> DeviceCollectResult:
+        """
+        写入采集到的 ARP/MAC 表缓存。
+
+        Args:
+            device: 设备
+            data: async_collect_tables 返回的结果
+
+        Returns:
+            DeviceCollectResult: 单设备采集结果
+        """
+        result = DeviceCollectResult(
+            device_id=device.id,
+            device_name=device.name,
+            success=True,
+            duration_ms=data.get("elapsed_ms"),
+        )
+        deltas: list[TableDelta] = []
+        if data.get("arp") is not None:
+            deltas.append(await self._save_arp_cache(device.id, data["arp"]))
+            result.arp_count = len(data["arp"])
+        if data.get("mac") is not None:
+            deltas.append(await self._save_mac_cache(device.id, data["mac"]))
+            result.mac_count = len(data["mac"])
+        await self._update_last_collect_time(device.id)
+
+        result.added_count = sum(len(d.added) for d in deltas)
+        result.removed_count = sum(len(d.removed) for d in deltas)
+        result.moved_count = sum(len(d.moved) for d in deltas)
+        logger.info(
+            f"采集完成: device={device.name}, arp={result.arp_count}, mac={result.mac_count}, "
+            f"added={result.added_count}, removed={result.removed_count}, moved={result.moved_count}, "
+            f"duration={result.duration_ms}ms"
+        )
+        return result
+
+    async def _save_arp_cache(self, device_id: UUID, entries: list[dict[str, Any]]) -> TableDelta:
+        """
+        保存 ARP 表快照到 Redis 缓存（使用 CacheMixin），并记录相对上次快照的变化。
 
         Args:
             device_id: 设备 ID
             entries: ARP 条目列表
+
+        Returns:
+            TableDelta: 相对上次快照的变化（IP 对应的 MAC/接口变化视为迁移）
         """
         cache_key = f"{ARP_CACHE_PREFIX}:{device_id}"
         now = datetime.now()
@@ -478,20 +541,39 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 }
             )
 
-        cache_data = {
-            "entries": normalized_entries,
-            "cached_at": now.isoformat(),
-        }
-
-        await self._cache_set(cache_key, json.dumps(cache_data), settings.COLLECT_CACHE_TTL)
+        packed = pack_table(normalized_entries, ARP_COLUMNS, now)
+        previous = await self._replace_snapshot(cache_key, packed)
+        delta = diff_tables(
+            previous,
+            normalized_entries,
+            key=lambda e: (e.get("ip_address") or "").lower(),
+            location=lambda e: (normalize_mac(e.get("mac_address")), e.get("interface") or ""),
+        )
 
-    async def _save_mac_cache(self, device_id: UUID, entries: list[dict[str, Any]]) -> None:
+        index: dict[str, dict[str, str]] = {}
+        for entry in normalized_entries:
+            interface = entry["interface"] or ""
+            mac = normalize_mac(entry["mac_address"])
+            ip = (entry["ip_address"] or "").lower()
+            value = _pack_locate_value(entry, "arp", now)
+            if mac:
+                index.setdefault(f"{LOCATE_MAC_INDEX_PREFIX}:{mac}", {})[f"{device_id}|arp|{interface}"] = value
+            if ip:
+                index.setdefault(f"{LOCATE_IP_INDEX_PREFIX}:{ip}", {})[f"{device_id}|{interface}|{mac}"] = value
+        await self._update_locate_index(device_id, "arp", index, now)
+        await self._record_mac_history(device_id, "arp", delta, now)
+        return delta
+
+    async def _save_mac_cache(self, device_id: UUID, entries: list[dict[str, Any]]) -> TableDelta:
         """
-        保存 MAC 表到 Redis 缓存（使用 CacheMixin）。
+        保存 MAC 表快照到 Redis 缓存（使用 CacheMixin），并记录相对上次快照的变化。
 
         Args:
             device_id: 设备 ID
             entries: MAC 条目列表
+
+        Returns:
+            TableDelta: 相对上次快照的变化（同一 MAC + VLAN 换端口视为迁移）
         """
         cache_key = f"{MAC_CACHE_PREFIX}:{device_id}"
         now = datetime.now()
@@ -510,12 +592,192 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 }
             )
 
-        cache_data = {
-            "entries": normalized_entries,
-            "cached_at": now.isoformat(),
-        }
+        packed = pack_table(normalized_entries, MAC_COLUMNS, now)
+        previous = await self._replace_snapshot(cache_key, packed)
+        delta = diff_tables(
+            previous,
+            normalized_entries,
+            key=lambda e: (normalize_mac(e.get("mac_address")), e.get("vlan_id") or ""),
+            location=lambda e: e.get("interface") or "",
+        )
 
-        await self._cache_set(cache_key, json.dumps(cache_data), settings.COLLECT_CACHE_TTL)
+        index: dict[str, dict[str, str]] = {}
+        for entry in normalized_entries:
+            mac = normalize_mac(entry["mac_address"])
+            if mac:
+                field = f"{device_id}|mac|{entry['interface'] or ''}"
+                value = _pack_locate_value(entry, "mac", now)
+                index.setdefault(f"{LOCATE_MAC_INDEX_PREFIX}:{mac}", {})[field] = value
+        await self._update_locate_index(device_id, "mac", index, now)
+        await self._record_mac_history(device_id, "mac", delta, now)
+        return delta
+
+    async def _replace_snapshot(self, cache_key: str, packed: str) -> list[dict[str, Any]]:
+        """
+        写入本次快照，并返回上次快照作为比对基线。
+
+        每台设备只保留一份快照，按历史轨迹保留期过期；查询时按 cached_at 判断是否超过 COLLECT_CACHE_TTL。
+
+        Args:
+            cache_key: 快照缓存键
+            packed: 打包后的快照
+
+        Returns:
+            list[dict[str, Any]]: 上次快照条目（无快照时为空）
+        """
+        previous, _ = unpack_table(await self._cache_get(cache_key))
+        await self._cache_set(cache_key, packed, _snapshot_ttl())
+        return previous
+
+    async def _record_mac_history(self, device_id: UUID, source: str, delta: TableDelta, now: datetime) -> None:
+        """
+        将快照变化写入 MAC 历史轨迹（有序集合，按采集时间排序，单次 pipeline）。
+
+        只在条目出现、消失或迁移时写事件，未变化的条目不产生写入；
+        迁移拆分为旧位置 gone 与新位置 seen 两个事件。
+
+        Args:
+            device_id: 设备 ID
+            source: 数据来源（arp/mac）
+            delta: 快照变化
+            now: 本次采集时间
+        """
+        if cache_module.redis_client is None or not delta.changed:
+            return
+
+        events: dict[str, dict[str, float]] = {}
+
+        def _push(entry: dict[str, Any], event: str) -> None:
+            mac = normalize_mac(entry.get("mac_address"))
+            if not mac:
+                return
+            member = json.dumps(
+                {
+                    "event": event,
+                    "source": source,
+                    "device_id": str(device_id),
+                    "interface": entry.get("interface") or None,
+                    "vlan_id": entry.get("vlan_id") or None,
+                    "ip_address": entry.get("ip_address") or None,
+                    "occurred_at": now.isoformat(),
+                }
+            )
+            events.setdefault(f"{COLLECT_HISTORY_PREFIX}:{mac}", {})[member] = now.timestamp()
+
+        for entry in delta.added:
+            _push(entry, "seen")
+        for before, after in delta.moved:
+            _push(before, "gone")
+            _push(after, "seen")
+        for entry in delta.removed:
+            _push(entry, "gone")
+
+        retention = settings.COLLECT_HISTORY_RETENTION_DAYS * 86400
+        try:
+            async with cache_module.redis_client.pipeline(transaction=False) as pipe:
+                for key, members in events.items():
+                    pipe.zadd(key, members)
+                    pipe.zremrangebyscore(key, 0, now.timestamp() - retention)
+                    pipe.zremrangebyrank(key, 0, -(settings.COLLECT_HISTORY_MAX_EVENTS + 1))
+                    pipe.expire(key, retention)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"写入 MAC 历史轨迹失败 [{source}:{device_id}]: {e}")
+
+    async def _update_locate_index(
+        self,
+        device_id: UUID,
+        source: str,
+        index: dict[str, dict[str, str]],
+        now: datetime,
+    ) -> None:
+        """
+        增量更新定位倒排索引（单次 pipeline）。
+
+        与上次写入的成员集合比对，只删除已消失的字段并覆盖当前字段；
+        索引键与缓存使用相同的 TTL，设备表过期后其条目在查询时被过滤。
+
+        Args:
+            device_id: 设备 ID
+            source: 数据来源（arp/mac）
+            index: 索引键 -> {字段: 压缩后的条目数组}
+            now: 本次采集时间
+        """
+        if cache_module.redis_client is None:
+            return
+
+        ttl = settings.COLLECT_CACHE_TTL
+        members_key = f"{LOCATE_MEMBERS_PREFIX}:{source}:{device_id}"
+        members = {f"{key}{_MEMBER_SEP}{field}" for key, fields in index.items() for field in fields}
+        try:
+            previous = await cache_module.redis_client.smembers(members_key)  # type: ignore[misc]
+            async with cache_module.redis_client.pipeline(transaction=False) as pipe:
+                for member in set(previous) - members:
+                    key, _, field = member.partition(_MEMBER_SEP)
+                    pipe.hdel(key, field)
+                for key, fields in index.items():
+                    pipe.hset(key, mapping=fields)
+                    pipe.expire(key, ttl)
+                pipe.delete(members_key)
+                if members:
+                    pipe.sadd(members_key, *members)
+                    pipe.expire(members_key, ttl)
+                pipe.zadd(LOCATE_DEVICES_KEY, {str(device_id): now.timestamp()})
+                pipe.zremrangebyscore(LOCATE_DEVICES_KEY, 0, now.timestamp() - ttl)
+                pipe.expire(LOCATE_DEVICES_KEY, ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"更新定位索引失败 [{source}:{device_id}]: {e}")
+
+    async def _lookup_locate_index(self, key: str) -> list[dict[str, Any]]:
+        """
+        读取定位索引中的有效条目（超过缓存 TTL 的条目会被惰性清理）。
+
+        Args:
+            key: 索引键
+
+        Returns:
+            list[dict[str, Any]]: 条目列表（ARP 来源在前）
+        """
+        assert cache_module.redis_client is not None
+        fields: dict[str, str] = await cache_module.redis_client.hgetall(key)  # type: ignore[misc]
+        if not fields:
+            return []
+
+        expire_before = datetime.now().timestamp() - settings.COLLECT_CACHE_TTL
+        entries: list[dict[str, Any]] = []
+        stale: list[str] = []
+        for field, value in fields.items():
+            entry = _unpack_locate_value(field, value)
+            if datetime.fromisoformat(entry["updated_at"]).timestamp() < expire_before:
+                stale.append(field)
+                continue
+            entries.append(entry)
+        if stale:
+            await cache_module.redis_client.hdel(key, *stale)  # type: ignore[misc]
+
+        entries.sort(key=lambda e: (e.get("source") != "arp", e.get("device_id", ""), e.get("interface") or ""))
+        return entries
+
+    async def _load_locate_context(self, entries: list[dict[str, Any]]) -> tuple[dict[str, Any], int]:
+        """
+        加载命中条目对应的设备信息与已索引设备数。
+
+        Args:
+            entries: 索引条目
+
+        Returns:
+            tuple[dict[str, Any], int]: (设备 ID -> 设备, 已索引设备数)
+        """
+        assert cache_module.redis_client is not None
+        device_ids = list(dict.fromkeys(UUID(e["device_id"]) for e in entries))
+        devices = await self.device_crud.get_by_ids(self.db, device_ids) if device_ids else []
+        searched_devices = await cache_module.redis_client.zcount(
+            LOCATE_DEVICES_KEY,
+            datetime.now().timestamp() - settings.COLLECT_CACHE_TTL,
+            "+inf",
+        )
+        return {str(d.id): d for d in devices}, int(searched_devices)
 
     async def _update_last_collect_time(self, device_id: UUID) -> None:
         """
@@ -537,7 +799,7 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         """
         根据 IP 地址定位设备和端口
 
-        遍历所有设备的 ARP 缓存，查找匹配的 IP 地址
+        查询 IP 倒排索引，只加载命中条目对应的设备信息
 
         Args:
             ip_address: 要查询的 IP 地址
@@ -560,47 +822,24 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 search_time_ms=0,
             )
 
-        # 获取所有设备
-        devices, _ = await self.device_crud.get_paginated(
-            self.db,
-            page=1,
-            page_size=10000,
-            max_size=10000,
-        )
-
-        # 预加载设备信息映射
-        device_map = {str(d.id): d for d in devices}
-
-        # 扫描所有 ARP 缓存
         try:
-            async for key in cache_module.redis_client.scan_iter(match=f"{ARP_CACHE_PREFIX}:*"):
-                searched_devices += 1
-                device_id = key.split(":")[-1]
-                device = device_map.get(device_id)
-
-                cached_data = await cache_module.redis_client.get(key)
-                if not cached_data:
-                    continue
-
-                data = json.loads(cached_data)
-                entries = data.get("entries", [])
-                cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
-
-                # 搜索匹配 IP
-                for entry in entries:
-                    if entry.get("ip_address", "").lower() == ip_address.lower():
-                        matches.append(
-                            LocateMatch(
-                                device_id=UUID(device_id),
-                                device_name=device.name if device else None,
-                                device_ip=device.ip_address if device else None,
-                                interface=entry.get("interface"),
-                                vlan_id=entry.get("vlan_id"),
-                                mac_address=entry.get("mac_address"),
-                                entry_type=entry.get("entry_type"),
-                                cached_at=cached_at,
-                            )
-                        )
+            entries = await self._lookup_locate_index(f"{LOCATE_IP_INDEX_PREFIX}:{ip_address.strip().lower()}")
+            device_map, searched_devices = await self._load_locate_context(entries)
+
+            for entry in entries:
+                device = device_map.get(entry["device_id"])
+                matches.append(
+                    LocateMatch(
+                        device_id=UUID(entry["device_id"]),
+                        device_name=device.name if device else None,
+                        device_ip=device.ip_address if device else None,
+                        interface=entry.get("interface"),
+                        vlan_id=entry.get("vlan_id"),
+                        mac_address=entry.get("mac_address"),
+                        entry_type=entry.get("entry_type"),
+                        cached_at=datetime.fromisoformat(entry["updated_at"]) if entry.get("updated_at") else None,
+                    )
+                )
 
         except Exception as e:
             logger.error(f"IP 定位查询失败: {e}")
@@ -624,7 +863,7 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
         """
         根据 MAC 地址定位设备和端口
 
-        同时搜索 ARP 和 MAC 缓存，合并结果
+        查询 MAC 倒排索引（同时包含 ARP 与 MAC 表条目），合并结果
 
         Args:
             mac_address: 要查询的 MAC 地址
@@ -647,94 +886,32 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
                 search_time_ms=0,
             )
 
-        # 标准化 MAC 地址格式（支持多种格式搜索）
-        mac_normalized = mac_address.lower().replace("-", "").replace(":", "").replace(".", "")
-
-        def mac_matches(stored_mac: str) -> bool:
-            """检查 MAC 是否匹配（忽略分隔符格式差异）。"""
-            if not stored_mac:
-                return False
-            stored_normalized = stored_mac.lower().replace("-", "").replace(":", "").replace(".", "")
-            return stored_normalized == mac_normalized
-
-        # 获取所有设备
-        devices, _ = await self.device_crud.get_paginated(
-            self.db,
-            page=1,
-            page_size=10000,
-            max_size=10000,
-        )
-
-        # 预加载设备信息映射
-        device_map = {str(d.id): d for d in devices}
-
-        # 用于去重的集合（device_id + interface）
+        # 用于去重的集合（device_id + interface），ARP 条目优先（可获取 IP 地址）
         found_locations: set[str] = set()
 
         try:
-            # 1. 搜索 ARP 缓存（可获取 IP 地址）
-            async for key in cache_module.redis_client.scan_iter(match=f"{ARP_CACHE_PREFIX}:*"):
-                searched_devices += 1
-                device_id = key.split(":")[-1]
-                device = device_map.get(device_id)
-
-                cached_data = await cache_module.redis_client.get(key)
-                if not cached_data:
-                    continue
+            entries = await self._lookup_locate_index(f"{LOCATE_MAC_INDEX_PREFIX}:{normalize_mac(mac_address)}")
+            device_map, searched_devices = await self._load_locate_context(entries)
 
-                data = json.loads(cached_data)
-                entries = data.get("entries", [])
-                cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
-
-                for entry in entries:
-                    if mac_matches(entry.get("mac_address", "")):
-                        location_key = f"{device_id}:{entry.get('interface', '')}"
-                        if location_key not in found_locations:
-                            found_locations.add(location_key)
-                            matches.append(
-                                LocateMatch(
-                                    device_id=UUID(device_id),
-                                    device_name=device.name if device else None,
-                                    device_ip=device.ip_address if device else None,
-                                    interface=entry.get("interface"),
-                                    vlan_id=entry.get("vlan_id"),
-                                    ip_address=entry.get("ip_address"),
-                                    mac_address=entry.get("mac_address"),
-                                    entry_type=entry.get("entry_type"),
-                                    cached_at=cached_at,
-                                )
-                            )
-
-            # 2. 搜索 MAC 缓存（可能有更精确的端口信息）
-            async for key in cache_module.redis_client.scan_iter(match=f"{MAC_CACHE_PREFIX}:*"):
-                device_id = key.split(":")[-1]
-                device = device_map.get(device_id)
-
-                cached_data = await cache_module.redis_client.get(key)
-                if not cached_data:
+            for entry in entries:
+                location_key = f"{entry['device_id']}:{entry.get('interface', '')}"
+                if location_key in found_locations:
                     continue
-
-                data = json.loads(cached_data)
-                entries = data.get("entries", [])
-                cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
-
-                for entry in entries:
-                    if mac_matches(entry.get("mac_address", "")):
-                        location_key = f"{device_id}:{entry.get('interface', '')}"
-                        if location_key not in found_locations:
-                            found_locations.add(location_key)
-                            matches.append(
-                                LocateMatch(
-                                    device_id=UUID(device_id),
-                                    device_name=device.name if device else None,
-                                    device_ip=device.ip_address if device else None,
-                                    interface=entry.get("interface"),
-                                    vlan_id=entry.get("vlan_id"),
-                                    mac_address=entry.get("mac_address"),
-                                    entry_type=entry.get("entry_type") or entry.get("state"),
-                                    cached_at=cached_at,
-                                )
-                            )
+                found_locations.add(location_key)
+                device = device_map.get(entry["device_id"])
+                matches.append(
+                    LocateMatch(
+                        device_id=UUID(entry["device_id"]),
+                        device_name=device.name if device else None,
+                        device_ip=device.ip_address if device else None,
+                        interface=entry.get("interface"),
+                        vlan_id=entry.get("vlan_id"),
+                        ip_address=entry.get("ip_address"),
+                        mac_address=entry.get("mac_address"),
+                        entry_type=entry.get("entry_type") or entry.get("state"),
+                        cached_at=datetime.fromisoformat(entry["updated_at"]) if entry.get("updated_at") else None,
+                    )
+                )
 
         except Exception as e:
             logger.error(f"MAC 定位查询失败: {e}")
@@ -753,3 +930,65 @@ class CollectService(DeviceCredentialMixin, CacheMixin):
             searched_devices=searched_devices,
             search_time_ms=search_time_ms,
         )
+
+    # ===== MAC 历史轨迹 =====
+
+    async def get_mac_history(self, mac_address: str, at: datetime | None = None) -> MACHistoryResponse:
+        """
+        查询 MAC 地址的历史轨迹及指定时间点所在位置。
+
+        按时间回放截至该时间点的事件，每个位置（来源 + 设备 + 接口 + IP）以最后一个事件为准。
+
+        Args:
+            mac_address: 要查询的 MAC 地址
+            at: 查询时间点（默认当前时间）
+
+        Returns:
+            MACHistoryResponse: 历史轨迹
+        """
+        at = at or datetime.now()
+        if at.tzinfo is not None:
+            at = at.astimezone().replace(tzinfo=None)
+        response = MACHistoryResponse(query=mac_address, at=at)
+
+        if not cache_module.redis_client:
+            logger.warning("Redis 未连接，无法查询 MAC 历史轨迹")
+            return response
+
+        key = f"{COLLECT_HISTORY_PREFIX}:{normalize_mac(mac_address)}"
+        try:
+            members = await cache_module.redis_client.zrangebyscore(key, "-inf", at.timestamp())
+        except Exception as e:
+            logger.error(f"MAC 历史轨迹查询失败: {e}")
+            return response
+
+        events = [json.loads(member) for member in members]
+        latest: dict[tuple[str, str, str, str], dict[str, Any]] = {}
+        for event in events:
+            interface, ip = event.get("interface") or "", event.get("ip_address") or ""
+            latest[(event["source"], event["device_id"], interface, ip)] = event
+
+        device_ids = list(dict.fromkeys(UUID(e["device_id"]) for e in events))
+        devices = await self.device_crud.get_by_ids(self.db, device_ids) if device_ids else []
+        device_map = {str(d.id): d for d in devices}
+
+        for event in reversed(events):
+            device = device_map.get(event["device_id"])
+            response.events.append(MACHistoryEvent(**event, device_name=device.name if device else None))
+        for event in latest.values():
+            if event["event"] != "seen":
+                continue
+            device = device_map.get(event["device_id"])
+            response.locations.append(
+                LocateMatch(
+                    device_id=UUID(event["device_id"]),
+                    device_name=device.name if device else None,
+                    device_ip=device.ip_address if device else None,
+                    interface=event.get("interface"),
+                    vlan_id=event.get("vlan_id"),
+                    ip_address=event.get("ip_address"),
+                    mac_address=mac_address,
+                    cached_at=datetime.fromisoformat(event["occurred_at"]),
+                )
+            )
+        return response
@@ -0,0 +1,120 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: collect_table_store.py
+@DateTime: 2026-02-09 16:00:00
+@Docs: ARP/MAC 表快照存储与增量计算 (Collect Table Store).
+
+快照以列式结构序列化（列名只写一次，行为数组），相比逐条字典的 JSON 显著减小体积；
+新旧快照按条目键比对得到新增、消失与迁移（同一键的位置变化）。
+"""
+
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import orjson
+
+# 快照格式版本
+TABLE_FORMAT_VERSION = 1
+
+ARP_COLUMNS: tuple[str, ...] = ("ip_address", "mac_address", "vlan_id", "interface", "age", "entry_type")
+MAC_COLUMNS: tuple[str, ...] = ("mac_address", "vlan_id", "interface", "entry_type", "state")
+
+EntryFn = Callable[[dict[str, Any]], Hashable]
+
+
+@dataclass
+class TableDelta:
+    """
+    两次快照之间的差异。
+
+    Attributes:
+        added: 新出现的条目
+        removed: 消失的条目
+        moved: 位置发生变化的条目（旧条目, 新条目）
+    """
+
+    added: list[dict[str, Any]] = field(default_factory=list)
+    removed: list[dict[str, Any]] = field(default_factory=list)
+    moved: list[tuple[dict[str, Any], dict[str, Any]]] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        """是否存在变化。"""
+        return bool(self.added or self.removed or self.moved)
+
+
+def pack_table(entries: list[dict[str, Any]], columns: tuple[str, ...], cached_at: datetime) -> str:
+    """
+    将条目序列化为列式快照。
+
+    Args:
+        entries: 规范化后的条目
+        columns: 列名
+        cached_at: 采集时间
+
+    Returns:
+        str: 快照字符串
+    """
+    rows = [[entry.get(column) for column in columns] for entry in entries]
+    return orjson.dumps(
+        {"v": TABLE_FORMAT_VERSION, "cached_at": cached_at.isoformat(), "columns": columns, "rows": rows}
+    ).decode("utf-8")
+
+
+def unpack_table(raw: str | None) -> tuple[list[dict[str, Any]], datetime | None]:
+    """
+    反序列化快照（兼容旧版逐条字典格式）。
+
+    Args:
+        raw: 快照字符串
+
+    Returns:
+        tuple[list[dict[str, Any]], datetime | None]: (条目列表, 采集时间)
+    """
+    if not raw:
+        return [], None
+    data = orjson.loads(raw)
+    cached_at = datetime.fromisoformat(data["cached_at"]) if data.get("cached_at") else None
+    if "entries" in data:
+        return list(data["entries"]), cached_at
+
+    columns = data.get("columns", [])
+    updated_at = cached_at.isoformat() if cached_at else None
+    entries = [{**dict(zip(columns, row, strict=True)), "updated_at": updated_at} for row in data.get("rows", [])]
+    return entries, cached_at
+
+
+def diff_tables(
+    previous: list[dict[str, Any]],
+    current: list[dict[str, Any]],
+    *,
+    key: EntryFn,
+    location: EntryFn,
+) -> TableDelta:
+    """
+    计算两次快照的差异。
+
+    Args:
+        previous: 上次快照条目
+        current: 本次快照条目
+        key: 条目键（ARP 为 IP，MAC 为 MAC + VLAN）
+        location: 条目位置（键相同而位置不同视为迁移）
+
+    Returns:
+        TableDelta: 差异
+    """
+    old = {key(entry): entry for entry in previous}
+    new = {key(entry): entry for entry in current}
+
+    delta = TableDelta()
+    for entry_key, entry in new.items():
+        before = old.get(entry_key)
+        if before is None:
+            delta.added.append(entry)
+        elif location(before) != location(entry):
+            delta.moved.append((before, entry))
+    delta.removed = [entry for entry_key, entry in old.items() if entry_key not in new]
+    return delta
@@ -0,0 +1,232 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: config_change_probe_service.py
+@DateTime: 2026-02-07 09:00:00
+@Docs: 配置变更探测服务 (Config Change Probe Service).
+
+增量配置检查前先获取每台设备的配置变更标记（SNMP 单次 GET 优先，CLI 轻量命令兜底），
+与 Redis 中缓存的上次标记比较，只有标记变化或无法探测的设备才全量采集运行配置。
+标记只在设备配置确认入库（或确认未变化）后写回缓存，缓存过期后强制全量采集一次作为兜底。
+"""
+
+import asyncio
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import cache as cache_module
+from app.core.config import settings
+from app.core.encryption import decrypt_snmp_secret
+from app.core.logger import logger
+from app.crud.crud_snmp_credential import CRUDDeptSnmpCredential
+from app.models.device import Device
+from app.network.platform_config import (
+    get_config_change_cli_probe,
+    get_config_change_snmp_oid,
+    get_scrapli_platform,
+)
+from app.services.snmp_service import SnmpService, SnmpV2cCredential
+
+CONFIG_MARKER_PREFIX = "ncm:backup:config_marker"
+
+# pysnmp v2c 对不支持的 OID 返回的异常值类型
+_SNMP_MISSING_TYPES = {"NoSuchObject", "NoSuchInstance", "EndOfMibView"}
+
+
+def config_marker_key(device_id: str) -> str:
+    """
+    生成设备配置变更标记的缓存键。
+
+    Args:
+        device_id: 设备 ID
+
+    Returns:
+        str: Redis 缓存键
+    """
+    return f"{CONFIG_MARKER_PREFIX}:{device_id}"
+
+
+def _snmp_marker(value: Any) -> str | None:
+    if value is None or type(value).__name__ in _SNMP_MISSING_TYPES:
+        return None
+    text = str(value).strip()
+    return f"snmp:{text}" if text else None
+
+
+class ConfigChangeProbeService:
+    """
+    配置变更探测服务类。
+
+    探测本身不修改任何数据；调用方在确认设备配置已处理后调用 save_markers 写回标记。
+    """
+
+    def __init__(self, db: AsyncSession, snmp_cred_crud: CRUDDeptSnmpCredential):
+        """
+        初始化配置变更探测服务。
+
+        Args:
+            db: 异步数据库会话
+            snmp_cred_crud: 部门 SNMP 凭据 CRUD 实例
+        """
+        self.db = db
+        self.snmp_cred_crud = snmp_cred_crud
+
+    async def filter_changed(
+        self, hosts_data: list[dict[str, Any]], *, known_device_ids: set[str]
+    ) -> tuple[list[dict[str, Any]], dict[str, str]]:
+        """
+        过滤出需要全量采集配置的主机。
+
+        无历史备份、无法探测、缓存缺失或标记变化的设备都需要全量采集。
+
+        Args:
+            hosts_data: 主机数据列表（需包含 device_id、hostname、platform）
+            known_device_ids: 已有成功备份的设备 ID
+
+        Returns:
+            tuple[list[dict[str, Any]], dict[str, str]]: (需全量采集的主机, 这些主机本次探测到的标记)
+        """
+        markers = await self.probe(hosts_data)
+        cached = await self._get_cached(list(markers))
+
+        changed: list[dict[str, Any]] = []
+        changed_markers: dict[str, str] = {}
+        for host in hosts_data:
+            device_id = str(host.get("device_id") or "")
+            marker = markers.get(device_id)
+            if marker is not None and device_id in known_device_ids and cached.get(device_id) == marker:
+                continue
+            changed.append(host)
+            if marker is not None:
+                changed_markers[device_id] = marker
+
+        logger.info(
+            "配置变更探测完成",
+            total=len(hosts_data),
+            probed=len(markers),
+            changed=len(changed),
+        )
+        return changed, changed_markers
+
+    async def probe(self, hosts_data: list[dict[str, Any]]) -> dict[str, str]:
+        """
+        探测设备配置变更标记（SNMP 优先，CLI 兜底）。
+
+        Args:
+            hosts_data: 主机数据列表
+
+        Returns:
+            dict[str, str]: 设备 ID -> 标记（无法探测的设备不在其中）
+        """
+        markers = await self._probe_snmp(hosts_data)
+        if settings.BACKUP_CHANGE_PROBE_CLI_ENABLED:
+            remaining = [
+                h
+                for h in hosts_data
+                if str(h.get("device_id")) not in markers
+                and get_config_change_cli_probe(get_scrapli_platform(h.get("platform"))) is not None
+            ]
+            markers.update(await self._probe_cli(remaining))
+        return markers
+
+    async def save_markers(self, markers: dict[str, str]) -> None:
+        """
+        写回已确认处理的设备标记（单次 pipeline，带过期时间）。
+
+        Args:
+            markers: 设备 ID -> 标记
+        """
+        if not markers or cache_module.redis_client is None:
+            return
+        try:
+            async with cache_module.redis_client.pipeline(transaction=False) as pipe:
+                for device_id, marker in markers.items():
+                    pipe.set(config_marker_key(device_id), marker, ex=settings.BACKUP_CHANGE_MARKER_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("写入配置变更标记失败", count=len(markers), error=str(e))
+
+    async def _get_cached(self, device_ids: list[str]) -> dict[str, str]:
+        if not device_ids or cache_module.redis_client is None:
+            return {}
+        try:
+            values = await cache_module.redis_client.mget([config_marker_key(d) for d in device_ids])
+        except Exception as e:
+            logger.warning("读取配置变更标记失败", error=str(e))
+            return {}
+        return {d: v for d, v in zip(device_ids, values, strict=True) if v is not None}
+
+    async def _probe_snmp(self, hosts_data: list[dict[str, Any]]) -> dict[str, str]:
+        """通过部门 v2c 凭据 GET 配置变更 OID。"""
+        targets: dict[str, tuple[str, str]] = {}
+        for host in hosts_data:
+            oid = get_config_change_snmp_oid(get_scrapli_platform(host.get("platform")))
+            if oid and host.get("device_id") and host.get("hostname"):
+                targets[str(host["device_id"])] = (str(host["hostname"]), oid)
+        if not targets:
+            return {}
+
+        result = await self.db.execute(
+            select(Device.id, Device.dept_id).where(Device.id.in_([UUID(d) for d in targets]))
+        )
+        device_depts = {str(row.id): row.dept_id for row in result.all() if row.dept_id}
+        creds: dict[UUID, SnmpV2cCredential] = {}
+        for dept_id in set(device_depts.values()):
+            snmp_cred = await self.snmp_cred_crud.get_by_dept_id(self.db, dept_id=dept_id)
+            if not snmp_cred or snmp_cred.snmp_version != "v2c" or not snmp_cred.community_encrypted:
+                continue
+            try:
+                community = decrypt_snmp_secret(snmp_cred.community_encrypted)
+            except Exception as e:
+                logger.warning("SNMP 凭据解密失败", dept_id=str(dept_id), error=str(e))
+                continue
+            creds[dept_id] = SnmpV2cCredential(community=community, port=snmp_cred.port)
+
+        sem = asyncio.Semaphore(settings.SNMP_MAX_CONCURRENCY)
+
+        async def _get(device_id: str, ip: str, oid: str, cred: SnmpV2cCredential) -> tuple[str, str | None]:
+            async with sem:
+                try:
+                    values = await snmp_service.get_many(ip, cred, [oid])
+                except Exception as e:
+                    logger.debug("SNMP 配置变更探测失败", device_id=device_id, ip=ip, error=str(e))
+                    return device_id, None
+            return device_id, _snmp_marker(next(iter(values.values()), None))
+
+        pending = [
+            _get(device_id, ip, oid, creds[device_depts[device_id]])
+            for device_id, (ip, oid) in targets.items()
+            if device_depts.get(device_id) in creds
+        ]
+        async with SnmpService(retries=1) as snmp_service:
+            results = await asyncio.gather(*pending)
+        return {device_id: marker for device_id, marker in results if marker is not None}
+
+    async def _probe_cli(self, hosts_data: list[dict[str, Any]]) -> dict[str, str]:
+        """通过连接池执行轻量 CLI 命令获取标记。"""
+        if not hosts_data:
+            return {}
+
+        from app.network.async_runner import run_async_tasks
+        from app.network.async_tasks import async_probe_config_change
+        from app.network.nornir_config import init_nornir_async
+
+        inventory = init_nornir_async(hosts_data)
+        results = await run_async_tasks(
+            inventory.hosts,
+            async_probe_config_change,
+            num_workers=min(settings.BACKUP_NUM_WORKERS, len(hosts_data)),
+        )
+
+        markers: dict[str, str] = {}
+        host_to_device = {str(h.get("name")): str(h.get("device_id")) for h in hosts_data}
+        for host_name, multi_result in results.items():
+            if not multi_result or multi_result.failed:
+                continue
+            data = multi_result[0].result
+            if isinstance(data, dict) and data.get("marker"):
+                markers[host_to_device.get(str(host_name), str(host_name))] = f"cli:{data['marker']}"
+        return markers
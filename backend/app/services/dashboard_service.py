@@ -6,19 +6,24 @@
 @Docs: 仪表盘业务逻辑 (Dashboard Service).
 """
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import Date, cast, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.enums import StatMetric
 from app.crud.crud_menu import CRUDMenu
 from app.crud.crud_role import CRUDRole
+from app.crud.crud_stat import stat_daily_crud
 from app.crud.crud_user import CRUDUser
-from app.models.log import LoginLog, OperationLog
+from app.models.log import LoginLog
 from app.models.user import User
 from app.schemas.dashboard import DashboardStats, LoginLogSimple
+from app.services.stats_service import ALL_DIMENSION, StatsService, trend_items, user_dimension
 
 
 class DashboardService:
@@ -49,69 +54,32 @@ class DashboardService:
         self.role_crud = role_crud
         self.menu_crud = menu_crud
 
-    # ========== 登录日志统计 ==========
+    # ========== 全局计数 ==========
 
-    async def _count_login_by_range(
-        self, start: datetime, end: datetime, *, user_id: UUID | None = None
-    ) -> int:
+    @cache(prefix="v1:dashboard:global", expire=settings.DASHBOARD_CACHE_TTL)
+    async def _get_global_counts(self) -> dict[str, int]:
         """
-        统计指定时间范围内的登录次数。
-
-        Args:
-            start: 开始时间
-            end: 结束时间
-            user_id: 用户 ID（可选，用于过滤特定用户）
-
-        Returns:
-            int: 登录次数
-        """
-        stmt = select(func.count(LoginLog.id)).where(
-            LoginLog.created_at >= start, LoginLog.created_at < end
-        )
-        if user_id is not None:
-            stmt = stmt.where(LoginLog.user_id == user_id)
-        result = await self.db.execute(stmt)
-        return result.scalar_one()
-
-    async def _count_login_today(self) -> int:
-        """
-        统计今日登录总数。
+        获取全局用户/角色/菜单计数（与当前用户无关，短时缓存）。
 
         Returns:
-            int: 今日登录总数
+            dict[str, int]: total_users、active_users、total_roles、total_menus
         """
-        now = datetime.now(UTC).replace(tzinfo=None)
-        today_start = datetime(now.year, now.month, now.day)
-        today_end = today_start + timedelta(days=1)
-        return await self._count_login_by_range(today_start, today_end)
+        from app.models.rbac import Menu, Role
 
-    async def _get_login_trend(self, days: int = 7, *, user_id: UUID | None = None) -> list[dict[str, Any]]:
-        """
-        获取近 N 天的登录趋势统计。
-
-        Args:
-            days: 统计天数（默认 7）
-            user_id: 用户 ID（可选，用于过滤特定用户）
-
-        Returns:
-            list[dict[str, Any]]: 趋势数据列表，每项包含 date 和 count
-        """
-        end_date = datetime.now(UTC).date()
-        start_date = end_date - timedelta(days=days - 1)
-
-        date_col = cast(LoginLog.created_at, Date)
-
-        stmt = (
-            select(date_col.label("d"), func.count().label("c"))
-            .where(date_col >= start_date)
-            .group_by(date_col)
-            .order_by(date_col.asc())
+        query = select(
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Role.id)).scalar_subquery(),
+            select(func.count(Menu.id)).scalar_subquery(),
         )
-        if user_id is not None:
-            stmt = stmt.where(LoginLog.user_id == user_id)
+        total_users, total_roles, total_menus = (await self.db.execute(query)).one()
+        return {
+            "total_users": total_users,
+            "active_users": await self.user_crud.count_active(self.db),
+            "total_roles": total_roles,
+            "total_menus": total_menus,
+        }
 
-        result = await self.db.execute(stmt)
-        return [{"date": str(row.d), "count": row.c} for row in result.all()]
+    # ========== 登录日志 ==========
 
     async def _get_recent_logins(self, limit: int = 10, *, user_id: UUID | None = None) -> list[LoginLog]:
         """
@@ -130,30 +98,6 @@ class DashboardService:
         result = await self.db.execute(stmt.order_by(LoginLog.created_at.desc()).limit(limit))
         return list(result.scalars().all())
 
-    # ========== 操作日志统计 ==========
-
-    async def _count_operation_by_range(
-        self, start: datetime, end: datetime, *, user_id: UUID | None = None
-    ) -> int:
-        """
-        统计指定时间范围内的操作日志数量。
-
-        Args:
-            start: 开始时间
-            end: 结束时间
-            user_id: 用户 ID（可选，用于过滤特定用户）
-
-        Returns:
-            int: 操作日志数量
-        """
-        stmt = select(func.count(OperationLog.id)).where(
-            OperationLog.created_at >= start, OperationLog.created_at <= end
-        )
-        if user_id is not None:
-            stmt = stmt.where(OperationLog.user_id == user_id)
-        result = await self.db.execute(stmt)
-        return result.scalar_one()
-
     # ========== 仪表盘汇总 ==========
 
     async def get_summary_stats(self, current_user: User) -> DashboardStats:
@@ -168,47 +112,41 @@ class DashboardService:
         Returns:
             DashboardStats: 仪表盘统计数据
         """
-        # 时间范围
-        now = datetime.now(UTC).replace(tzinfo=None)
-        today_start = datetime(now.year, now.month, now.day)
-        today_end = today_start + timedelta(days=1)
+        # 今日计数与近 7 天趋势：读取每日统计汇总（个人维度，超级管理员附加全量维度）
+        my_dimension = user_dimension(current_user.id)
+        dimensions = [my_dimension, ALL_DIMENSION] if current_user.is_superuser else [my_dimension]
+        values = await StatsService(self.db, stat_daily_crud).get_values(
+            [StatMetric.LOGIN, StatMetric.OPERATION], dimensions, days=7
+        )
+        today = datetime.now(UTC).date()
+
+        def _today(metric: StatMetric, dimension: str) -> int:
+            return values.get((metric.value, dimension), {}).get(today, 0)
+
+        def _trend(metric: StatMetric, dimension: str) -> list[dict[str, Any]]:
+            return trend_items(values.get((metric.value, dimension), {}))
 
         # 普通用户：个人维度
-        my_today_login_count = await self._count_login_by_range(today_start, today_end, user_id=current_user.id)
-        my_today_operation_count = await self._count_operation_by_range(today_start, today_end, user_id=current_user.id)
-        my_login_trend = await self._get_login_trend(days=7, user_id=current_user.id)
+        my_today_login_count = _today(StatMetric.LOGIN, my_dimension)
+        my_today_operation_count = _today(StatMetric.OPERATION, my_dimension)
+        my_login_trend = _trend(StatMetric.LOGIN, my_dimension)
         my_recent_logins_orm = await self._get_recent_logins(limit=10, user_id=current_user.id)
         my_recent_logins = [LoginLogSimple.model_validate(log) for log in my_recent_logins_orm]
 
         # 超级管理员：全局统计
         if current_user.is_superuser:
-            from app.models.rbac import Menu, Role
-
-            active_users = await self.user_crud.count_active(self.db)
-            total_users_res = await self.db.execute(select(func.count(User.id)))
-            total_users = total_users_res.scalar_one()
-
-            total_roles_res = await self.db.execute(select(func.count(Role.id)))
-            total_roles = total_roles_res.scalar_one()
-
-            total_menus_res = await self.db.execute(select(func.count(Menu.id)))
-            total_menus = total_menus_res.scalar_one()
-
-            today_login_count = await self._count_login_today()
-            today_operation_count = await self._count_operation_by_range(today_start, today_end)
-
-            login_trend = await self._get_login_trend(days=7)
+            global_counts = await self._get_global_counts()
             recent_logins_orm = await self._get_recent_logins(limit=10)
             recent_logins = [LoginLogSimple.model_validate(log) for log in recent_logins_orm]
 
             return DashboardStats(
-                total_users=total_users,
-                active_users=active_users,
-                total_roles=total_roles,
-                total_menus=total_menus,
-                today_login_count=today_login_count,
-                today_operation_count=today_operation_count,
-                login_trend=login_trend,
+                total_users=global_counts["total_users"],
+                active_users=global_counts["active_users"],
+                total_roles=global_counts["total_roles"],
+                total_menus=global_counts["total_menus"],
+                today_login_count=_today(StatMetric.LOGIN, ALL_DIMENSION),
+                today_operation_count=_today(StatMetric.OPERATION, ALL_DIMENSION),
+                login_trend=_trend(StatMetric.LOGIN, ALL_DIMENSION),
                 recent_logins=recent_logins,
                 my_today_login_count=my_today_login_count,
                 my_today_operation_count=my_today_operation_count,
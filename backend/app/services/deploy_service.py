@@ -724,6 +724,7 @@ class DeployService(BaseService):
         from app.network.async_tasks import async_collect_config
         from app.network.nornir_config import init_nornir_async
         from app.network.platform_config import get_platform_for_vendor
+        from app.services.backup_blob_service import load_backup_content_safe
 
         # 验证任务状态（含 OTP 预检）
         task = await self.validate_rollback(task_id, check_otp=True)
@@ -794,7 +795,8 @@ class DeployService(BaseService):
 
             # 获取变更前备份
             backup = await self.db.get(Backup, UUID(backup_id))
-            if not backup or not backup.content:
+            backup_content = await load_backup_content_safe(self.db, backup) if backup else None
+            if not backup or not backup_content:
                 cannot_rollback.append(
                     RollbackDevicePreview(
                         device_id=UUID(dev_id_str),
@@ -815,7 +817,7 @@ class DeployService(BaseService):
                 )
                 continue
 
-            expected_md5 = backup.md5_hash or hashlib.md5(backup.content.encode("utf-8")).hexdigest()
+            expected_md5 = backup.md5_hash or hashlib.md5(backup_content.encode("utf-8")).hexdigest()
 
             # 获取设备凭据
             try:
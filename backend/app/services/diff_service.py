@@ -5,11 +5,11 @@
 @DateTime: 2026-01-10 03:40:00
 @Docs: 配置差异服务 (Diff Service).
 
-基于备份内容生成 unified diff，用于配置变更告警与差异查看。
+基于备份内容生成 unified diff 与按配置段划分的差异，用于配置变更告警与差异查看。
+差异计算由 app.utils.config_diff 完成（引擎由 CONFIG_DIFF_ENGINE 配置）。
 """
 
 import asyncio
-import difflib
 from uuid import UUID
 
 from sqlalchemy import select
@@ -19,6 +19,8 @@ from sqlalchemy.orm import selectinload
 from app.core.enums import BackupStatus
 from app.crud.crud_backup import CRUDBackup
 from app.models.backup import Backup
+from app.services.backup_blob_service import load_backup_content_safe
+from app.utils.config_diff import SectionChange, diff_config, normalize_lines, unified_diff
 
 # 大文本阈值：超过此大小使用线程池处理避免阻塞
 LARGE_TEXT_THRESHOLD = 100 * 1024  # 100KB
@@ -69,6 +71,18 @@ class DiffService:
             return backups[0], None
         return backups[0], backups[1]
 
+    async def get_backup_content(self, backup: Backup) -> str | None:
+        """
+        读取备份配置内容（DB / MinIO / 去重内容块自动路由）。
+
+        Args:
+            backup: 备份对象
+
+        Returns:
+            str | None: 配置内容，不可用时返回 None
+        """
+        return await load_backup_content_safe(self.db, backup)
+
     @staticmethod
     def _normalize_lines(text: str) -> list[str]:
         """
@@ -82,13 +96,7 @@ class DiffService:
         Returns:
             list[str]: 规范化后的行列表
         """
-        lines = []
-        for line in text.splitlines():
-            s = line.rstrip()
-            if not s:
-                continue
-            lines.append(s)
-        return lines
+        return normalize_lines(text)
 
     def compute_unified_diff(self, old_text: str, new_text: str, *, context_lines: int = 3) -> str:
         """
@@ -102,18 +110,11 @@ class DiffService:
         Returns:
             str: unified diff 字符串
         """
-        old_lines = self._normalize_lines(old_text)
-        new_lines = self._normalize_lines(new_text)
-
-        diff_iter = difflib.unified_diff(
-            old_lines,
-            new_lines,
-            fromfile="old",
-            tofile="new",
-            lineterm="",
-            n=context_lines,
+        return unified_diff(
+            self._normalize_lines(old_text),
+            self._normalize_lines(new_text),
+            context_lines=context_lines,
         )
-        return "\n".join(diff_iter)
 
     async def compute_unified_diff_async(self, old_text: str, new_text: str, *, context_lines: int = 3) -> str:
         """
@@ -136,6 +137,38 @@ class DiffService:
         # 小文本直接计算
         return self.compute_unified_diff(old_text, new_text, context_lines=context_lines)
 
+    def compute_diff(self, old_text: str, new_text: str, *, context_lines: int = 3) -> tuple[str, list[SectionChange]]:
+        """
+        同时计算 unified diff 与按配置段划分的差异（同步版本）。
+
+        Args:
+            old_text: 旧文本内容
+            new_text: 新文本内容
+            context_lines: 上下文行数（默认 3）
+
+        Returns:
+            tuple[str, list[SectionChange]]: (unified diff 字符串, 有变更的配置段)
+        """
+        return diff_config(old_text, new_text, context_lines=context_lines)
+
+    async def compute_diff_async(
+        self, old_text: str, new_text: str, *, context_lines: int = 3
+    ) -> tuple[str, list[SectionChange]]:
+        """
+        同时计算 unified diff 与按配置段划分的差异（异步版本，大文本使用线程池）。
+
+        Args:
+            old_text: 旧文本内容
+            new_text: 新文本内容
+            context_lines: 上下文行数（默认 3）
+
+        Returns:
+            tuple[str, list[SectionChange]]: (unified diff 字符串, 有变更的配置段)
+        """
+        if len(old_text) + len(new_text) > LARGE_TEXT_THRESHOLD:
+            return await asyncio.to_thread(self.compute_diff, old_text, new_text, context_lines=context_lines)
+        return self.compute_diff(old_text, new_text, context_lines=context_lines)
+
     @staticmethod
     def should_alert(diff_text: str) -> bool:
         """
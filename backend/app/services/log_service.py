@@ -11,16 +11,19 @@ from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from fastapi import Request
-from sqlalchemy import Date, cast, func, or_, select
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.elements import ColumnElement
 from user_agents import parse
 
 from app.core.decorator import transactional
+from app.core.enums import StatMetric
 from app.core.logger import logger
 from app.crud.crud_log import CRUDLoginLog, CRUDOperationLog
+from app.crud.crud_stat import stat_daily_crud
 from app.models.log import LoginLog, OperationLog
 from app.schemas.log import LoginLogCreate
+from app.services.stats_service import ALL_DIMENSION, StatsService, user_dimension
 
 
 class LogService:
@@ -164,23 +167,11 @@ class LogService:
         Returns:
             包含日期和计数的字典列表，如 [{"date": "2023-10-01", "count": 10}, ...]
         """
-        end_date = datetime.now(UTC).date()
-        start_date = end_date - timedelta(days=days - 1)
-
-        date_col = cast(LoginLog.created_at, Date)
-
-        stmt = (
-            select(date_col.label("d"), func.count().label("c"))
-            .where(date_col >= start_date)
-            .group_by(date_col)
-            .order_by(date_col.asc())
-        )
-        if user_id is not None:
-            stmt = stmt.where(LoginLog.user_id == user_id)
-
+        dimension = user_dimension(user_id) if user_id is not None else ALL_DIMENSION
         try:
-            result = await self.db.execute(stmt)
-            return [{"date": str(row.d), "count": row.c} for row in result.all()]
+            return await StatsService(self.db, stat_daily_crud).get_trend(
+                StatMetric.LOGIN, days, dimension=dimension
+            )
         except Exception as e:
             logger.error(f"获取登录趋势失败: {e}")
             return []
@@ -331,4 +322,8 @@ class LogService:
             msg=msg,
         )
 
-        return await self.login_log_crud.create(self.db, obj_in=log_in)
+        log = await self.login_log_crud.create(self.db, obj_in=log_in)
+        await StatsService(self.db, stat_daily_crud).record(
+            StatMetric.LOGIN, [[user_dimension(final_user_id)] if final_user_id else []]
+        )
+        return log
@@ -21,6 +21,9 @@ from app.core.config import settings
 from app.core.logger import logger
 from app.schemas.discovery import ScanHost, ScanResult
 
+# nmap 进程超时的错误前缀（资产盘点据此把超时的多目标调用拆分重试）
+NMAP_TIMEOUT_ERROR = "Nmap 扫描超时"
+
 
 class NmapScanService:
     """
@@ -58,15 +61,17 @@ class NmapScanService:
         """
         解析扫描类型。
 
+        auto 优先使用 masscan/nmap，均未安装时回退到进程内异步扫描（sweep）。
+
         Args:
-            scan_type: 扫描类型（auto/nmap/masscan）
+            scan_type: 扫描类型（auto/nmap/masscan/sweep）
 
         Returns:
             实际使用的扫描类型
         """
         scan_type = (scan_type or "").strip().lower()
 
-        if scan_type in {"nmap", "masscan"}:
+        if scan_type in {"nmap", "masscan", "sweep"}:
             return scan_type
 
         if scan_type in {"auto", ""}:
@@ -74,9 +79,9 @@ class NmapScanService:
                 return "masscan"
             if self.is_nmap_available():
                 return "nmap"
-            return "none"
+            return "sweep"
 
-        raise ValueError("scan_type 仅支持 auto/nmap/masscan")
+        raise ValueError("scan_type 仅支持 auto/nmap/masscan/sweep")
 
     # ========== Nmap 扫描 ==========
 
@@ -127,6 +132,10 @@ class NmapScanService:
             result.completed_at = datetime.now()
             result.duration_seconds = int((result.completed_at - started_at).total_seconds())
 
+        except nmap.PortScannerTimeout as e:
+            logger.error(f"Nmap 扫描超时: {subnet}", error=str(e))
+            result.error = f"{NMAP_TIMEOUT_ERROR}（{settings.SCAN_TIMEOUT}s）: {e}"
+            result.completed_at = datetime.now()
         except Exception as e:
             logger.error(f"Nmap 扫描失败: {subnet}", error=str(e))
             result.error = f"Nmap 扫描失败: {e}"
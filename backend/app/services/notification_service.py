@@ -6,92 +6,295 @@
 @Docs: 告警通知服务 (Notification Service).
 
 说明：
-- Webhook：可配置启用，支持通用 HTTP POST。
-- 邮件：仅提供配置项，默认不启用；即使配置也不会发送，除非显式开启 ALERT_EMAIL_ENABLED。
+- 发件箱：新告警与 ncm_notification_outbox 记录同事务写入（enqueue），扫描事务内不再发起 HTTP/SMTP 调用。
+- 投递：dispatch_pending 由定时任务调用，按 SKIP LOCKED 领取到期记录，失败按指数退避重试。
+- Webhook：可配置启用，单轮投递复用同一个 keep-alive 连接池，每次 POST 携带 ALERT_WEBHOOK_BATCH_SIZE 条告警。
+- 邮件：默认不启用；显式开启 ALERT_EMAIL_ENABLED 后，每个摘要窗口内的告警合并为一封邮件。
 """
 
+import asyncio
 import json
+import math
+import smtplib
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
 from email.message import EmailMessage
+from typing import Any
+from uuid import UUID
 
 import httpx
+import uuid6
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload, selectinload
 
 from app.core.config import settings
+from app.core.enums import NotificationChannel, NotificationStatus
 from app.core.logger import logger
 from app.models.alert import Alert
+from app.models.notification_outbox import NotificationOutbox
+
+# 单条 INSERT 语句的最大行数（避免绑定参数超过 PostgreSQL 上限）
+_INSERT_BATCH_SIZE = 1000
+
+
+def alert_payload(alert: Alert) -> dict[str, Any]:
+    """
+    构建告警通知内容。
+
+    Args:
+        alert: 告警对象
+
+    Returns:
+        dict: 通知内容
+    """
+    return {
+        "id": str(alert.id),
+        "type": alert.alert_type,
+        "severity": alert.severity,
+        "status": alert.status,
+        "title": alert.title,
+        "message": alert.message,
+        "details": alert.details,
+        "source": alert.source,
+        "related_device_id": str(alert.related_device_id) if alert.related_device_id else None,
+        "related_discovery_id": str(alert.related_discovery_id) if alert.related_discovery_id else None,
+        "created_at": alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+def _digest_window_end(now: datetime) -> datetime:
+    """邮件摘要窗口末尾时间（同一窗口内的告警同时到期，合并为一封邮件）。"""
+    window = settings.ALERT_EMAIL_DIGEST_SECONDS
+    if window <= 0:
+        return now
+    return datetime.fromtimestamp(math.ceil(now.timestamp() / window) * window, tz=UTC)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次发送失败后的退避时间。"""
+    seconds = settings.ALERT_NOTIFY_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.ALERT_NOTIFY_RETRY_MAX_SECONDS))
 
 
 class NotificationService:
     """
     告警通知服务类。
 
-    提供 Webhook 和邮件通知功能。
+    提供通知入队（发件箱）与批量投递（Webhook 批量、邮件摘要）功能。
     """
 
-    async def send_webhook(self, alert: Alert) -> None:
+    def __init__(self, http_transport: httpx.AsyncBaseTransport | None = None):
         """
-        发送 Webhook 通知（按配置决定是否启用）。
+        初始化通知服务。
 
         Args:
-            alert: 告警对象
+            http_transport: 自定义 HTTP 传输层（测试时注入），默认使用 httpx 连接池
         """
-        if not settings.ALERT_WEBHOOK_ENABLED:
-            return
+        self._http_transport = http_transport
+
+    @staticmethod
+    def enabled_channels() -> list[NotificationChannel]:
+        """当前启用且配置完整的通知渠道。"""
+        channels: list[NotificationChannel] = []
+        if settings.ALERT_WEBHOOK_ENABLED and (settings.ALERT_WEBHOOK_URL or "").strip():
+            channels.append(NotificationChannel.WEBHOOK)
+        if settings.ALERT_EMAIL_ENABLED and (settings.ALERT_EMAIL_HOST or "").strip():
+            channels.append(NotificationChannel.EMAIL)
+        return channels
+
+    async def enqueue(self, db: AsyncSession, alert_ids: Sequence[UUID]) -> int:
+        """
+        为新告警批量写入发件箱记录（不提交，随调用方事务一起提交）。
+
+        Args:
+            db: 数据库会话
+            alert_ids: 新创建的告警 ID 列表（告警需已写入当前事务）
+
+        Returns:
+            int: 写入的记录数（未启用任何渠道时为 0）
+        """
+        channels = self.enabled_channels()
+        if not alert_ids or not channels:
+            return 0
+        now = datetime.now(UTC)
+        rows = [
+            {
+                "id": uuid6.uuid7(),
+                "alert_id": alert_id,
+                "channel": channel.value,
+                "status": NotificationStatus.PENDING.value,
+                "attempts": 0,
+                "next_attempt_at": _digest_window_end(now) if channel == NotificationChannel.EMAIL else now,
+            }
+            for alert_id in alert_ids
+            for channel in channels
+        ]
+        for start in range(0, len(rows), _INSERT_BATCH_SIZE):
+            await db.execute(insert(NotificationOutbox).values(rows[start : start + _INSERT_BATCH_SIZE]))
+        return len(rows)
+
+    async def dispatch_pending(self, db: AsyncSession) -> dict[str, int]:
+        """
+        投递到期的发件箱记录，直到没有到期记录。
+
+        每轮领取 ALERT_NOTIFY_DISPATCH_BATCH 条（PostgreSQL 下 FOR UPDATE SKIP LOCKED，
+        并发投递任务互不重复），发送后更新状态并提交。
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            dict: {"sent": 发送成功数, "retrying": 等待重试数, "failed": 最终失败数}
+        """
+        stats = {"sent": 0, "retrying": 0, "failed": 0}
+        limit = max(settings.ALERT_NOTIFY_DISPATCH_BATCH, 1)
+        client: httpx.AsyncClient | None = None
+        try:
+            while True:
+                rows = await self._claim_due(db, limit)
+                if not rows:
+                    break
+
+                webhook_rows = [row for row in rows if row.channel == NotificationChannel.WEBHOOK.value]
+                email_rows = [row for row in rows if row.channel == NotificationChannel.EMAIL.value]
+                known = {NotificationChannel.WEBHOOK.value, NotificationChannel.EMAIL.value}
+                if unknown_rows := [row for row in rows if row.channel not in known]:
+                    self._settle(unknown_rows, "未知通知渠道", stats)
 
+                if webhook_rows:
+                    if client is None:
+                        client = httpx.AsyncClient(
+                            timeout=settings.ALERT_WEBHOOK_TIMEOUT,
+                            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+                            transport=self._http_transport,
+                        )
+                    size = max(settings.ALERT_WEBHOOK_BATCH_SIZE, 1)
+                    for start in range(0, len(webhook_rows), size):
+                        chunk = webhook_rows[start : start + size]
+                        error = await self._post_webhook(client, [row.alert for row in chunk])
+                        self._settle(chunk, error, stats)
+
+                if email_rows:
+                    error = await self._send_email_digest([row.alert for row in email_rows])
+                    self._settle(email_rows, error, stats)
+
+                await db.commit()
+                if len(rows) < limit:
+                    break
+        finally:
+            if client is not None:
+                await client.aclose()
+        return stats
+
+    async def purge(self, db: AsyncSession) -> int:
+        """
+        清理超过保留期的已发送/失败记录。
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            int: 删除的记录数
+        """
+        before = datetime.now(UTC) - timedelta(days=settings.ALERT_NOTIFY_RETENTION_DAYS)
+        result = await db.execute(
+            delete(NotificationOutbox)
+            .where(NotificationOutbox.status != NotificationStatus.PENDING.value)
+            .where(NotificationOutbox.updated_at < before)
+        )
+        await db.commit()
+        return int(getattr(result, "rowcount", 0) or 0)
+
+    async def _claim_due(self, db: AsyncSession, limit: int) -> Sequence[NotificationOutbox]:
+        """领取到期的待发送记录（告警只加载自身列）。"""
+        query = (
+            select(NotificationOutbox)
+            .options(selectinload(NotificationOutbox.alert).options(lazyload("*")))
+            .where(NotificationOutbox.status == NotificationStatus.PENDING.value)
+            .where(NotificationOutbox.next_attempt_at <= datetime.now(UTC))
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    @staticmethod
+    def _settle(rows: Sequence[NotificationOutbox], error: str | None, stats: dict[str, int]) -> None:
+        """根据发送结果更新记录状态。"""
+        now = datetime.now(UTC)
+        for row in rows:
+            row.attempts += 1
+            if error is None:
+                row.status = NotificationStatus.SENT.value
+                row.sent_at = now
+                row.last_error = None
+                stats["sent"] += 1
+            elif row.attempts >= settings.ALERT_NOTIFY_MAX_ATTEMPTS:
+                row.status = NotificationStatus.FAILED.value
+                row.last_error = error[:2000]
+                stats["failed"] += 1
+            else:
+                row.next_attempt_at = now + _retry_delay(row.attempts)
+                row.last_error = error[:2000]
+                stats["retrying"] += 1
+
+    async def _post_webhook(self, client: httpx.AsyncClient, alerts: list[Alert]) -> str | None:
+        """
+        发送一批告警到 Webhook。
+
+        ALERT_WEBHOOK_BATCH_SIZE=1 时沿用单告警格式，否则请求体为 {"count": n, "alerts": [...]}。
+
+        Returns:
+            str | None: 失败原因，成功返回 None
+        """
+        if not settings.ALERT_WEBHOOK_ENABLED:
+            return "Webhook 未启用"
         url = (settings.ALERT_WEBHOOK_URL or "").strip()
         if not url:
-            logger.warning("Webhook 已启用但未配置 ALERT_WEBHOOK_URL，已跳过发送")
-            return
-
-        payload = {
-            "id": str(alert.id),
-            "type": alert.alert_type,
-            "severity": alert.severity,
-            "status": alert.status,
-            "title": alert.title,
-            "message": alert.message,
-            "details": alert.details,
-            "source": alert.source,
-            "related_device_id": str(alert.related_device_id) if alert.related_device_id else None,
-            "related_discovery_id": str(alert.related_discovery_id) if alert.related_discovery_id else None,
-            "created_at": alert.created_at.isoformat() if alert.created_at else None,
-        }
+            return "未配置 ALERT_WEBHOOK_URL"
+
+        if settings.ALERT_WEBHOOK_BATCH_SIZE <= 1 and len(alerts) == 1:
+            payload: dict[str, Any] = alert_payload(alerts[0])
+        else:
+            payload = {"count": len(alerts), "alerts": [alert_payload(alert) for alert in alerts]}
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.post(url, json=payload)
-                if resp.status_code >= 400:
-                    logger.warning(
-                        "Webhook 发送失败",
-                        status_code=resp.status_code,
-                        response_text=resp.text[:500],
-                    )
+            resp = await client.post(url, json=payload)
         except Exception as e:
-            logger.warning("Webhook 发送异常", error=str(e))
+            logger.warning("Webhook 发送异常", error=str(e), alerts=len(alerts))
+            return f"{type(e).__name__}: {e}"
+        if resp.status_code >= 400:
+            logger.warning(
+                "Webhook 发送失败",
+                status_code=resp.status_code,
+                response_text=resp.text[:500],
+                alerts=len(alerts),
+            )
+            return f"HTTP {resp.status_code}: {resp.text[:500]}"
+        return None
 
-    async def send_email(self, alert: Alert) -> None:
+    async def _send_email_digest(self, alerts: list[Alert]) -> str | None:
         """
-        发送邮件通知（默认禁用）。
-
-        注意：只有当 ALERT_EMAIL_ENABLED=true 时才会实际发送。
+        将一批告警合并为一封摘要邮件发送。
 
-        Args:
-            alert: 告警对象
+        Returns:
+            str | None: 失败原因，成功返回 None
         """
         if not settings.ALERT_EMAIL_ENABLED:
-            return
-
+            return "邮件通知未启用"
         host = (settings.ALERT_EMAIL_HOST or "").strip()
         if not host:
-            logger.warning("邮件通知已启用但未配置 ALERT_EMAIL_HOST，已跳过发送")
-            return
+            return "未配置 ALERT_EMAIL_HOST"
 
-        # 使用标准库 SMTP 发送（同步），放到线程里避免阻塞事件循环
         msg = EmailMessage()
-        msg["Subject"] = f"[NCM告警] {alert.title}"
+        msg["Subject"] = f"[NCM告警] {alerts[0].title}" if len(alerts) == 1 else f"[NCM告警] {len(alerts)} 条新告警"
         msg["From"] = settings.ALERT_EMAIL_FROM or settings.ALERT_EMAIL_USER
         msg["To"] = settings.ALERT_EMAIL_TO
-        msg.set_content(
-            json.dumps(
+        summary = "\n".join(f"[{alert.severity}] {alert.title}" for alert in alerts)
+        detail = json.dumps(
+            [
                 {
                     "id": str(alert.id),
                     "type": alert.alert_type,
@@ -99,15 +302,15 @@ class NotificationService:
                     "title": alert.title,
                     "message": alert.message,
                     "details": alert.details,
-                },
-                ensure_ascii=False,
-                indent=2,
-            )
+                }
+                for alert in alerts
+            ],
+            ensure_ascii=False,
+            indent=2,
         )
+        msg.set_content(f"{summary}\n\n{detail}")
 
-        import asyncio
-        import smtplib
-
+        # 使用标准库 SMTP 发送（同步），放到线程里避免阻塞事件循环
         def _send_sync() -> None:
             with smtplib.SMTP(host=host, port=settings.ALERT_EMAIL_PORT, timeout=10) as server:
                 if settings.ALERT_EMAIL_USER:
@@ -117,5 +320,6 @@ class NotificationService:
         try:
             await asyncio.to_thread(_send_sync)
         except Exception as e:
-            logger.warning("邮件发送异常", error=str(e))
-
+            logger.warning("邮件发送异常", error=str(e), alerts=len(alerts))
+            return f"{type(e).__name__}: {e}"
+        return None
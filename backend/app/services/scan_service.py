@@ -5,13 +5,15 @@
 @DateTime: 2026-01-09 23:30:00
 @Docs: 网络扫描服务 (Scan Service).
 
-提供 Nmap/Masscan 扫描功能，以及扫描结果与 CMDB 比对。
+提供 Nmap/Masscan/原生异步扫描功能，以及扫描结果与 CMDB 比对。
 
 注意：此文件已重构为组合服务，实际逻辑拆分到：
 - nmap_scan_service.py: Nmap/Masscan 扫描功能
+- sweep_scan_service.py: 原生异步 TCP 扫描功能
 - snmp_discovery_service.py: SNMP 发现和 CMDB 比对功能
 """
 
+from collections.abc import AsyncIterator
 from typing import Any
 from uuid import UUID
 
@@ -24,21 +26,24 @@ from app.models.discovery import Discovery
 from app.schemas.discovery import (
     CMDBCompareResult,
     OfflineDevice,
+    ScanHost,
     ScanResult,
 )
 from app.services.nmap_scan_service import NmapScanService
 from app.services.snmp_discovery_service import SnmpDiscoveryService
+from app.services.sweep_scan_service import SweepScanService
 
 
 class ScanService:
     """
     网络扫描服务类（组合服务）。
 
-    此类组合了 NmapScanService 和 SnmpDiscoveryService，
+    此类组合了 NmapScanService、SweepScanService 和 SnmpDiscoveryService，
     保持向后兼容性。
 
     推荐直接使用拆分后的服务类：
     - NmapScanService: 网络扫描功能
+    - SweepScanService: 原生异步扫描功能
     - SnmpDiscoveryService: SNMP 发现和 CMDB 比对
     """
 
@@ -58,6 +63,7 @@ class ScanService:
         self.device_crud = device_crud
         # 组合子服务
         self._nmap_service = NmapScanService()
+        self._sweep_service = SweepScanService()
         self._snmp_discovery_service = SnmpDiscoveryService(discovery_crud, device_crud)
 
     # ========== 扫描工具检测（委托给 NmapScanService）==========
@@ -92,6 +98,14 @@ class ScanService:
     ) -> ScanResult:
         return await self._nmap_service.masscan_scan(subnet, ports, rate)
 
+    # ========== 原生异步扫描（委托给 SweepScanService）==========
+
+    async def sweep_scan(self, subnet: str, ports: str | None = None) -> ScanResult:
+        return await self._sweep_service.sweep_scan(subnet, ports)
+
+    def iter_sweep(self, subnet: str, ports: str | None = None) -> AsyncIterator[ScanHost]:
+        return self._sweep_service.iter_sweep(subnet, ports)
+
     # ========== 扫描结果处理（委托给 SnmpDiscoveryService）==========
 
     async def process_scan_result(
@@ -105,6 +119,25 @@ class ScanService:
             db, scan_result, scan_task_id, snmp_cred_id
         )
 
+    async def process_scan_stream(
+        self,
+        db: AsyncSession,
+        hosts: AsyncIterator[ScanHost],
+        *,
+        subnet: str,
+        scan_type: str,
+        scan_task_id: str | None = None,
+        snmp_cred_id: UUID | None = None,
+    ) -> tuple[ScanResult, int]:
+        return await self._snmp_discovery_service.process_scan_stream(
+            db,
+            hosts,
+            subnet=subnet,
+            scan_type=scan_type,
+            scan_task_id=scan_task_id,
+            snmp_cred_id=snmp_cred_id,
+        )
+
     # ========== CMDB 比对（委托给 SnmpDiscoveryService）==========
 
     async def compare_with_cmdb(self, db: AsyncSession) -> CMDBCompareResult:
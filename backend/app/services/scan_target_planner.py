@@ -0,0 +1,154 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: scan_target_planner.py
+@DateTime: 2026-02-08 16:00:00
+@Docs: 扫描目标规划 (Scan Target Planner).
+
+把大量 /32 与零散网段打包为少量多目标扫描调用，扫描后再按原始目标拆分结果。
+"""
+
+import ipaddress
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from app.schemas.discovery import ScanHost
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@dataclass
+class ScanBatch:
+    """
+    一次扫描调用的目标集合。
+
+    Attributes:
+        networks: 去重后的网段列表（被其它目标包含的网段已剔除）
+        targets: 该批次覆盖的原始目标
+    """
+
+    networks: list[IPNetwork] = field(default_factory=list)
+    targets: list[str] = field(default_factory=list)
+
+    @property
+    def expression(self) -> str:
+        """扫描器目标表达式（空格分隔，nmap 与 sweep 均支持）。"""
+        return " ".join(str(n) for n in self.networks)
+
+    @property
+    def num_addresses(self) -> int:
+        """批次覆盖的地址总数。"""
+        return sum(n.num_addresses for n in self.networks)
+
+    def split(self) -> list["ScanBatch"]:
+        """按网段拆分为单网段批次（批次扫描超时后逐网段重试）。"""
+        batches = [ScanBatch(networks=[n]) for n in self.networks]
+        for target in self.targets:
+            network = _parse_target(target)
+            for batch in batches:
+                if network is not None and network.subnet_of(batch.networks[0]):  # type: ignore[arg-type]
+                    batch.targets.append(target)
+                    break
+        return batches
+
+
+def _parse_target(target: str) -> IPNetwork | None:
+    try:
+        return ipaddress.ip_network(target.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def plan_scan_batches(
+    targets: Iterable[str], *, max_targets: int, max_addresses: int | None = None
+) -> tuple[list[ScanBatch], list[str]]:
+    """
+    规划扫描批次。
+
+    1. 按地址族剔除被其它目标完整包含的网段（如 10.0.0.0/24 已覆盖 10.0.0.7/32）
+    2. 将剩余网段按地址顺序打包为多目标扫描调用，每次不超过 max_targets 个网段、
+       max_addresses 个地址（超过地址上限的单个网段独占一次调用）
+
+    相邻目标不会折叠为更大网段：sweep 对网段按 hosts() 展开会跳过网络/广播地址，
+    折叠后的块（如 4 个 /32 -> /30）会丢失边界上的显式主机。
+    3. 记录每个批次覆盖的原始目标，供结果拆分与错误归属
+
+    Args:
+        targets: 原始扫描目标（CIDR 或单个 IP）
+        max_targets: 单次扫描调用的最大网段数
+        max_addresses: 单次扫描调用的最大地址数（None 表示不限制）
+
+    Returns:
+        tuple[list[ScanBatch], list[str]]: (扫描批次, 无法解析的目标)
+    """
+    size = max(1, max_targets)
+    parsed: dict[str, IPNetwork] = {}
+    invalid: list[str] = []
+    for target in dict.fromkeys(targets):
+        network = _parse_target(target)
+        if network is None:
+            invalid.append(target)
+        else:
+            parsed[target] = network
+
+    batches: list[ScanBatch] = []
+    for version in (4, 6):
+        family = [n for n in parsed.values() if n.version == version]
+        if not family:
+            continue
+        # 同起始地址时前缀短的在前，包含关系的网段必然排在被包含网段之前
+        family.sort(key=lambda n: (n.network_address, n.prefixlen))
+        kept: list[IPNetwork] = []
+        for network in family:
+            if kept and network.subnet_of(kept[-1]):  # type: ignore[arg-type]
+                continue
+            kept.append(network)
+        batch, addresses = ScanBatch(), 0
+        for network in kept:
+            full = len(batch.networks) >= size or (
+                max_addresses is not None and addresses + network.num_addresses > max_addresses
+            )
+            if batch.networks and full:
+                batches.append(batch)
+                batch, addresses = ScanBatch(), 0
+            batch.networks.append(network)
+            addresses += network.num_addresses
+        batches.append(batch)
+
+    # 原始目标归属到包含它的批次（原始目标必然被某个保留网段完整包含，逐级查找超网即可）
+    owner: dict[IPNetwork, ScanBatch] = {n: batch for batch in batches for n in batch.networks}
+    for target, network in parsed.items():
+        for prefix in range(network.prefixlen, -1, -1):
+            batch = owner.get(network.supernet(new_prefix=prefix))
+            if batch is not None:
+                batch.targets.append(target)
+                break
+
+    return batches, invalid
+
+
+def split_hosts_by_target(hosts: Iterable[ScanHost], targets: Iterable[str]) -> dict[str, list[ScanHost]]:
+    """
+    将合并扫描得到的主机按原始目标拆分。
+
+    Args:
+        hosts: 扫描发现的主机
+        targets: 原始扫描目标
+
+    Returns:
+        dict[str, list[ScanHost]]: 原始目标 -> 该目标内的主机（每个主机只归属第一个匹配的目标）
+    """
+    networks = [(t, n) for t in targets if (n := _parse_target(t)) is not None]
+    # 前缀越长越精确，优先匹配
+    networks.sort(key=lambda item: item[1].prefixlen, reverse=True)
+    result: dict[str, list[ScanHost]] = {t: [] for t, _ in networks}
+    for host in hosts:
+        try:
+            ip = ipaddress.ip_address(host.ip_address)
+        except ValueError:
+            continue
+        for target, network in networks:
+            if ip in network:
+                result[target].append(host)
+                break
+    return result
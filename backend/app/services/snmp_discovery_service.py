@@ -9,6 +9,7 @@
 """
 
 import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 from uuid import UUID
@@ -30,6 +31,7 @@ from app.schemas.discovery import (
     CMDBCompareResult,
     DiscoveryCreate,
     OfflineDevice,
+    ScanHost,
     ScanResult,
 )
 from app.services.nmap_scan_service import NmapScanService
@@ -105,6 +107,63 @@ class SnmpDiscoveryService:
             logger.error("批量处理扫描结果失败", error=str(e))
             raise
 
+    async def process_scan_stream(
+        self,
+        db: AsyncSession,
+        hosts: AsyncIterator[ScanHost],
+        *,
+        subnet: str,
+        scan_type: str,
+        scan_task_id: str | None = None,
+        snmp_cred_id: UUID | None = None,
+        batch_size: int | None = None,
+    ) -> tuple[ScanResult, int]:
+        """
+        流式处理扫描结果：主机按批次补全并入库，无需等待整个网段扫描完成。
+
+        每个批次单独提交事务，中途失败时已入库的批次保留。
+
+        Args:
+            db: 数据库会话
+            hosts: 扫描主机异步迭代器
+            subnet: 扫描网段
+            scan_type: 扫描类型
+            scan_task_id: 扫描任务ID
+            snmp_cred_id: SNMP 凭据ID（用于 SNMP 补全）
+            batch_size: 每批入库主机数（默认 SCAN_SWEEP_BATCH_SIZE）
+
+        Returns:
+            tuple[ScanResult, int]: (汇总扫描结果, 处理的主机数量)
+        """
+        size = max(1, batch_size or settings.SCAN_SWEEP_BATCH_SIZE)
+        started_at = datetime.now()
+        summary = ScanResult(subnet=subnet, scan_type=scan_type, task_id=scan_task_id, started_at=started_at)
+        processed = 0
+        batch: list[ScanHost] = []
+
+        async def _flush() -> None:
+            nonlocal processed
+            chunk = ScanResult(subnet=subnet, scan_type=scan_type, task_id=scan_task_id, hosts=batch.copy())
+            batch.clear()
+            processed += await self.process_scan_result(db, chunk, scan_task_id, snmp_cred_id)
+
+        try:
+            async for host in hosts:
+                summary.hosts.append(host)
+                batch.append(host)
+                if len(batch) >= size:
+                    await _flush()
+            if batch:
+                await _flush()
+        except Exception as e:
+            logger.error(f"流式处理扫描结果失败: {subnet}", error=str(e))
+            summary.error = str(e)
+
+        summary.hosts_found = len(summary.hosts)
+        summary.completed_at = datetime.now()
+        summary.duration_seconds = int((summary.completed_at - started_at).total_seconds())
+        return summary, processed
+
     async def _enrich_with_snmp(
         self,
         db: AsyncSession,
@@ -137,7 +196,6 @@ class SnmpDiscoveryService:
                 return snmp_results
 
             community = decrypt_snmp_secret(snmp_cred.community_encrypted)
-            snmp_service = SnmpService()
             cred = SnmpV2cCredential(community=community, port=snmp_cred.port)
             sem = asyncio.Semaphore(settings.SNMP_MAX_CONCURRENCY)
 
@@ -157,8 +215,10 @@ class SnmpDiscoveryService:
                         "snmp_error": r.error,
                     }
 
-            tasks = [_enrich(h.ip_address) for h in scan_result.hosts]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 整个扫描共享一个 SNMP 引擎（同一 UDP 套接字），避免每台主机重复建立/销毁
+            async with SnmpService() as snmp_service:
+                tasks = [_enrich(h.ip_address) for h in scan_result.hosts]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
 
             for item in results:
                 if isinstance(item, BaseException):
@@ -243,47 +303,25 @@ class SnmpDiscoveryService:
         Returns:
             CMDBCompareResult: 比对结果
         """
-        result = CMDBCompareResult(compared_at=datetime.now())
-
-        # 获取所有发现记录
-        discoveries, total_discovered = await self.discovery_crud.get_paginated(
-            db, page=1, page_size=10000, max_size=10000
+        compared_at = datetime.now()
+        # IP 关联与状态迁移全部在数据库内完成
+        reconciled = await self.discovery_crud.reconcile_with_cmdb(db)
+        logger.info(
+            "CMDB 比对完成",
+            total_discovered=reconciled.total_discovered,
+            newly_matched=len(reconciled.matched_ids),
+            newly_shadow=len(reconciled.shadow_ids),
+        )
+        return CMDBCompareResult(
+            total_discovered=reconciled.total_discovered,
+            total_cmdb=reconciled.total_cmdb,
+            matched=reconciled.matched,
+            shadow_assets=reconciled.shadow,
+            offline_devices=reconciled.offline,
+            newly_matched=len(reconciled.matched_ids),
+            newly_shadow=len(reconciled.shadow_ids),
+            compared_at=compared_at,
         )
-        result.total_discovered = total_discovered
-
-        # 获取所有设备
-        devices, total_cmdb = await self.device_crud.get_paginated(db, page=1, page_size=10000, max_size=10000)
-        result.total_cmdb = total_cmdb
-
-        # 构建设备 IP 索引
-        device_ip_map: dict[str, Device] = {d.ip_address: d for d in devices}
-
-        # 比对发现记录
-        matched_count = 0
-        shadow_count = 0
-
-        for discovery in discoveries:
-            if discovery.ip_address in device_ip_map:
-                # 匹配成功
-                device = device_ip_map[discovery.ip_address]
-                if discovery.status != DiscoveryStatus.MATCHED.value:
-                    await self.discovery_crud.set_matched_device(db, id=discovery.id, device_id=device.id)
-                matched_count += 1
-            else:
-                # 影子资产
-                if discovery.status != DiscoveryStatus.SHADOW.value:
-                    await self.discovery_crud.update_status(db, id=discovery.id, status=DiscoveryStatus.SHADOW)
-                shadow_count += 1
-
-        result.matched = matched_count
-        result.shadow_assets = shadow_count
-
-        # 检测离线设备 (CMDB 中有但扫描未发现)
-        discovered_ips = {d.ip_address for d in discoveries}
-        offline_count = sum(1 for device in devices if device.ip_address not in discovered_ips)
-        result.offline_devices = offline_count
-
-        return result
 
     # ========== 离线设备检测 ==========
 
@@ -298,40 +336,10 @@ class SnmpDiscoveryService:
         Returns:
             OfflineDevice 列表
         """
-        offline_devices: list[OfflineDevice] = []
-
-        # 获取所有活跃设备
-        devices, _ = await self.device_crud.get_paginated(
-            db, page=1, page_size=10000, max_size=10000, status=DeviceStatus.ACTIVE.value
+        rows = await self.discovery_crud.get_offline_devices(
+            db, device_status=DeviceStatus.ACTIVE.value, days_threshold=days_threshold
         )
-
-        for device in devices:
-            discovery = await self.discovery_crud.get_by_ip(db, ip_address=device.ip_address)
-
-            if discovery:
-                if discovery.offline_days >= days_threshold:
-                    offline_devices.append(
-                        OfflineDevice(
-                            device_id=device.id,
-                            device_name=device.name,
-                            ip_address=device.ip_address,
-                            offline_days=discovery.offline_days,
-                            last_seen_at=discovery.last_seen_at,
-                        )
-                    )
-            else:
-                # 从未扫描到过
-                offline_devices.append(
-                    OfflineDevice(
-                        device_id=device.id,
-                        device_name=device.name,
-                        ip_address=device.ip_address,
-                        offline_days=-1,  # -1 表示从未发现
-                        last_seen_at=None,
-                    )
-                )
-
-        return offline_devices
+        return [OfflineDevice(**row) for row in rows]
 
     # ========== 影子资产 ==========
 
@@ -6,7 +6,8 @@
 @Docs: SNMP v2c 客户端封装。
 """
 
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 
 from pysnmp.hlapi.v3arch.asyncio import (
@@ -16,6 +17,7 @@ from pysnmp.hlapi.v3arch.asyncio import (
     ObjectType,
     SnmpEngine,
     UdpTransportTarget,
+    bulk_walk_cmd,
     get_cmd,
     walk_cmd,
 )
@@ -81,7 +83,14 @@ class SnmpService:
     """
     SNMP v2c 客户端封装类。
 
-    提供 SNMP GET 和 WALK 操作，以及基础信息补全功能。
+    提供 SNMP GET、WALK 和 GETBULK WALK 操作，以及基础信息补全功能。
+
+    作为异步上下文管理器使用时，整个扫描共享同一个 SnmpEngine（同一个 UDP 套接字与
+    调度器），并缓存各主机的传输目标；否则每次调用临时创建并关闭引擎。
+
+    Example:
+        async with SnmpService() as snmp:
+            await asyncio.gather(*(snmp.enrich_basic(ip, cred) for ip in ips))
     """
 
     def __init__(
@@ -89,6 +98,7 @@ class SnmpService:
         *,
         timeout_seconds: int | None = None,
         retries: int | None = None,
+        max_repetitions: int | None = None,
     ):
         """
         初始化 SNMP 服务。
@@ -96,9 +106,67 @@ class SnmpService:
         Args:
             timeout_seconds: 超时时间（秒，可选）
             retries: 重试次数（可选）
+            max_repetitions: GETBULK 每个 PDU 返回的最大行数（可选）
         """
         self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.SNMP_TIMEOUT_SECONDS
         self.retries = retries if retries is not None else settings.SNMP_RETRIES
+        self.max_repetitions = max(
+            1, max_repetitions if max_repetitions is not None else settings.SNMP_BULK_MAX_REPETITIONS
+        )
+        self._engine: SnmpEngine | None = None
+        self._targets: dict[tuple[str, int], UdpTransportTarget] = {}
+
+    async def __aenter__(self) -> "SnmpService":
+        if self._engine is None:
+            self._engine = SnmpEngine()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """关闭共享的 SNMP 引擎并清空传输目标缓存。"""
+        engine, self._engine = self._engine, None
+        self._targets.clear()
+        if engine is not None:
+            self._close_engine(engine)
+
+    @asynccontextmanager
+    async def _engine_scope(self) -> AsyncIterator[SnmpEngine]:
+        """
+        获取本次操作使用的 SNMP 引擎。
+
+        Yields:
+            SnmpEngine: 共享引擎；未进入上下文时为临时引擎（用完即关闭）
+        """
+        if self._engine is not None:
+            yield self._engine
+            return
+        engine = SnmpEngine()
+        try:
+            yield engine
+        finally:
+            self._close_engine(engine)
+
+    async def _get_target(self, host: str, cred: SnmpV2cCredential) -> UdpTransportTarget:
+        """
+        获取 SNMP 传输目标（共享引擎模式下按主机缓存，避免重复解析地址）。
+
+        Args:
+            host: 主机地址
+            cred: SNMP v2c 凭据
+
+        Returns:
+            UdpTransportTarget: UDP 传输目标
+        """
+        if self._engine is None:
+            return await self._create_target(host, cred)
+        key = (host, cred.port)
+        target = self._targets.get(key)
+        if target is None:
+            target = await self._create_target(host, cred)
+            self._targets[key] = target
+        return target
 
     async def _create_target(self, host: str, cred: SnmpV2cCredential) -> UdpTransportTarget:
         """
@@ -144,10 +212,9 @@ class SnmpService:
         Raises:
             RuntimeError: SNMP 操作失败
         """
-        engine = SnmpEngine()
-        try:
+        async with self._engine_scope() as engine:
             oid_list = list(oids)
-            target = await self._create_target(host, cred)
+            target = await self._get_target(host, cred)
             community = CommunityData(cred.community, mpModel=1)
             obj_types = [ObjectType(ObjectIdentity(oid)) for oid in oid_list]
             iterator = get_cmd(
@@ -171,8 +238,6 @@ class SnmpService:
                 value = var_bind[1]
                 result[str(oid_obj)] = value
             return result
-        finally:
-            self._close_engine(engine)
 
     async def walk(
         self, host: str, cred: SnmpV2cCredential, root_oid: str, *, max_rows: int = 2000
@@ -192,9 +257,8 @@ class SnmpService:
         Raises:
             RuntimeError: SNMP 操作失败
         """
-        engine = SnmpEngine()
-        try:
-            target = await self._create_target(host, cred)
+        async with self._engine_scope() as engine:
+            target = await self._get_target(host, cred)
             community = CommunityData(cred.community, mpModel=1)
             rows: list[tuple[str, object]] = []
             async for error_indication, error_status, _, var_binds in walk_cmd(
@@ -216,8 +280,58 @@ class SnmpService:
                     if len(rows) >= max_rows:
                         return rows
             return rows
-        finally:
-            self._close_engine(engine)
+
+    async def bulk_walk(
+        self,
+        host: str,
+        cred: SnmpV2cCredential,
+        root_oid: str,
+        *,
+        max_rows: int = 2000,
+        max_repetitions: int | None = None,
+    ) -> list[tuple[str, object]]:
+        """
+        使用 GETBULK 执行 SNMP WALK 操作（每个 PDU 返回多行，减少往返次数）。
+
+        Args:
+            host: 主机地址
+            cred: SNMP v2c 凭据
+            root_oid: 根 OID
+            max_rows: 最大返回行数（默认 2000）
+            max_repetitions: 每个 PDU 的最大行数（默认使用实例配置，不超过 max_rows）
+
+        Returns:
+            list[tuple[str, object]]: (OID, 值) 元组列表
+
+        Raises:
+            RuntimeError: SNMP 操作失败
+        """
+        repetitions = max(1, min(max_repetitions or self.max_repetitions, max_rows))
+        async with self._engine_scope() as engine:
+            target = await self._get_target(host, cred)
+            community = CommunityData(cred.community, mpModel=1)
+            rows: list[tuple[str, object]] = []
+            async for error_indication, error_status, _, var_binds in bulk_walk_cmd(
+                engine,
+                community,
+                target,
+                ContextData(),
+                0,
+                repetitions,
+                ObjectType(ObjectIdentity(root_oid)),
+                lexicographicMode=False,
+            ):
+                if error_indication:
+                    raise RuntimeError(str(error_indication))
+                if error_status:
+                    raise RuntimeError(str(error_status))
+                for var_bind in var_binds:
+                    oid_obj = var_bind[0]
+                    value = var_bind[1]
+                    rows.append((str(oid_obj), value))
+                    if len(rows) >= max_rows:
+                        return rows
+            return rows
 
     async def enrich_basic(self, host: str, cred: SnmpV2cCredential) -> SnmpEnrichResult:
         """
@@ -284,7 +398,7 @@ class SnmpService:
 
             if not interface_mac:
                 try:
-                    mac_rows = await self.walk(host, cred, IF_PHYS_ADDRESS_OID, max_rows=2000)
+                    mac_rows = await self.bulk_walk(host, cred, IF_PHYS_ADDRESS_OID, max_rows=2000)
                     mac_candidates: list[str] = []
                     for _, v in mac_rows:
                         m = _format_mac(v)
@@ -297,7 +411,7 @@ class SnmpService:
 
             serial = None
             try:
-                serial_rows = await self.walk(host, cred, ENT_PHYSICAL_SERIAL_OID, max_rows=5000)
+                serial_rows = await self.bulk_walk(host, cred, ENT_PHYSICAL_SERIAL_OID, max_rows=5000)
                 serial_candidates: list[str] = []
                 for _, v in serial_rows:
                     s = _to_text(v)
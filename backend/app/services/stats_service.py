@@ -0,0 +1,211 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: stats_service.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总服务 (Daily Stats Rollup Service).
+
+- 增量：登录日志、操作日志、新告警在写入事务内累加当天汇总（all 维度 + 自身维度）。
+- 重算：定时任务按 created_at 范围（走索引）重算近几天的全部指标并覆盖汇总行，
+  修正增量遗漏（如部署前的历史数据、写入失败），备份数量只由重算维护。
+- 读取：仪表盘/趋势接口只读汇总行，代价与日志保留年限无关。
+
+已有库通过 migrate_stats_rollup.py 创建汇总表、补齐 created_at 索引并回填历史汇总。
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.decorator import transactional
+from app.core.enums import StatMetric
+from app.crud.crud_stat import CRUDStatDaily
+from app.models.alert import Alert
+from app.models.backup import Backup
+from app.models.log import LoginLog, OperationLog
+
+# 全量维度
+ALL_DIMENSION = "all"
+
+
+def user_dimension(user_id: UUID | str) -> str:
+    """用户维度。"""
+    return f"user:{user_id}"
+
+
+def alert_dimensions(alert_type: str, severity: str) -> list[str]:
+    """告警维度（类型、级别）。"""
+    return [f"type:{alert_type}", f"severity:{severity}"]
+
+
+def _utc_today() -> date:
+    return datetime.now(UTC).date()
+
+
+def _utc_day(db: AsyncSession, column: Any) -> ColumnElement[Any]:
+    """
+    按 UTC 取日期，与 record() 的 UTC 分桶一致。
+
+    PostgreSQL 的 date(timestamptz) 按会话时区取日期，需先换算为 UTC；
+    SQLite 没有 timezone()，带时区时间按 UTC 文本存储，直接取日期即可。
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def _as_date(value: Any) -> date:
+    """func.date() 在 PostgreSQL 返回 date，在 SQLite 返回字符串。"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+class StatsService:
+    """
+    每日统计汇总服务类。
+
+    提供汇总增量累加、按源表重算与汇总读取能力。
+    """
+
+    def __init__(self, db: AsyncSession, stat_crud: CRUDStatDaily):
+        """
+        初始化统计汇总服务。
+
+        Args:
+            db: 异步数据库会话
+            stat_crud: 统计汇总 CRUD 实例
+        """
+        self.db = db
+        self.stat_crud = stat_crud
+
+    async def record(self, metric: StatMetric, events: Iterable[Iterable[str]]) -> None:
+        """
+        累加当天汇总（不提交，随调用方事务一起提交）。
+
+        每个事件计入 all 维度及其自身维度，同一批事件合并为一条 UPSERT。
+
+        Args:
+            metric: 指标
+            events: 事件列表，每个事件为其维度列表（可为空）
+        """
+        today = _utc_today()
+        counts: dict[tuple[str, str, date], int] = defaultdict(int)
+        for dimensions in events:
+            counts[(metric.value, ALL_DIMENSION, today)] += 1
+            for dimension in dimensions:
+                counts[(metric.value, dimension, today)] += 1
+        await self.stat_crud.increment(self.db, counts=counts)
+
+    @transactional()
+    async def compact(self, days: int) -> dict[str, int]:
+        """
+        按源表重算最近 days 天（含今天）的全部指标并覆盖汇总行。
+
+        Args:
+            days: 重算天数
+
+        Returns:
+            dict: 各指标重算后的汇总行数
+        """
+        end_day = _utc_today()
+        start_day = end_day - timedelta(days=max(days, 1) - 1)
+        since = datetime(start_day.year, start_day.month, start_day.day, tzinfo=UTC)
+        counts: dict[tuple[str, str, date], int] = defaultdict(int)
+
+        def _add(metric: StatMetric, day: Any, dimensions: Iterable[str], value: int) -> None:
+            day = _as_date(day)
+            counts[(metric.value, ALL_DIMENSION, day)] += value
+            for dimension in dimensions:
+                counts[(metric.value, dimension, day)] += value
+
+        for metric, log_model in ((StatMetric.LOGIN, LoginLog), (StatMetric.OPERATION, OperationLog)):
+            day_col = _utc_day(self.db, log_model.created_at)
+            result = await self.db.execute(
+                select(day_col.label("d"), log_model.user_id, func.count().label("c"))
+                .where(log_model.created_at >= since)
+                .group_by(day_col, log_model.user_id)
+            )
+            for row in result.all():
+                _add(metric, row.d, [user_dimension(row.user_id)] if row.user_id else [], row.c)
+
+        day_col = _utc_day(self.db, Alert.created_at)
+        result = await self.db.execute(
+            select(day_col.label("d"), Alert.alert_type, Alert.severity, func.count().label("c"))
+            .where(Alert.is_deleted.is_(False))
+            .where(Alert.created_at >= since)
+            .group_by(day_col, Alert.alert_type, Alert.severity)
+        )
+        for row in result.all():
+            _add(StatMetric.ALERT, row.d, alert_dimensions(row.alert_type, row.severity), row.c)
+
+        day_col = _utc_day(self.db, Backup.created_at)
+        result = await self.db.execute(
+            select(day_col.label("d"), Backup.status, func.count().label("c"))
+            .where(Backup.created_at >= since)
+            .group_by(day_col, Backup.status)
+        )
+        for row in result.all():
+            _add(StatMetric.BACKUP, row.d, [f"status:{row.status}"], row.c)
+
+        await self.stat_crud.replace(
+            self.db,
+            metrics=[metric.value for metric in StatMetric],
+            start_day=start_day,
+            end_day=end_day,
+            counts=counts,
+        )
+        rows: dict[str, int] = defaultdict(int)
+        for metric, _, _ in counts:
+            rows[metric] += 1
+        return dict(rows)
+
+    async def get_values(
+        self, metrics: Iterable[StatMetric], dimensions: Iterable[str], days: int
+    ) -> dict[tuple[str, str], dict[date, int]]:
+        """
+        读取最近 days 天（含今天）的汇总值。
+
+        Args:
+            metrics: 指标列表
+            dimensions: 维度列表
+            days: 天数
+
+        Returns:
+            dict: (指标, 维度) -> {日期: 计数}
+        """
+        end_day = _utc_today()
+        rows = await self.stat_crud.get_values(
+            self.db,
+            metrics=[metric.value for metric in metrics],
+            dimensions=dimensions,
+            start_day=end_day - timedelta(days=max(days, 1) - 1),
+            end_day=end_day,
+        )
+        values: dict[tuple[str, str], dict[date, int]] = defaultdict(dict)
+        for row in rows:
+            values[(row.metric, row.dimension)][row.day] = row.value
+        return values
+
+    async def get_trend(self, metric: StatMetric, days: int, *, dimension: str = ALL_DIMENSION) -> list[dict[str, Any]]:
+        """
+        获取最近 days 天（含今天）的每日趋势（只包含有数据的日期）。
+
+        Args:
+            metric: 指标
+            days: 天数
+            dimension: 维度（默认 all）
+
+        Returns:
+            list[dict[str, Any]]: [{"date": "2026-01-20", "count": 5}, ...]
+        """
+        values = await self.get_values([metric], [dimension], days)
+        return trend_items(values.get((metric.value, dimension), {}))
+
+
+def trend_items(series: dict[date, int]) -> list[dict[str, Any]]:
+    """将 {日期: 计数} 转换为按日期排序的趋势列表（只包含有数据的日期）。"""
+    return [{"date": str(day), "count": count} for day, count in sorted(series.items()) if count]
@@ -0,0 +1,287 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: sweep_scan_service.py
+@DateTime: 2026-02-08 14:00:00
+@Docs: 原生异步扫描服务 (Async Sweep Scan Service).
+
+进程内 asyncio TCP connect 探测，不依赖 nmap/masscan 可执行文件。
+主机按探测完成顺序流式产出，调用方可以边扫描边入库。
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.schemas.discovery import ScanHost, ScanResult
+
+# 常用端口服务名（getservbyport 查不到时的兜底）
+_PORT_SERVICES: dict[int, str] = {22: "ssh", 23: "telnet", 80: "http", 443: "https", 161: "snmp", 830: "netconf"}
+
+
+def parse_ports(ports: str) -> list[int]:
+    """
+    解析端口表达式（支持逗号分隔与区间，如 "22,80,8000-8010"）。
+
+    Args:
+        ports: 端口表达式
+
+    Returns:
+        list[int]: 去重并保持顺序的端口列表
+
+    Raises:
+        ValueError: 端口格式非法
+    """
+    result: list[int] = []
+    for part in (ports or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start_s, end_s = part.split("-", 1)
+            start, end = int(start_s), int(end_s)
+            if start > end:
+                start, end = end, start
+            result.extend(range(start, end + 1))
+        else:
+            result.append(int(part))
+    ports_list = list(dict.fromkeys(result))
+    if not ports_list or any(p < 1 or p > 65535 for p in ports_list):
+        raise ValueError(f"端口格式非法: {ports}")
+    return ports_list
+
+
+def iter_targets(subnet: str) -> Iterator[str]:
+    """
+    惰性展开扫描目标中的主机地址（/16 也不会一次性生成列表）。
+
+    Args:
+        subnet: 网段 (CIDR 格式) 或单个 IP，多个目标以空格/逗号分隔
+
+    Returns:
+        Iterator[str]: 主机 IP 迭代器
+    """
+    for target in subnet.replace(",", " ").split():
+        network = ipaddress.ip_network(target, strict=False)
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+            continue
+        for ip in network.hosts():
+            yield str(ip)
+
+
+def _service_name(port: int) -> str:
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return _PORT_SERVICES.get(port, "unknown")
+
+
+class _RateLimiter:
+    """按固定间隔发放探测令牌（rate 次/秒，<=0 表示不限速）。"""
+
+    def __init__(self, rate: int):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class SweepScanService:
+    """
+    原生异步扫描服务类。
+
+    对每个主机的目标端口做 TCP connect 探测：
+    - 端口可连接：记为开放端口，SSH 端口可选抓取 Banner
+    - 连接被拒绝（RST）：主机存活但端口关闭
+    - 超时/不可达：视为无响应
+
+    说明：ICMP 需要原始套接字权限（root/CAP_NET_RAW），此处只做 TCP 探测，
+    与 nmap 非特权模式下的 TCP ping 行为一致。
+    """
+
+    # 抓取 SSH Banner 的端口
+    ssh_ports: frozenset[int] = frozenset({22})
+
+    def __init__(
+        self,
+        *,
+        rate: int | None = None,
+        concurrency: int | None = None,
+        connect_timeout: float | None = None,
+        grab_banner: bool | None = None,
+    ):
+        """
+        初始化扫描服务。
+
+        Args:
+            rate: 每秒发起的最大连接数（可选）
+            concurrency: 同时探测的最大主机数（可选）
+            connect_timeout: 单次连接超时（秒，可选）
+            grab_banner: 是否抓取 SSH Banner（可选）
+        """
+        self.rate = rate if rate is not None else settings.SCAN_SWEEP_RATE
+        self.concurrency = max(1, concurrency if concurrency is not None else settings.SCAN_SWEEP_CONCURRENCY)
+        self.connect_timeout = connect_timeout if connect_timeout is not None else settings.SCAN_SWEEP_CONNECT_TIMEOUT
+        self.grab_banner = grab_banner if grab_banner is not None else settings.SCAN_SWEEP_GRAB_BANNER
+
+    async def _probe_port(self, ip: str, port: int, limiter: _RateLimiter) -> tuple[bool, bool, str | None]:
+        """
+        探测单个端口。
+
+        Returns:
+            tuple[bool, bool, str | None]: (主机存活, 端口开放, SSH Banner)
+        """
+        await limiter.acquire()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=self.connect_timeout)
+        except ConnectionRefusedError:
+            return True, False, None
+        except (TimeoutError, OSError):
+            return False, False, None
+
+        banner = None
+        try:
+            if port in self.ssh_ports and self.grab_banner:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout=self.connect_timeout)
+                    text = line.decode("utf-8", errors="replace").strip()
+                    banner = text if text.startswith("SSH-") else None
+                except (TimeoutError, OSError):
+                    banner = None
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+        return True, True, banner
+
+    async def probe_host(self, ip: str, ports: list[int], limiter: _RateLimiter | None = None) -> ScanHost | None:
+        """
+        探测单个主机。
+
+        Args:
+            ip: 主机 IP
+            ports: 目标端口列表
+            limiter: 速率限制器（可选）
+
+        Returns:
+            ScanHost | None: 存活主机；无响应时返回 None
+        """
+        limiter = limiter or _RateLimiter(0)
+        results = await asyncio.gather(*(self._probe_port(ip, port, limiter) for port in ports))
+        if not any(alive for alive, _, _ in results):
+            return None
+
+        open_ports = {
+            port: _service_name(port) for port, (_, is_open, _) in zip(ports, results, strict=True) if is_open
+        }
+        ssh_banner = next((banner for _, _, banner in results if banner), None)
+
+        vendor = None
+        if ssh_banner:
+            try:
+                from app.network.platform_config import detect_vendor_from_banner
+
+                vendor = detect_vendor_from_banner(ssh_banner)
+            except Exception:
+                vendor = None
+
+        return ScanHost(
+            ip_address=ip,
+            vendor=vendor,
+            open_ports=open_ports or None,
+            ssh_banner=ssh_banner,
+            status="up",
+        )
+
+    async def iter_sweep(self, subnet: str, ports: str | None = None) -> AsyncIterator[ScanHost]:
+        """
+        扫描网段，按完成顺序流式产出存活主机。
+
+        使用固定数量的 worker 消费惰性展开的地址，内存占用与网段大小无关。
+        调用方提前停止迭代时会取消剩余探测。
+
+        Args:
+            subnet: 网段 (CIDR 格式)
+            ports: 扫描端口（默认 SCAN_DEFAULT_PORTS）
+
+        Yields:
+            ScanHost: 存活主机
+        """
+        port_list = parse_ports(ports or settings.SCAN_DEFAULT_PORTS)
+        targets = iter_targets(subnet)
+        limiter = _RateLimiter(self.rate)
+        queue: asyncio.Queue[ScanHost | None] = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def _worker() -> None:
+            cancelled = False
+            try:
+                for ip in targets:
+                    host = await self.probe_host(ip, port_list, limiter)
+                    if host is not None:
+                        await queue.put(host)
+            except asyncio.CancelledError:
+                # 调用方已停止消费，不再阻塞在满队列上
+                cancelled = True
+                raise
+            finally:
+                if not cancelled:
+                    await queue.put(None)
+
+        workers = [asyncio.create_task(_worker()) for _ in range(self.concurrency)]
+        try:
+            remaining = len(workers)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield item
+            for w in workers:
+                # 传播 worker 中的意外异常
+                w.result()
+        finally:
+            for w in workers:
+                if not w.done():
+                    w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def sweep_scan(self, subnet: str, ports: str | None = None) -> ScanResult:
+        """
+        扫描网段并汇总为 ScanResult（非流式调用方使用）。
+
+        Args:
+            subnet: 网段 (CIDR 格式)
+            ports: 扫描端口
+
+        Returns:
+            ScanResult: 扫描结果
+        """
+        started_at = datetime.now()
+        result = ScanResult(subnet=subnet, scan_type="sweep", started_at=started_at)
+        try:
+            async for host in self.iter_sweep(subnet, ports):
+                result.hosts.append(host)
+            result.hosts_found = len(result.hosts)
+        except Exception as e:
+            logger.error(f"异步扫描失败: {subnet}", error=str(e))
+            result.error = f"异步扫描失败: {e}"
+        result.completed_at = datetime.now()
+        result.duration_seconds = int((result.completed_at - started_at).total_seconds())
+        return result
@@ -0,0 +1,169 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: topology_graph.py
+@DateTime: 2026-02-10 14:00:00
+@Docs: 拓扑图片段与子图计算 (Topology Graph Fragments).
+
+拓扑按源设备拆分为邻接片段（该设备的全部出边及未知邻居节点），片段以 vis.js 字典格式缓存，
+设备链路变化时只重建对应片段；完整拓扑与子图均由片段拼装，CMDB 节点信息实时查询。
+节点与边字典包含 TopologyNode/TopologyEdge 的全部字段，接口直接序列化，不逐条构建模型。
+"""
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+# 设备分组对应的节点形状与颜色
+_SHAPE_MAP = {"core": "diamond", "distribution": "square", "access": "dot"}
+_COLOR_MAP = {"core": "#e74c3c", "distribution": "#f39c12", "access": "#3498db"}
+
+
+def build_fragment(links: Iterable[Any]) -> dict[str, list[dict[str, Any]]]:
+    """
+    将同一源设备的链路转换为邻接片段。
+
+    Args:
+        links: 链路行（需包含 id/source_device_id/source_interface/target_* /link_type 属性）
+
+    Returns:
+        dict: {"edges": 边列表, "nodes": 未知邻居节点列表}
+    """
+    edges: list[dict[str, Any]] = []
+    unknown: dict[str, dict[str, Any]] = {}
+    for link in links:
+        if link.target_device_id:
+            target_id = str(link.target_device_id)
+        else:
+            target_id = link.target_hostname or link.target_ip or f"unknown_{link.id}"
+            if target_id not in unknown:
+                unknown[target_id] = {
+                    "id": target_id,
+                    "label": link.target_hostname or link.target_ip or "Unknown",
+                    "title": f"IP: {link.target_ip or 'N/A'}",
+                    "group": "unknown",
+                    "shape": "triangle",
+                    "size": 20,
+                    "color": None,
+                    "ip": link.target_ip,
+                    "vendor": None,
+                    "device_type": None,
+                    "device_group": None,
+                    "status": None,
+                    "in_cmdb": False,
+                }
+
+        label = f"{link.source_interface}"
+        if link.target_interface:
+            label += f" → {link.target_interface}"
+        edges.append(
+            {
+                "id": str(link.id),
+                "from": str(link.source_device_id),
+                "to": target_id,
+                "label": label,
+                "title": f"Type: {link.link_type}",
+                "arrows": "to",
+                "color": None,
+                "dashes": False,
+                "width": 1,
+                "source_interface": link.source_interface,
+                "target_interface": link.target_interface,
+                "link_type": link.link_type,
+            }
+        )
+    return {"edges": edges, "nodes": list(unknown.values())}
+
+
+def device_node(device: Any) -> dict[str, Any]:
+    """
+    从设备行创建 CMDB 节点（vis.js 格式）。
+
+    Args:
+        device: 设备行（需包含 id/name/ip_address/vendor/model/device_group/status 属性）
+
+    Returns:
+        dict: 节点数据
+    """
+    group = device.device_group or "access"
+    return {
+        "id": str(device.id),
+        "label": device.name,
+        "title": f"IP: {device.ip_address}\nVendor: {device.vendor or 'N/A'}",
+        "group": group,
+        "shape": _SHAPE_MAP.get(group, "dot"),
+        "size": 30 if group == "core" else 25,
+        "color": _COLOR_MAP.get(group),
+        "ip": device.ip_address,
+        "vendor": device.vendor,
+        "device_type": device.model,
+        "device_group": group,
+        "status": device.status,
+        "in_cmdb": True,
+    }
+
+
+@dataclass
+class TopologyGraph:
+    """
+    由邻接片段组成的拓扑图。
+
+    Attributes:
+        fragments: 源设备ID(str) -> 邻接片段，按源设备顺序排列
+    """
+
+    fragments: dict[str, dict[str, list[dict[str, Any]]]] = field(default_factory=dict)
+
+    def edges(self) -> list[dict[str, Any]]:
+        """全部边（按源设备顺序）。"""
+        return [edge for fragment in self.fragments.values() for edge in fragment["edges"]]
+
+    def unknown_nodes(self) -> dict[str, dict[str, Any]]:
+        """全部未知邻居节点（节点ID -> 节点）。"""
+        return {node["id"]: node for fragment in self.fragments.values() for node in fragment["nodes"]}
+
+    def within_hops(self, start: str, hops: int) -> set[str]:
+        """
+        以无向图方式计算距起点不超过 hops 跳的节点。
+
+        Args:
+            start: 起点节点ID
+            hops: 跳数
+
+        Returns:
+            set[str]: 节点ID集合（包含起点）
+        """
+        adjacency: dict[str, set[str]] = {}
+        for edge in self.edges():
+            adjacency.setdefault(edge["from"], set()).add(edge["to"])
+            adjacency.setdefault(edge["to"], set()).add(edge["from"])
+
+        visited = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            node_id, depth = queue.popleft()
+            if depth >= hops:
+                continue
+            for neighbor in adjacency.get(node_id, ()):
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append((neighbor, depth + 1))
+        return visited
+
+
+def edge_endpoints(edges: Iterable[dict[str, Any]]) -> list[str]:
+    """
+    按首次出现顺序返回边涉及的节点ID（源节点在前）。
+
+    Args:
+        edges: 边列表
+
+    Returns:
+        list[str]: 节点ID列表
+    """
+    seen: dict[str, None] = {}
+    for edge in edges:
+        seen.setdefault(edge["from"])
+        seen.setdefault(edge["to"])
+    return list(seen)
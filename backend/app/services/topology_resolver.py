@@ -0,0 +1,90 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: topology_resolver.py
+@DateTime: 2026-02-10 09:00:00
+@Docs: LLDP 邻居批量匹配 (Topology Neighbor Resolver).
+
+每次拓扑采集只加载一次设备表的 ID/名称/IP，在内存中建立索引后匹配全部邻居，
+替代逐个邻居最多三次的数据库查询（其中名称模糊匹配为无法走索引的 ILIKE）。
+"""
+
+from bisect import bisect_left
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_device import CRUDDevice
+
+
+class NeighborResolver:
+    """
+    邻居设备匹配器。
+
+    匹配优先级与逐个查询时一致：
+    1. IP 精确匹配（最可靠）
+    2. hostname 精确匹配
+    3. CMDB 名称以 hostname 开头（不区分大小写，多个候选取名称排序最小者）
+    4. hostname 去掉域名后缀后精确匹配 CMDB 名称
+    """
+
+    def __init__(self, devices: list[tuple[UUID, str, str | None]]):
+        """
+        构建索引。
+
+        Args:
+            devices: (设备ID, 设备名称, IP 地址) 列表，靠前者优先
+        """
+        self._by_ip: dict[str, UUID] = {}
+        self._by_name: dict[str, UUID] = {}
+        for device_id, name, ip in devices:
+            if ip:
+                self._by_ip.setdefault(ip, device_id)
+            if name:
+                self._by_name.setdefault(name, device_id)
+        # 小写名称有序表，前缀匹配用二分查找
+        self._prefix_index: list[tuple[str, UUID]] = sorted(
+            (name.lower(), device_id) for name, device_id in self._by_name.items()
+        )
+
+    @classmethod
+    async def load(cls, db: AsyncSession, device_crud: CRUDDevice) -> "NeighborResolver":
+        """
+        从数据库加载设备并构建匹配器（单次查询）。
+
+        Args:
+            db: 数据库会话
+            device_crud: 设备 CRUD 实例
+
+        Returns:
+            NeighborResolver: 匹配器
+        """
+        return cls(await device_crud.get_match_keys(db))
+
+    def resolve(self, *, hostname: str | None = None, ip: str | None = None) -> UUID | None:
+        """
+        匹配邻居对应的 CMDB 设备。
+
+        Args:
+            hostname: 邻居主机名（LLDP 上报）
+            ip: 邻居管理 IP（LLDP 上报）
+
+        Returns:
+            UUID | None: 匹配到的设备ID
+        """
+        if ip and ip in self._by_ip:
+            return self._by_ip[ip]
+        if not hostname:
+            return None
+        if hostname in self._by_name:
+            return self._by_name[hostname]
+
+        prefix = hostname.lower()
+        pos = bisect_left(self._prefix_index, (prefix,))
+        if pos < len(self._prefix_index) and self._prefix_index[pos][0].startswith(prefix):
+            return self._prefix_index[pos][1]
+
+        short_name, dot, _ = hostname.partition(".")
+        if dot:
+            return self._by_name.get(short_name)
+        return None
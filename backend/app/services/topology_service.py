@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 from typing import Any, Callable
 from uuid import UUID
 
+import orjson
 import redis.asyncio as redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -31,19 +32,20 @@ from app.schemas.topology import (
     DeviceLLDPResult,
     DeviceNeighborsResponse,
     TopologyCollectResult,
-    TopologyEdge,
     TopologyLinkCreate,
     TopologyLinkResponse,
-    TopologyNode,
-    TopologyResponse,
     TopologyStats,
 )
 from app.services.base import DeviceCredentialMixin
+from app.services.topology_graph import TopologyGraph, build_fragment, device_node, edge_endpoints
+from app.services.topology_resolver import NeighborResolver
 from app.core.otp_helpers import build_otp_required_info, dedupe_otp_groups
 from app.network.platform_config import get_scrapli_platform
 
-# 拓扑缓存键
-TOPOLOGY_CACHE_KEY = "ncm:topology:data"
+# 拓扑邻接片段缓存键前缀（按源设备）
+TOPOLOGY_ADJACENCY_PREFIX = "ncm:topology:adj:"
+# IN 查询单批ID数量
+TOPOLOGY_QUERY_BATCH_SIZE = 1000
 
 
 class TopologyService(DeviceCredentialMixin):
@@ -291,8 +293,10 @@ class TopologyService(DeviceCredentialMixin):
                 else:
                     logger.warning("Nornir 结果显示 OTP 失败但缺少部门信息", aggregated=aggregated)
 
-            # 处理采集结果
-            total_links = 0
+            # 处理采集结果：设备表只加载一次，全部邻居在内存中匹配
+            resolver = await NeighborResolver.load(db, self.device_crud)
+            links_by_device: dict[UUID, list[TopologyLinkCreate]] = {}
+            collected_at = datetime.now()
             results_items = list(aggregated.get("results", {}).items())
             total_results = len(results_items)
 
@@ -338,9 +342,8 @@ class TopologyService(DeviceCredentialMixin):
                     device_result.neighbors = neighbors
                     device_result.neighbors_count = len(neighbors)
 
-                    # 保存拓扑链路
-                    saved_count = await self._save_device_topology(db, device=device, neighbors=neighbors)
-                    total_links += saved_count
+                    # 匹配邻居设备，链路在全部设备处理完后统一写入
+                    links_by_device[device.id] = self._build_device_links(device, neighbors, resolver, collected_at)
                 else:
                     result.failed_count += 1
                     device_result.error = host_result.get("error", "Unknown error")
@@ -354,14 +357,15 @@ class TopologyService(DeviceCredentialMixin):
 
                 result.results.append(device_result)
 
-            result.total_links = total_links
+            # 保存拓扑链路（单次删除 + 批量 upsert）
+            result.total_links = await self._save_topology_links(db, links_by_device)
             result.completed_at = datetime.now()
 
             # 提交数据库更改
             await db.commit()
 
-            # 清除拓扑缓存
-            await self._invalidate_cache()
+            # 增量更新本次采集设备的邻接片段
+            await self._refresh_fragments(db, list(links_by_device))
 
             # 报告进度：完成
             if progress_callback:
@@ -517,76 +521,27 @@ class TopologyService(DeviceCredentialMixin):
 
         return neighbors
 
-    async def _match_target_device(
+    def _build_device_links(
         self,
-        db: AsyncSession,
-        *,
-        hostname: str | None = None,
-        ip: str | None = None,
-        mac: str | None = None,
-    ) -> Device | None:
-        """
-        多维度匹配目标设备。
-
-        匹配优先级：
-        1. IP 精确匹配（最可靠）
-        2. hostname 精确匹配
-        3. hostname 模糊匹配（前缀/包含）
-
-        Args:
-            db: 数据库会话
-            hostname: 邻居主机名（LLDP 上报）
-            ip: 邻居管理 IP（LLDP 上报）
-            mac: 邻居 MAC/Chassis ID（LLDP 上报，暂不用于匹配）
-
-        Returns:
-            Device | None: 匹配到的设备或 None
-        """
-        # 1. IP 精确匹配（最可靠）
-        if ip:
-            device = await self.device_crud.get_by_ip(db, ip_address=ip)
-            if device:
-                logger.debug("设备匹配成功（IP）", ip=ip, device_name=device.name)
-                return device
-
-        # 2. hostname 精确匹配
-        if hostname:
-            device = await self.device_crud.get_by_name(db, name=hostname)
-            if device:
-                logger.debug("设备匹配成功（hostname精确）", hostname=hostname, device_name=device.name)
-                return device
-
-            # 3. hostname 模糊匹配
-            device = await self.device_crud.get_by_name_like(db, name=hostname)
-            if device:
-                logger.debug("设备匹配成功（hostname模糊）", hostname=hostname, device_name=device.name)
-                return device
-
-        # 未匹配到设备
-        return None
-
-    async def _save_device_topology(
-        self,
-        db: AsyncSession,
         device: Device,
         neighbors: list[dict],
-    ) -> int:
+        resolver: NeighborResolver,
+        collected_at: datetime,
+    ) -> list[TopologyLinkCreate]:
         """
-        保存设备拓扑链路。
-
-        注意：不使用 @transactional() 装饰器，由调用方统一管理事务。
+        将设备的 LLDP 邻居转换为链路数据（邻居匹配在内存中完成）。
 
         Args:
-            db: 数据库会话
             device: 源设备
             neighbors: 邻居列表
+            resolver: 邻居设备匹配器
+            collected_at: 采集时间
 
         Returns:
-            保存的链路数量
+            链路数据列表
         """
         # 使用字典去重，同一接口只保留第一个邻居（避免 UPSERT 冲突）
         links_by_interface: dict[str, TopologyLinkCreate] = {}
-        now = datetime.now()
 
         for neighbor in neighbors:
             local_interface = neighbor.get("local_interface", "")
@@ -604,210 +559,285 @@ class TopologyService(DeviceCredentialMixin):
                 )
                 continue
 
-            # 尝试匹配目标设备（多维度匹配）
             target_ip = neighbor.get("neighbor_ip")
             target_hostname = neighbor.get("neighbor_hostname")
-            target_mac = neighbor.get("chassis_id")
 
-            target_device = await self._match_target_device(
-                db,
-                hostname=target_hostname,
-                ip=target_ip,
-                mac=target_mac,
-            )
-            target_device_id = target_device.id if target_device else None
-
-            link_data = TopologyLinkCreate(
+            links_by_interface[local_interface] = TopologyLinkCreate(
                 source_device_id=device.id,
                 source_interface=local_interface,
-                target_device_id=target_device_id,
+                target_device_id=resolver.resolve(hostname=target_hostname, ip=target_ip),
                 target_interface=neighbor.get("neighbor_interface"),
                 target_hostname=target_hostname,
                 target_ip=target_ip,
-                target_mac=target_mac,
+                target_mac=neighbor.get("chassis_id"),
                 target_description=neighbor.get("neighbor_description"),
                 link_type="lldp",
-                collected_at=now,
+                collected_at=collected_at,
             )
-            links_by_interface[local_interface] = link_data
 
-        links_data = list(links_by_interface.values())
+        return list(links_by_interface.values())
+
+    async def _save_topology_links(
+        self,
+        db: AsyncSession,
+        links_by_device: dict[UUID, list[TopologyLinkCreate]],
+    ) -> int:
+        """
+        批量保存拓扑链路：一次删除全部源设备的旧链路，再分批 upsert 新链路。
+
+        注意：不使用 @transactional() 装饰器，由调用方统一管理事务。
+
+        Args:
+            db: 数据库会话
+            links_by_device: 源设备ID -> 链路数据
 
-        # 刷新设备拓扑：先删除旧链路，再创建新链路
-        await self.topology_crud.delete_by_device(db, device_id=device.id, hard_delete=False)
-        created_count = await self.topology_crud.upsert_many(db, links_data=links_data)
+        Returns:
+            保存的链路数量
+        """
+        if not links_by_device:
+            return 0
 
-        return created_count
+        await self.topology_crud.delete_by_devices(db, device_ids=list(links_by_device), hard_delete=False)
+        links_data = [link for links in links_by_device.values() for link in links]
+        return await self.topology_crud.upsert_many(db, links_data=links_data)
 
-    async def build_topology(self, db: AsyncSession) -> TopologyResponse:
+    async def build_topology(self, db: AsyncSession, *, refresh: bool = False) -> dict[str, Any]:
         """
-        构建拓扑数据 (vis.js 格式)。
+        构建完整拓扑数据 (vis.js 格式)。
+
+        由各源设备的邻接片段拼装，缺失的片段从数据库分批加载并回填缓存，不限制链路数量。
+        节点与边保持片段中的字典形式（字段与 TopologyResponse 一致），不逐条构建 Pydantic 模型。
 
         Args:
             db: 数据库会话
+            refresh: 是否忽略缓存，从数据库重建全部片段
 
         Returns:
-            TopologyResponse: vis.js 格式的拓扑数据
+            dict: TopologyResponse 结构的拓扑数据
         """
-        # 尝试从缓存获取
-        cached = await self._get_cached_topology()
-        if cached:
-            return cached
+        graph = await self._load_graph(db, refresh=refresh)
+        nodes, edges = await self._assemble(db, graph, graph.edges())
+        return {"nodes": nodes, "edges": edges, "stats": self._build_stats(nodes, edges)}
 
-        # 从数据库构建
-        nodes: list[TopologyNode] = []
-        edges: list[TopologyEdge] = []
-        node_ids: set[str] = set()
+    async def build_subgraph(
+        self,
+        db: AsyncSession,
+        *,
+        dept_id: UUID | None = None,
+        device_id: UUID | None = None,
+        hops: int = 1,
+        page: int = 1,
+        page_size: int = 2000,
+    ) -> dict[str, Any]:
+        """
+        构建子图拓扑数据 (vis.js 格式)，按边分页。
 
-        # 获取所有链路
-        links, _ = await self.topology_crud.get_paginated(
-            db,
-            page=1,
-            page_size=5000,
-            order_by=TopologyLink.created_at.desc(),
-        )
+        Args:
+            db: 数据库会话
+            dept_id: 部门ID（保留至少一端属于该部门设备的边）
+            device_id: 中心设备ID（保留两端均在 hops 跳范围内的边）
+            hops: 跳数
+            page: 页码
+            page_size: 每页边数
 
-        # 获取所有相关设备ID
-        device_ids = await self._get_unique_device_ids(db)
-        devices_list = await self.device_crud.get_by_ids(db, list(device_ids), options=self.device_crud._DEVICE_OPTIONS)
-        device_map: dict[UUID, Device] = {d.id: d for d in devices_list}
+        Returns:
+            dict: TopologySubgraphResponse 结构的当前页节点与边，统计信息为整个子图
+        """
+        graph = await self._load_graph(db)
+        edges = graph.edges()
 
-        # 构建节点和边
-        for link in links:
-            # 源节点
-            source_id = str(link.source_device_id)
-            if source_id not in node_ids:
-                source_device = device_map.get(link.source_device_id)
-                if source_device:
-                    nodes.append(self._create_node_from_device(source_device))
-                    node_ids.add(source_id)
-
-            # 目标节点
-            if link.target_device_id:
-                target_id = str(link.target_device_id)
-                if target_id not in node_ids:
-                    target_device = device_map.get(link.target_device_id)
-                    if target_device:
-                        nodes.append(self._create_node_from_device(target_device))
-                        node_ids.add(target_id)
-            else:
-                # 未知设备节点
-                target_id = link.target_hostname or link.target_ip or f"unknown_{link.id}"
-                if target_id not in node_ids:
-                    nodes.append(
-                        TopologyNode(
-                            id=target_id,
-                            label=link.target_hostname or link.target_ip or "Unknown",
-                            title=f"IP: {link.target_ip or 'N/A'}",
-                            group="unknown",
-                            shape="triangle",
-                            size=20,
-                            ip=link.target_ip,
-                            in_cmdb=False,
-                        )
-                    )
-                    node_ids.add(target_id)
-
-            # 边
-            edge_label = f"{link.source_interface}"
-            if link.target_interface:
-                edge_label += f" → {link.target_interface}"
-
-            edge_data = {
-                "id": str(link.id),
-                "from": str(link.source_device_id),
-                "to": target_id,
-                "label": edge_label,
-                "title": f"Type: {link.link_type}",
-                "source_interface": link.source_interface,
-                "target_interface": link.target_interface,
-                "link_type": link.link_type,
-            }
-            edges.append(TopologyEdge.model_validate(edge_data))
-
-        # 统计信息
-        cmdb_count = sum(1 for n in nodes if n.in_cmdb)
-        stats = TopologyStats(
-            total_nodes=len(nodes),
-            total_edges=len(edges),
-            cmdb_devices=cmdb_count,
-            unknown_devices=len(nodes) - cmdb_count,
-            collected_at=datetime.now(),
-            cache_expires_at=datetime.now() + timedelta(seconds=settings.TOPOLOGY_CACHE_TTL),
-        )
+        if device_id:
+            reachable = graph.within_hops(str(device_id), hops)
+            edges = [edge for edge in edges if edge["from"] in reachable and edge["to"] in reachable]
+        if dept_id:
+            dept_devices = {str(i) for i in await self._get_dept_device_ids(db, dept_id)}
+            edges = [edge for edge in edges if edge["from"] in dept_devices or edge["to"] in dept_devices]
 
-        response = TopologyResponse(nodes=nodes, edges=edges, stats=stats)
+        nodes, edges = await self._assemble(db, graph, edges)
+        stats = self._build_stats(nodes, edges)
 
-        # 缓存结果
-        await self._cache_topology(response)
+        start = (page - 1) * page_size
+        page_edges = edges[start : start + page_size]
+        page_node_ids = set(edge_endpoints(page_edges))
+        page_nodes = [node for node in nodes if node["id"] in page_node_ids]
 
-        return response
+        return {
+            "nodes": page_nodes,
+            "edges": page_edges,
+            "stats": stats,
+            "page": page,
+            "page_size": page_size,
+            "has_more": start + page_size < len(edges),
+        }
 
-    async def _get_unique_device_ids(self, db: AsyncSession) -> set[UUID]:
+    async def _load_graph(self, db: AsyncSession, *, refresh: bool = False) -> TopologyGraph:
         """
-        获取拓扑中涉及的所有设备ID。
+        加载拓扑图：优先读取缓存片段，缺失的片段从数据库重建并回填。
 
         Args:
             db: 数据库会话
+            refresh: 是否忽略缓存
 
         Returns:
-            设备ID集合
+            TopologyGraph: 拓扑图
+        """
+        source_ids = await self._get_source_device_ids(db)
+        keys = [str(source_id) for source_id in source_ids]
+
+        fragments = {} if refresh else await self._get_cached_fragments(keys)
+        missing = [source_id for source_id, key in zip(source_ids, keys, strict=True) if key not in fragments]
+        if missing:
+            built = await self._build_fragments(db, missing)
+            await self._cache_fragments(built)
+            fragments.update(built)
+            logger.debug("拓扑片段已重建", devices=len(missing), cached=len(keys) - len(missing))
+
+        return TopologyGraph({key: fragments[key] for key in keys})
+
+    async def _get_source_device_ids(self, db: AsyncSession) -> list[UUID]:
+        """
+        获取拥有链路的源设备ID（有序）。
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            设备ID列表
         """
         stmt = (
-            select(TopologyLink.source_device_id, TopologyLink.target_device_id)
+            select(TopologyLink.source_device_id)
             .where(TopologyLink.is_deleted.is_(False))
             .distinct()
+            .order_by(TopologyLink.source_device_id)
         )
         result = await db.execute(stmt)
-        rows = result.all()
+        return list(result.scalars().all())
+
+    async def _build_fragments(self, db: AsyncSession, device_ids: list[UUID]) -> dict[str, dict]:
+        """
+        从数据库分批加载链路并构建邻接片段（只查询所需列）。
+
+        Args:
+            db: 数据库会话
+            device_ids: 源设备ID列表
+
+        Returns:
+            源设备ID(str) -> 邻接片段（无链路的设备为空片段）
+        """
+        rows_by_source: dict[str, list[Any]] = {str(device_id): [] for device_id in device_ids}
+        for start in range(0, len(device_ids), TOPOLOGY_QUERY_BATCH_SIZE):
+            stmt = (
+                select(
+                    TopologyLink.id,
+                    TopologyLink.source_device_id,
+                    TopologyLink.source_interface,
+                    TopologyLink.target_device_id,
+                    TopologyLink.target_interface,
+                    TopologyLink.target_hostname,
+                    TopologyLink.target_ip,
+                    TopologyLink.link_type,
+                )
+                .where(
+                    TopologyLink.source_device_id.in_(device_ids[start : start + TOPOLOGY_QUERY_BATCH_SIZE]),
+                    TopologyLink.is_deleted.is_(False),
+                )
+                .order_by(TopologyLink.source_device_id, TopologyLink.source_interface)
+            )
+            for row in await db.execute(stmt):
+                rows_by_source[str(row.source_device_id)].append(row)
 
-        device_ids: set[UUID] = set()
-        for source_id, target_id in rows:
-            device_ids.add(source_id)
-            if target_id:
-                device_ids.add(target_id)
+        return {source_id: build_fragment(rows) for source_id, rows in rows_by_source.items()}
 
-        return device_ids
+    async def _assemble(
+        self, db: AsyncSession, graph: TopologyGraph, edges: list[dict[str, Any]]
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """
+        为边补齐节点：CMDB 节点实时查询设备信息，未知节点取自片段。
+
+        Args:
+            db: 数据库会话
+            graph: 拓扑图
+            edges: 边列表
 
-    def _create_node_from_device(self, device: Device) -> TopologyNode:
+        Returns:
+            (节点列表, 边列表)
+        """
+        unknown = graph.unknown_nodes()
+        endpoint_ids = edge_endpoints(edges)
+        device_nodes = await self._load_device_nodes(db, [UUID(i) for i in endpoint_ids if i not in unknown])
+
+        nodes: list[dict[str, Any]] = []
+        for node_id in endpoint_ids:
+            node = device_nodes.get(node_id) or unknown.get(node_id)
+            if node:
+                nodes.append(node)
+        return nodes, edges
+
+    async def _load_device_nodes(self, db: AsyncSession, device_ids: list[UUID]) -> dict[str, dict[str, Any]]:
         """
-        从设备创建拓扑节点。
+        分批查询设备并转换为 CMDB 节点（只查询所需列）。
 
         Args:
-            device: 设备对象
+            db: 数据库会话
+            device_ids: 设备ID列表
 
         Returns:
-            TopologyNode
+            设备ID(str) -> 节点
         """
-        # 根据设备分组设置形状和颜色
-        shape_map = {
-            "core": "diamond",
-            "distribution": "square",
-            "access": "dot",
-        }
-        color_map = {
-            "core": "#e74c3c",
-            "distribution": "#f39c12",
-            "access": "#3498db",
-        }
+        nodes: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(device_ids), TOPOLOGY_QUERY_BATCH_SIZE):
+            stmt = select(
+                Device.id,
+                Device.name,
+                Device.ip_address,
+                Device.vendor,
+                Device.model,
+                Device.device_group,
+                Device.status,
+            ).where(
+                Device.id.in_(device_ids[start : start + TOPOLOGY_QUERY_BATCH_SIZE]),
+                Device.is_deleted.is_(False),
+            )
+            for row in await db.execute(stmt):
+                nodes[str(row.id)] = device_node(row)
+        return nodes
 
-        group = device.device_group or "access"
-
-        return TopologyNode(
-            id=str(device.id),
-            label=device.name,
-            title=f"IP: {device.ip_address}\nVendor: {device.vendor or 'N/A'}",
-            group=group,
-            shape=shape_map.get(group, "dot"),
-            size=30 if group == "core" else 25,
-            color=color_map.get(group),
-            ip=device.ip_address,
-            vendor=device.vendor,
-            device_type=device.model,  # 设备型号
-            device_group=group,
-            status=device.status,  # 设备状态
-            in_cmdb=True,
-        )
+    async def _get_dept_device_ids(self, db: AsyncSession, dept_id: UUID) -> list[UUID]:
+        """
+        获取部门下的设备ID。
+
+        Args:
+            db: 数据库会话
+            dept_id: 部门ID
+
+        Returns:
+            设备ID列表
+        """
+        stmt = select(Device.id).where(Device.dept_id == dept_id, Device.is_deleted.is_(False))
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _build_stats(nodes: list[dict[str, Any]], edges: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        计算拓扑统计信息。
+
+        Args:
+            nodes: 节点列表
+            edges: 边列表
+
+        Returns:
+            dict: TopologyStats 结构的统计信息
+        """
+        cmdb_count = sum(1 for node in nodes if node["in_cmdb"])
+        return TopologyStats(
+            total_nodes=len(nodes),
+            total_edges=len(edges),
+            cmdb_devices=cmdb_count,
+            unknown_devices=len(nodes) - cmdb_count,
+            collected_at=datetime.now(),
+            cache_expires_at=datetime.now() + timedelta(seconds=settings.TOPOLOGY_CACHE_TTL),
+        ).model_dump(mode="json")
 
     async def get_device_neighbors(self, db: AsyncSession, device_id: UUID) -> DeviceNeighborsResponse:
         """
@@ -911,13 +941,7 @@ class TopologyService(DeviceCredentialMixin):
             导出的拓扑数据
         """
         topology = await self.build_topology(db)
-
-        return {
-            "exported_at": datetime.now().isoformat(),
-            "nodes": [n.model_dump() for n in topology.nodes],
-            "edges": [e.model_dump(by_alias=True) for e in topology.edges],
-            "stats": topology.stats.model_dump(),
-        }
+        return {"exported_at": datetime.now().isoformat(), **topology}
 
     async def reset_topology(self, db: AsyncSession, *, hard_delete: bool = False) -> dict:
         """
@@ -990,54 +1014,73 @@ class TopologyService(DeviceCredentialMixin):
 
     # ===== 缓存方法 =====
 
-    async def _get_cached_topology(self) -> TopologyResponse | None:
+    async def _get_cached_fragments(self, device_ids: list[str]) -> dict[str, dict]:
         """
-        从 Redis 获取缓存的拓扑数据。
+        从 Redis 批量获取邻接片段。
+
+        Args:
+            device_ids: 源设备ID列表
 
         Returns:
-            TopologyResponse | None: 缓存的拓扑数据，如果不存在或获取失败则返回 None
+            源设备ID -> 邻接片段（未命中的设备不在结果中）
         """
-        if not self._redis:
-            return None
+        if not self._redis or not device_ids:
+            return {}
 
         try:
-            data = await self._redis.get(TOPOLOGY_CACHE_KEY)
-            if data:
-                return TopologyResponse.model_validate_json(data)
+            values = await self._redis.mget([f"{TOPOLOGY_ADJACENCY_PREFIX}{i}" for i in device_ids])
         except Exception as e:
             logger.warning("获取拓扑缓存失败", error=str(e))
+            return {}
 
-        return None
+        return {device_id: orjson.loads(value) for device_id, value in zip(device_ids, values, strict=True) if value}
 
-    async def _cache_topology(self, topology: TopologyResponse) -> None:
+    async def _cache_fragments(self, fragments: dict[str, dict]) -> None:
         """
-        缓存拓扑数据到 Redis。
+        缓存邻接片段到 Redis。
 
         Args:
-            topology: 拓扑响应对象
+            fragments: 源设备ID -> 邻接片段
         """
-        if not self._redis:
+        if not self._redis or not fragments:
             return
 
         try:
-            await self._redis.setex(
-                TOPOLOGY_CACHE_KEY,
-                settings.TOPOLOGY_CACHE_TTL,
-                topology.model_dump_json(),
-            )
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for device_id, fragment in fragments.items():
+                    pipe.setex(
+                        f"{TOPOLOGY_ADJACENCY_PREFIX}{device_id}",
+                        settings.TOPOLOGY_CACHE_TTL,
+                        orjson.dumps(fragment).decode("utf-8"),
+                    )
+                await pipe.execute()
         except Exception as e:
             logger.warning("缓存拓扑数据失败", error=str(e))
 
+    async def _refresh_fragments(self, db: AsyncSession, device_ids: list[UUID]) -> None:
+        """
+        重建指定源设备的邻接片段（链路变化后调用，其余设备的片段保持不变）。
+
+        Args:
+            db: 数据库会话
+            device_ids: 源设备ID列表
+        """
+        if not self._redis or not device_ids:
+            return
+        await self._cache_fragments(await self._build_fragments(db, device_ids))
+
     async def _invalidate_cache(self) -> None:
         """
-        清除拓扑缓存。
+        清除全部拓扑片段缓存。
 
-        当拓扑数据更新时调用此方法清除缓存，确保下次查询获取最新数据。
+        当拓扑数据整体重置时调用，确保下次查询从数据库重建。
         """
         if not self._redis:
             return
 
         try:
-            await self._redis.delete(TOPOLOGY_CACHE_KEY)
+            keys = [key async for key in self._redis.scan_iter(match=f"{TOPOLOGY_ADJACENCY_PREFIX}*", count=1000)]
+            for start in range(0, len(keys), 1000):
+                await self._redis.delete(*keys[start : start + 1000])
         except Exception as e:
             logger.warning("清除拓扑缓存失败", error=str(e))
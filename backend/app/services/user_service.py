@@ -317,6 +317,8 @@ class UserService(BaseService, PermissionCacheMixin):
             if await self.user_crud.get_by_unique_field(self.db, field="email", value=obj_in.email):
                 raise BadRequestException(message="邮箱已存在")
 
+        # 状态、超管标记或部门可能变化，提交后失效认证主体缓存
+        self._invalidate_permissions_cache_after_commit([user.id])
         return await self.user_crud.update(self.db, db_obj=user, obj_in=obj_in)
 
     @transactional()
@@ -381,6 +383,7 @@ class UserService(BaseService, PermissionCacheMixin):
             BatchOperationResult: 批量操作结果
         """
         success_count, failed_ids = await self.user_crud.batch_remove(self.db, ids=ids, hard_delete=hard_delete)
+        self._invalidate_permissions_cache_after_commit(ids)
         return self._build_batch_result(success_count, failed_ids, message="删除完成")
 
     @transactional()
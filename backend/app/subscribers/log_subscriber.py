@@ -4,69 +4,203 @@
 @FileName: log_subscriber.py
 @DateTime: 2025-12-30 15:30:00
 @Docs: 日志事件订阅者 (Log Event Subscriber).
+
+操作日志由 OperationLogWriter 缓冲：请求路径只做一次入队，后台写入器每 OPERATION_LOG_BATCH_SIZE 条
+或每 OPERATION_LOG_FLUSH_INTERVAL_MS 毫秒以一个事务批量写入，队列满时丢弃并计数。
 """
 
+import asyncio
 import uuid
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import insert
 
+from app.core.config import settings
 from app.core.db import AsyncSessionLocal
+from app.core.enums import StatMetric
 from app.core.event_bus import Event, OperationLogEvent, event_bus
 from app.core.logger import logger
+from app.core.metrics import OPERATION_LOG_EVENTS, OPERATION_LOG_QUEUE_DEPTH
+from app.crud.crud_stat import stat_daily_crud
 from app.models.log import OperationLog
+from app.services.stats_service import StatsService, user_dimension
+
+# 停止后台写入任务的哨兵
+_STOP = object()
 
 
-async def handle_operation_log_event(event: Event) -> None:
-    """处理操作日志事件，写入数据库。
+def build_operation_log_row(event: OperationLogEvent, created_at: datetime) -> dict[str, Any]:
+    """将操作日志事件转换为操作日志表行。
 
     Args:
-        event: 事件对象，需为 OperationLogEvent 类型
+        event: 操作日志事件
+        created_at: 事件入队时间（作为日志创建时间，不受攒批延迟影响）
 
-    Raises:
-        Exception: 数据库操作异常（已记录日志）
+    Returns:
+        dict[str, Any]: 操作日志行数据
     """
-    if not isinstance(event, OperationLogEvent):
-        return
+    # 简单的模块名提取 (例如 /api/v1/users/ -> users)
+    parts = event.path.strip("/").split("/")
+    module = "unknown"
+    if len(parts) >= 3 and parts[0] == "api":
+        module = parts[2]
+
+    user_id: uuid.UUID | None
+    try:
+        user_id = uuid.UUID(event.user_id)
+    except Exception:
+        user_id = None
+
+    return {
+        "user_id": user_id,
+        "username": event.username,
+        "ip": event.ip,
+        "module": module,
+        "summary": f"{event.method} {event.path}",
+        "method": event.method,
+        "path": event.path,
+        "params": event.params,
+        "response_code": event.status_code,
+        "response_result": event.response_result,
+        "duration": event.process_time,
+        "user_agent": event.user_agent,
+        "created_at": created_at,
+    }
+
+
+class OperationLogWriter:
+    """
+    操作日志批量写入器（事件总线接收器）。
+
+    - submit：同步入队，不访问数据库；队列达到上限时丢弃新日志并计数。
+    - 后台任务攒批后以一次批量 INSERT + 一次提交写入，同批日志的当天操作汇总合并为一条 UPSERT。
+    - flush：写出队列中剩余的日志并停止后台任务（下次 submit 时自动重启）。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int | None = None,
+        batch_size: int | None = None,
+        flush_interval_ms: int | None = None,
+    ):
+        """
+        初始化写入器。
 
-    async with AsyncSessionLocal() as session:
+        Args:
+            max_size: 待写入队列上限（默认 OPERATION_LOG_QUEUE_MAX）
+            batch_size: 单次写入的最大日志数（默认 OPERATION_LOG_BATCH_SIZE）
+            flush_interval_ms: 最长攒批时间（毫秒，默认 OPERATION_LOG_FLUSH_INTERVAL_MS）
+        """
+        self.max_size = max(max_size or settings.OPERATION_LOG_QUEUE_MAX, 1)
+        self.batch_size = max(batch_size or settings.OPERATION_LOG_BATCH_SIZE, 1)
+        interval_ms = settings.OPERATION_LOG_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        self.flush_interval = max(interval_ms, 0) / 1000
+        self._queue: asyncio.Queue[Any] | None = None
+        self._task: asyncio.Task | None = None
+        self._dropped = 0
+
+    def submit(self, event: Event) -> None:
+        """入队一条操作日志事件（非操作日志事件直接忽略）。
+
+        Args:
+            event: 事件对象
+        """
+        if not isinstance(event, OperationLogEvent):
+            return
+        queue = self._queue
+        if queue is None or self._task is None or self._task.done():
+            queue = self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run(queue))
+
+        # 队列本身不设上限（保证 flush 时哨兵总能入队），这里按 qsize 限流
+        if queue.qsize() >= self.max_size:
+            self._dropped += 1
+            OPERATION_LOG_EVENTS.labels(result="dropped").inc()
+            return
+        queue.put_nowait((event, datetime.now(UTC)))
+        OPERATION_LOG_QUEUE_DEPTH.set(queue.qsize())
+
+    async def flush(self, timeout: float) -> None:
+        """写出队列中剩余的日志并停止后台任务。
+
+        Args:
+            timeout: 最长等待时间（秒），超时后取消后台任务，剩余日志计为丢弃
+        """
+        task, queue = self._task, self._queue
+        if task is None or task.done() or queue is None:
+            return
+        queue.put_nowait(_STOP)
         try:
-            # 简单的模块名提取 (例如 /api/v1/users/ -> users)
-            parts = event.path.strip("/").split("/")
-            module = "unknown"
-            if len(parts) >= 3 and parts[0] == "api":
-                module = parts[2]
-
-            summary = f"{event.method} {event.path}"
-
-            user_id: uuid.UUID | None
-            try:
-                user_id = uuid.UUID(event.user_id)
-            except Exception:
-                user_id = None
-
-            log = OperationLog(
-                user_id=user_id,
-                username=event.username,
-                ip=event.ip,
-                module=module,
-                summary=summary,
-                method=event.method,
-                path=event.path,
-                params=event.params,
-                response_code=event.status_code,
-                response_result=event.response_result,
-                duration=event.process_time,
-                user_agent=event.user_agent,
-            )
-            session.add(log)
-            await session.commit()
-            logger.debug(f"操作日志已保存: {summary}")
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except TimeoutError:
+            task.cancel()
+            lost = 0
+            while not queue.empty():
+                if queue.get_nowait() is not _STOP:
+                    lost += 1
+            OPERATION_LOG_EVENTS.labels(result="dropped").inc(lost)
+            logger.warning(f"操作日志 flush 超时，未写入 {lost} 条")
+
+    async def _run(self, queue: asyncio.Queue[Any]) -> None:
+        """后台写入循环：攒够 batch_size 条或到达攒批时间即写入一批。"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not (stopping and queue.empty()):
+            item = await queue.get()
+            deadline = loop.time() + self.flush_interval
+            batch: list[tuple[OperationLogEvent, datetime]] = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                if not queue.empty():
+                    item = queue.get_nowait()
+                    continue
+                remaining = deadline - loop.time()
+                if stopping or remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except TimeoutError:
+                    break
+            if batch:
+                await self._write(batch)
+            OPERATION_LOG_QUEUE_DEPTH.set(queue.qsize())
+
+    async def _write(self, batch: list[tuple[OperationLogEvent, datetime]]) -> None:
+        """批量写入一批日志（失败只记录日志，不重试）。"""
+        rows = [build_operation_log_row(event, created_at) for event, created_at in batch]
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(OperationLog), rows)
+                await StatsService(session, stat_daily_crud).record(
+                    StatMetric.OPERATION, [[user_dimension(row["user_id"])] if row["user_id"] else [] for row in rows]
+                )
+                await session.commit()
+            OPERATION_LOG_EVENTS.labels(result="written").inc(len(rows))
+            logger.debug(f"操作日志已批量保存: {len(rows)} 条")
         except Exception as e:
-            logger.error(f"保存操作日志失败: {e}")
+            OPERATION_LOG_EVENTS.labels(result="failed").inc(len(rows))
+            logger.error(f"批量保存操作日志失败 ({len(rows)} 条): {e}")
+
+        if self._dropped:
+            logger.warning(f"操作日志队列已满，已丢弃 {self._dropped} 条")
+            self._dropped = 0
+
+
+# 全局操作日志写入器
+operation_log_writer = OperationLogWriter()
 
 
 def register_log_subscribers() -> None:
     """
     注册日志相关的事件订阅者。应在应用启动时调用。
 
-    将 handle_operation_log_event 注册为 OperationLogEvent 的订阅者。
+    将 operation_log_writer 注册为 OperationLogEvent 的接收器（event_bus.drain 时写出缓冲）。
     """
-    event_bus.subscribe(OperationLogEvent, handle_operation_log_event)
+    event_bus.subscribe_sink(OperationLogEvent, operation_log_writer)
@@ -0,0 +1,375 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: config_diff.py
+@DateTime: 2026-02-12 09:00:00
+@Docs: 配置差异引擎 (Config Diff Engine).
+
+- 行级差异：默认 patience 算法（两侧各只出现一次的行作锚点，最长递增子序列对齐后在锚点间递归），
+  大配置上近线性；无唯一行的小区间回退 difflib，超大区间直接视为整体替换，避免平方级退化。
+  可通过 CONFIG_DIFF_ENGINE 切换为 difflib。
+- unified diff 输出格式与 difflib.unified_diff 一致。
+- 分段差异：按顶格行划分配置段（interface/bgp/acl 等，兼容 Comware/VRP "#" 与 IOS "!" 分隔），
+  逐段报告新增/删除/修改的子命令。
+"""
+
+import difflib
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+# (tag, i1, i2, j1, j2)，与 difflib.SequenceMatcher.get_opcodes 相同
+Opcode = tuple[str, int, int, int, int]
+DiffEngine = Callable[[Sequence[str], Sequence[str]], list[Opcode]]
+
+# 无唯一锚点时回退 difflib 的区间规模上限（两侧行数乘积）
+FALLBACK_MAX_CELLS = 250_000
+
+# 顶格单行命令归入的配置段
+GLOBAL_SECTION = "(global)"
+
+# 配置段分隔行（Comware/VRP 使用 "#"，IOS 使用 "!"）
+_SEPARATORS = frozenset({"#", "!"})
+
+
+# ========== 行级差异 ==========
+
+
+def _opcodes_from_matches(matches: list[tuple[int, int]], a_len: int, b_len: int) -> list[Opcode]:
+    """将有序的逐行匹配对转换为 opcodes。"""
+    codes: list[Opcode] = []
+    i = j = 0
+    k = 0
+    while k <= len(matches):
+        mi, mj = matches[k] if k < len(matches) else (a_len, b_len)
+        if i < mi and j < mj:
+            codes.append(("replace", i, mi, j, mj))
+        elif i < mi:
+            codes.append(("delete", i, mi, j, j))
+        elif j < mj:
+            codes.append(("insert", i, i, j, mj))
+        if k == len(matches):
+            break
+        # 合并连续匹配为一个 equal 块
+        end = k
+        while end + 1 < len(matches) and matches[end + 1] == (matches[end][0] + 1, matches[end][1] + 1):
+            end += 1
+        size = end - k + 1
+        codes.append(("equal", mi, mi + size, mj, mj + size))
+        i, j = mi + size, mj + size
+        k = end + 1
+    return codes
+
+
+def _unique_anchors(a: list[int], b: list[int], alo: int, ahi: int, blo: int, bhi: int) -> list[tuple[int, int]]:
+    """两侧区间内各只出现一次的行，按最长递增子序列（patience sorting）对齐。"""
+    counts: dict[int, list[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.get(a[i])
+        if entry is None:
+            counts[a[i]] = [1, i, 0, -1]
+        else:
+            entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted((entry[1], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[2] == 1)
+    if not pairs:
+        return []
+
+    # 最长递增子序列（按 b 下标），O(k log k)
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    prev: list[int] = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+        prev[idx] = tail_idx[pos - 1] if pos else -1
+    anchors: list[tuple[int, int]] = []
+    idx = tail_idx[-1]
+    while idx != -1:
+        anchors.append(pairs[idx])
+        idx = prev[idx]
+    anchors.reverse()
+    return anchors
+
+
+def patience_opcodes(a: Sequence[str], b: Sequence[str]) -> list[Opcode]:
+    """
+    patience 行级差异。
+
+    Args:
+        a: 旧行列表
+        b: 新行列表
+
+    Returns:
+        list[Opcode]: opcodes
+    """
+    ids: dict[str, int] = {}
+    ai = [ids.setdefault(line, len(ids)) for line in a]
+    bi = [ids.setdefault(line, len(ids)) for line in b]
+
+    matches: list[tuple[int, int]] = []
+    stack = [(0, len(ai), 0, len(bi))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # 公共前缀/后缀
+        while alo < ahi and blo < bhi and ai[alo] == bi[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and ai[ahi - 1] == bi[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(ai, bi, alo, ahi, blo, bhi)
+        if anchors:
+            i, j = alo, blo
+            for ai_, bj_ in anchors:
+                matches.append((ai_, bj_))
+                stack.append((i, ai_, j, bj_))
+                i, j = ai_ + 1, bj_ + 1
+            stack.append((i, ahi, j, bhi))
+        elif (ahi - alo) * (bhi - blo) <= FALLBACK_MAX_CELLS:
+            matcher = difflib.SequenceMatcher(None, ai[alo:ahi], bi[blo:bhi], autojunk=False)
+            for block in matcher.get_matching_blocks():
+                matches.extend((alo + block.a + k, blo + block.b + k) for k in range(block.size))
+        # 否则整体视为替换
+
+    matches.sort()
+    return _opcodes_from_matches(matches, len(ai), len(bi))
+
+
+def difflib_opcodes(a: Sequence[str], b: Sequence[str]) -> list[Opcode]:
+    """difflib 行级差异（最坏情况平方级，仅用于兼容/对比）。"""
+    return difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+
+_ENGINES: dict[str, DiffEngine] = {
+    "patience": patience_opcodes,
+    "difflib": difflib_opcodes,
+}
+
+
+def get_engine(name: str | None = None) -> DiffEngine:
+    """
+    获取差异引擎。
+
+    Args:
+        name: 引擎名称（patience/difflib），默认 CONFIG_DIFF_ENGINE
+
+    Returns:
+        DiffEngine: 差异函数
+
+    Raises:
+        ValueError: 未知引擎名称
+    """
+    name = name or settings.CONFIG_DIFF_ENGINE
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise ValueError(f"未知的差异引擎: {name}") from None
+
+
+# ========== unified diff ==========
+
+
+def normalize_lines(text: str) -> list[str]:
+    """
+    预处理文本行：去除行尾空白与空行（避免无意义变更）。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        list[str]: 规范化后的行列表
+    """
+    return [s for s in (line.rstrip() for line in text.splitlines()) if s]
+
+
+def _grouped_opcodes(codes: list[Opcode], n: int) -> Iterator[list[Opcode]]:
+    """按上下文行数对 opcodes 分组（与 difflib.SequenceMatcher.get_grouped_opcodes 一致）。"""
+    codes = list(codes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > n + n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    """unified diff 区间格式。"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    *,
+    context_lines: int = 3,
+    fromfile: str = "old",
+    tofile: str = "new",
+    engine: str | None = None,
+) -> str:
+    """
+    生成 unified diff（格式与 difflib.unified_diff(lineterm="") 一致）。
+
+    Args:
+        a: 旧行列表
+        b: 新行列表
+        context_lines: 上下文行数
+        fromfile: 旧文件名
+        tofile: 新文件名
+        engine: 差异引擎名称，默认 CONFIG_DIFF_ENGINE
+
+    Returns:
+        str: unified diff 字符串，无差异时为空字符串
+    """
+    out: list[str] = []
+    for group in _grouped_opcodes(get_engine(engine)(a, b), context_lines):
+        if not out:
+            out.append(f"--- {fromfile}")
+            out.append(f"+++ {tofile}")
+        first, last = group[0], group[-1]
+        out.append(f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend("-" + line for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                out.extend("+" + line for line in b[j1:j2])
+    return "\n".join(out)
+
+
+# ========== 分段差异 ==========
+
+
+@dataclass
+class SectionChange:
+    """单个配置段的变更。"""
+
+    section: str
+    change: str  # added / removed / modified
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def parse_sections(lines: Sequence[str]) -> dict[str, list[str]]:
+    """
+    按顶格行划分配置段。
+
+    顶格行为段头，其后缩进行为段内命令；没有子命令的顶格行归入 (global) 段；
+    同名段（如重复出现的 interface）合并。
+
+    Args:
+        lines: 规范化后的配置行
+
+    Returns:
+        dict[str, list[str]]: 段头 -> 段内命令（按出现顺序）
+    """
+    blocks: list[tuple[str, list[str]]] = []
+    current: list[str] | None = None
+    for line in lines:
+        if line.strip() in _SEPARATORS:
+            current = None
+        elif line[:1].isspace():
+            if current is None:
+                current = []
+                blocks.append((GLOBAL_SECTION, current))
+            current.append(line)
+        else:
+            current = []
+            blocks.append((line, current))
+
+    sections: dict[str, list[str]] = {GLOBAL_SECTION: []}
+    for header, body in blocks:
+        if not body and header != GLOBAL_SECTION:
+            sections[GLOBAL_SECTION].append(header)
+        else:
+            sections.setdefault(header, []).extend(body)
+    if not sections[GLOBAL_SECTION]:
+        del sections[GLOBAL_SECTION]
+    return sections
+
+
+def section_diff(a: Sequence[str], b: Sequence[str], *, engine: str | None = None) -> list[SectionChange]:
+    """
+    按配置段比较两份配置。
+
+    Args:
+        a: 旧配置行（规范化后）
+        b: 新配置行（规范化后）
+        engine: 段内差异引擎名称，默认 CONFIG_DIFF_ENGINE
+
+    Returns:
+        list[SectionChange]: 有变更的配置段（新配置中的顺序在前，已删除的段在后）
+    """
+    diff = get_engine(engine)
+    old_sections = parse_sections(a)
+    new_sections = parse_sections(b)
+
+    changes: list[SectionChange] = []
+    for header, new_body in new_sections.items():
+        old_body = old_sections.get(header)
+        if old_body is None:
+            changes.append(SectionChange(section=header, change="added", added=list(new_body)))
+        elif old_body != new_body:
+            change = SectionChange(section=header, change="modified")
+            for tag, i1, i2, j1, j2 in diff(old_body, new_body):
+                if tag != "equal":
+                    change.removed.extend(old_body[i1:i2])
+                    change.added.extend(new_body[j1:j2])
+            changes.append(change)
+    for header, old_body in old_sections.items():
+        if header not in new_sections:
+            changes.append(SectionChange(section=header, change="removed", removed=list(old_body)))
+    return changes
+
+
+def diff_config(old_text: str, new_text: str, *, context_lines: int = 3) -> tuple[str, list[SectionChange]]:
+    """
+    比较两份配置文本：unified diff 与按配置段划分的差异（行先经 normalize_lines 规范化）。
+
+    Args:
+        old_text: 旧配置文本
+        new_text: 新配置文本
+        context_lines: 上下文行数
+
+    Returns:
+        tuple[str, list[SectionChange]]: (unified diff 字符串, 有变更的配置段)
+    """
+    old_lines = normalize_lines(old_text)
+    new_lines = normalize_lines(new_text)
+    return unified_diff(old_lines, new_lines, context_lines=context_lines), section_diff(old_lines, new_lines)
@@ -47,6 +47,36 @@ async def compute_text_md5_async(text: str, *, encoding: str = "utf-8") -> str:
     return await asyncio.to_thread(compute_text_md5, text, encoding=encoding)
 
 
+def compute_text_sha256(text: str, *, encoding: str = "utf-8") -> str:
+    """计算文本的 SHA-256 哈希值（同步版本，用于内容寻址存储）。
+
+    Args:
+        text: 待计算哈希的文本内容。
+        encoding: 文本编码方式，默认 utf-8。
+
+    Returns:
+        文本内容的 SHA-256 十六进制字符串（64 位小写）。
+    """
+    import hashlib
+
+    return hashlib.sha256(text.encode(encoding)).hexdigest()
+
+
+async def compute_text_sha256_async(text: str, *, encoding: str = "utf-8") -> str:
+    """计算文本的 SHA-256 哈希值（异步版本，避免阻塞事件循环）。
+
+    Args:
+        text: 待计算哈希的文本内容。
+        encoding: 文本编码方式，默认 utf-8。
+
+    Returns:
+        文本内容的 SHA-256 十六进制字符串（64 位小写）。
+    """
+    import asyncio
+
+    return await asyncio.to_thread(compute_text_sha256, text, encoding=encoding)
+
+
 def should_skip_backup_save_due_to_unchanged_md5(
     *,
     backup_type: str,
@@ -0,0 +1,116 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: bench_backup_delta.py
+@DateTime: 2026-02-06 09:00:00
+@Docs: 备份差量存储基准测试（500 版本链的存储比例与重建延迟）.
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_backup_delta [--versions 500] [--lines 3000] [--changes 5]
+"""
+
+import argparse
+import random
+import time
+
+from app.utils import backup_codec
+
+
+def build_history(versions: int, lines: int, changes: int, seed: int = 42) -> list[str]:
+    """生成模拟配置历史：每个版本随机修改/新增/删除少量行。"""
+    rng = random.Random(seed)
+    current = []
+    for i in range(lines):
+        if i % 6 == 0:
+            current.append(f"interface GigabitEthernet1/0/{i // 6}\n")
+        elif i % 6 == 5:
+            current.append("!\n")
+        else:
+            current.append(f" description uplink-{i} vlan {rng.randint(1, 4094)}\n")
+
+    history = ["".join(current)]
+    for v in range(1, versions):
+        for _ in range(changes):
+            idx = rng.randrange(len(current))
+            op = rng.random()
+            if op < 0.7:
+                current[idx] = f" description changed-v{v}-{rng.randint(0, 99999)}\n"
+            elif op < 0.85:
+                current.insert(idx, f" switchport access vlan {rng.randint(1, 4094)}\n")
+            elif len(current) > 1:
+                current.pop(idx)
+        history.append("".join(current))
+    return history
+
+
+def encode_chain(history: list[str], interval: int, algorithm: str) -> list[tuple[bytes, bool, int]]:
+    """按快照间隔编码整条历史，返回 (编码数据, 是否差量, 链深度)。"""
+    encoded: list[tuple[bytes, bool, int]] = []
+    depth = 0
+    for i, text in enumerate(history):
+        snapshot = backup_codec.encode_snapshot(text, algorithm)
+        if i > 0 and depth + 1 <= interval:
+            delta = backup_codec.encode_delta(backup_codec.make_delta(history[i - 1], text), algorithm)
+            if len(delta) < len(snapshot):
+                depth += 1
+                encoded.append((delta, True, depth))
+                continue
+        depth = 0
+        encoded.append((snapshot, False, 0))
+    return encoded
+
+
+def reconstruct(encoded: list[tuple[bytes, bool, int]], index: int, algorithm: str) -> str:
+    """从最近快照开始应用差量，重建第 index 个版本。"""
+    start = index - encoded[index][2]
+    text = backup_codec.decode_snapshot(encoded[start][0], algorithm)
+    for data, _, _ in encoded[start + 1 : index + 1]:
+        text = backup_codec.apply_delta(text, backup_codec.decode_delta(data, algorithm))
+    return text
+
+
+def run(versions: int, lines: int, changes: int, intervals: list[int]) -> None:
+    history = build_history(versions, lines, changes)
+    plain_size = sum(len(text.encode("utf-8")) for text in history)
+    algorithms = ["gzip"] + (["zstd"] if backup_codec.zstd_available() else [])
+
+    print(f"版本数={versions} 单版本行数≈{lines} 每版本修改行数={changes}")
+    print(f"明文总大小: {plain_size / 1024 / 1024:.2f} MiB")
+    print(f"{'编码':<12}{'快照间隔':>8}{'存储大小(KiB)':>16}{'压缩比':>10}{'编码耗时(s)':>14}{'最深重建(ms)':>16}")
+
+    for algorithm in algorithms:
+        for interval in intervals:
+            started = time.perf_counter()
+            encoded = encode_chain(history, interval, algorithm)
+            encode_seconds = time.perf_counter() - started
+            stored = sum(len(data) for data, _, _ in encoded)
+
+            deepest = max(range(len(encoded)), key=lambda i: encoded[i][2])
+            started = time.perf_counter()
+            rounds = 5
+            for _ in range(rounds):
+                text = reconstruct(encoded, deepest, algorithm)
+            rebuild_ms = (time.perf_counter() - started) / rounds * 1000
+            assert text == history[deepest], "重建结果与原文不一致"
+
+            label = algorithm if interval == 0 else f"delta+{algorithm}"
+            print(
+                f"{label:<12}{interval:>8}{stored / 1024:>16.1f}{plain_size / stored:>10.1f}"
+                f"{encode_seconds:>14.2f}{rebuild_ms:>16.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="备份差量存储基准测试")
+    parser.add_argument("--versions", type=int, default=500, help="版本数")
+    parser.add_argument("--lines", type=int, default=3000, help="单版本配置行数")
+    parser.add_argument("--changes", type=int, default=5, help="每个版本修改的行数")
+    parser.add_argument(
+        "--intervals", type=int, nargs="+", default=[0, 10, 20, 50], help="快照间隔（0 表示只压缩不差量）"
+    )
+    args = parser.parse_args()
+    run(args.versions, args.lines, args.changes, args.intervals)
+
+
+if __name__ == "__main__":
+    main()
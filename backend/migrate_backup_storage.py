@@ -0,0 +1,192 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: migrate_backup_storage.py
+@DateTime: 2026-02-06 09:00:00
+@Docs: 备份存储迁移脚本 (存量备份转为内容块，并按 BACKUP_STORAGE_MODE 压缩/差量重编码).
+
+用法：
+    python migrate_backup_storage.py --schema             # 为已有库补齐内容块相关表/列/约束
+    python migrate_backup_storage.py --dry-run            # 只统计待迁移数据
+    python migrate_backup_storage.py [--device ID] [--limit N]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from uuid import UUID
+
+from sqlalchemy import func, or_, select, text
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.core.enums import BackupStatus
+from app.core.minio_client import delete_objects_safe
+from app.crud.crud_backup import backup as backup_crud
+from app.models.backup import Backup
+from app.models.backup_blob import BackupBlob
+from app.services.backup_blob_service import BackupBlobService, load_backup_content
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# create_all 不会为已存在的表补列，这里用幂等 DDL 补齐
+SCHEMA_DDL = [
+    "ALTER TABLE ncm_backup ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_ncm_backup_content_hash ON ncm_backup (content_hash)",
+    # 只引用内容块的备份 content/content_path 均为空，旧库的内容约束需放宽（名称含命名约定前缀）
+    "ALTER TABLE ncm_backup DROP CONSTRAINT IF EXISTS ck_ncm_backup_ck_ncm_backup_content",
+    "ALTER TABLE ncm_backup ADD CONSTRAINT ck_ncm_backup_ck_ncm_backup_content "
+    "CHECK (content IS NOT NULL OR content_path IS NOT NULL OR content_hash IS NOT NULL)",
+    "ALTER TABLE ncm_backup_blob ADD COLUMN IF NOT EXISTS content_data BYTEA",
+    "ALTER TABLE ncm_backup_blob ADD COLUMN IF NOT EXISTS content_encoding VARCHAR(20) NOT NULL DEFAULT 'identity'",
+    "ALTER TABLE ncm_backup_blob ADD COLUMN IF NOT EXISTS base_hash VARCHAR(64)",
+    "ALTER TABLE ncm_backup_blob ADD COLUMN IF NOT EXISTS chain_depth INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_ncm_backup_blob_base_hash ON ncm_backup_blob (base_hash)",
+]
+
+
+async def ensure_schema() -> None:
+    """创建内容块表并补齐新增列，放宽备份内容约束。"""
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: BackupBlob.__table__.create(sync_conn, checkfirst=True))
+        for ddl in SCHEMA_DDL:
+            await conn.execute(text(ddl))
+    logger.info("备份存储表结构已就绪")
+
+
+async def _device_ids(device: UUID | None, limit: int | None) -> list[UUID]:
+    if device is not None:
+        return [device]
+    async with AsyncSessionLocal() as db:
+        query = (
+            select(Backup.device_id)
+            .where(Backup.is_deleted.is_(False))
+            .where(Backup.status == BackupStatus.SUCCESS.value)
+            .group_by(Backup.device_id)
+            .order_by(Backup.device_id)
+        )
+        if limit:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+
+async def report(device_ids: list[UUID]) -> None:
+    """统计待迁移数据（不做任何修改）。"""
+    async with AsyncSessionLocal() as db:
+        legacy = await db.execute(
+            select(func.count())
+            .select_from(Backup)
+            .where(Backup.device_id.in_(device_ids))
+            .where(Backup.is_deleted.is_(False))
+            .where(Backup.content_hash.is_(None))
+            .where(or_(Backup.content.isnot(None), Backup.content_path.isnot(None)))
+        )
+        encodings = await db.execute(
+            select(BackupBlob.content_encoding, func.count(), func.sum(BackupBlob.content_size)).group_by(
+                BackupBlob.content_encoding
+            )
+        )
+        logger.info("设备数=%d，待转为内容块的存量备份=%d", len(device_ids), legacy.scalar() or 0)
+        for encoding, count, size in encodings.all():
+            logger.info("内容块编码 %s：%d 个，原文合计 %d 字节", encoding, count, size or 0)
+
+
+async def migrate_device(device_id: UUID) -> tuple[int, int]:
+    """
+    按时间顺序迁移单台设备的备份历史（单事务，提交后删除旧 MinIO 对象）。
+
+    Args:
+        device_id: 设备 ID
+
+    Returns:
+        tuple[int, int]: (转为内容块的存量备份数, 处理的内容块版本数)
+    """
+    converted = 0
+    versions = 0
+    obsolete: list[str] = []
+    async with AsyncSessionLocal() as db:
+        service = BackupBlobService(db, backup_crud)
+        result = await db.execute(
+            select(Backup)
+            .where(Backup.device_id == device_id)
+            .where(Backup.is_deleted.is_(False))
+            .where(Backup.status == BackupStatus.SUCCESS.value)
+            .order_by(Backup.created_at.asc())
+        )
+        prev_hash: str | None = None
+        for row in result.scalars().all():
+            if row.content_hash is None:
+                content = await load_backup_content(db, row)
+                if content is None:
+                    continue
+                if row.content_path:
+                    obsolete.append(row.content_path)
+                row.content_hash = await service.store(content)
+                row.content = None
+                row.content_path = None
+                converted += 1
+
+            if row.content_hash != prev_hash:
+                obsolete.extend(await service.reencode(row.content_hash, prev_hash))
+                versions += 1
+                prev_hash = row.content_hash
+
+        await db.commit()
+
+    if obsolete:
+        await delete_objects_safe(obsolete)
+    return converted, versions
+
+
+async def migrate(device_ids: list[UUID]) -> None:
+    total_converted = 0
+    total_versions = 0
+    for idx, device_id in enumerate(device_ids, start=1):
+        try:
+            converted, versions = await migrate_device(device_id)
+        except Exception as e:
+            logger.error("设备 %s 迁移失败: %s", device_id, e)
+            continue
+        total_converted += converted
+        total_versions += versions
+        if idx % 100 == 0:
+            logger.info("已迁移 %d/%d 台设备", idx, len(device_ids))
+    logger.info(
+        "迁移完成：设备=%d，存量备份转换=%d，内容块版本=%d（模式=%s）",
+        len(device_ids),
+        total_converted,
+        total_versions,
+        settings.BACKUP_STORAGE_MODE,
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.schema:
+        await ensure_schema()
+        return
+    device_ids = await _device_ids(UUID(args.device) if args.device else None, args.limit)
+    if args.dry_run:
+        await report(device_ids)
+        return
+    await migrate(device_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="备份存储迁移脚本（内容块去重 + 压缩/差量编码）")
+    parser.add_argument("--schema", action="store_true", help="只补齐表结构（新增表/列/索引）")
+    parser.add_argument("--dry-run", action="store_true", help="只统计待迁移数据，不做修改")
+    parser.add_argument("--device", help="只迁移指定设备 ID")
+    parser.add_argument("--limit", type=int, help="最多迁移的设备数")
+    args = parser.parse_args()
+
+    if not settings.BACKUP_DEDUP_ENABLED and not args.schema:
+        logger.error("BACKUP_DEDUP_ENABLED 未开启，迁移后新备份仍写旧格式，已中止")
+        sys.exit(1)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: migrate_stats_rollup.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总迁移脚本 (创建汇总表与重算索引，并按源表回填历史汇总).
+
+重算任务按 created_at 范围扫描日志/告警/备份表，已有库需先补齐 created_at 索引，
+否则每次重算都会全表扫描。
+
+用法：
+    python migrate_stats_rollup.py --schema         # 创建汇总表并补齐 created_at 索引
+    python migrate_stats_rollup.py [--days N]       # 按源表回填最近 N 天汇总（默认 STATS_ROLLUP_RECOMPUTE_DAYS）
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, engine
+from app.crud.crud_stat import stat_daily_crud
+from app.models.stat_daily import StatDaily
+from app.services.stats_service import StatsService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# create_all 不会为已存在的表补索引，这里用幂等 DDL 补齐（登录/操作日志的 created_at 已有索引）
+SCHEMA_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_ncm_backup_created_at ON ncm_backup (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_ncm_alert_created_at ON ncm_alert (created_at)",
+]
+
+
+async def ensure_schema() -> None:
+    """创建汇总表并补齐重算使用的索引。"""
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: StatDaily.__table__.create(sync_conn, checkfirst=True))
+        for ddl in SCHEMA_DDL:
+            await conn.execute(text(ddl))
+    logger.info("每日统计汇总表结构已就绪")
+
+
+async def backfill(days: int) -> None:
+    """按源表重算最近 days 天（含今天）的汇总。"""
+    async with AsyncSessionLocal() as db:
+        rows = await StatsService(db, stat_daily_crud).compact(days)
+    logger.info("汇总回填完成：天数=%d，汇总行=%s", days, rows)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.schema:
+        await ensure_schema()
+        return
+    await backfill(args.days or settings.STATS_ROLLUP_RECOMPUTE_DAYS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="每日统计汇总迁移脚本（汇总表/索引 + 历史回填）")
+    parser.add_argument("--schema", action="store_true", help="只补齐表结构（汇总表与 created_at 索引）")
+    parser.add_argument("--days", type=int, help="回填天数（含今天）")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
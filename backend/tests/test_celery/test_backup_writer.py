@@ -0,0 +1,183 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_backup_writer.py
+@DateTime: 2026-02-03 10:30:00
+@Docs: 流式备份写入器单元测试.
+"""
+
+from uuid import uuid4
+
+import pytest
+from nornir.core.task import Result
+
+import app.celery.tasks.backup_writer as writer_module
+from app.celery.tasks.backup_writer import BackupRecord, BackupStreamWriter, record_from_result
+from app.core.enums import BackupStatus, BackupType
+from app.core.exceptions import OTPRequiredException
+
+
+class FakeSession:
+    def __init__(self, *, fail_batch: bool = False) -> None:
+        self.added: list[object] = []
+        self.commits: list[int] = []
+        self.rollbacks = 0
+        self.fail_batch = fail_batch
+        self._pending: list[object] = []
+
+    def add(self, obj: object) -> None:
+        self._pending.append(obj)
+
+    def add_all(self, objs: list[object]) -> None:
+        self._pending.extend(objs)
+
+    async def commit(self) -> None:
+        if self.fail_batch and len(self._pending) > 1:
+            raise RuntimeError("batch failed")
+        self.commits.append(len(self._pending))
+        self.added.extend(self._pending)
+        self._pending = []
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+        self._pending = []
+
+
+class FakeSessionFactory:
+    def __init__(self, session: FakeSession) -> None:
+        self.session = session
+
+    def __call__(self) -> "FakeSessionFactory":
+        return self
+
+    async def __aenter__(self) -> FakeSession:
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class FakeBlobService:
+    calls: list[list[str]] = []
+
+    def __init__(self, db, backup_crud) -> None:
+        self.db = db
+        self.placed_objects: list[str] = []
+
+    async def store_many(self, contents: list[str], device_ids: list | None = None) -> list[str]:
+        FakeBlobService.calls.append(list(contents))
+        self.placed_objects.extend(f"blobs/{len(FakeBlobService.calls)}-{c}" for c in contents)
+        return [f"h-{c}" for c in contents]
+
+
+class DummyHost:
+    name = "h1"
+    data: dict = {}
+
+
+def test_record_from_result_pops_config() -> None:
+    payload = {"success": True, "config": "hostname sw1"}
+    result = Result(host=DummyHost(), result=payload)  # type: ignore[arg-type]
+
+    record = record_from_result("d1", result, operator_id="u1")
+
+    assert record is not None
+    assert record.status == BackupStatus.SUCCESS
+    assert record.config == "hostname sw1"
+    assert record.operator_id == "u1"
+    assert "config" not in payload
+
+
+def test_record_from_result_failed_and_otp() -> None:
+    failed = Result(host=DummyHost(), exception=RuntimeError("timeout"), failed=True)  # type: ignore[arg-type]
+    record = record_from_result("d1", failed)
+    assert record is not None
+    assert record.status == BackupStatus.FAILED
+    assert record.error_message == "timeout"
+
+    otp = Result(host=DummyHost(), result={"success": False, "otp_required": True}, failed=True)  # type: ignore[arg-type]
+    assert record_from_result("d1", otp) is None
+
+    otp_exc = Result(
+        host=DummyHost(),  # type: ignore[arg-type]
+        exception=OTPRequiredException(dept_id=uuid4(), device_group="core", failed_devices=[]),
+        failed=True,
+    )
+    assert record_from_result("d1", otp_exc) is None
+
+
+@pytest.mark.asyncio
+async def test_writer_commits_fixed_size_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(writer_module.settings, "BACKUP_DEDUP_ENABLED", False)
+    session = FakeSession()
+    monkeypatch.setattr(writer_module, "AsyncSessionLocal", FakeSessionFactory(session))
+    records = [BackupRecord(device_id=str(uuid4()), status=BackupStatus.SUCCESS, config=f"cfg {i}") for i in range(5)]
+    records.append(BackupRecord(device_id=str(uuid4()), status=BackupStatus.FAILED, error_message="x"))
+
+    async with BackupStreamWriter(backup_type=BackupType.SCHEDULED, batch_size=2, queue_size=1) as writer:
+        for r in records:
+            await writer.submit(r)
+
+    assert writer.summary() == {"success": 5, "failed": 1, "total": 6, "saved": 6, "skipped": 0}
+    assert [c for c in session.commits if c] == [2, 2, 2]
+    assert all(r.config is None for r in records)
+    assert {b.backup_type for b in session.added} == {BackupType.SCHEDULED.value}
+
+
+@pytest.mark.asyncio
+async def test_writer_falls_back_to_row_inserts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(writer_module.settings, "BACKUP_DEDUP_ENABLED", False)
+    session = FakeSession(fail_batch=True)
+    monkeypatch.setattr(writer_module, "AsyncSessionLocal", FakeSessionFactory(session))
+
+    async with BackupStreamWriter(backup_type="scheduled", batch_size=3) as writer:
+        for i in range(3):
+            await writer.submit(BackupRecord(device_id=str(uuid4()), status=BackupStatus.SUCCESS, config=f"c{i}"))
+
+    assert session.rollbacks == 1
+    assert writer.saved_count == 3
+    assert len(session.added) == 3
+
+
+@pytest.mark.asyncio
+async def test_writer_stores_dedup_blobs_per_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(writer_module.settings, "BACKUP_DEDUP_ENABLED", True)
+    monkeypatch.setattr(writer_module, "BackupBlobService", FakeBlobService)
+    FakeBlobService.calls = []
+    session = FakeSession()
+    monkeypatch.setattr(writer_module, "AsyncSessionLocal", FakeSessionFactory(session))
+
+    async with BackupStreamWriter(backup_type=BackupType.SCHEDULED, batch_size=3) as writer:
+        for cfg in ("same", "same", "other"):
+            await writer.submit(BackupRecord(device_id=str(uuid4()), status=BackupStatus.SUCCESS, config=cfg))
+        await writer.submit(BackupRecord(device_id=str(uuid4()), status=BackupStatus.FAILED, error_message="x"))
+
+    assert FakeBlobService.calls == [["same", "same", "other"]]
+    hashes = [b.content_hash for b in session.added]
+    assert hashes == ["h-same", "h-same", "h-other", None]
+    assert all(b.content is None and b.content_path is None for b in session.added)
+
+
+@pytest.mark.asyncio
+async def test_writer_deletes_objects_of_rolled_back_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(writer_module.settings, "BACKUP_DEDUP_ENABLED", True)
+    monkeypatch.setattr(writer_module, "BackupBlobService", FakeBlobService)
+    FakeBlobService.calls = []
+    deleted: list[str] = []
+
+    async def _delete(names: list[str]) -> list[str]:
+        deleted.extend(names)
+        return []
+
+    monkeypatch.setattr(writer_module, "delete_objects_safe", _delete)
+    session = FakeSession(fail_batch=True)
+    monkeypatch.setattr(writer_module, "AsyncSessionLocal", FakeSessionFactory(session))
+
+    async with BackupStreamWriter(backup_type=BackupType.SCHEDULED, batch_size=2) as writer:
+        for cfg in ("a", "b"):
+            await writer.submit(BackupRecord(device_id=str(uuid4()), status=BackupStatus.SUCCESS, config=cfg))
+
+    # 整批回滚的对象被删除，逐条重试提交的对象保留
+    assert deleted == ["blobs/1-a", "blobs/1-b"]
+    assert FakeBlobService.calls == [["a", "b"], ["a"], ["b"]]
+    assert writer.saved_count == 2
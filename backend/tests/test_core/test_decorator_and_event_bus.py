@@ -86,6 +86,32 @@ async def test_transactional_rollback_on_exception() -> None:
     assert session.rollback_count == 1
 
 
+@pytest.mark.asyncio
+async def test_transactional_rollback_discards_post_commit_tasks() -> None:
+    session = DummySession()
+    called = {"task": 0}
+
+    class Svc:
+        def __init__(self) -> None:
+            self.db = session
+            self._post_commit_tasks = []
+
+        @transactional()
+        async def fn(self) -> None:
+            async def task() -> None:
+                called["task"] += 1
+
+            self._post_commit_tasks.append(task)
+            raise ValueError("x")
+
+    svc = Svc()
+    with pytest.raises(ValueError):
+        await svc.fn()
+
+    assert called["task"] == 0
+    assert svc._post_commit_tasks == []
+
+
 @pytest.mark.asyncio
 async def test_with_db_retry_retries_then_success(monkeypatch: pytest.MonkeyPatch) -> None:
     async def no_sleep(_: float) -> None:
@@ -174,3 +200,34 @@ async def test_event_bus_drain_timeout() -> None:
     await bus.drain(timeout=0.0)
     # 再等一次，避免遗留 pending task
     await bus.drain(timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_event_bus_sink_submits_inline_and_flushes_on_drain() -> None:
+    bus = EventBus()
+
+    class MyEvent(Event):
+        pass
+
+    class Sink:
+        def __init__(self) -> None:
+            self.submitted: list[Event] = []
+            self.flushed: list[float] = []
+
+        def submit(self, event: Event) -> None:
+            self.submitted.append(event)
+
+        async def flush(self, timeout: float) -> None:
+            self.flushed.append(timeout)
+
+    sink = Sink()
+    bus.subscribe_sink(MyEvent, sink)
+    bus.subscribe_sink(MyEvent, sink)
+
+    await bus.publish(MyEvent())
+    # 接收器同步入队，不创建任务
+    assert len(sink.submitted) == 1
+    assert not bus._pending_tasks
+
+    await bus.drain(timeout=1.0)
+    assert len(sink.flushed) == 1
@@ -0,0 +1,118 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_principal_cache.py
+@DateTime: 2026-02-10 18:00:00
+@Docs: 认证主体缓存测试.
+"""
+
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.core import cache as cache_module
+from app.core import principal_cache
+from app.core.config import settings
+from app.core.principal_cache import Principal, PrincipalRevokedError
+from app.core.token_store import revoke_user_access_now
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.ops: list[tuple[str, tuple[Any, ...]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def hset(self, key: str, field: str, value: str) -> None:
+        self.ops.append(("hset", (key, field, value)))
+
+    def expire(self, key: str, ttl: int) -> None:
+        self.ops.append(("expire", (key, ttl)))
+
+    async def execute(self) -> None:
+        for name, args in self.ops:
+            if name == "hset":
+                key, field, value = args
+                self.client.store.setdefault(key, {})[field] = value
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, dict[str, str]] = {}
+
+    async def hmget(self, key: str, fields: list[str]) -> list[str | None]:
+        return [self.store.get(key, {}).get(field) for field in fields]
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.store.pop(key, None)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+def _principal() -> Principal:
+    return Principal(
+        id=uuid4(),
+        username="ops",
+        is_active=True,
+        is_superuser=False,
+        dept_id=None,
+        data_scope="SELF",
+        permissions=frozenset({"device:list"}),
+    )
+
+
+async def test_principal_redis_roundtrip_and_revocation(monkeypatch: pytest.MonkeyPatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache_module, "redis_client", fake)
+    principal = _principal()
+
+    await principal_cache.cache_principal(principal, 1000)
+    # 模拟其他进程：清除进程内缓存后从 Redis 读取
+    principal_cache._local_cache.discard_users({str(principal.id)})
+    assert await principal_cache.get_cached_principal(principal.id, 1000) == principal
+    assert await principal_cache.get_cached_principal(principal.id, 2000) is None
+
+    await principal_cache.mark_principals_revoked([principal.id], 1500)
+    with pytest.raises(PrincipalRevokedError):
+        await principal_cache.get_cached_principal(principal.id, 1000)
+
+    # 失效后新签发的 Token 可正常缓存
+    await principal_cache.cache_principal(principal, 2000)
+    principal_cache._local_cache.discard_users({str(principal.id)})
+    assert await principal_cache.get_cached_principal(principal.id, 2000) == principal
+
+    await cache_module.invalidate_user_permissions_cache([principal.id])
+    assert fake.store == {}
+    assert await principal_cache.get_cached_principal(principal.id, 2000) is None
+
+
+async def test_authenticated_requests_skip_database_on_cache_hit(
+    client: AsyncClient, auth_headers: dict, async_engine, test_superuser
+):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    url = f"{settings.API_V1_STR}/permissions/"
+    assert (await client.get(url, headers=auth_headers)).status_code == 200
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        assert (await client.get(url, headers=auth_headers)).status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _record)
+    assert statements == []
+
+    await revoke_user_access_now(user_id=str(test_superuser.id))
+    assert (await client.get(url, headers=auth_headers)).status_code == 401
@@ -0,0 +1,85 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_crud_discovery.py
+@DateTime: 2026-02-09 09:00:00
+@Docs: 发现记录 CMDB 对账测试.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import DeviceGroup, DeviceStatus, DeviceVendor, DiscoveryStatus
+from app.crud.crud_discovery import discovery_crud
+from app.models.device import Device
+from app.models.discovery import Discovery
+
+
+def _device(ip: str, *, status: DeviceStatus = DeviceStatus.ACTIVE) -> Device:
+    return Device(
+        name=f"sw-{ip}",
+        ip_address=ip,
+        vendor=DeviceVendor.H3C,
+        device_group=DeviceGroup.ACCESS,
+        status=status,
+        ssh_port=22,
+    )
+
+
+def _discovery(ip: str, status: DiscoveryStatus, *, offline_days: int = 0) -> Discovery:
+    now = datetime.now()
+    return Discovery(
+        ip_address=ip,
+        first_seen_at=now,
+        last_seen_at=now,
+        offline_days=offline_days,
+        status=status.value,
+    )
+
+
+async def test_reconcile_with_cmdb_transitions_only_changed_rows(db_session: AsyncSession):
+    devices = [_device("10.0.0.1"), _device("10.0.0.2"), _device("10.0.0.3")]
+    db_session.add_all(devices)
+    await db_session.flush()
+
+    pending = _discovery("10.0.0.1", DiscoveryStatus.PENDING)
+    already = _discovery("10.0.0.2", DiscoveryStatus.MATCHED)
+    already.matched_device_id = devices[1].id
+    stray = _discovery("10.9.9.9", DiscoveryStatus.PENDING)
+    known_shadow = _discovery("10.9.9.8", DiscoveryStatus.SHADOW)
+    db_session.add_all([pending, already, stray, known_shadow])
+    await db_session.commit()
+
+    result = await discovery_crud.reconcile_with_cmdb(db_session)
+
+    assert (result.total_discovered, result.total_cmdb) == (4, 3)
+    assert (result.matched, result.shadow, result.offline) == (2, 2, 1)
+    assert result.matched_ids == [pending.id]
+    assert result.shadow_ids == [stray.id]
+
+    await db_session.refresh(pending)
+    assert pending.status == DiscoveryStatus.MATCHED.value and pending.matched_device_id == devices[0].id
+
+    again = await discovery_crud.reconcile_with_cmdb(db_session)
+    assert again.matched_ids == [] and again.shadow_ids == []
+
+
+async def test_get_offline_devices_single_query(db_session: AsyncSession):
+    db_session.add_all(
+        [
+            _device("10.0.1.1"),
+            _device("10.0.1.2"),
+            _device("10.0.1.3"),
+            _device("10.0.1.4", status=DeviceStatus.IN_USE),
+            _discovery("10.0.1.1", DiscoveryStatus.MATCHED, offline_days=9),
+            _discovery("10.0.1.2", DiscoveryStatus.MATCHED, offline_days=1),
+        ]
+    )
+    await db_session.commit()
+
+    rows = await discovery_crud.get_offline_devices(
+        db_session, device_status=DeviceStatus.ACTIVE.value, days_threshold=7
+    )
+
+    assert {(r["ip_address"], r["offline_days"]) for r in rows} == {("10.0.1.1", 9), ("10.0.1.3", -1)}
@@ -0,0 +1,159 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_async_runner.py
+@DateTime: 2026-02-08 09:00:00
+@Docs: 异步运行器并发调度测试 (分组/部门/跳板机限流与 AIMD 自适应并发).
+"""
+
+import asyncio
+from collections import defaultdict
+from contextlib import aclosing
+from types import SimpleNamespace
+
+from scrapli.exceptions import ScrapliAuthenticationFailed
+
+from app.network.async_runner import AdaptiveConcurrency, AsyncRunner, ConcurrencyScheduler
+
+
+def _host(name: str, **data) -> SimpleNamespace:
+    return SimpleNamespace(name=name, data=data)
+
+
+async def test_scheduler_enforces_keyed_limits():
+    hosts = {
+        f"h{i}": _host(f"h{i}", device_group="access" if i < 6 else "core", dept_id="d1", jump_host=f"j{i % 2}")
+        for i in range(8)
+    }
+    running: dict[str, int] = defaultdict(int)
+    peak: dict[str, int] = defaultdict(int)
+
+    async def _task(host):
+        keys = [f"group:{host.data['device_group']}", f"jump:{host.data['jump_host']}", "dept", "global"]
+        for key in keys:
+            running[key] += 1
+            peak[key] = max(peak[key], running[key])
+        await asyncio.sleep(0.01)
+        for key in keys:
+            running[key] -= 1
+        return {"success": True}
+
+    scheduler = ConcurrencyScheduler(10, group_limit=2, dept_limit=3, jump_host_limit=2)
+    results = await AsyncRunner(scheduler=scheduler)._run_async(_task, hosts)  # pyright: ignore[reportArgumentType]
+
+    assert len(results) == 8 and not results.failed
+    assert peak["group:access"] == 2
+    assert peak["dept"] == 3
+    assert peak["jump:j0"] <= 2 and peak["jump:j1"] <= 2
+    assert peak["global"] <= 3
+
+
+async def test_adaptive_window_backs_off_and_ramps_up():
+    window = AdaptiveConcurrency(20, min_limit=2, initial=4, cooldown=60)
+
+    for _ in range(4):
+        await window.acquire()
+        await window.release(0.1)
+    assert window.current == 8  # 慢启动阶段每次成功 +1
+
+    await window.acquire()
+    await window.release(congested=True)
+    await window.acquire()
+    await window.release(congested=True)
+    assert window.current == 4 and window.decreases == 1  # 冷却期内只减小一次
+
+    for _ in range(8):
+        await window.acquire()
+        await window.release(0.1)
+    assert window.current == 5  # 拥塞后每轮（约 window 次成功）+1
+    assert window.in_flight == 0
+
+
+async def test_adaptive_window_reacts_to_latency_spike_and_auth_failure():
+    window = AdaptiveConcurrency(10, min_limit=1, initial=10, cooldown=0)
+    for _ in range(6):
+        await window.acquire()
+        await window.release(0.1)
+    await window.acquire()
+    await window.release(1.0)
+    assert window.current == 5
+
+    scheduler = ConcurrencyScheduler(10, adaptive=window)
+    calls = 0
+
+    async def _task(host):
+        nonlocal calls
+        calls += 1
+        raise ScrapliAuthenticationFailed("tacacs timeout")
+
+    results = await AsyncRunner(scheduler=scheduler)._run_async(  # pyright: ignore[reportArgumentType]
+        _task, {"a": _host("a"), "b": _host("b")}
+    )
+    assert calls == 2 and results.failed
+    assert window.current == 1 and window.in_flight == 0
+
+
+async def test_iter_streams_results_with_bounded_workers():
+    created = 0
+    in_flight = 0
+    peak = 0
+
+    def _hosts():
+        nonlocal created
+        for i in range(200):
+            created += 1
+            yield _host(f"h{i}")
+
+    async def _task(host):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return {"success": True}
+
+    runner = AsyncRunner(scheduler=ConcurrencyScheduler(4))
+    seen = []
+    async for host_name, result in runner.iter_async(_task, _hosts()):  # pyright: ignore[reportArgumentType]
+        assert not result.failed
+        seen.append(host_name)
+        # 主机按需拉取：已创建的主机数不超过已产出数 + worker 数 + 队列容量
+        assert created <= len(seen) + 4 + 4 + 1
+    assert sorted(seen) == sorted(f"h{i}" for i in range(200))
+    assert peak <= 4
+
+
+async def test_iter_early_exit_cancels_workers():
+    started: list[str] = []
+
+    async def _task(host):
+        started.append(host.name)
+        await asyncio.sleep(0 if host.name == "h0" else 10)
+        return {"success": True}
+
+    runner = AsyncRunner(scheduler=ConcurrencyScheduler(2))
+    hosts = [_host(f"h{i}") for i in range(10)]
+    async with aclosing(runner.iter_async(_task, hosts)) as stream:  # pyright: ignore[reportArgumentType]
+        async for host_name, _ in stream:
+            assert host_name == "h0"
+            break
+    assert len(started) <= 3
+    assert all(t.done() for t in asyncio.all_tasks() if t is not asyncio.current_task())
+
+
+async def test_iter_defers_hosts_whose_key_is_saturated():
+    started: list[str] = []
+
+    async def _task(host):
+        started.append(host.name)
+        await asyncio.sleep(0.01)
+        return {"success": True}
+
+    # 同一部门（上限 1）的设备排在前面，其它部门的设备不应被阻塞在后面
+    hosts = [_host(f"a{i}", dept_id="d1") for i in range(4)] + [_host(f"b{i}", dept_id=f"d{i + 2}") for i in range(3)]
+    runner = AsyncRunner(scheduler=ConcurrencyScheduler(4, dept_limit=1))
+    seen = [name async for name, _ in runner.iter_async(_task, hosts)]  # pyright: ignore[reportArgumentType]
+
+    assert sorted(seen) == sorted(h.name for h in hosts)
+    assert set(started[:4]) == {"a0", "b0", "b1", "b2"}
+    assert started[4:] == ["a1", "a2", "a3"]
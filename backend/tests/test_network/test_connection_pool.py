@@ -0,0 +1,145 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_connection_pool.py
+@DateTime: 2026-02-08 14:00:00
+@Docs: Scrapli 连接池借出/归还测试 (Connection Pool Checkout/Checkin Tests).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.network import connection_pool as pool_module
+from app.network.connection_pool import AsyncConnectionPool
+
+
+class FakeScrapli:
+    opened = 0
+
+    def __init__(self, **kwargs) -> None:
+        self.host = kwargs["host"]
+        self.closed = False
+        self.sent: list[str] = []
+
+    async def open(self) -> None:
+        FakeScrapli.opened += 1
+        await asyncio.sleep(0)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def get_prompt(self) -> str:
+        self.sent.append("<prompt>")
+        return "<sw>"
+
+    async def send_command(self, command: str, timeout_ops: float | None = None) -> SimpleNamespace:
+        self.sent.append(command)
+        return SimpleNamespace(result="", failed=False)
+
+
+@pytest.fixture(autouse=True)
+def fake_scrapli(monkeypatch):
+    FakeScrapli.opened = 0
+    monkeypatch.setattr(pool_module, "AsyncScrapli", FakeScrapli)
+
+
+def _acquire(pool: AsyncConnectionPool, host: str = "10.0.0.1"):
+    return pool.acquire(host=host, username="admin", password="x", platform="cisco_iosxe")
+
+
+async def test_sessions_are_checked_out_exclusively_and_waiters_are_woken():
+    pool = AsyncConnectionPool(max_connections=10, max_sessions_per_key=2, acquire_timeout=5)
+    active: set[int] = set()
+    overlaps = 0
+
+    async def _job():
+        nonlocal overlaps
+        async with await _acquire(pool) as conn:
+            if id(conn) in active:
+                overlaps += 1
+            active.add(id(conn))
+            await asyncio.sleep(0.01)
+            active.discard(id(conn))
+
+    await asyncio.gather(*(_job() for _ in range(6)))
+
+    assert overlaps == 0
+    assert FakeScrapli.opened == 2
+    stats = pool.stats()
+    assert stats["size"] == 2 and stats["in_use"] == 0 and stats["idle"] == 2 and stats["waiters"] == 0
+
+
+async def test_lru_eviction_never_closes_busy_sessions():
+    pool = AsyncConnectionPool(max_connections=2, max_sessions_per_key=1, acquire_timeout=0.05)
+
+    busy_ctx = await _acquire(pool, "10.0.0.1")
+    busy = await busy_ctx.__aenter__()
+    async with await _acquire(pool, "10.0.0.2") as idle:
+        pass
+
+    async with await _acquire(pool, "10.0.0.3") as fresh:
+        assert idle.closed and not busy.closed
+
+    # 全池只剩借出中的会话与 10.0.0.3 的会话，10.0.0.4 淘汰空闲的 10.0.0.3
+    async with await _acquire(pool, "10.0.0.4"):
+        assert fresh.closed and not busy.closed
+
+    # 单设备会话已借出且不能新建：等待超时
+    with pytest.raises(TimeoutError):
+        await _acquire(pool, "10.0.0.1")
+
+    await busy_ctx.__aexit__(None, None, None)
+    async with await _acquire(pool, "10.0.0.1") as reused:
+        assert reused is busy
+
+
+async def test_failed_session_is_discarded_and_close_waits_for_checkin():
+    pool = AsyncConnectionPool(max_connections=4, max_sessions_per_key=1, acquire_timeout=1)
+
+    with pytest.raises(ValueError):
+        async with await _acquire(pool) as broken:
+            raise ValueError("boom")
+    assert broken.closed and pool.size == 0
+
+    ctx = await _acquire(pool)
+    conn = await ctx.__aenter__()
+    await pool.close()
+    assert not conn.closed
+    await ctx.__aexit__(None, None, None)
+    assert conn.closed and pool.size == 0
+    with pytest.raises(RuntimeError):
+        await _acquire(pool)
+
+
+async def test_warm_session_skips_prompt_and_paging_setup():
+    pool = AsyncConnectionPool(max_connections=4, max_sessions_per_key=1, health_check=False)
+
+    ctx = await _acquire(pool)
+    async with ctx as conn:
+        assert await ctx.warm_up("cisco_iosxe") == "<sw>"
+    first_round = list(conn.sent)
+    assert first_round[0] == "<prompt>" and len(first_round) == 2
+
+    ctx = await _acquire(pool)
+    async with ctx as conn:
+        assert ctx.reused
+        assert await ctx.warm_up("cisco_iosxe") == "<sw>"
+    assert conn.sent == first_round
+    assert pool.stats()["saved_round_trips"] == 2
+
+    # 配置下发后清空状态，下一次使用重新预热
+    ctx = await _acquire(pool)
+    async with ctx as conn:
+        ctx.invalidate_state()
+        await ctx.warm_up("cisco_iosxe")
+    assert conn.sent == first_round * 2
+
+    # 丢弃重建的会话从冷状态开始
+    with pytest.raises(ValueError):
+        async with await _acquire(pool):
+            raise ValueError("boom")
+    ctx = await _acquire(pool)
+    async with ctx as conn:
+        assert not ctx.reused and ctx.state.prompt is None
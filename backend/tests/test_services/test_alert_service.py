@@ -0,0 +1,106 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_alert_service.py
+@DateTime: 2026-02-11 14:00:00
+@Docs: 告警批量创建与集合式去重测试.
+"""
+
+from uuid import uuid4
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import cache as cache_module
+from app.core.enums import AlertType
+from app.crud.crud_alert import alert_crud
+from app.models.alert import Alert
+from app.schemas.alert import AlertCreate
+from app.services.alert_service import AlertService
+
+
+def _offline(device_id=None, discovery_id=None) -> AlertCreate:
+    return AlertCreate(
+        alert_type=AlertType.DEVICE_OFFLINE,
+        title="设备离线",
+        related_device_id=device_id,
+        related_discovery_id=discovery_id,
+    )
+
+
+async def test_bulk_create_matches_single_create_dedup(db_session: AsyncSession):
+    service = AlertService(db_session, alert_crud)
+    device_id, discovery_id = uuid4(), uuid4()
+    existing = await service.create_alert(_offline(device_id, discovery_id))
+
+    alerts_in = [
+        _offline(device_id, discovery_id),  # 完全相同
+        _offline(device_id),  # 只指定设备：匹配任意发现记录
+        _offline(device_id, uuid4()),  # 发现记录不同：新建
+        _offline(uuid4(), None),  # 新建
+        _offline(None, discovery_id),  # 只指定发现记录：命中
+    ]
+    alerts_in.append(alerts_in[3])  # 同批重复：只创建一条
+    result = await service.create_alerts_bulk(alerts_in)
+
+    assert result.existing_ids[:3] == [existing.id, existing.id, existing.id]
+    assert len(result.created_ids) == 2
+    assert result.existing_ids[3] == result.created_ids[1]
+    assert (await db_session.execute(select(func.count()).select_from(Alert))).scalar() == 3
+
+    # 已关闭的告警不参与去重
+    await service.close_alert(existing.id)
+    again = await service.create_alerts_bulk([_offline(device_id, discovery_id)])
+    assert len(again.created_ids) == 1
+
+
+async def test_bulk_create_uses_constant_statements(db_session: AsyncSession, async_engine):
+    service = AlertService(db_session, alert_crud)
+    await service.create_alerts_bulk([_offline(discovery_id=uuid4()) for _ in range(10)])
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args) -> None:
+        if not statement.startswith(("BEGIN", "COMMIT", "SAVEPOINT", "RELEASE")):
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        result = await service.create_alerts_bulk([_offline(discovery_id=uuid4()) for _ in range(100)])
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _record)
+
+    assert len(result.created_ids) == 100
+    # 去重查询 + 多行 INSERT + 每日汇总 UPSERT
+    assert len(statements) == 3
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.store.get(key)
+
+    async def setex(self, key: str, ttl: int, value: str) -> None:
+        self.store[key] = value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    async def scan_iter(self, match: str):
+        for key in list(self.store):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+
+async def test_alert_writes_invalidate_stats_cache(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(cache_module, "redis_client", FakeRedis())
+    service = AlertService(db_session, alert_crud)
+    first, second = (await service.create_alerts_bulk([_offline(uuid4()), _offline(uuid4())])).created_ids
+    assert (await service.get_stats())["by_status"] == {"open": 2}
+
+    await service.ack_alert(first)
+    assert (await service.get_stats())["by_status"] == {"open": 1, "ack": 1}
+
+    await service.batch_close_alerts([first, second])
+    assert (await service.get_stats())["by_status"] == {"closed": 2}
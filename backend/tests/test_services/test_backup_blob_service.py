@@ -0,0 +1,316 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_backup_blob_service.py
+@DateTime: 2026-02-05 10:00:00
+@Docs: 备份内容块（去重存储）服务测试.
+"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import StaticPool, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.crud_backup import backup as backup_crud
+from app.models.backup import Backup
+from app.models.backup_blob import BackupBlob
+from app.models.device import Device
+from app.services import backup_blob_service as blob_module
+from app.services import backup_service as backup_service_module
+from app.services.backup_blob_service import BackupBlobService, load_backup_content, load_backup_contents
+from app.services.backup_service import BackupService
+from app.utils import backup_codec
+from app.utils.validators import compute_text_sha256
+
+
+@pytest_asyncio.fixture
+async def blob_session():
+    # 只建备份相关两张表，避开 SQLite 不支持的 JSONB 列
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Backup.__table__.create)
+        await conn.run_sync(BackupBlob.__table__.create)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+def fake_minio(monkeypatch):
+    objects: dict[str, str] = {}
+
+    async def _put(name: str, content: str) -> bool:
+        objects[name] = content
+        return True
+
+    async def _get(name: str) -> str:
+        return objects[name]
+
+    async def _delete(names: list[str]) -> list[str]:
+        for name in names:
+            objects.pop(name, None)
+        return []
+
+    monkeypatch.setattr(blob_module, "put_text_safe", _put)
+    monkeypatch.setattr(blob_module, "get_text", _get)
+    monkeypatch.setattr(blob_module, "delete_objects_safe", _delete)
+    monkeypatch.setattr(blob_module.settings, "BACKUP_CONTENT_SIZE_THRESHOLD_BYTES", 16)
+    return objects
+
+
+async def _refs(db: AsyncSession) -> dict[str, int]:
+    result = await db.execute(select(BackupBlob.content_hash, BackupBlob.ref_count))
+    return {row.content_hash: row.ref_count for row in result.fetchall()}
+
+
+async def test_store_many_dedups_and_counts_refs(blob_session, fake_minio):
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    large = "x" * 64
+
+    hashes = await service.store_many(["hostname a", "hostname a", large])
+    await service.store("hostname a")
+    await db.commit()
+
+    assert hashes[0] == hashes[1] == compute_text_sha256("hostname a")
+    refs = await _refs(db)
+    assert refs == {hashes[0]: 3, hashes[2]: 1}
+
+    blobs = await backup_crud.get_blobs(db, hashes)
+    assert blobs[hashes[0]].content == "hostname a"
+    assert blobs[hashes[2]].content is None
+    assert fake_minio[blobs[hashes[2]].content_path or ""] == large
+    # 只记录本实例写入的对象（供调用方回滚时删除）
+    assert service.placed_objects == [blobs[hashes[2]].content_path]
+
+
+async def test_release_deletes_blob_when_last_reference_goes(blob_session, fake_minio):
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    small, large = "hostname b", "y" * 64
+    h_small, _, h_large = await service.store_many([small, small, large])
+    await db.commit()
+
+    assert await service.release([h_small, h_large, None]) != []
+    await db.commit()
+    assert await _refs(db) == {h_small: 1}
+
+    assert await service.release([h_small]) == []
+    await db.commit()
+    assert await _refs(db) == {}
+
+    # 已回收的内容块无法再被恢复引用
+    assert await service.acquire([h_small]) == set()
+
+
+async def test_delete_backup_removes_blob_object_after_commit(blob_session, fake_minio, monkeypatch):
+    db = blob_session
+    # delete_backup 会按 selectin 关系加载设备
+    await (await db.connection()).run_sync(Device.__table__.create)
+    (h_large,) = await BackupBlobService(db, backup_crud).store_many(["w" * 64])
+    backup = Backup(device_id=uuid4(), content_hash=h_large, content_size=64)
+    db.add(backup)
+    await db.commit()
+    path = (await backup_crud.get_blobs(db, [h_large]))[h_large].content_path
+    assert path in fake_minio
+
+    # 提交时对象必须仍在：事务回滚不能留下指向已删除对象的内容块
+    present_at_commit: list[bool] = []
+    real_commit = db.commit
+
+    async def _commit() -> None:
+        present_at_commit.append(path in fake_minio)
+        await real_commit()
+
+    monkeypatch.setattr(db, "commit", _commit)
+    monkeypatch.setattr(backup_service_module, "delete_objects_safe", blob_module.delete_objects_safe)
+    service = BackupService(db, backup_crud, None, None)  # type: ignore[arg-type]
+    await service.delete_backup(backup.id)
+
+    assert present_at_commit == [True]
+    assert path not in fake_minio
+
+
+async def test_enforce_retention_defers_object_delete_to_commit(blob_session, monkeypatch):
+    deleted: list[list[str]] = []
+
+    async def _mark_expired(self, device_ids):
+        return 1, ["backups/shared-blob"]
+
+    async def _delete(names: list[str]) -> list[str]:
+        deleted.append(names)
+        return []
+
+    monkeypatch.setattr(backup_service_module.BackupRetentionService, "mark_expired", _mark_expired)
+    monkeypatch.setattr(backup_service_module, "delete_objects_safe", _delete)
+    service = BackupService(blob_session, backup_crud, None, None)  # type: ignore[arg-type]
+    await service._enforce_retention(device_id=uuid4())
+
+    # 事务未提交前不得删除对象；回滚时任务随之作废
+    assert deleted == []
+    assert len(service._post_commit_tasks) == 1
+    await service._post_commit_tasks[0]()
+    assert deleted == [["backups/shared-blob"]]
+
+
+async def test_load_backup_content_reads_through_blob(blob_session, fake_minio):
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    large = "z" * 64
+    h_small, h_large = await service.store_many(["hostname c", large])
+    dev = uuid4()
+    small_backup = Backup(device_id=dev, content_hash=h_small, content_size=10)
+    large_backup = Backup(device_id=dev, content_hash=h_large, content_size=64)
+    legacy_backup = Backup(device_id=dev, content="legacy", content_size=6)
+    db.add_all([small_backup, large_backup, legacy_backup])
+    await db.commit()
+
+    assert await load_backup_content(db, small_backup) == "hostname c"
+    assert await load_backup_content(db, large_backup) == large
+    assert await load_backup_content(db, legacy_backup) == "legacy"
+
+
+async def test_collect_orphans_recounts_live_references(blob_session, fake_minio):
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    h_live, h_orphan = await service.store_many(["hostname d", "hostname e"])
+    dev = uuid4()
+    db.add(Backup(device_id=dev, content_hash=h_live, content_size=10))
+    db.add(Backup(device_id=dev, content_hash=h_live, content_size=10, is_deleted=True))
+    await db.commit()
+
+    fixed, _ = await service.collect_orphans()
+    await db.commit()
+    assert fixed == 1
+    assert await _refs(db) == {h_live: 1, h_orphan: 0}
+
+    # 宽限期之后才回收
+    await db.execute(
+        update(BackupBlob)
+        .where(BackupBlob.content_hash == h_orphan)
+        .values(updated_at=datetime.now(UTC) - timedelta(hours=2))
+    )
+    await service.collect_orphans()
+    await db.commit()
+    assert await _refs(db) == {h_live: 1}
+    assert (await db.execute(select(func.count()).select_from(BackupBlob))).scalar() == 1
+
+
+def test_codec_delta_roundtrip_preserves_bytes():
+    base = "hostname sw1\r\ninterface Gi0/1\r\n description old\r\n!"
+    new = "hostname sw1\r\ninterface Gi0/1\r\n description new\r\n shutdown\r\n!\n"
+
+    ops = backup_codec.make_delta(base, new)
+    encoded = backup_codec.encode_delta(ops, "gzip")
+
+    assert backup_codec.apply_delta(base, backup_codec.decode_delta(encoded, "gzip")) == new
+    assert backup_codec.decode_snapshot(backup_codec.encode_snapshot(new, "gzip"), "gzip") == new
+    assert backup_codec.split_encoding("delta+gzip") == (True, "gzip")
+    assert backup_codec.resolve_compression("zstd") in {"gzip", "zstd"}
+
+
+async def test_delta_mode_chains_versions_and_cascades_release(blob_session, fake_minio, monkeypatch):
+    monkeypatch.setattr(blob_module.settings, "BACKUP_STORAGE_MODE", "delta")
+    monkeypatch.setattr(blob_module.settings, "BACKUP_DELTA_SNAPSHOT_INTERVAL", 2)
+    monkeypatch.setattr(blob_module.settings, "BACKUP_CONTENT_SIZE_THRESHOLD_BYTES", 64 * 1024)
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    dev = uuid4()
+    lines = [f"interface Gi0/{i}\n description port {i}\n" for i in range(40)]
+
+    versions: list[str] = []
+    backups: list[Backup] = []
+    for v in range(4):
+        lines[v] = f"interface Gi0/{v}\n description changed in v{v}\n"
+        text = "".join(lines)
+        content_hash = await service.store(text, dev)
+        row = Backup(
+            device_id=dev,
+            content_hash=content_hash,
+            content_size=len(text),
+            created_at=datetime.now(UTC) + timedelta(seconds=v),
+        )
+        db.add(row)
+        await db.commit()
+        versions.append(text)
+        backups.append(row)
+
+    blobs = await backup_crud.get_blobs(db, [b.content_hash for b in backups])
+    encodings = [blobs[b.content_hash].content_encoding for b in backups]
+    assert encodings == ["gzip", "delta+gzip", "delta+gzip", "gzip"]
+    assert [blobs[b.content_hash].chain_depth for b in backups] == [0, 1, 2, 0]
+    for row, text in zip(backups, versions, strict=True):
+        assert await load_backup_content(db, row) == text
+
+    # 基准被差量子块引用：删除最早版本的备份后内容块仍保留，删除整条链后级联回收
+    h0, h1, h2, _ = (b.content_hash for b in backups)
+    assert await service.release([h0]) == []
+    await db.commit()
+    assert (await _refs(db))[h0] == 1
+    await service.release([h2, h1])
+    await db.commit()
+    assert set(await _refs(db)) == {backups[3].content_hash}
+
+
+async def test_reencode_rewrites_plain_history_as_delta(blob_session, fake_minio, monkeypatch):
+    monkeypatch.setattr(blob_module.settings, "BACKUP_CONTENT_SIZE_THRESHOLD_BYTES", 64 * 1024)
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    v1 = "".join(f"vlan {i}\n name v{i}\n" for i in range(50))
+    v2 = v1.replace("name v7\n", "name renamed\n")
+    h1, h2 = await service.store_many([v1, v2])
+    await db.commit()
+
+    monkeypatch.setattr(blob_module.settings, "BACKUP_STORAGE_MODE", "delta")
+    assert await service.reencode(h1) == []
+    assert await service.reencode(h2, h1) == []
+    # 环检测：h1 不能再以 h2 为基准
+    await service.reencode(h1, h2)
+    await db.commit()
+
+    blobs = await backup_crud.get_blobs(db, [h1, h2])
+    assert blobs[h1].content_encoding == "gzip" and blobs[h1].base_hash is None
+    assert blobs[h2].content_encoding == "delta+gzip" and blobs[h2].base_hash == h1
+    assert await _refs(db) == {h1: 2, h2: 1}
+    dev = uuid4()
+    assert await load_backup_content(db, Backup(device_id=dev, content_hash=h2)) == v2
+
+
+async def test_latest_info_is_lightweight_and_contents_load_lazily(blob_session, fake_minio, monkeypatch):
+    db = blob_session
+    service = BackupBlobService(db, backup_crud)
+    h_blob = await service.store("hostname blob")
+    fake_minio["backups/legacy.txt"] = "hostname minio"
+
+    async def _get_safe(name: str) -> str | None:
+        return fake_minio.get(name)
+
+    monkeypatch.setattr(blob_module, "get_text_safe", _get_safe)
+
+    devs = [uuid4() for _ in range(4)]
+    rows = [
+        Backup(device_id=devs[0], content="hostname db", content_size=11, md5_hash="m0"),
+        Backup(device_id=devs[1], content_path="backups/legacy.txt", content_size=14, md5_hash="m1"),
+        Backup(device_id=devs[2], content_hash=h_blob, content_size=13, md5_hash="m2"),
+        Backup(device_id=devs[3], content_path="backups/missing.txt", content_size=1, md5_hash="m3"),
+    ]
+    db.add_all(rows)
+    await db.commit()
+
+    info = await backup_crud.get_devices_latest_backup_info(db, devs)
+    assert info[devs[1]] == {"backup_id": rows[1].id, "md5_hash": "m1"}
+
+    contents = await load_backup_contents(db, rows)
+    assert contents == {
+        rows[0].id: "hostname db",
+        rows[1].id: "hostname minio",
+        rows[2].id: "hostname blob",
+    }
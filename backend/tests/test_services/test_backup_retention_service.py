@@ -0,0 +1,150 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_backup_retention_service.py
+@DateTime: 2026-02-04 09:30:00
+@Docs: 备份保留策略服务测试.
+"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import StaticPool, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.enums import BackupStatus, BackupType
+from app.crud.crud_backup import backup as backup_crud
+from app.models.backup import Backup
+from app.services import backup_retention_service as retention_module
+from app.services.backup_retention_service import BackupRetentionService
+
+
+@pytest_asyncio.fixture
+async def backup_session():
+    # 只建 ncm_backup 一张表，避开 SQLite 不支持的 JSONB 列
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Backup.__table__.create)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        yield session
+    await engine.dispose()
+
+
+def _add(
+    db: AsyncSession,
+    device_id: UUID,
+    *,
+    age_days: float,
+    backup_type: BackupType = BackupType.SCHEDULED,
+    status: BackupStatus = BackupStatus.SUCCESS,
+    content_path: str | None = None,
+) -> Backup:
+    row = Backup(
+        device_id=device_id,
+        backup_type=backup_type.value,
+        status=status.value,
+        content="x",
+        content_path=content_path,
+        content_size=1,
+        created_at=datetime.now(UTC) - timedelta(days=age_days),
+    )
+    db.add(row)
+    return row
+
+
+async def _alive_ids(db: AsyncSession) -> set[UUID]:
+    result = await db.execute(select(Backup.id).where(Backup.is_deleted.is_(False)))
+    return set(result.scalars().all())
+
+
+@pytest.fixture
+def retention_settings(monkeypatch):
+    monkeypatch.setattr(retention_module.settings, "BACKUP_RETENTION_SCHEDULED_KEEP", 2)
+    monkeypatch.setattr(retention_module.settings, "BACKUP_RETENTION_MANUAL_KEEP", 0)
+    monkeypatch.setattr(retention_module.settings, "BACKUP_RETENTION_KEEP_DAYS", 30)
+
+
+async def test_mark_expired_applies_count_and_age_rules(backup_session, retention_settings):
+    db = backup_session
+    dev = uuid4()
+    newest = _add(db, dev, age_days=1)
+    second = _add(db, dev, age_days=2)
+    third = _add(db, dev, age_days=3, content_path="backups/a.txt")
+    manual_recent = _add(db, dev, age_days=5, backup_type=BackupType.MANUAL)
+    manual_old = _add(db, dev, age_days=40, backup_type=BackupType.MANUAL, content_path="backups/b.txt")
+    failed_recent = _add(db, dev, age_days=0.5, status=BackupStatus.FAILED)
+    failed_old = _add(db, dev, age_days=60, status=BackupStatus.FAILED)
+    await db.commit()
+
+    service = BackupRetentionService(db, backup_crud)
+    count, paths = await service.mark_expired([dev])
+    await db.commit()
+
+    assert count == 3
+    assert sorted(paths) == ["backups/a.txt", "backups/b.txt"]
+    assert await _alive_ids(db) == {newest.id, second.id, manual_recent.id, failed_recent.id}
+    assert third.id not in await _alive_ids(db)
+    assert manual_old.id not in await _alive_ids(db)
+    assert failed_old.id not in await _alive_ids(db)
+
+
+async def test_mark_expired_keeps_latest_backup_even_when_stale(backup_session, retention_settings):
+    db = backup_session
+    dev_a, dev_b = uuid4(), uuid4()
+    latest_failed = _add(db, dev_a, age_days=50, status=BackupStatus.FAILED)
+    latest_success = _add(db, dev_a, age_days=70)
+    _add(db, dev_a, age_days=80)
+    only_b = _add(db, dev_b, age_days=90)
+    await db.commit()
+
+    service = BackupRetentionService(db, backup_crud)
+    count, _ = await service.mark_expired()
+    await db.commit()
+
+    assert count == 1
+    assert await _alive_ids(db) == {latest_failed.id, latest_success.id, only_b.id}
+
+
+async def test_mark_expired_scopes_to_device_ids(backup_session, retention_settings):
+    db = backup_session
+    dev_a, dev_b = uuid4(), uuid4()
+    for age in (1, 2, 3):
+        _add(db, dev_a, age_days=age)
+        _add(db, dev_b, age_days=age)
+    await db.commit()
+
+    service = BackupRetentionService(db, backup_crud)
+    count, _ = await service.mark_expired([dev_a])
+    assert count == 1
+    assert await service.mark_expired([]) == (0, [])
+
+
+async def test_enforce_deletes_objects_after_commit(backup_session, retention_settings, monkeypatch):
+    db = backup_session
+    dev = uuid4()
+    for age in (1, 2):
+        _add(db, dev, age_days=age)
+    _add(db, dev, age_days=3, content_path="backups/c.txt")
+    _add(db, dev, age_days=4, content_path="backups/d.txt")
+    await db.commit()
+
+    deleted: list[list[str]] = []
+
+    async def _fake_delete(names: list[str]) -> list[str]:
+        deleted.append(list(names))
+        return ["backups/d.txt"]
+
+    monkeypatch.setattr(retention_module, "delete_objects_safe", _fake_delete)
+
+    result = await BackupRetentionService(db, backup_crud).enforce([dev])
+
+    assert result == {"expired": 2, "objects_deleted": 1, "objects_failed": 1}
+    assert len(deleted) == 1
+    assert sorted(deleted[0]) == ["backups/c.txt", "backups/d.txt"]
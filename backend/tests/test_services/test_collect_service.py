@@ -0,0 +1,310 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_collect_service.py
+@DateTime: 2026-02-09 14:00:00
+@Docs: ARP/MAC 采集与定位倒排索引测试.
+"""
+
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import DeviceGroup, DeviceStatus, DeviceVendor
+from app.crud.crud_credential import credential as credential_crud
+from app.crud.crud_device import device as device_crud
+from app.models.device import Device
+from app.network import async_tasks
+from app.network.nornir_config import init_nornir_async
+from app.schemas.collect import CollectBatchRequest
+from app.schemas.credential import DeviceCredential
+from app.services import collect_service as collect_module
+from app.services.collect_service import CollectService, normalize_mac
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.ops: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def __getattr__(self, name: str):
+        def _queue(*args: Any, **kwargs: Any) -> None:
+            self.ops.append((name, args, kwargs))
+
+        return _queue
+
+    async def execute(self) -> None:
+        for name, args, kwargs in self.ops:
+            await getattr(self.client, name)(*args, **kwargs)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, Any] = {}
+        self.ttls: dict[str, int] = {}
+        self.hgetall_calls = 0
+
+    async def get(self, key: str) -> str | None:
+        return self.store.get(key)
+
+    async def setex(self, key: str, ttl: int, value: str) -> None:
+        self.store[key] = value
+        self.ttls[key] = ttl
+
+    async def expire(self, key: str, ttl: int) -> None:
+        return None
+
+    async def delete(self, key: str) -> None:
+        self.store.pop(key, None)
+
+    async def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self.store.setdefault(key, {}).update(mapping)
+
+    async def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self.store.get(key, {}).pop(field, None)
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        self.hgetall_calls += 1
+        return dict(self.store.get(key, {}))
+
+    async def sadd(self, key: str, *members: str) -> None:
+        self.store.setdefault(key, set()).update(members)
+
+    async def smembers(self, key: str) -> set[str]:
+        return set(self.store.get(key, set()))
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.store.setdefault(key, {}).update(mapping)
+
+    async def zremrangebyscore(self, key: str, low: float, high: float) -> None:
+        zset = self.store.get(key, {})
+        for member in [m for m, s in zset.items() if low <= s <= high]:
+            zset.pop(member)
+
+    async def zcount(self, key: str, low: float, high: str) -> int:
+        return sum(1 for s in self.store.get(key, {}).values() if s >= low)
+
+    async def zremrangebyrank(self, key: str, start: int, end: int) -> None:
+        zset = self.store.get(key, {})
+        ordered = sorted(zset, key=lambda m: (zset[m], m))
+        for member in ordered[start : len(ordered) + end + 1]:
+            zset.pop(member)
+
+    async def zrangebyscore(self, key: str, low: str, high: float) -> list[str]:
+        zset = self.store.get(key, {})
+        return [m for m in sorted(zset, key=lambda m: (zset[m], m)) if zset[m] <= high]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(collect_module.cache_module, "redis_client", client)
+    return client
+
+
+async def _devices(db: AsyncSession, count: int) -> list[Device]:
+    devices = [
+        Device(
+            name=f"sw-{i}",
+            ip_address=f"10.0.0.{i + 1}",
+            vendor=DeviceVendor.H3C,
+            device_group=DeviceGroup.ACCESS,
+            status=DeviceStatus.ACTIVE,
+            ssh_port=22,
+        )
+        for i in range(count)
+    ]
+    db.add_all(devices)
+    await db.commit()
+    return devices
+
+
+def test_normalize_mac_formats():
+    assert normalize_mac("AA:BB:CC:DD:EE:FF") == normalize_mac("aabb-ccdd-eeff") == normalize_mac("aabb.ccdd.eeff")
+    assert normalize_mac(None) == ""
+
+
+async def test_locate_uses_index_and_prunes_vanished_entries(db_session: AsyncSession, fake_redis: FakeRedis):
+    core, access = await _devices(db_session, 2)
+    service = CollectService(db_session, device_crud, credential_crud)
+
+    await service._save_arp_cache(
+        core.id,
+        [
+            {"ip_address": "192.168.1.10", "mac_address": "aabb-ccdd-eeff", "interface": "Vlan10", "vlan_id": "10"},
+            {"ip_address": "192.168.1.11", "mac_address": "0011-2233-4455", "interface": "Vlan10", "vlan_id": "10"},
+        ],
+    )
+    await service._save_mac_cache(
+        access.id,
+        [{"mac_address": "aa:bb:cc:dd:ee:ff", "interface": "GE1/0/1", "vlan_id": "10", "state": "Learned"}],
+    )
+
+    located = await service.locate_by_mac("AABB.CCDD.EEFF")
+    assert [(m.device_name, m.interface, m.ip_address) for m in located.matches] == [
+        ("sw-0", "Vlan10", "192.168.1.10"),
+        ("sw-1", "GE1/0/1", None),
+    ]
+    assert located.searched_devices == 2
+    assert fake_redis.hgetall_calls == 1
+
+    by_ip = await service.locate_by_ip("192.168.1.11")
+    assert [(m.device_ip, m.mac_address) for m in by_ip.matches] == [("10.0.0.1", "0011-2233-4455")]
+
+    # 再次采集时该 IP 已消失，索引字段应被清理
+    await service._save_arp_cache(
+        core.id,
+        [{"ip_address": "192.168.1.10", "mac_address": "aabb-ccdd-eeff", "interface": "Vlan10", "vlan_id": "10"}],
+    )
+    assert (await service.locate_by_ip("192.168.1.11")).matches == []
+    assert (await service.locate_by_mac("aabb-ccdd-eeff")).total == 2
+
+
+async def test_batch_collect_runs_pooled_task_once_per_device(db_session: AsyncSession, fake_redis, monkeypatch):
+    online, broken = await _devices(db_session, 2)
+    service = CollectService(db_session, device_crud, credential_crud)
+    calls: list[tuple[str, bool, bool]] = []
+
+    async def _credential(self, device, failed_devices=None):
+        return DeviceCredential(username="admin", password="secret", auth_type="static")
+
+    async def _collect_tables(host, *, collect_arp, collect_mac):
+        calls.append((host.data["device_name"], collect_arp, collect_mac))
+        if host.hostname == broken.ip_address:
+            raise ConnectionError("timed out")
+        arp = [{"ip_address": "192.168.1.10", "mac_address": "aabb-ccdd-eeff", "interface": "Vlan10"}]
+        return {"success": True, "arp": arp, "mac": None, "platform": "hp_comware", "elapsed_ms": 5}
+
+    monkeypatch.setattr(CollectService, "_get_device_credential", _credential)
+    monkeypatch.setattr(collect_module, "async_collect_tables", _collect_tables)
+
+    result = await service.batch_collect(
+        CollectBatchRequest(device_ids=[online.id, broken.id, uuid4()], collect_arp=True, collect_mac=False)
+    )
+
+    assert sorted(calls) == [("sw-0", True, False), ("sw-1", True, False)]
+    assert (result.success_count, result.failed_count) == (1, 2)
+    assert [(r.success, r.arp_count, r.error_message) for r in result.results] == [
+        (True, 1, None),
+        (False, 0, "timed out"),
+        (False, 0, "设备不存在"),
+    ]
+    assert (await service.locate_by_ip("192.168.1.10")).total == 1
+
+
+async def test_collect_tables_rejects_command_error_output(monkeypatch):
+    class _PoolCtx:
+        reused = False
+
+        async def __aenter__(self) -> object:
+            return object()
+
+        async def __aexit__(self, *exc) -> None:
+            return None
+
+        async def warm_up(self, platform: str) -> str:
+            return "<sw>"
+
+    class _Pool:
+        async def acquire(self, **kwargs: Any) -> _PoolCtx:
+            return _PoolCtx()
+
+    async def _get_pool() -> _Pool:
+        return _Pool()
+
+    async def _send(conn, command: str, **kwargs: Any) -> str:
+        return "                  ^\n % Unrecognized command found at '^' position."
+
+    monkeypatch.setattr(async_tasks, "get_connection_pool", _get_pool)
+    monkeypatch.setattr(async_tasks, "send_command_with_paging_async", _send)
+    host_data = {
+        "name": "sw",
+        "hostname": "10.0.0.1",
+        "platform": "hp_comware",
+        "username": "admin",
+        "password": "secret",
+        "data": {"device_name": "sw", "auth_type": "static"},
+    }
+    host = init_nornir_async([host_data]).hosts["sw"]
+
+    # 错误输出不能被解析为空表，否则会清空快照与定位索引
+    with pytest.raises(RuntimeError, match="命令执行失败"):
+        await async_tasks.async_collect_tables(host, collect_arp=True, collect_mac=False)
+
+
+async def test_single_snapshot_serves_fresh_table_and_stays_as_baseline(
+    db_session: AsyncSession, fake_redis: FakeRedis, monkeypatch
+):
+    (access,) = await _devices(db_session, 1)
+    service = CollectService(db_session, device_crud, credential_crud)
+    entries = [{"mac_address": "aabb-ccdd-eeff", "interface": "GE1/0/1", "vlan_id": None}]
+
+    await service._save_mac_cache(access.id, entries)
+    snapshot_key = f"{collect_module.MAC_CACHE_PREFIX}:{access.id}"
+    assert [k for k in fake_redis.ttls if k.endswith(str(access.id)) and "locate" not in k] == [snapshot_key]
+    assert fake_redis.ttls[snapshot_key] >= collect_module.settings.COLLECT_HISTORY_RETENTION_DAYS * 86400
+    cached = await service.get_cached_mac(access.id)
+    assert (cached.total, cached.entries[0].vlan_id) == (1, None)
+
+    # 超过 COLLECT_CACHE_TTL 后不再对外提供，但仍作为比对基线
+    monkeypatch.setattr(collect_module.settings, "COLLECT_CACHE_TTL", -1)
+    stale = await service.get_cached_mac(access.id)
+    assert (stale.total, stale.cached_at) == (0, None)
+    delta = await service._save_mac_cache(access.id, entries)
+    assert not delta.changed
+
+
+async def test_locate_index_stores_compact_values(db_session: AsyncSession, fake_redis: FakeRedis):
+    (access,) = await _devices(db_session, 1)
+    service = CollectService(db_session, device_crud, credential_crud)
+    await service._save_arp_cache(
+        access.id, [{"ip_address": "192.168.1.10", "mac_address": "aa:bb:cc:dd:ee:ff", "interface": "GE1/0/1"}]
+    )
+
+    (value,) = fake_redis.store[f"{collect_module.LOCATE_IP_INDEX_PREFIX}:192.168.1.10"].values()
+    assert str(access.id) not in value and "mac_address" not in value
+    (match,) = (await service.locate_by_ip("192.168.1.10")).matches
+    assert (match.device_id, match.interface, match.mac_address) == (access.id, "GE1/0/1", "aa:bb:cc:dd:ee:ff")
+    assert match.cached_at is not None
+
+
+async def test_mac_history_replays_moves(db_session: AsyncSession, fake_redis: FakeRedis, monkeypatch):
+    (access,) = await _devices(db_session, 1)
+    service = CollectService(db_session, device_crud, credential_crud)
+    times = iter([datetime(2026, 2, 9, 8, 0), datetime(2026, 2, 9, 9, 0), datetime(2026, 2, 9, 10, 0)])
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(times)
+
+    monkeypatch.setattr(collect_module, "datetime", _Clock)
+
+    first = await service._save_mac_cache(access.id, [{"mac_address": "aabb-ccdd-eeff", "interface": "GE1/0/1"}])
+    moved = await service._save_mac_cache(access.id, [{"mac_address": "aabb-ccdd-eeff", "interface": "GE1/0/7"}])
+    gone = await service._save_mac_cache(access.id, [])
+    assert (len(first.added), len(moved.moved), len(gone.removed)) == (1, 1, 1)
+
+    monkeypatch.setattr(collect_module, "datetime", datetime)
+    at_830 = await service.get_mac_history("aa:bb:cc:dd:ee:ff", at=datetime(2026, 2, 9, 8, 30))
+    assert [(m.device_name, m.interface) for m in at_830.locations] == [("sw-0", "GE1/0/1")]
+
+    at_930 = await service.get_mac_history("aabb.ccdd.eeff", at=datetime(2026, 2, 9, 9, 30))
+    assert [m.interface for m in at_930.locations] == ["GE1/0/7"]
+
+    latest = await service.get_mac_history("aabb-ccdd-eeff")
+    assert latest.locations == []
+    assert [(e.event, e.interface) for e in latest.events][:2] == [("gone", "GE1/0/7"), ("seen", "GE1/0/7")]
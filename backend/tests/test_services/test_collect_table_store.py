@@ -0,0 +1,51 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_collect_table_store.py
+@DateTime: 2026-02-09 16:30:00
+@Docs: ARP/MAC 快照存储与增量计算测试.
+"""
+
+import json
+from datetime import datetime
+
+from app.services.collect_table_store import MAC_COLUMNS, diff_tables, pack_table, unpack_table
+
+
+def _mac(mac: str, interface: str, vlan: str = "10") -> dict:
+    return {"mac_address": mac, "vlan_id": vlan, "interface": interface, "entry_type": "Learned", "state": ""}
+
+
+def test_pack_table_round_trip_is_smaller_than_entry_json():
+    now = datetime(2026, 2, 9, 12, 0, 0)
+    entries = [_mac(f"0000-0000-{i:04x}", f"GE1/0/{i % 48}") for i in range(500)]
+
+    packed = pack_table(entries, MAC_COLUMNS, now)
+    rows, cached_at = unpack_table(packed)
+
+    assert cached_at == now
+    assert rows[0] == {**entries[0], "updated_at": now.isoformat()}
+    legacy = json.dumps({"entries": [{**e, "updated_at": now.isoformat()} for e in entries]})
+    assert len(packed) < len(legacy) / 2
+    assert unpack_table(legacy)[0] == rows
+
+    # 空值保持为 None，不被改写为空字符串
+    (row,), _ = unpack_table(pack_table([{**entries[0], "vlan_id": None}], MAC_COLUMNS, now))
+    assert row["vlan_id"] is None
+
+
+def test_diff_tables_reports_added_removed_and_moved():
+    previous = [_mac("aa", "GE1/0/1"), _mac("bb", "GE1/0/2"), _mac("cc", "GE1/0/3")]
+    current = [_mac("aa", "GE1/0/1"), _mac("bb", "GE1/0/9"), _mac("dd", "GE1/0/4")]
+
+    delta = diff_tables(
+        previous,
+        current,
+        key=lambda e: (e["mac_address"], e["vlan_id"]),
+        location=lambda e: e["interface"],
+    )
+
+    assert [e["mac_address"] for e in delta.added] == ["dd"]
+    assert [e["mac_address"] for e in delta.removed] == ["cc"]
+    assert [(old["interface"], new["interface"]) for old, new in delta.moved] == [("GE1/0/2", "GE1/0/9")]
+    assert not diff_tables(current, current, key=lambda e: e["mac_address"], location=lambda e: e["interface"]).changed
@@ -0,0 +1,103 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_config_change_probe_service.py
+@DateTime: 2026-02-07 09:00:00
+@Docs: 配置变更探测服务测试.
+"""
+
+import re
+
+import pytest
+
+from app.network.platform_config import get_config_change_cli_probe, get_config_change_snmp_oid
+from app.services import config_change_probe_service as probe_module
+from app.services.config_change_probe_service import ConfigChangeProbeService, config_marker_key
+
+
+class FakePipeline:
+    def __init__(self, store: dict[str, str]) -> None:
+        self.store = store
+        self.pending: list[tuple[str, str, int]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.pending.append((key, value, ex))
+
+    async def execute(self) -> None:
+        for key, value, _ in self.pending:
+            self.store[key] = value
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self.store)
+
+
+class NoSuchObject:
+    pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(probe_module.cache_module, "redis_client", client)
+    return client
+
+
+def _host(device_id: str, platform: str = "cisco_iosxe") -> dict:
+    return {"name": device_id, "device_id": device_id, "hostname": "10.0.0.1", "platform": platform}
+
+
+async def test_filter_changed_skips_only_unchanged_known_devices(fake_redis, monkeypatch):
+    fake_redis.store[config_marker_key("same")] = "snmp:100"
+    fake_redis.store[config_marker_key("moved")] = "snmp:100"
+    fake_redis.store[config_marker_key("new")] = "snmp:100"
+
+    async def _snmp(self, hosts):
+        return {"same": "snmp:100", "moved": "snmp:200", "new": "snmp:100", "uncached": "snmp:1"}
+
+    async def _cli(self, hosts):
+        assert [h["device_id"] for h in hosts] == ["unprobed"]
+        return {}
+
+    monkeypatch.setattr(ConfigChangeProbeService, "_probe_snmp", _snmp)
+    monkeypatch.setattr(ConfigChangeProbeService, "_probe_cli", _cli)
+
+    service = ConfigChangeProbeService(None, None)  # type: ignore[arg-type]
+    hosts = [_host(d) for d in ("same", "moved", "new", "uncached", "unprobed")]
+    changed, markers = await service.filter_changed(hosts, known_device_ids={"same", "moved", "uncached", "unprobed"})
+
+    assert [h["device_id"] for h in changed] == ["moved", "new", "uncached", "unprobed"]
+    assert markers == {"moved": "snmp:200", "new": "snmp:100", "uncached": "snmp:1"}
+
+    await service.save_markers({"moved": "snmp:200"})
+    assert fake_redis.store[config_marker_key("moved")] == "snmp:200"
+
+
+def test_probe_definitions_and_snmp_marker_parsing():
+    assert probe_module._snmp_marker(NoSuchObject()) is None
+    assert probe_module._snmp_marker(12345) == "snmp:12345"
+    assert get_config_change_snmp_oid("cisco_ios") == get_config_change_snmp_oid("cisco_iosxe")
+    assert get_config_change_cli_probe("hp_comware") is None
+
+    _, pattern = get_config_change_cli_probe("cisco_iosxe") or ("", "")
+    output = "! Last configuration change at 10:22:05 UTC Mon Jan 1 2024 by admin\n"
+    match = re.search(pattern, output, re.MULTILINE)
+    assert match and match.group(1).startswith("10:22:05")
+
+    _, pattern = get_config_change_cli_probe("huawei_vrp") or ("", "")
+    output = "  No.   CommitId        Label   User     Time\n  1     1000000019      -       root     2024-06-18\n"
+    match = re.search(pattern, output, re.MULTILINE)
+    assert match and match.group(1) == "1000000019"
@@ -0,0 +1,145 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_diff_service.py
+@DateTime: 2026-02-12 09:00:00
+@Docs: 配置差异引擎与分段差异测试.
+"""
+
+import difflib
+import random
+
+import pytest
+
+from app.crud.crud_backup import backup as backup_crud
+from app.services.diff_service import DiffService
+from app.utils import config_diff
+
+COMWARE_OLD = """
+sysname SW1
+#
+interface GigabitEthernet1/0/1
+ description uplink
+ port access vlan 10
+#
+interface GigabitEthernet1/0/2
+ shutdown
+#
+bgp 65000
+ peer 10.0.0.1 as-number 65001
+#
+return
+"""
+
+COMWARE_NEW = """
+sysname SW1-NEW
+#
+interface GigabitEthernet1/0/1
+ description uplink
+ port access vlan 20
+#
+acl advanced 3000
+ rule 0 permit ip
+#
+bgp 65000
+ peer 10.0.0.1 as-number 65001
+ peer 10.0.0.2 as-number 65002
+#
+return
+"""
+
+
+@pytest.mark.parametrize("engine", ["patience", "difflib"])
+def test_opcodes_rebuild_new_lines(engine: str):
+    rng = random.Random(0)
+    diff = config_diff.get_engine(engine)
+    for _ in range(500):
+        old = [rng.choice("abcdef!#") for _ in range(rng.randint(0, 40))]
+        new = [line if rng.random() > 0.2 else rng.choice("xyz") for line in old]
+        new.insert(rng.randint(0, len(new)), "inserted")
+
+        rebuilt: list[str] = []
+        for tag, i1, i2, j1, j2 in diff(old, new):
+            if tag == "equal":
+                assert old[i1:i2] == new[j1:j2]
+            rebuilt.extend(new[j1:j2])
+        assert rebuilt == new
+
+
+def test_unified_diff_format_matches_difflib():
+    old = config_diff.normalize_lines(COMWARE_OLD)
+    new = config_diff.normalize_lines(COMWARE_NEW)
+    expected = "\n".join(difflib.unified_diff(old, new, fromfile="old", tofile="new", lineterm="", n=1))
+
+    assert config_diff.unified_diff(old, new, context_lines=1, engine="difflib") == expected
+    assert config_diff.unified_diff(old, old) == ""
+
+
+def test_patience_keeps_hunks_small_on_repetitive_config():
+    old = []
+    for i in range(2000):
+        old += [f"interface GigabitEthernet1/0/{i}", " port link-type access", " undo shutdown", "#"]
+    new = list(old)
+    new[4 * 1000 + 2] = " shutdown"
+
+    diff_text = config_diff.unified_diff(old, new, engine="patience")
+    assert [line for line in diff_text.splitlines() if line[:1] in "+-"] == [
+        "--- old",
+        "+++ new",
+        "- undo shutdown",
+        "+ shutdown",
+    ]
+
+
+def test_section_diff_reports_changes_per_section():
+    sections = config_diff.section_diff(
+        config_diff.normalize_lines(COMWARE_OLD), config_diff.normalize_lines(COMWARE_NEW)
+    )
+    by_name = {section.section: section for section in sections}
+
+    assert list(by_name) == [
+        "(global)",
+        "interface GigabitEthernet1/0/1",
+        "acl advanced 3000",
+        "bgp 65000",
+        "interface GigabitEthernet1/0/2",
+    ]
+    assert (by_name["(global)"].removed, by_name["(global)"].added) == (["sysname SW1"], ["sysname SW1-NEW"])
+    assert by_name["interface GigabitEthernet1/0/1"].removed == [" port access vlan 10"]
+    assert by_name["interface GigabitEthernet1/0/1"].added == [" port access vlan 20"]
+    assert by_name["acl advanced 3000"].change == "added"
+    assert by_name["bgp 65000"].added == [" peer 10.0.0.2 as-number 65002"]
+    assert by_name["interface GigabitEthernet1/0/2"].change == "removed"
+
+
+def test_section_diff_ignores_reordered_sections_and_ios_separators():
+    old = [
+        "hostname R1",
+        "!",
+        "interface Gi0/1",
+        " ip address 10.0.0.1 255.255.255.0",
+        "!",
+        "interface Gi0/2",
+        " shutdown",
+    ]
+    new = [
+        "hostname R1",
+        "!",
+        "interface Gi0/2",
+        " shutdown",
+        "!",
+        "interface Gi0/1",
+        " ip address 10.0.0.1 255.255.255.0",
+    ]
+
+    assert config_diff.section_diff(old, new) == []
+
+
+async def test_diff_service_computes_unified_and_section_diff(db_session):
+    service = DiffService(db_session, backup_crud)
+
+    diff_text, sections = await service.compute_diff_async(COMWARE_OLD, COMWARE_NEW)
+
+    assert diff_text == service.compute_unified_diff(COMWARE_OLD, COMWARE_NEW)
+    assert service.should_alert(diff_text)
+    assert len(sections) == 5
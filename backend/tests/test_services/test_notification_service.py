@@ -0,0 +1,121 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_notification_service.py
+@DateTime: 2026-02-11 09:00:00
+@Docs: 告警通知发件箱与批量投递测试.
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.enums import AlertType, NotificationStatus
+from app.crud.crud_alert import alert_crud
+from app.models.notification_outbox import NotificationOutbox
+from app.schemas.alert import AlertCreate
+from app.services import notification_service as notification_module
+from app.services.alert_service import AlertService
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def webhook_enabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "ALERT_WEBHOOK_ENABLED", True)
+    monkeypatch.setattr(settings, "ALERT_WEBHOOK_URL", "http://hooks.example.com/ncm")
+    monkeypatch.setattr(settings, "ALERT_WEBHOOK_BATCH_SIZE", 2)
+
+
+def _alert(discovery_id=None) -> AlertCreate:
+    return AlertCreate(
+        alert_type=AlertType.SHADOW_ASSET,
+        title="影子资产",
+        source="discovery",
+        related_discovery_id=discovery_id or uuid4(),
+    )
+
+
+async def _outbox(db: AsyncSession) -> list[NotificationOutbox]:
+    return list((await db.execute(select(NotificationOutbox))).scalars().all())
+
+
+async def test_new_alerts_are_enqueued_once_and_sent_in_batches(db_session: AsyncSession, webhook_enabled):
+    service = AlertService(db_session, alert_crud)
+    requests: list[dict] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    notifier = NotificationService(http_transport=httpx.MockTransport(_handler))
+    discovery_ids = [uuid4() for _ in range(3)]
+    for discovery_id in discovery_ids:
+        assert (await service.raise_alert(_alert(discovery_id), notifier=notifier))[1] is True
+    # 去重命中：返回已有告警，不再入队
+    assert (await service.raise_alert(_alert(discovery_ids[0]), notifier=notifier))[1] is False
+    assert len(await _outbox(db_session)) == 3
+
+    stats = await notifier.dispatch_pending(db_session)
+    assert stats == {"sent": 3, "retrying": 0, "failed": 0}
+    assert [body["count"] for body in requests] == [2, 1]
+    assert {row.status for row in await _outbox(db_session)} == {NotificationStatus.SENT.value}
+
+    assert await notifier.dispatch_pending(db_session) == {"sent": 0, "retrying": 0, "failed": 0}
+    assert len(requests) == 2
+
+
+async def test_failed_webhook_backs_off_until_attempts_exhausted(
+    db_session: AsyncSession, webhook_enabled, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "ALERT_NOTIFY_MAX_ATTEMPTS", 2)
+    notifier = NotificationService(http_transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    await AlertService(db_session, alert_crud).raise_alert(_alert(), notifier=notifier)
+
+    assert (await notifier.dispatch_pending(db_session))["retrying"] == 1
+    (row,) = await _outbox(db_session)
+    assert (row.status, row.attempts, row.last_error) == (NotificationStatus.PENDING.value, 1, "HTTP 503: ")
+
+    # 退避期内不会再次领取
+    assert await notifier.dispatch_pending(db_session) == {"sent": 0, "retrying": 0, "failed": 0}
+
+    await db_session.execute(
+        update(NotificationOutbox).values(next_attempt_at=datetime.now(UTC) - timedelta(seconds=1))
+    )
+    assert (await notifier.dispatch_pending(db_session))["failed"] == 1
+    (row,) = await _outbox(db_session)
+    assert (row.status, row.attempts) == (NotificationStatus.FAILED.value, 2)
+
+
+async def test_email_alerts_in_one_window_become_one_digest(db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "ALERT_EMAIL_ENABLED", True)
+    monkeypatch.setattr(settings, "ALERT_EMAIL_HOST", "smtp.example.com")
+    monkeypatch.setattr(settings, "ALERT_EMAIL_DIGEST_SECONDS", 0)
+    sent: list = []
+
+    class FakeSMTP:
+        def __init__(self, **kwargs) -> None:
+            pass
+
+        def __enter__(self) -> "FakeSMTP":
+            return self
+
+        def __exit__(self, *exc) -> None:
+            return None
+
+        def send_message(self, msg) -> None:
+            sent.append(msg)
+
+    monkeypatch.setattr(notification_module.smtplib, "SMTP", FakeSMTP)
+    notifier = NotificationService()
+    service = AlertService(db_session, alert_crud)
+    for _ in range(3):
+        await service.raise_alert(_alert(), notifier=notifier)
+
+    assert (await notifier.dispatch_pending(db_session))["sent"] == 3
+    assert [msg["Subject"] for msg in sent] == ["[NCM告警] 3 条新告警"]
@@ -0,0 +1,55 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_scan_target_planner.py
+@DateTime: 2026-02-08 16:00:00
+@Docs: 扫描目标规划测试.
+"""
+
+from app.schemas.discovery import ScanHost
+from app.services.scan_target_planner import plan_scan_batches, split_hosts_by_target
+from app.services.sweep_scan_service import iter_targets
+
+
+def test_plan_keeps_explicit_hosts_and_packs_batches():
+    targets = [f"10.0.0.{i}/32" for i in range(4)] + ["10.0.1.9/32", "10.2.0.0/24", "10.2.0.7/32", "bad"]
+    batches, invalid = plan_scan_batches(targets, max_targets=2)
+
+    assert invalid == ["bad"]
+    assert [b.expression for b in batches] == [
+        "10.0.0.0/32 10.0.0.1/32",
+        "10.0.0.2/32 10.0.0.3/32",
+        "10.0.1.9/32 10.2.0.0/24",
+    ]
+    assert sorted(t for b in batches for t in b.targets) == sorted(t for t in targets if t != "bad")
+    assert batches[2].targets == ["10.0.1.9/32", "10.2.0.0/24", "10.2.0.7/32"]
+
+
+def test_split_hosts_prefers_most_specific_target():
+    hosts = [ScanHost(ip_address="10.2.0.7"), ScanHost(ip_address="10.2.0.8"), ScanHost(ip_address="192.0.2.1")]
+    split = split_hosts_by_target(hosts, ["10.2.0.0/24", "10.2.0.7/32"])
+
+    assert [h.ip_address for h in split["10.2.0.7/32"]] == ["10.2.0.7"]
+    assert [h.ip_address for h in split["10.2.0.0/24"]] == ["10.2.0.8"]
+
+
+def test_planned_batches_sweep_every_explicit_host():
+    targets = [f"10.0.0.{i}" for i in range(8)]
+    batches, _ = plan_scan_batches(targets, max_targets=256)
+
+    assert sorted(ip for b in batches for ip in iter_targets(b.expression)) == sorted(targets)
+
+
+def test_plan_caps_addresses_per_batch_and_splits_per_network():
+    targets = ["10.0.0.0/30", "10.0.0.8/32", "10.0.1.0/24", "10.0.2.1/32"]
+    batches, _ = plan_scan_batches(targets, max_targets=256, max_addresses=8)
+
+    # 超过地址上限的单个网段独占一次调用
+    assert [b.expression for b in batches] == ["10.0.0.0/30 10.0.0.8/32", "10.0.1.0/24", "10.0.2.1/32"]
+    assert [b.num_addresses for b in batches] == [5, 256, 1]
+
+    split = plan_scan_batches(targets + ["10.0.0.1/32"], max_targets=256, max_addresses=8)[0][0].split()
+    assert [(b.expression, b.targets) for b in split] == [
+        ("10.0.0.0/30", ["10.0.0.0/30", "10.0.0.1/32"]),
+        ("10.0.0.8/32", ["10.0.0.8/32"]),
+    ]
@@ -0,0 +1,87 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_snmp_service.py
+@DateTime: 2026-02-08 10:00:00
+@Docs: SNMP 客户端（共享引擎 / GETBULK WALK）测试.
+"""
+
+import pytest
+
+from app.services import snmp_service as snmp_module
+from app.services.snmp_service import SnmpService, SnmpV2cCredential
+
+CRED = SnmpV2cCredential(community="public")
+
+
+class FakeEngine:
+    created = 0
+
+    def __init__(self) -> None:
+        FakeEngine.created += 1
+        self.closed = False
+
+    def close_dispatcher(self) -> None:
+        self.closed = True
+
+
+class FakeTarget:
+    created = 0
+
+    @classmethod
+    async def create(cls, address, timeout, retries):
+        cls.created += 1
+        return (address, timeout, retries)
+
+
+@pytest.fixture(autouse=True)
+def fake_pysnmp(monkeypatch):
+    FakeEngine.created = 0
+    FakeTarget.created = 0
+    calls: list[tuple] = []
+
+    async def _get_cmd(engine, community, target, context, *obj_types):
+        calls.append(("get", engine, target))
+        return None, 0, 0, [("1.3.6.1.2.1.1.5.0", "sw1")]
+
+    async def _bulk_walk_cmd(engine, community, target, context, non_repeaters, max_repetitions, *obj, **kwargs):
+        calls.append(("bulk", engine, max_repetitions))
+        for start in range(0, 10, max_repetitions):
+            yield None, 0, 0, [(f"1.3.6.1.2.1.2.2.1.6.{i}", i) for i in range(start, min(start + max_repetitions, 10))]
+
+    monkeypatch.setattr(snmp_module, "SnmpEngine", FakeEngine)
+    monkeypatch.setattr(snmp_module, "UdpTransportTarget", FakeTarget)
+    monkeypatch.setattr(snmp_module, "get_cmd", _get_cmd)
+    monkeypatch.setattr(snmp_module, "bulk_walk_cmd", _bulk_walk_cmd)
+    return calls
+
+
+async def test_shared_engine_and_targets_reused_within_context(fake_pysnmp):
+    async with SnmpService() as snmp:
+        engine = snmp._engine
+        for _ in range(3):
+            await snmp.get_many("10.0.0.1", CRED, ["1.3.6.1.2.1.1.5.0"])
+        await snmp.get_many("10.0.0.2", CRED, ["1.3.6.1.2.1.1.5.0"])
+
+    assert FakeEngine.created == 1 and engine.closed
+    assert FakeTarget.created == 2
+    assert {call[1] for call in fake_pysnmp} == {engine}
+    assert snmp._engine is None and not snmp._targets
+
+
+async def test_standalone_calls_use_temporary_engines():
+    snmp = SnmpService()
+    await snmp.get_many("10.0.0.1", CRED, ["1.3.6.1.2.1.1.5.0"])
+    await snmp.get_many("10.0.0.1", CRED, ["1.3.6.1.2.1.1.5.0"])
+    assert FakeEngine.created == 2 and FakeTarget.created == 2
+
+
+async def test_bulk_walk_honours_max_repetitions_and_max_rows(fake_pysnmp):
+    snmp = SnmpService(max_repetitions=4)
+    rows = await snmp.bulk_walk("10.0.0.1", CRED, "1.3.6.1.2.1.2.2.1.6")
+    assert [v for _, v in rows] == list(range(10))
+    assert fake_pysnmp[-1] == ("bulk", fake_pysnmp[-1][1], 4)
+
+    rows = await snmp.bulk_walk("10.0.0.1", CRED, "1.3.6.1.2.1.2.2.1.6", max_rows=3)
+    assert len(rows) == 3
+    assert fake_pysnmp[-1][2] == 3
@@ -0,0 +1,90 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_stats_service.py
+@DateTime: 2026-02-11 16:00:00
+@Docs: 每日统计汇总测试.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import AlertSeverity, AlertType, StatMetric
+from app.crud.crud_alert import alert_crud
+from app.crud.crud_stat import stat_daily_crud
+from app.models.log import LoginLog
+from app.models.stat_daily import StatDaily
+from app.models.user import User
+from app.schemas.alert import AlertCreate
+from app.services.alert_service import AlertService
+from app.services.stats_service import ALL_DIMENSION, StatsService, _utc_day, user_dimension
+
+
+async def _rows(db: AsyncSession, metric: StatMetric) -> dict[tuple[str, str], int]:
+    result = await db.execute(select(StatDaily).where(StatDaily.metric == metric.value))
+    return {(row.dimension, str(row.day)): row.value for row in result.scalars().all()}
+
+
+async def test_record_accumulates_into_one_row_per_dimension(db_session: AsyncSession, test_user: User):
+    service = StatsService(db_session, stat_daily_crud)
+    mine = user_dimension(test_user.id)
+    await service.record(StatMetric.LOGIN, [[mine], [mine], []])
+    await service.record(StatMetric.LOGIN, [[mine]])
+
+    today = str(datetime.now(UTC).date())
+    assert await _rows(db_session, StatMetric.LOGIN) == {(ALL_DIMENSION, today): 4, (mine, today): 3}
+    assert await service.get_trend(StatMetric.LOGIN, 7, dimension=mine) == [{"date": today, "count": 3}]
+
+
+async def test_compact_recomputes_from_source_tables(db_session: AsyncSession, test_user: User):
+    service = StatsService(db_session, stat_daily_crud)
+    yesterday = datetime.now(UTC) - timedelta(days=1)
+    db_session.add_all(
+        [LoginLog(user_id=test_user.id, username=test_user.username, status=True) for _ in range(2)]
+        + [LoginLog(user_id=test_user.id, username=test_user.username, status=True, created_at=yesterday)]
+    )
+    await db_session.flush()
+    # 增量遗漏/错误的汇总行会被重算结果覆盖
+    await service.record(StatMetric.LOGIN, [[] for _ in range(10)])
+
+    await service.compact(2)
+
+    mine = user_dimension(test_user.id)
+    today, day_before = str(datetime.now(UTC).date()), str(yesterday.date())
+    assert await _rows(db_session, StatMetric.LOGIN) == {
+        (ALL_DIMENSION, today): 2,
+        (mine, today): 2,
+        (ALL_DIMENSION, day_before): 1,
+        (mine, day_before): 1,
+    }
+
+
+def test_utc_day_converts_to_utc_on_postgresql():
+    class _Bind:
+        dialect = postgresql.dialect()
+
+    class _Session:
+        def get_bind(self) -> _Bind:
+            return _Bind()
+
+    # PostgreSQL 的 date(timestamptz) 按会话时区取日期，重算必须与 record() 一样按 UTC 分桶
+    sql = str(_utc_day(_Session(), LoginLog.created_at).compile(dialect=postgresql.dialect()))  # type: ignore[arg-type]
+    assert sql.startswith("date(timezone(") and sql.endswith("sys_login_log.created_at))")
+
+
+async def test_alert_trend_reads_rollup(db_session: AsyncSession):
+    alert_service = AlertService(db_session, alert_crud)
+    await alert_service.create_alert(AlertCreate(alert_type=AlertType.SHADOW_ASSET, title="影子资产"))
+    await alert_service.create_alerts_bulk(
+        [AlertCreate(alert_type=AlertType.CONFIG_CHANGE, severity=AlertSeverity.HIGH, title="配置变更")]
+    )
+
+    today = str(datetime.now(UTC).date())
+    assert await alert_service.get_trend(days=7) == [{"date": today, "count": 2}]
+    rows = await _rows(db_session, StatMetric.ALERT)
+    assert rows[("type:config_change", today)] == 1
+    assert rows[("severity:high", today)] == 1
+    assert rows[("severity:medium", today)] == 1
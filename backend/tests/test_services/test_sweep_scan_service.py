@@ -0,0 +1,62 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_sweep_scan_service.py
+@DateTime: 2026-02-08 14:00:00
+@Docs: 原生异步扫描服务测试.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.sweep_scan_service import SweepScanService, iter_targets, parse_ports
+
+
+def test_parse_ports_and_targets():
+    assert parse_ports("22, 80,8000-8002,22") == [22, 80, 8000, 8001, 8002]
+    with pytest.raises(ValueError):
+        parse_ports("0")
+    assert list(iter_targets("10.0.0.5/32")) == ["10.0.0.5"]
+    assert list(iter_targets("10.0.0.0/30")) == ["10.0.0.1", "10.0.0.2"]
+    assert list(iter_targets("10.0.0.0/31 10.0.0.9/32")) == ["10.0.0.0", "10.0.0.1", "10.0.0.9"]
+
+
+async def test_probe_host_reports_open_ports_and_ssh_banner():
+    async def _handle(reader, writer):
+        writer.write(b"SSH-2.0-Comware-7.1.064\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        service = SweepScanService(rate=0, connect_timeout=1, grab_banner=True)
+        host = await service.probe_host("127.0.0.1", [port])
+        assert host is not None and port in (host.open_ports or {})
+        assert host.ssh_banner is None
+
+        service.ssh_ports = frozenset({port})
+        host = await service.probe_host("127.0.0.1", [port])
+        assert host is not None and host.ssh_banner == "SSH-2.0-Comware-7.1.064"
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def test_iter_sweep_streams_hosts_and_counts_refused_as_alive():
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        service = SweepScanService(rate=0, concurrency=2, connect_timeout=1)
+        hosts = [h async for h in service.iter_sweep("127.0.0.1/32", f"{port},1")]
+        assert len(hosts) == 1
+        assert hosts[0].open_ports and list(hosts[0].open_ports) == [port]
+
+        result = await service.sweep_scan("127.0.0.1", "1")
+        # 端口关闭但连接被拒绝，主机视为存活
+        assert result.scan_type == "sweep" and result.hosts_found == 1
+        assert result.hosts[0].open_ports is None
+    finally:
+        server.close()
+        await server.wait_closed()
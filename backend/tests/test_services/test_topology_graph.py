@@ -0,0 +1,192 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_topology_graph.py
+@DateTime: 2026-02-10 14:00:00
+@Docs: 拓扑邻接片段缓存与子图测试.
+"""
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+from fastapi import Response
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.topology import get_topology
+from app.core.enums import DeviceGroup, DeviceStatus, DeviceVendor
+from app.crud.crud_credential import credential as credential_crud
+from app.crud.crud_device import device as device_crud
+from app.crud.crud_topology import topology_crud
+from app.models.device import Device
+from app.models.topology import TopologyLink
+from app.schemas.topology import TopologyEdge, TopologyNode, TopologyResponse
+from app.services.topology_service import TopologyService
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.ops: list[tuple[str, str]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self.ops.append((key, value))
+
+    async def execute(self) -> None:
+        self.client.store.update(self.ops)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.store.get(key) for key in keys]
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match: str, count: int):
+        for key in list(self.store):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def service() -> TopologyService:
+    return TopologyService(topology_crud, device_crud, credential_crud, redis_client=FakeRedis())  # type: ignore[arg-type]
+
+
+async def _devices(db: AsyncSession, count: int, dept_id=None) -> list[Device]:
+    devices = [
+        Device(
+            name=f"sw-{i}",
+            ip_address=f"10.0.0.{i + 1}",
+            vendor=DeviceVendor.H3C,
+            device_group=DeviceGroup.ACCESS,
+            status=DeviceStatus.ACTIVE,
+            ssh_port=22,
+            dept_id=dept_id if i % 2 == 0 else None,
+        )
+        for i in range(count)
+    ]
+    db.add_all(devices)
+    await db.commit()
+    return devices
+
+
+def _link(source: Device, interface: str, target: Device | None = None, hostname: str | None = None) -> TopologyLink:
+    return TopologyLink(
+        source_device_id=source.id,
+        source_interface=interface,
+        target_device_id=target.id if target else None,
+        target_hostname=hostname or (target.name if target else None),
+        link_type="lldp",
+        collected_at=datetime.now(),
+    )
+
+
+async def test_build_topology_has_no_link_cap_and_reuses_fragments(db_session: AsyncSession, service):
+    core, access = await _devices(db_session, 2)
+    db_session.add_all([_link(core, f"GE1/0/{i}", hostname=f"ap-{i}") for i in range(5100)])
+    db_session.add(_link(access, "GE1/0/48", core))
+    await db_session.commit()
+
+    topology = await service.build_topology(db_session)
+    stats = topology["stats"]
+    assert (stats["total_edges"], stats["cmdb_devices"], stats["unknown_devices"]) == (5101, 2, 5100)
+
+    # 片段命中时不再读取链路：数据库变化只在刷新对应设备片段后可见
+    await db_session.execute(
+        update(TopologyLink).where(TopologyLink.source_device_id == access.id).values(target_interface="GE1/0/1")
+    )
+    cached = await service.build_topology(db_session)
+    assert next(e for e in cached["edges"] if e["from"] == str(access.id))["label"] == "GE1/0/48"
+
+    await service._refresh_fragments(db_session, [access.id])
+    refreshed = await service.build_topology(db_session)
+    assert next(e for e in refreshed["edges"] if e["from"] == str(access.id))["label"] == "GE1/0/48 → GE1/0/1"
+
+    await service._invalidate_cache()
+    assert service._redis.store == {}  # type: ignore[union-attr]
+
+
+async def test_subgraph_by_hops_dept_and_page(db_session: AsyncSession, service):
+    dept_id = uuid4()
+    a, b, c, d = await _devices(db_session, 4, dept_id=dept_id)
+    db_session.add_all([_link(a, "GE1", b), _link(b, "GE2", c), _link(c, "GE3", d), _link(a, "GE9", hostname="ap-1")])
+    await db_session.commit()
+
+    one_hop = await service.build_subgraph(db_session, device_id=b.id, hops=1)
+    assert {(e["from"], e["to"]) for e in one_hop["edges"]} == {(str(a.id), str(b.id)), (str(b.id), str(c.id))}
+    assert {n["label"] for n in one_hop["nodes"]} == {"sw-0", "sw-1", "sw-2"}
+
+    two_hops = await service.build_subgraph(db_session, device_id=b.id, hops=2)
+    assert two_hops["stats"]["total_edges"] == 4
+
+    # a、c 属于部门，d 与 b 不属于：c→d 与 a→* 均保留
+    dept = await service.build_subgraph(db_session, dept_id=dept_id, page=1, page_size=2)
+    assert (dept["stats"]["total_edges"], len(dept["edges"]), dept["has_more"]) == (4, 2, True)
+    assert {n["id"] for n in dept["nodes"]} == {e["from"] for e in dept["edges"]} | {e["to"] for e in dept["edges"]}
+
+    last = await service.build_subgraph(db_session, dept_id=dept_id, page=2, page_size=2)
+    assert (len(last["edges"]), last["has_more"]) == (2, False)
+
+
+async def test_topology_endpoint_serializes_fragments_without_edge_models(
+    db_session: AsyncSession, service, monkeypatch
+):
+    core, access = await _devices(db_session, 2)
+    await db_session.execute(
+        insert(TopologyLink),
+        [
+            {
+                "source_device_id": core.id,
+                "source_interface": f"GE{i // 48}/0/{i % 48}",
+                "target_device_id": access.id if i % 2 else None,
+                "target_hostname": f"ap-{i}",
+                "link_type": "lldp",
+                "collected_at": datetime.now(),
+            }
+            for i in range(20000)
+        ],
+    )
+    await db_session.commit()
+
+    # 拓扑节点/边不应逐条构建 Pydantic 模型（含整体 model_validate 时的嵌套校验）
+    def _fail(*args, **kwargs):
+        raise AssertionError("per-element model validation")
+
+    for model in (TopologyResponse, TopologyEdge, TopologyNode):
+        monkeypatch.setattr(model, "__pydantic_validator__", SimpleNamespace(validate_python=_fail))
+
+    started = time.perf_counter()
+    response = await get_topology(db_session, service)
+    elapsed = time.perf_counter() - started
+
+    # 返回 Response 时 FastAPI 不再按 response_model 校验
+    assert isinstance(response, Response)
+    body = orjson.loads(response.body)
+    stats = body["data"]["stats"]
+    assert (body["code"], stats["total_edges"], stats["total_nodes"]) == (200, 20000, 10002)
+    assert elapsed < 5
+
+    # 字典字段与响应模型一致（含模型默认值）
+    monkeypatch.undo()
+    edge, node = body["data"]["edges"][0], body["data"]["nodes"][-1]
+    assert TopologyEdge.model_validate(edge).model_dump(by_alias=True) == edge
+    assert TopologyNode.model_validate(node).model_dump() == node
@@ -0,0 +1,75 @@
+"""
+@Author: li
+@Email: lijianqiao2906@live.com
+@FileName: test_topology_resolver.py
+@DateTime: 2026-02-10 09:00:00
+@Docs: LLDP 邻居批量匹配测试.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import DeviceGroup, DeviceStatus, DeviceVendor
+from app.crud.crud_device import device as device_crud
+from app.models.device import Device
+from app.services.topology_resolver import NeighborResolver
+from app.services.topology_service import TopologyService
+
+
+async def _device(db: AsyncSession, name: str, ip: str, *, deleted: bool = False) -> Device:
+    device = Device(
+        name=name,
+        ip_address=ip,
+        vendor=DeviceVendor.H3C,
+        device_group=DeviceGroup.ACCESS,
+        status=DeviceStatus.ACTIVE,
+        ssh_port=22,
+        is_deleted=deleted,
+    )
+    db.add(device)
+    await db.commit()
+    return device
+
+
+async def test_resolver_keeps_match_priority(db_session: AsyncSession):
+    core = await _device(db_session, "Core-SW01", "10.0.0.1")
+    access = await _device(db_session, "access-sw01-floor3", "10.0.0.2")
+    edge = await _device(db_session, "edge", "10.0.0.3")
+    await _device(db_session, "retired", "10.0.0.9", deleted=True)
+
+    resolver = await NeighborResolver.load(db_session, device_crud)
+
+    # IP 优先于名称
+    assert resolver.resolve(hostname="edge", ip="10.0.0.1") == core.id
+    assert resolver.resolve(hostname="Core-SW01", ip="192.0.2.1") == core.id
+    # 不区分大小写的前缀匹配
+    assert resolver.resolve(hostname="ACCESS-SW01") == access.id
+    # 去掉域名后缀精确匹配
+    assert resolver.resolve(hostname="edge.example.com") == edge.id
+    # 已删除设备与无法匹配的邻居
+    assert resolver.resolve(hostname="retired", ip="10.0.0.9") is None
+    assert resolver.resolve(hostname="unknown-sw") is None
+    assert resolver.resolve() is None
+
+
+async def test_build_device_links_dedupes_interfaces(db_session: AsyncSession):
+    source = await _device(db_session, "dist-01", "10.0.1.1")
+    target = await _device(db_session, "acc-01", "10.0.1.2")
+    resolver = await NeighborResolver.load(db_session, device_crud)
+    service = TopologyService.__new__(TopologyService)
+
+    links = service._build_device_links(
+        source,
+        [
+            {"local_interface": "GE1/0/1", "neighbor_hostname": "acc-01.lab", "neighbor_interface": "GE1/0/48"},
+            {"local_interface": "GE1/0/1", "neighbor_hostname": "phone"},
+            {"local_interface": "GE1/0/2", "neighbor_hostname": "unmanaged-ap"},
+            {"neighbor_hostname": "no-interface"},
+        ],
+        resolver,
+        source.created_at,
+    )
+
+    assert [(link.source_interface, link.target_device_id) for link in links] == [
+        ("GE1/0/1", target.id),
+        ("GE1/0/2", None),
+    ]
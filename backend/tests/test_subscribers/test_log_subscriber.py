@@ -6,32 +6,43 @@
 @Docs: 日志订阅者单元测试.
 """
 
+import asyncio
+
 import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 import app.subscribers.log_subscriber as subscriber
 from app.core.event_bus import Event, OperationLogEvent
+from app.models.log import OperationLog
+from app.models.user import User
 
 
 class DummyLogger:
     def __init__(self) -> None:
         self.debug_calls: list[str] = []
+        self.warning_calls: list[str] = []
         self.error_calls: list[str] = []
 
     def debug(self, msg: str) -> None:
         self.debug_calls.append(msg)
 
+    def warning(self, msg: str) -> None:
+        self.warning_calls.append(msg)
+
     def error(self, msg: str) -> None:
         self.error_calls.append(msg)
 
 
 class FakeSession:
     def __init__(self, *, fail_commit: bool = False) -> None:
-        self.added: list[object] = []
+        self.inserted: list[list[dict]] = []
         self.committed = 0
         self.fail_commit = fail_commit
 
-    def add(self, obj: object) -> None:
-        self.added.append(obj)
+    async def execute(self, stmt, params=None) -> None:
+        self.inserted.append(list(params))
 
     async def commit(self) -> None:
         self.committed += 1
@@ -53,36 +64,21 @@ class FakeSessionFactory:
         return None
 
 
-class FakeOperationLog:
-    def __init__(self, **kwargs):
-        self.kwargs = kwargs
-
-
-@pytest.mark.asyncio
-async def test_handle_operation_log_event_ignores_other_event(monkeypatch: pytest.MonkeyPatch) -> None:
-    dummy_logger = DummyLogger()
-    monkeypatch.setattr(subscriber, "logger", dummy_logger)
-
-    await subscriber.handle_operation_log_event(Event())
-    assert dummy_logger.debug_calls == []
-    assert dummy_logger.error_calls == []
-
+class FakeStatCrud:
+    def __init__(self) -> None:
+        self.counts: list[dict] = []
 
-@pytest.mark.asyncio
-async def test_handle_operation_log_event_saves_log_and_parses_module(monkeypatch: pytest.MonkeyPatch) -> None:
-    dummy_logger = DummyLogger()
-    fake_session = FakeSession()
+    async def increment(self, db, *, counts) -> None:
+        self.counts.append(dict(counts))
 
-    monkeypatch.setattr(subscriber, "logger", dummy_logger)
-    monkeypatch.setattr(subscriber, "AsyncSessionLocal", FakeSessionFactory(fake_session))
-    monkeypatch.setattr(subscriber, "OperationLog", FakeOperationLog)
 
-    event = OperationLogEvent(
-        user_id="00000000-0000-0000-0000-000000000001",
+def _event(path: str = "/api/v1/users/", *, user_id: str = "00000000-0000-0000-0000-000000000001") -> OperationLogEvent:
+    return OperationLogEvent(
+        user_id=user_id,
         username="u",
         ip="127.0.0.1",
-        method="GET",
-        path="/api/v1/users/",
+        method="POST",
+        path=path,
         status_code=200,
         process_time=0.1,
         params={"query": {"a": "1"}},
@@ -90,54 +86,124 @@ async def test_handle_operation_log_event_saves_log_and_parses_module(monkeypatc
         user_agent="UA",
     )
 
-    await subscriber.handle_operation_log_event(event)
 
-    assert fake_session.committed == 1
-    assert len(fake_session.added) == 1
+def _metric(result: str) -> float:
+    return REGISTRY.get_sample_value("operation_log_events_total", {"result": result}) or 0.0
+
+
+@pytest.fixture
+def fake_db(monkeypatch: pytest.MonkeyPatch) -> tuple[FakeSession, FakeStatCrud, DummyLogger]:
+    session, stats, dummy_logger = FakeSession(), FakeStatCrud(), DummyLogger()
+    monkeypatch.setattr(subscriber, "logger", dummy_logger)
+    monkeypatch.setattr(subscriber, "AsyncSessionLocal", FakeSessionFactory(session))
+    monkeypatch.setattr(subscriber, "stat_daily_crud", stats)
+    return session, stats, dummy_logger
 
-    saved = fake_session.added[0]
-    assert isinstance(saved, FakeOperationLog)
-    assert saved.kwargs["module"] == "users"
-    assert saved.kwargs["summary"] == "GET /api/v1/users/"
-    assert saved.kwargs["params"] == {"query": {"a": "1"}}
-    assert saved.kwargs["response_result"] == {"code": 200, "msg": "ok"}
-    assert saved.kwargs["user_agent"] == "UA"
+
+def test_build_operation_log_row_parses_module_and_user() -> None:
+    row = subscriber.build_operation_log_row(_event(), created_at=None)  # type: ignore[arg-type]
+    assert row["module"] == "users"
+    assert row["summary"] == "POST /api/v1/users/"
+    assert row["params"] == {"query": {"a": "1"}}
+    assert row["response_result"] == {"code": 200, "msg": "ok"}
+    assert row["user_agent"] == "UA"
+    assert str(row["user_id"]) == "00000000-0000-0000-0000-000000000001"
+
+    row = subscriber.build_operation_log_row(_event("/health", user_id="bad"), created_at=None)  # type: ignore[arg-type]
+    assert (row["module"], row["user_id"]) == ("unknown", None)
 
 
 @pytest.mark.asyncio
-async def test_handle_operation_log_event_commit_error_is_logged(monkeypatch: pytest.MonkeyPatch) -> None:
-    dummy_logger = DummyLogger()
-    fake_session = FakeSession(fail_commit=True)
+async def test_writer_ignores_other_event(fake_db) -> None:
+    writer = subscriber.OperationLogWriter()
+    writer.submit(Event())
+    await writer.flush(1.0)
+    assert fake_db[0].inserted == []
+
+
+@pytest.mark.asyncio
+async def test_writer_inserts_in_batches_and_flushes_rest(fake_db) -> None:
+    session, stats, _ = fake_db
+    writer = subscriber.OperationLogWriter(batch_size=3, flush_interval_ms=60_000)
+    for i in range(7):
+        writer.submit(_event(user_id="bad" if i == 6 else "00000000-0000-0000-0000-000000000001"))
+
+    await writer.flush(1.0)
+
+    assert [len(rows) for rows in session.inserted] == [3, 3, 1]
+    assert session.committed == 3
+    assert all(row["created_at"] is not None for rows in session.inserted for row in rows)
+    # 每批的当天操作汇总合并为一次累加
+    assert [counts[next(k for k in counts if k[1] == "all")] for counts in stats.counts] == [3, 3, 1]
+    assert len(stats.counts[-1]) == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_partial_batch_after_interval(fake_db) -> None:
+    session, _, _ = fake_db
+    writer = subscriber.OperationLogWriter(batch_size=100, flush_interval_ms=10)
+    writer.submit(_event())
+    writer.submit(_event())
+
+    await asyncio.sleep(0.2)
+    assert [len(rows) for rows in session.inserted] == [2]
+    await writer.flush(1.0)
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_when_queue_full(fake_db) -> None:
+    session, _, dummy_logger = fake_db
+    dropped_before = _metric("dropped")
+    writer = subscriber.OperationLogWriter(max_size=2, batch_size=10)
+    for _ in range(5):
+        writer.submit(_event())
+
+    await writer.flush(1.0)
 
+    assert _metric("dropped") - dropped_before == 3
+    assert [len(rows) for rows in session.inserted] == [2]
+    assert len(dummy_logger.warning_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_commit_error_is_logged(monkeypatch: pytest.MonkeyPatch) -> None:
+    dummy_logger = DummyLogger()
     monkeypatch.setattr(subscriber, "logger", dummy_logger)
-    monkeypatch.setattr(subscriber, "AsyncSessionLocal", FakeSessionFactory(fake_session))
-    monkeypatch.setattr(subscriber, "OperationLog", FakeOperationLog)
+    monkeypatch.setattr(subscriber, "AsyncSessionLocal", FakeSessionFactory(FakeSession(fail_commit=True)))
+    monkeypatch.setattr(subscriber, "stat_daily_crud", FakeStatCrud())
+    failed_before = _metric("failed")
 
-    event = OperationLogEvent(
-        user_id="00000000-0000-0000-0000-000000000001",
-        username="u",
-        ip=None,
-        method="POST",
-        path="/health",
-        status_code=500,
-        process_time=1.2,
-        params=None,
-        response_result=None,
-        user_agent=None,
-    )
+    writer = subscriber.OperationLogWriter()
+    writer.submit(_event())
+    await writer.flush(1.0)
 
-    await subscriber.handle_operation_log_event(event)
     assert len(dummy_logger.error_calls) == 1
+    assert _metric("failed") - failed_before == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_persists_batch(
+    monkeypatch: pytest.MonkeyPatch, async_engine, db_session: AsyncSession, test_user: User
+) -> None:
+    monkeypatch.setattr(subscriber, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, class_=AsyncSession))
+    writer = subscriber.OperationLogWriter(batch_size=50)
+    for _ in range(20):
+        writer.submit(_event(user_id=str(test_user.id)))
+    await writer.flush(5.0)
+
+    count = await db_session.scalar(select(func.count()).select_from(OperationLog))
+    assert count == 20
 
 
 def test_register_log_subscribers_subscribes(monkeypatch: pytest.MonkeyPatch) -> None:
     calls: list[tuple[type, object]] = []
 
-    def fake_subscribe(event_type: type, handler: object) -> None:
-        calls.append((event_type, handler))
+    def fake_subscribe_sink(event_type: type, sink: object) -> None:
+        calls.append((event_type, sink))
 
-    monkeypatch.setattr(subscriber.event_bus, "subscribe", fake_subscribe)
+    monkeypatch.setattr(subscriber.event_bus, "subscribe_sink", fake_subscribe_sink)
 
     subscriber.register_log_subscribers()
     assert calls
     assert calls[0][0].__name__ == "OperationLogEvent"
+    assert calls[0][1] is subscriber.operation_log_writer
@@ -66,6 +66,9 @@ export interface DeviceCollectResult {
   mac_count: number
   error_message: string | null
   duration_ms: number | null
+  added_count?: number
+  removed_count?: number
+  moved_count?: number
 }
 
 /** 批量采集结果 */
@@ -98,6 +101,34 @@ export interface LocateResponse {
   located_at: string | null
 }
 
+/** MAC 历史事件 */
+export interface MACHistoryEvent {
+  event: 'seen' | 'gone'
+  source: 'arp' | 'mac'
+  device_id: string
+  device_name: string | null
+  interface: string | null
+  vlan_id: string | null
+  ip_address: string | null
+  occurred_at: string
+}
+
+/** MAC 历史轨迹响应 */
+export interface MACHistoryResponse {
+  query: string
+  at: string
+  locations: {
+    device_id: string
+    device_name: string | null
+    device_ip: string | null
+    interface: string | null
+    vlan_id: string | null
+    ip_address: string | null
+    cached_at: string | null
+  }[]
+  events: MACHistoryEvent[]
+}
+
 /** 批量采集请求 */
 export interface BatchCollectRequest {
   device_ids: string[]
@@ -182,3 +213,12 @@ export function locateMAC(macAddress: string) {
     method: 'get',
   })
 }
+
+/** MAC 历史轨迹（at 为空时查询当前位置） */
+export function getMACHistory(macAddress: string, at?: string) {
+  return request<ResponseBase<MACHistoryResponse>>({
+    url: `/collect/history/mac/${encodeURIComponent(macAddress)}`,
+    method: 'get',
+    params: at ? { at } : undefined,
+  })
+}
@@ -59,7 +59,7 @@ export interface DiscoverySearchParams {
 /** 扫描请求 */
 export interface ScanRequest {
   subnets: string[]
-  scan_type?: 'auto' | 'nmap' | 'masscan'
+  scan_type?: 'auto' | 'nmap' | 'masscan' | 'sweep'
   ports?: string
   async_mode?: boolean
   snmp_cred_id: string
@@ -65,6 +65,22 @@ export interface TopologyResponse {
   stats: TopologyStats
 }
 
+/** 拓扑子图响应（按边分页，stats 为整个子图） */
+export interface TopologySubgraphResponse extends TopologyResponse {
+  page: number
+  page_size: number
+  has_more: boolean
+}
+
+/** 拓扑子图查询参数 */
+export interface TopologySubgraphParams {
+  dept_id?: string
+  device_id?: string
+  hops?: number
+  page?: number
+  page_size?: number
+}
+
 /** 拓扑链路响应 */
 export interface TopologyLinkResponse {
   id: string
@@ -154,6 +170,15 @@ export function getTopology() {
   })
 }
 
+/** 获取拓扑子图（按部门或设备 N 跳范围） */
+export function getTopologySubgraph(params: TopologySubgraphParams) {
+  return request<ResponseBase<TopologySubgraphResponse>>({
+    url: '/topology/subgraph',
+    method: 'get',
+    params,
+  })
+}
+
 /** 获取链路列表 */
 export function getTopologyLinks(params?: { page?: number; page_size?: number }) {
   return request<ResponseBase<TopologyLinksResponse>>({